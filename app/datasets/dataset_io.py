@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Final
+from typing import Iterator
+
+import polars as pl
+
+CSV_FORMAT: Final = "csv"
+PARQUET_FORMAT: Final = "parquet"
+IPC_FORMAT: Final = "ipc"
+
+# File extension to format. Arrow IPC files are also known as Feather v2.
+FORMAT_BY_EXTENSION: Final = {".csv": CSV_FORMAT, ".parquet": PARQUET_FORMAT, ".arrow": IPC_FORMAT, ".ipc": IPC_FORMAT, ".feather": IPC_FORMAT}
+EXTENSION_BY_FORMAT: Final = {CSV_FORMAT: ".csv", PARQUET_FORMAT: ".parquet", IPC_FORMAT: ".arrow"}
+
+DATETIME_COLUMNS: Final = ("purchase_date",)
+
+
+def dataset_format(path: str) -> str:
+    """Resolve the format of a dataset file from its extension.
+
+    Args:
+        path (str): Dataset file.
+
+    Raises:
+        ValueError: If the extension is not one of the supported formats.
+
+    Returns:
+        str: One of `csv`, `parquet` or `ipc`.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMAT_BY_EXTENSION:
+        raise ValueError(f"Unsupported dataset format '{extension}' of {path}. Supported extensions: {sorted(FORMAT_BY_EXTENSION)}.")
+    return FORMAT_BY_EXTENSION[extension]
+
+
+def scan_dataset(path: str, columns: list | None = None, predicate: pl.Expr | None = None) -> pl.LazyFrame:
+    """Lazily scan a CSV, Parquet or Arrow IPC dataset.
+
+    Column selection and the predicate are part of the lazy plan, so Parquet and IPC readers only decode the selected columns
+    and Parquet row groups whose statistics can not match the predicate are skipped.
+
+    Args:
+        path (str): Dataset file.
+        columns (list, optional): Columns to read. Defaults to all columns.
+        predicate (pl.Expr, optional): Row filter. Defaults to no filter.
+
+    Returns:
+        pl.LazyFrame: Lazy dataset.
+    """
+    file_format = dataset_format(path)
+    if file_format == CSV_FORMAT:
+        frame = pl.scan_csv(path)
+    elif file_format == PARQUET_FORMAT:
+        frame = pl.scan_parquet(path)
+    else:
+        frame = pl.scan_ipc(path, memory_map=True)
+
+    frame = frame if columns is None else frame.select(columns)
+    return frame if predicate is None else frame.filter(predicate)
+
+
+def read_dataset(path: str, columns: list | None = None, predicate: pl.Expr | None = None) -> pl.DataFrame:
+    """Eagerly read a CSV, Parquet or Arrow IPC dataset, see `scan_dataset`."""
+    return scan_dataset(path, columns=columns, predicate=predicate).collect()
+
+
+def iter_dataset_batches(path: str, batch_rows: int, start: int = 0, stop: int | None = None) -> Iterator[pl.DataFrame]:
+    """Read a dataset in row batches in file order without loading it at once.
+
+    Args:
+        path (str): Dataset file.
+        batch_rows (int): Approximate number of rows per batch.
+        start (int, optional): First row to read. Defaults to 0.
+        stop (int, optional): Row to stop before. Defaults to the end of the dataset.
+
+    Yields:
+        pl.DataFrame: Consecutive batches of the dataset.
+    """
+    if dataset_format(path) == CSV_FORMAT:
+        remaining_rows = float("inf") if stop is None else stop - start
+        reader = pl.read_csv_batched(path, batch_size=batch_rows, skip_rows_after_header=start)
+        while remaining_rows > 0 and (batches := reader.next_batches(1)):
+            batch = batches[0] if batches[0].height <= remaining_rows else batches[0].head(int(remaining_rows))
+            remaining_rows -= batch.height
+            yield batch
+        return
+
+    frame = scan_dataset(path)
+    total_rows = frame.select(pl.len()).collect().item()
+    stop = total_rows if stop is None else min(stop, total_rows)
+    for offset in range(start, stop, batch_rows):
+        yield frame.slice(offset, min(batch_rows, stop - offset)).collect()
+
+
+def write_dataset(dataframe: pl.DataFrame, path: str):
+    """Write a dataset in the format given by the extension of `path`.
+
+    Args:
+        dataframe (pl.DataFrame): Dataset to write.
+        path (str): Destination file.
+    """
+    file_format = dataset_format(path)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if file_format == CSV_FORMAT:
+        dataframe.write_csv(path)
+    elif file_format == PARQUET_FORMAT:
+        dataframe.write_parquet(path)
+    else:
+        dataframe.write_ipc(path)
+
+
+def parse_datetime_columns(frame: pl.DataFrame | pl.LazyFrame, columns=DATETIME_COLUMNS, datetime_format: str | None = None):
+    """Parse timestamp columns stored as text. Columns that are already temporal, as in Parquet or IPC datasets, are left as they are.
+
+    Args:
+        frame (pl.DataFrame | pl.LazyFrame): Dataset.
+        columns (Iterable[str], optional): Timestamp columns. Missing columns are ignored. Defaults to `purchase_date`.
+        datetime_format (str, optional): strptime format, inferred per column when omitted. Defaults to None.
+
+    Returns:
+        pl.DataFrame | pl.LazyFrame: Frame of the same kind with the text columns parsed.
+    """
+    schema = frame.collect_schema() if isinstance(frame, pl.LazyFrame) else frame.schema
+    text_columns = [column for column in columns if schema.get(column) == pl.String]
+    if not text_columns:
+        return frame
+    return frame.with_columns([pl.col(column).str.to_datetime(format=datetime_format, time_unit="us") for column in text_columns])
+
+
+def convert_dataset(source_path: str, target_format: str, output_dir: str | None = None) -> str:
+    """Convert a dataset file to another format, parsing its timestamp columns once so readers never parse them again.
+
+    Args:
+        source_path (str): Dataset to convert.
+        target_format (str): One of `csv`, `parquet` or `ipc`.
+        output_dir (str, optional): Directory of the converted file. Defaults to the directory of the source.
+
+    Returns:
+        str: Path of the converted file.
+    """
+    output_dir = os.path.dirname(source_path) if output_dir is None else output_dir
+    target_name = os.path.splitext(os.path.basename(source_path))[0] + EXTENSION_BY_FORMAT[target_format]
+    target_path = os.path.join(output_dir, target_name)
+
+    write_dataset(parse_datetime_columns(read_dataset(source_path)), target_path)
+    return target_path
+
+
+# python -m app.datasets.dataset_io data --to parquet
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert datasets between CSV, Parquet and Arrow IPC.")
+    parser.add_argument("paths", nargs="+", help="Dataset files or directories. Every supported file of a directory is converted.")
+    parser.add_argument("--to", dest="target_format", choices=sorted(EXTENSION_BY_FORMAT), default=PARQUET_FORMAT, help="Target format.")
+    parser.add_argument("--output-dir", default=None, help="Directory of the converted files. Defaults to next to each source.")
+    args = parser.parse_args()
+
+    source_paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            source_paths.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path)) if os.path.splitext(name)[1].lower() in FORMAT_BY_EXTENSION
+            )
+        else:
+            source_paths.append(path)
+
+    for source_path in source_paths:
+        if dataset_format(source_path) == args.target_format:
+            continue
+        target_path = convert_dataset(source_path, args.target_format, output_dir=args.output_dir)
+        print(f"{source_path} ({os.path.getsize(source_path) / 1024:.1f} KB) -> {target_path} ({os.path.getsize(target_path) / 1024:.1f} KB)")
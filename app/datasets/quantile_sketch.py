@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import math
+from typing import Final
+from typing import Iterable
+
+import numpy as np
+import polars as pl
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty, "Optimal Quantile Approximation in Streams") backed by NumPy arrays.
+
+    Values are kept in levels of compactors, an item of level `h` standing for `2**h` values. A level over its capacity is
+    sorted and every other item, starting at a random offset, moves up a level, so ranks stay unbiased while the sketch keeps
+    about `3 * k` items whatever the number of values. Sketches of disjoint partitions merge into the sketch of all of them, and
+    quantiles are exact until more than `k` values were added.
+
+    Args:
+        error (float, optional): Normalized rank error to size the sketch for, see `error_bound`. Defaults to 0.01.
+        seed (int, optional): Seed of the compaction offsets. Defaults to fresh entropy.
+    """
+
+    DEFAULT_ERROR: Final = 0.01
+    CAPACITY_DECAY: Final = 2 / 3
+    MIN_CAPACITY: Final = 2
+    MIN_K: Final = 8
+    # Empirical single quantile rank error of a KLL sketch at 99% confidence, error = 2.296 / k ** 0.9723 (Apache DataSketches).
+    ERROR_FACTOR: Final = 2.296
+    ERROR_EXPONENT: Final = 0.9723
+
+    def __init__(self, error: float = DEFAULT_ERROR, seed: int | None = None):
+        if not 0 < error < 1:
+            raise ValueError(f"The rank error of a quantile sketch must be between 0 and 1, got {error}.")
+
+        self.k = max(KLLSketch.MIN_K, math.ceil((KLLSketch.ERROR_FACTOR / error) ** (1 / KLLSketch.ERROR_EXPONENT)))
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    @property
+    def error_bound(self) -> float:
+        """Normalized rank error of a quantile, the returned value is the `q ± error_bound` quantile with 99% confidence."""
+        return KLLSketch.ERROR_FACTOR / self.k**KLLSketch.ERROR_EXPONENT
+
+    def __capacity(self, level: int) -> int:
+        return max(KLLSketch.MIN_CAPACITY, math.ceil(self.k * KLLSketch.CAPACITY_DECAY ** (len(self.levels) - level - 1)))
+
+    def __compress(self):
+        level = 0
+        while level < len(self.levels):
+            if self.levels[level].size > self.__capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(self.levels[level])
+                # An odd item out stays at its level, the others pair up and one of every pair moves up.
+                odd = items.size % 2
+                pairs = slice(odd + self.rng.integers(2), None, 2)
+                self.levels[level], self.levels[level + 1] = items[:odd], np.concatenate([self.levels[level + 1], items[pairs]])
+            level += 1
+
+    def update(self, values) -> KLLSketch:
+        """
+        Adds values, missing ones are skipped.
+
+        Args:
+            values (array-like): Values to add.
+
+        Returns:
+            KLLSketch: self, updated.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        self.count += values.size
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.__compress()
+        return self
+
+    def merge(self, other: KLLSketch) -> KLLSketch:
+        """
+        Folds in the sketch of a disjoint set of values.
+
+        Args:
+            other (KLLSketch): Sketch of other values.
+
+        Raises:
+            ValueError: If the sketches have different sizes.
+
+        Returns:
+            KLLSketch: self, updated.
+        """
+        if other.k != self.k:
+            raise ValueError(f"Can not merge a sketch of k={other.k} into a sketch of k={self.k}.")
+
+        self.levels.extend(np.empty(0) for _ in range(len(other.levels) - len(self.levels)))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.__compress()
+        return self
+
+    def __weighted_items(self) -> tuple[np.ndarray, np.ndarray]:
+        """Sorted items with the cumulative number of values they stand for."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level_items.size, 2**level, dtype=np.int64) for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        Estimates quantiles, the smallest value whose rank reaches `q` of the values.
+
+        Args:
+            q (float | array-like): Quantiles between 0 and 1.
+
+        Returns:
+            float | np.ndarray: The quantiles, NaN for an empty sketch.
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)[()]
+
+        items, cumulative_weights = self.__weighted_items()
+        estimates = items[np.minimum(np.searchsorted(cumulative_weights, q * self.count, side="left"), items.size - 1)]
+        # The extremes are tracked exactly, they may have been compacted away.
+        return np.where(q <= 0, self.minimum, np.where(q >= 1, self.maximum, estimates))[()]
+
+    def rank(self, value) -> float | np.ndarray:
+        """
+        Estimates the normalized rank of values, the fraction of the values that are less than or equal to them.
+
+        Args:
+            value (float | array-like): Values to rank.
+
+        Returns:
+            float | np.ndarray: Ranks between 0 and 1, NaN for an empty sketch.
+        """
+        value = np.asarray(value, dtype=np.float64)
+        if self.count == 0:
+            return np.full(value.shape, np.nan)[()]
+
+        items, cumulative_weights = self.__weighted_items()
+        positions = np.searchsorted(items, value, side="right")
+        return (np.where(positions > 0, cumulative_weights[np.maximum(positions - 1, 0)], 0) / self.count)[()]
+
+
+def sketch_columns(batches: Iterable[pl.DataFrame], columns: list, error: float = KLLSketch.DEFAULT_ERROR, seed: int | None = 0) -> dict:
+    """
+    Sketches columns over batches of rows, e.g. `dataset_io.iter_dataset_batches` of a file that does not fit in memory.
+
+    Args:
+        batches (Iterable[pl.DataFrame]): Row batches.
+        columns (list): Numerical columns to sketch.
+        error (float, optional): Rank error the sketches are sized for. Defaults to 0.01.
+        seed (int, optional): Seed of the first sketch, the others use the next seeds. Defaults to 0.
+
+    Returns:
+        dict: Column name to `KLLSketch`.
+    """
+    sketches = {column: KLLSketch(error=error, seed=None if seed is None else seed + position) for position, column in enumerate(columns)}
+    for batch in batches:
+        for column, sketch in sketches.items():
+            sketch.update(batch[column].cast(pl.Float64).to_numpy())
+    return sketches
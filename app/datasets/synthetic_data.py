@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import argparse
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Final
+
+import numpy as np
+import polars as pl
+
+from app.datasets.dataset_io import CSV_FORMAT
+from app.datasets.dataset_io import dataset_format
+from app.datasets.dataset_io import EXTENSION_BY_FORMAT
+from app.datasets.dataset_io import PARQUET_FORMAT
+from app.datasets.dataset_io import write_dataset
+
+CHUNK_ROWS: Final = 1_000_000
+PURCHASES_PER_CUSTOMER: Final = 5.0
+NULL_FRACTION: Final = 0.002
+OUTLIER_FRACTION: Final = 0.001
+START_DATE: Final = "2023-05-24"
+DAYS: Final = 365
+
+# Customer attributes, close to the ones of data/customer_purchases.csv.
+MIN_AGE: Final = 18
+MAX_AGE: Final = 80
+FEMALE_SHARE: Final = 0.65
+MIN_INCOME: Final = 30_000
+MAX_INCOME: Final = 130_000
+MIN_TYPICAL_PURCHASE: Final = 50.0
+MAX_TYPICAL_PURCHASE: Final = 1000.0
+PURCHASE_AMOUNT_SIGMA: Final = 0.35
+CADENCE_DAYS: Final = 30.0
+CADENCE_SIGMA: Final = 0.5
+OUTLIER_FACTOR: Final = 10
+UTC_OFFSET: Final = "+03:00"
+UTC_OFFSET_HOURS: Final = 3
+SECONDS_PER_DAY: Final = 24 * 3600
+
+
+def generate_chunk(
+    chunk_index: int,
+    rows: int,
+    chunk_rows: int = CHUNK_ROWS,
+    seed: int = 0,
+    purchases_per_customer: float = PURCHASES_PER_CUSTOMER,
+    null_fraction: float = NULL_FRACTION,
+    outlier_fraction: float = OUTLIER_FRACTION,
+    start_date: str = START_DATE,
+    days: int = DAYS,
+) -> pl.DataFrame:
+    """Generate one chunk of a synthetic customer purchase dataset with the schema of `data/customer_purchases.csv`.
+
+    Chunk `i` holds the rows `[i * chunk_rows, (i + 1) * chunk_rows)` of a `rows` row dataset and is drawn from its own seed,
+    derived from `seed` and `i`, so chunks are generated independently and in any order and the dataset only depends on
+    `rows`, `chunk_rows`, `seed` and the distribution arguments. Customers do not span chunks, a customer id is one more than the
+    dataset row of its first purchase.
+
+    Every customer has a constant age, gender and annual income, a typical purchase amount and a purchase cadence of about a
+    month. Its purchases follow each other by exponential gaps around its cadence from a random first date, wrapping around to
+    the start of the `days` long date range, at the same time of day. Missing values and outliers are sprinkled in like in the
+    real data: whole customers without an age, purchases without a gender or income, customers with a tenfold income and
+    purchases with a tenfold amount or an age of 0.
+
+    Args:
+        chunk_index (int): Chunk to generate.
+        rows (int): Rows of the whole dataset.
+        chunk_rows (int, optional): Rows per chunk. Defaults to 1_000_000.
+        seed (int, optional): Seed of the dataset. Defaults to 0.
+        purchases_per_customer (float, optional): Mean purchases of a customer, at least 1. Defaults to 5.0.
+        null_fraction (float, optional): Share of missing ages (per customer), genders and incomes (per purchase). Defaults to 0.002.
+        outlier_fraction (float, optional): Share of outlier incomes (per customer), amounts and ages (per purchase). Defaults to 0.001.
+        start_date (str, optional): First day of the purchase dates. Defaults to "2023-05-24".
+        days (int, optional): Length of the purchase date range. Defaults to 365.
+
+    Raises:
+        ValueError: If the chunk is not part of the dataset or there are less than one purchases per customer.
+
+    Returns:
+        pl.DataFrame: Rows of the chunk, ordered by customer, with `purchase_date` as a UTC datetime.
+    """
+    first_row = chunk_index * chunk_rows
+    if not 0 <= first_row < rows:
+        raise ValueError(f"Chunk {chunk_index} of {chunk_rows} rows is not part of a dataset of {rows} rows.")
+    if purchases_per_customer < 1:
+        raise ValueError(f"Customers make at least one purchase, got {purchases_per_customer} purchases per customer.")
+
+    size = min(chunk_rows, rows - first_row)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+    # Every customer makes at least one purchase, so `size` customers always cover the chunk. The last one is cut to fit.
+    purchases = 1 + rng.poisson(purchases_per_customer - 1, size)
+    cumulative_purchases = np.cumsum(purchases)
+    customers = int(np.searchsorted(cumulative_purchases, size)) + 1
+    purchases = purchases[:customers]
+    purchases[-1] -= cumulative_purchases[customers - 1] - size
+    first_purchases = np.concatenate([[0], cumulative_purchases[: customers - 1]])
+    customer = np.repeat(np.arange(customers), purchases)
+
+    ages = np.minimum(MIN_AGE + np.round(rng.gamma(1.5, 14.0, customers)), MAX_AGE)
+    females = rng.random(customers) < FEMALE_SHARE
+    incomes = rng.integers(MIN_INCOME, MAX_INCOME, customers, endpoint=True)
+    incomes = np.where(rng.random(customers) < outlier_fraction, incomes * OUTLIER_FACTOR, incomes)
+    typical_purchases = rng.uniform(MIN_TYPICAL_PURCHASE, MAX_TYPICAL_PURCHASE, customers)
+    cadences = CADENCE_DAYS * rng.lognormal(0.0, CADENCE_SIGMA, customers)
+    first_days = rng.uniform(0, days, customers)
+    times_of_day = rng.integers(0, SECONDS_PER_DAY, customers)
+
+    # Days since the first purchase of the customer, the cumulative gaps with the first gap of every customer set to zero.
+    gaps = rng.exponential(1.0, size) * cadences[customer]
+    gaps[first_purchases] = 0.0
+    elapsed_days = np.cumsum(gaps)
+    elapsed_days -= np.repeat(elapsed_days[first_purchases], purchases)
+    purchase_days = np.floor((first_days[customer] + elapsed_days) % days).astype(np.int64)
+    start_seconds = np.datetime64(start_date, "s").astype(np.int64)
+    purchase_seconds = start_seconds + purchase_days * SECONDS_PER_DAY + times_of_day[customer]
+
+    amounts = typical_purchases[customer] * rng.lognormal(0.0, PURCHASE_AMOUNT_SIGMA, size)
+    amounts = np.round(np.where(rng.random(size) < outlier_fraction, amounts * OUTLIER_FACTOR, amounts), 2)
+    purchase_ages = np.where(rng.random(size) < outlier_fraction, 0, ages[customer])
+
+    return pl.DataFrame(
+        {
+            "customer_id": first_row + first_purchases[customer] + 1,
+            "age": pl.Series(purchase_ages, dtype=pl.Int64).scatter(np.flatnonzero(rng.random(customers)[customer] < null_fraction), None),
+            "gender": pl.Series(np.where(females[customer], "Female", "Male")).scatter(np.flatnonzero(rng.random(size) < null_fraction), None),
+            "annual_income": pl.Series(incomes[customer], dtype=pl.Int64).scatter(np.flatnonzero(rng.random(size) < null_fraction), None),
+            "purchase_amount": np.maximum(amounts, 0.01),
+            "purchase_date": pl.from_epoch(pl.Series(purchase_seconds), time_unit="s").dt.replace_time_zone("UTC").dt.cast_time_unit("us"),
+            "next_month_purchase_amount": pl.Series([None] * size, dtype=pl.Float64),
+        }
+    )
+
+
+def to_csv_layout(chunk: pl.DataFrame) -> pl.DataFrame:
+    """Format `purchase_date` like `data/customer_purchases.csv`, as local time with a `+03:00` UTC offset."""
+    local_time = pl.col("purchase_date") + pl.duration(hours=UTC_OFFSET_HOURS)
+    return chunk.with_columns(local_time.dt.strftime("%Y-%m-%dT%H:%M:%S") + UTC_OFFSET)
+
+
+def generate_purchases(rows: int, chunk_rows: int = CHUNK_ROWS, **kwargs) -> pl.DataFrame:
+    """Generate a synthetic customer purchase dataset in memory, see `generate_chunk` for the arguments.
+
+    Returns:
+        pl.DataFrame: The concatenated chunks.
+    """
+    return pl.concat([generate_chunk(chunk_index, rows, chunk_rows=chunk_rows, **kwargs) for chunk_index in range(math.ceil(rows / chunk_rows))])
+
+
+def _write_chunk(part_path: str, chunk_index: int, rows: int, chunk_rows: int, kwargs: dict) -> str:
+    chunk = generate_chunk(chunk_index, rows, chunk_rows=chunk_rows, **kwargs)
+    if dataset_format(part_path) == CSV_FORMAT:
+        to_csv_layout(chunk).write_csv(part_path, include_header=chunk_index == 0)
+    else:
+        write_dataset(chunk, part_path)
+    return part_path
+
+
+def write_purchases(path: str, rows: int, chunk_rows: int = CHUNK_ROWS, workers: int | None = None, **kwargs) -> str:
+    """Generate a synthetic customer purchase dataset chunk by chunk in parallel processes and write it to a file.
+
+    Every worker writes its chunks to part files next to `path`, which are then joined in chunk order, so memory holds about
+    one chunk per worker whatever the number of rows and the file does not depend on the number of workers. CSV files have the
+    layout of `data/customer_purchases.csv`, Parquet and Arrow IPC files store `purchase_date` already parsed like
+    `dataset_io.convert_dataset`.
+
+    Args:
+        path (str): Destination file, its extension gives the format.
+        rows (int): Rows of the dataset.
+        chunk_rows (int, optional): Rows per chunk. Defaults to 1_000_000.
+        workers (int, optional): Worker processes. Defaults to one per CPU.
+        **kwargs: Other `generate_chunk` arguments.
+
+    Returns:
+        str: `path`.
+    """
+    file_format = dataset_format(path)
+    output_dir = os.path.dirname(path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    part_dir = tempfile.mkdtemp(prefix=".synthetic_parts_", dir=output_dir)
+    chunks = math.ceil(rows / chunk_rows)
+    part_paths = [os.path.join(part_dir, f"part_{chunk_index:06d}{EXTENSION_BY_FORMAT[file_format]}") for chunk_index in range(chunks)]
+    try:
+        # Spawned workers do not inherit the thread pool of polars from this process.
+        with ProcessPoolExecutor(max_workers=workers or multiprocessing.cpu_count(), mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(_write_chunk, part_path, chunk_index, rows, chunk_rows, kwargs) for chunk_index, part_path in enumerate(part_paths)
+            ]
+            if file_format == CSV_FORMAT:
+                # Parts are appended as soon as they and the ones before them are written.
+                with open(path, "wb") as csv_file:
+                    for future in futures:
+                        with open(future.result(), "rb") as part_file:
+                            shutil.copyfileobj(part_file, csv_file)
+                        os.remove(future.result())
+                return path
+            for future in futures:
+                future.result()
+
+        if file_format == PARQUET_FORMAT:
+            pl.scan_parquet(part_paths).sink_parquet(path)
+        else:
+            # Polars can not stream into IPC files yet, the uncompressed parts are memory mapped instead of loaded.
+            pl.concat([pl.read_ipc(part_path, memory_map=True) for part_path in part_paths], rechunk=False).write_ipc(path)
+        return path
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+
+# python -m app.datasets.synthetic_data data/synthetic_purchases.parquet --rows 10000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic customer purchase dataset for scale tests and benchmarks.")
+    parser.add_argument("path", help="Destination CSV, Parquet or Arrow IPC file.")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows of the dataset.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows generated at once by a worker.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes. Defaults to one per CPU.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the dataset.")
+    parser.add_argument("--purchases-per-customer", type=float, default=PURCHASES_PER_CUSTOMER, help="Mean purchases of a customer.")
+    parser.add_argument("--null-fraction", type=float, default=NULL_FRACTION, help="Share of missing ages, genders and incomes.")
+    parser.add_argument("--outlier-fraction", type=float, default=OUTLIER_FRACTION, help="Share of outlier incomes, amounts and ages.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    write_purchases(
+        args.path,
+        args.rows,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers,
+        seed=args.seed,
+        purchases_per_customer=args.purchases_per_customer,
+        null_fraction=args.null_fraction,
+        outlier_fraction=args.outlier_fraction,
+    )
+    elapsed = time.perf_counter() - start_time
+    print(f"{args.rows} rows -> {args.path} ({os.path.getsize(args.path) / 1024 ** 2:.1f} MB) in {elapsed:.1f} s")
@@ -1,8 +1,12 @@
 from __future__ import annotations
 import os
+import time
+from typing import Optional
 from app.inference.engine import MlInferenceEngine
 from marshmallow import ValidationError
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 
 import warnings
 
@@ -11,26 +15,109 @@ from app.inference.endpoint_schemas import PredictRequest  # noreorder # noqa
 from app.inference.endpoint_schemas import PredictResponse  # noreorder # noqa
 from app.inference.input_schema import ModelInputSchema  # noreorder # noqa
 from app.logger.logger import ColorLogger as Logger  # noreorder # noqa
+from app.monitoring.metrics import METRICS_CONTENT_TYPE  # noreorder # noqa
+from app.monitoring.metrics import QUEUE_DEPTH  # noreorder # noqa
+from app.monitoring.metrics import render_metrics  # noreorder # noqa
+from app.monitoring.metrics import REQUEST_LATENCY  # noreorder # noqa
+from app.monitoring.metrics import UNMATCHED_ROUTE  # noreorder # noqa
+from app.monitoring.profiler import admin_routes_enabled  # noreorder # noqa
+from app.monitoring.profiler import profiler_from_env  # noreorder # noqa
 
 
 app = FastAPI(title="ML Inference API")
 # uvicorn app.inference.endpoint:app --host 0.0.0.0 --port 2000 --workers 4
-config_path = "app/inference/configs/inference_config.yml"  # HARDCODED
+config_path = os.environ.get("INFERENCE_CONFIG", "app/inference/configs/inference_config.yml")
+SERVICE_NAME = "inference"
+LOG_QUEUE_NAME = "inference_log"
+DEBUG_TIMINGS_HEADER = "X-Debug-Timings"
+TRUE_HEADER_VALUES = frozenset(["1", "true", "yes"])
 
 
-inference_server_logger = Logger(log_file="logs" + os.sep + "inference_engine_logger.log", debug_mode=False)
+inference_server_logger = Logger(
+    log_file="logs" + os.sep + "inference_engine_logger.log",
+    debug_mode=False,
+    async_mode=True,
+    log_format=os.environ.get("LOG_FORMAT", "text"),
+    sampling_rates={"INFERENCE": float(os.environ.get("INFERENCE_LOG_SAMPLE_RATE", 1.0))},  # Per request timing lines.
+)
 inference_engine = MlInferenceEngine(inference_config_path=config_path, logger=inference_server_logger)
+profiler = profiler_from_env()  # Opt in with PROFILER_ENABLED=1, or POST /admin/profiler/start when the admin routes are mounted.
+# Unauthenticated, mounted only with PROFILER_ADMIN_ENABLED=1.
+profiler_router = APIRouter(prefix="/admin/profiler", include_in_schema=False)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_template = route.path if route is not None else UNMATCHED_ROUTE  # Route template keeps label cardinality bounded.
+        REQUEST_LATENCY.labels(service=SERVICE_NAME, route=route_template, method=request.method, status=str(status_code)).observe(
+            time.perf_counter() - start_time
+        )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    QUEUE_DEPTH.labels(queue=LOG_QUEUE_NAME).set(inference_server_logger.queue_depth)
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@profiler_router.post("/start")
+async def start_profiler(frequency_hz: Optional[float] = None):
+    try:
+        return {"started": profiler.start(frequency_hz), **profiler.status()}
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+
+# Stopping joins the sampling thread and dumping renders and writes the profile, both run off the event loop.
+@profiler_router.post("/stop")
+async def stop_profiler():
+    return {"stopped": await run_in_threadpool(profiler.stop), **profiler.status()}
+
+
+@profiler_router.get("/status")
+async def profiler_status():
+    return profiler.status()
+
+
+@profiler_router.post("/dump")
+async def dump_profile(profile_format: str = Query("collapsed", alias="format"), reset: bool = False):
+    # Each uvicorn worker samples itself, the dump covers the worker that answered.
+    try:
+        path = await run_in_threadpool(profiler.dump, profile_format, SERVICE_NAME)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if reset:
+        profiler.reset()
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+if admin_routes_enabled():
+    app.include_router(profiler_router)
 
 
 @app.post("/predict")
-async def predict_endpoint(request: PredictRequest):
+async def predict_endpoint(request: PredictRequest, debug_timings: Optional[str] = Header(None, alias=DEBUG_TIMINGS_HEADER)):
     try:
         data = request.dict()
         validated_data = ModelInputSchema().load(data)
-        predicted_value, message, inference_time, is_valid_prediction = inference_engine(validated_data)
+        force_trace = debug_timings is not None and debug_timings.strip().lower() in TRUE_HEADER_VALUES
+        trace = inference_engine.tracer.start_trace(force=force_trace)
+        predicted_value, message, inference_time, is_valid_prediction = inference_engine(validated_data, trace=trace)
 
         return PredictResponse(
-            next_month_purchase_amount=predicted_value, message=message, inference_time=inference_time, is_valid_prediction=is_valid_prediction
+            next_month_purchase_amount=predicted_value,
+            message=message,
+            inference_time=inference_time,
+            is_valid_prediction=is_valid_prediction,
+            stage_timings=trace.breakdown_ms() if force_trace else None,
         )
 
     except ValidationError as ve:
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -30,6 +32,11 @@ class PredictResponse(BaseModel):
     message: str = Field(..., example="Prediction successful", description="Message providing additional details about the prediction result")
     inference_time: float = Field(..., example=0.123, description="Time taken to run the inference in seconds")
     is_valid_prediction: bool = Field(..., example=True, description="Flag indicating whether the prediction is considered valid")
+    stage_timings: Optional[dict[str, float]] = Field(
+        None,
+        example={"validation": 0.05, "history_lookup": 1.2, "predict": 0.1},
+        description="Per stage duration in milliseconds, only returned when the X-Debug-Timings header is set",
+    )
 
     class Config:
         schema_extra = {
@@ -38,5 +45,6 @@ class PredictResponse(BaseModel):
                 "message": "Prediction successful",
                 "inference_time": 0.123,
                 "is_valid_prediction": True,
+                "stage_timings": None,
             }
         }
@@ -6,6 +6,7 @@ import os
 import time
 from datetime import datetime
 from pathlib import Path
+from typing import Final
 
 import inflect
 import joblib
@@ -15,11 +16,19 @@ import requests
 import yaml
 
 
+from app.datasets.dataset_io import parse_datetime_columns  # noreorder # noqa
+from app.datasets.dataset_io import scan_dataset  # noreorder # noqa
 from app.inference.input_schema import ModelInputSchema  # noreorder # noqa
 from app.logger.logger import ColorLogger as Logger  # noreorder # noqa
+from app.monitoring.metrics import ENGINE_STAGE_LATENCY  # noreorder # noqa
+from app.monitoring.metrics import record_cache_access  # noreorder # noqa
+from app.monitoring.tracing import Trace  # noreorder # noqa
+from app.monitoring.tracing import Tracer  # noreorder # noqa
 
 
 class MlInferenceEngine:
+    PURCHASE_DATE_FORMAT: Final = "%Y-%m-%dT%H:%M:%S%z"
+
     def __init__(self, inference_config_path, logger) -> None:
         inference_config = load_config(file_path=inference_config_path)
         self.database_path = inference_config["database"]
@@ -35,14 +44,20 @@ class MlInferenceEngine:
         self.registry_name = self.registry_config["name"]
         self.registry_url = self.registry_config["url"]
 
+        # Tracing config parsing
+        tracing_config = inference_config.get("tracing", {})
+        self.tracer = Tracer(sample_rate=tracing_config.get("sample_rate", 1.0), histogram=ENGINE_STAGE_LATENCY)
+
         self.logger = logger
 
         self.features = None
         self.model = None
 
-        self.customer_database = pl.scan_csv(self.database_path)  # Let us assume our database is provided csv.
+        # Let us assume our database is provided as a csv, parquet or arrow file. Parquet and arrow files keep purchase dates parsed.
+        self.customer_database = scan_dataset(self.database_path)
         self.customer_database = self.customer_database.drop("next_month_purchase_amount")
         self.customer_database = self.customer_database.drop_nulls()
+        self.customer_database = parse_datetime_columns(self.customer_database, datetime_format=MlInferenceEngine.PURCHASE_DATE_FORMAT)
 
         average_values_lazy = self.customer_database.lazy().select(
             [
@@ -60,22 +75,36 @@ class MlInferenceEngine:
         self.inflect_engine = inflect.engine()
         self.__fetch_model()
 
-    def __call__(self, raw_input):
+    def __call__(self, raw_input, trace: Trace | None = None):
+        """
+        Run a prediction for a single purchase.
+
+        Args:
+            raw_input (dict): Purchase record matching `ModelInputSchema`.
+            trace (Trace, optional): Trace receiving per stage durations. A sampled trace is started when omitted.
+
+        Returns:
+            tuple: Prediction, message, inference time in milliseconds and whether the prediction is valid.
+        """
+        trace = self.tracer.start_trace() if trace is None else trace
         start_time = time.perf_counter()
         predicted_next_month_purchase_amount = 0
-        processed_input, is_valid_prediction, msg = self.__preprocess_data(raw_input)
+        processed_input, is_valid_prediction, msg = self.__preprocess_data(raw_input, trace)
         if is_valid_prediction:
-            processed_input = np.array([[processed_input[feature] for feature in self.features]])
-            predicted_next_month_purchase_amount = self.model.predict(processed_input)
+            with trace.span("predict"):
+                processed_input = np.array([[processed_input[feature] for feature in self.features]])
+                predicted_next_month_purchase_amount = float(self.model.predict(processed_input)[0])
         end_time = time.perf_counter()
 
         inference_time = (end_time - start_time) * 1000
-        self.logger.info(f"Elapsed time: {inference_time:.3f} ms")
+        self.tracer.finish(trace)
+        self.logger.info("Elapsed time: %.3f ms", inference_time, category="INFERENCE", inference_time_ms=inference_time, valid=is_valid_prediction)
 
         return predicted_next_month_purchase_amount, msg, inference_time, is_valid_prediction
 
-    def __preprocess_data(self, raw_input: dict):
-        validated_data = self.input_scheme.load(raw_input)  # Validate and deserialize
+    def __preprocess_data(self, raw_input: dict, trace: Trace):
+        with trace.span("validation"):
+            validated_data = self.input_scheme.load(raw_input)  # Validate and deserialize
 
         customer_id = validated_data["customer_id"]
         age = validated_data["age"]
@@ -87,18 +116,22 @@ class MlInferenceEngine:
         age = self.imputation_age if age == 0 else age
         annual_income = self.imputation_income if annual_income == 0 else annual_income
 
-        customer_block_as_dataframe = self.customer_database.filter(pl.col("customer_id") == customer_id).collect().lazy()
-        customer_block_as_dataframe = customer_block_as_dataframe.with_columns(pl.lit(0).alias("recent"))
+        with trace.span("history_lookup"):
+            customer_block_as_dataframe = self.customer_database.filter(pl.col("customer_id") == customer_id).collect().lazy()
+            customer_block_as_dataframe = customer_block_as_dataframe.with_columns(pl.lit(0).alias("recent"))
 
-        customer_count = self.__get_customer_count(customer_id=customer_id, filtered_polars_dataframe=customer_block_as_dataframe)
+            customer_count = self.__get_customer_count(customer_id=customer_id, filtered_polars_dataframe=customer_block_as_dataframe)
         msg = ""
         is_valid_data = True
         if customer_count > 0:  #  Old customer has record
-            squashed_dataframe = self.__squash_rows(polars_dataframe=customer_block_as_dataframe)
-            frequency = squashed_dataframe.height
-            squashed_dataframe = self.__add_customer(age, annual_income, gender, purchase_date, purchase_amount, squashed_dataframe)
-            one_hot_encoded_df = self.__one_hot_encode(squashed_dataframe)
-            processed_input = self.__calculate_rfm(one_hot_encoded_df)
+            with trace.span("squash_rows"):
+                squashed_dataframe = self.__squash_rows(polars_dataframe=customer_block_as_dataframe)
+                frequency = squashed_dataframe.height
+            with trace.span("feature_build"):
+                squashed_dataframe = self.__add_customer(age, annual_income, gender, purchase_date, purchase_amount, squashed_dataframe)
+                one_hot_encoded_df = self.__one_hot_encode(squashed_dataframe)
+            with trace.span("rfm"):
+                processed_input = self.__calculate_rfm(one_hot_encoded_df)
 
             msg = f"Old customer with customer id {customer_id} detected. This customers {self.inflect_engine.ordinal(int(self.__get_customer_count(customer_id=customer_id, filtered_polars_dataframe=customer_block_as_dataframe)))} purchase."
 
@@ -116,11 +149,12 @@ class MlInferenceEngine:
             msg = f"New customer with customer id {customer_id} detected. Not predicting."
             is_valid_data = False
 
-        self.customer_database = self.customer_database.collect()
-        new_rows = [raw_input]
-        new_df = pl.DataFrame(new_rows)
-        self.customer_database = pl.concat([self.customer_database, new_df])
-        self.customer_database = self.customer_database.lazy()  # back to lazy
+        with trace.span("history_update"):
+            self.customer_database = self.customer_database.collect()
+            new_rows = [raw_input]
+            new_df = parse_datetime_columns(pl.DataFrame(new_rows), datetime_format=MlInferenceEngine.PURCHASE_DATE_FORMAT)
+            self.customer_database = pl.concat([self.customer_database, new_df])
+            self.customer_database = self.customer_database.lazy()  # back to lazy
 
         return processed_input, is_valid_data, msg
 
@@ -129,6 +163,7 @@ class MlInferenceEngine:
         if not os.path.exists(self.model_path):
             download = True
             self.logger.warning("Could not found model in path downloading !")
+        record_cache_access(cache="model_file", hit=not download)
 
         if self.__check_registry_status() == 200:
             response = self.__fetch_model_wrapper(download=download)
@@ -143,7 +178,7 @@ class MlInferenceEngine:
 
             model_path = os.path.join(model_basepath, downloaded_model)
             self.model = joblib.load(model_path)
-            self.logger.info(f"Model features from response: {self.features}")
+            self.logger.info("Model features from response: %s", self.features)
         else:
             self.logger.registry_error("Could not get connection from regitry cant fetch data ! Attempting to fill features from config !")
             self.features = self.model_config["features"]
@@ -203,8 +238,7 @@ class MlInferenceEngine:
         customer_block_as_dataframe = polars_dataframe.with_columns(
             [
                 pl.col("purchase_date")
-                .str.strptime(pl.Datetime, "%Y-%m-%dT%H:%M:%S%z")  # Convert to Datetime
-                .dt.strftime("%Y-%m")  # Extract 'YYYY-MM'
+                .dt.strftime("%Y-%m")  # Extract 'YYYY-MM', dates are parsed when they enter the database
                 .alias("purchase_month_year")  # Add as a new column
             ]
         ).lazy()
@@ -225,10 +259,10 @@ class MlInferenceEngine:
         """
         try:
             response = requests.get(os.path.join(self.registry_url, "status"))  # noqa
-            self.logger.registry(f"Status response for ado-flow: {response.json()}")
+            self.logger.registry("Status response for ado-flow: %s", response.json())
             return response.status_code
         except Exception as e:
-            self.logger.registry_error(f"Could not get status exception {e} occured.")
+            self.logger.registry_error("Could not get status exception %s occured.", e)
             return -1
 
     def __fetch_model_wrapper(self, download: bool = False):
@@ -237,11 +271,11 @@ class MlInferenceEngine:
             model_add_request = {"name": self.model_name, "version": self.model_version, "download_path": os.path.dirname(self.model_path)}  # noqa
             response = requests.get(os.path.join(self.registry_url, route), json=model_add_request, verify=False)
             if response.status_code == 200:
-                self.logger.registry(f"Model successfully fetched. Response: {response.json()}")
+                self.logger.registry("Model successfully fetched. Response: %s", response.json())
 
             return response.json()
         except Exception as e:
-            self.logger.registry_error(f"Could not upload model exception {e} occured. Response: {response}")
+            self.logger.registry_error("Could not upload model exception %s occured. Response: %s", e, response)
         return False
 
 
@@ -273,4 +307,4 @@ if __name__ == "__main__":
 
     engine = MlInferenceEngine(inference_config_path=config_path, logger=inference_logger)
 
-    inference_logger.info(f"Predicted Next Month Purchase Amount: {engine(raw_input)}")
+    inference_logger.info("Predicted Next Month Purchase Amount: %s", engine(raw_input))
@@ -1,12 +1,135 @@
 from __future__ import annotations
 
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import weakref
 from datetime import datetime
+from datetime import timezone
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 
 import colorlog
 
 
+class FieldsTextFormatterMixin:
+    """
+    Appends structured fields passed with a record as `key=value` pairs to the formatted text line.
+    """
+
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if not fields:
+            return text
+        return text + " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+
+class FieldsColoredFormatter(FieldsTextFormatterMixin, colorlog.ColoredFormatter):
+    pass
+
+
+class FieldsFormatter(FieldsTextFormatterMixin, logging.Formatter):
+    pass
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as a single JSON object. Structured fields keep their JSON types instead of being rendered into the message.
+    """
+
+    def format(self, record):
+        document = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            document.update(fields)
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records of each configured category.
+
+    A record's category is its `category` field if one was given, otherwise its level name. Categories without a rate are never sampled.
+
+    Args:
+        sampling_rates (dict): Category to fraction of records to keep, e.g. {"ENDPOINT": 0.01}.
+    """
+
+    def __init__(self, sampling_rates: dict):
+        super().__init__()
+        for category, rate in sampling_rates.items():
+            if not 0.0 <= rate <= 1.0:
+                raise ValueError(f"Sampling rate of {category} must be between 0 and 1, got {rate}.")
+        self.sampling_rates = sampling_rates
+
+    def filter(self, record):
+        fields = getattr(record, "fields", None)
+        category = fields.get("category", record.levelname) if fields else record.levelname
+        rate = self.sampling_rates.get(category)
+        return rate is None or random.random() < rate
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler backed by a bounded queue that either drops or blocks when the queue is full.
+
+    Records are put on the queue as they are, formatting (including merging %-style args) happens on the listener thread.
+
+    Args:
+        log_queue (queue.Queue): Bounded queue shared with the listener.
+        block (bool, optional): Block the caller until there is room instead of dropping the record. Defaults to False.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool = False):
+        super().__init__(log_queue)
+        self.block = block
+        self.dropped_records = 0
+
+    def prepare(self, record):
+        return record  # Listener runs in the same process, no need to pre-format for pickling.
+
+    def enqueue(self, record):
+        if self.block:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+
+# Async loggers that are still running, their listeners are restarted in forked children. Weak references let stopped
+# and collected loggers drop out without unregistering anything.
+_ASYNC_LOGGERS: weakref.WeakSet = weakref.WeakSet()
+
+
+def _stop_async_logger(logger: logging.Logger, queue_handler: QueueHandler, listener: QueueListener, handlers: tuple):
+    # Flush the queue and write later records synchronously. Runs on `stop`, garbage collection or interpreter exit.
+    listener.stop()
+    logger.removeHandler(queue_handler)
+    for handler in handlers:
+        logger.addHandler(handler)
+
+
+def _restart_async_loggers_after_fork():
+    for color_logger in list(_ASYNC_LOGGERS):
+        color_logger._restart_listener_after_fork()
+
+
+os.register_at_fork(after_in_child=_restart_async_loggers_after_fork)
+
+
 class ColorLogger:
     # Define standard and custom log levels
     DEBUG = logging.DEBUG  # 0
@@ -31,20 +154,63 @@ class ColorLogger:
     logging.addLevelName(STORAGE_ERROR, "STORAGE_ERROR")
     logging.addLevelName(ENDPOINT, "ENDPOINT")
 
-    def __init__(self, log_file: str = "_default.log", debug_mode: bool = False):
+    QUEUE_FULL_POLICIES = ("drop", "block")
+    LOG_FORMATS = ("text", "json")
+    LOGGING_KWARGS = ("exc_info", "stack_info", "stacklevel")
+
+    def __init__(
+        self,
+        log_file: str = "_default.log",
+        debug_mode: bool = False,
+        async_mode: bool = False,
+        queue_size: int = 10000,
+        queue_full_policy: str = "drop",
+        log_format: str = "text",
+        sampling_rates: dict | None = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+    ):
+        """
+        Args:
+            log_file (str, optional): Log file path. Defaults to "_default.log".
+            debug_mode (bool, optional): Log DEBUG records. Defaults to False.
+            async_mode (bool, optional): Hand records to a background listener thread through a bounded queue so the
+                calling thread does not pay for formatting and disk writes. Defaults to False.
+            queue_size (int, optional): Capacity of the queue in async mode. Defaults to 10000.
+            queue_full_policy (str, optional): "drop" discards records when the queue is full, "block" waits for room.
+                Defaults to "drop".
+            log_format (str, optional): "text" for colored console and plain file lines, "json" for one JSON object per line.
+                Defaults to "text".
+            sampling_rates (dict, optional): Fraction of records to keep per category (level name or `category` field),
+                e.g. {"ENDPOINT": 0.01}. Defaults to keeping every record.
+            max_bytes (int, optional): Size at which the log file is rotated. Defaults to 10 MB.
+            backup_count (int, optional): Number of rotated files to keep. Defaults to 5.
+        """
+        if queue_full_policy not in ColorLogger.QUEUE_FULL_POLICIES:
+            raise ValueError(f"Queue full policy must be one of {ColorLogger.QUEUE_FULL_POLICIES}, got {queue_full_policy}.")
+        if log_format not in ColorLogger.LOG_FORMATS:
+            raise ValueError(f"Log format must be one of {ColorLogger.LOG_FORMATS}, got {log_format}.")
+
         log_root_dir = os.path.dirname(log_file)
         log_file = os.path.basename(log_file)
         os.makedirs(log_root_dir, exist_ok=True)
 
-        today = datetime.today().strftime("%Y_%m_%d")
         self.debug_mode = debug_mode
+        self.log_format = log_format
 
-        self.logger_name = log_root_dir + os.sep + today + "_" + log_file if os.path.isdir(log_root_dir) else today + "_" + log_file
+        self.logger_name = log_root_dir + os.sep + log_file if os.path.isdir(log_root_dir) else log_file
         self.logger = logging.getLogger(log_file)
         self.logger.setLevel(logging.DEBUG) if self.debug_mode else self.logger.setLevel(logging.INFO)
 
+        # Sampling runs on the caller thread before anything is formatted or queued. Loggers are cached by file name,
+        # so the filter of an earlier instance is replaced instead of stacking the rates.
+        for sampling_filter in [log_filter for log_filter in self.logger.filters if isinstance(log_filter, SamplingFilter)]:
+            self.logger.removeFilter(sampling_filter)
+        if sampling_rates:
+            self.logger.addFilter(SamplingFilter(sampling_rates))
+
         # Create a ColorFormatter
-        self.color_formatter = colorlog.ColoredFormatter(
+        self.color_formatter = FieldsColoredFormatter(
             "%(log_color)s%(asctime)s %(levelname)-8s%(reset)s %(message)s",
             datefmt="%Y-%m-%d %H:%M:%S",  # Format for date and time
             log_colors={
@@ -63,61 +229,126 @@ class ColorLogger:
             },
         )
 
+        # Create a Formatter for the file handler
+        self.file_formatter = FieldsFormatter(
+            "%(asctime)s %(levelname)-8s %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",  # Format for date and time
+        )
+        self.json_formatter = JsonFormatter()
+
         # Create a StreamHandler for console output
         self.stream_handler = logging.StreamHandler()
         self.stream_handler.setLevel(logging.DEBUG)
-        self.stream_handler.setFormatter(self.color_formatter)
+        self.stream_handler.setFormatter(self.json_formatter if log_format == "json" else self.color_formatter)
 
-        # Create a FileHandler for file output
-        self.file_handler = logging.FileHandler(self.logger_name)
+        # Create a size based rotating FileHandler for file output
+        self.file_handler = logging.handlers.RotatingFileHandler(self.logger_name, maxBytes=max_bytes, backupCount=backup_count)
         self.file_handler.setLevel(logging.DEBUG)
+        self.file_handler.setFormatter(self.json_formatter if log_format == "json" else self.file_formatter)
 
-        # Create a Formatter for the file handler
-        self.file_formatter = logging.Formatter(
-            "%(asctime)s %(levelname)-8s %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",  # Format for date and time
-        )
-        self.file_handler.setFormatter(self.file_formatter)
+        self.async_mode = async_mode
+        self.queue_size = queue_size
+        self.log_queue = None
+        self.queue_handler = None
+        self.listener = None
+        self._finalizer = None
 
         # Add the handlers to the utils
-        self.logger.addHandler(self.stream_handler)
-        self.logger.addHandler(self.file_handler)
+        if self.async_mode:
+            self.log_queue = queue.Queue(maxsize=queue_size)
+            self.queue_handler = BoundedQueueHandler(self.log_queue, block=queue_full_policy == "block")
+            self.logger.addHandler(self.queue_handler)
+            self.__start_listener()
+        else:
+            self.logger.addHandler(self.stream_handler)
+            self.logger.addHandler(self.file_handler)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of records waiting to be written, always 0 in synchronous mode."""
+        return self.log_queue.qsize() if self.log_queue is not None else 0
+
+    @property
+    def dropped_records(self) -> int:
+        """Number of records discarded because the queue was full."""
+        return self.queue_handler.dropped_records if self.queue_handler is not None else 0
+
+    @property
+    def listener_running(self) -> bool:
+        """Whether records are handed to the background listener, False in synchronous mode and after `stop`."""
+        return self._finalizer is not None and self._finalizer.alive
+
+    def stop(self):
+        """
+        Flush queued records and stop the background listener. Later records are written synchronously.
+        Does nothing in synchronous mode or when already stopped.
+        """
+        _ASYNC_LOGGERS.discard(self)
+        if self.listener_running:
+            self._finalizer()
+
+    def __start_listener(self):
+        self.listener = QueueListener(self.log_queue, self.stream_handler, self.file_handler, respect_handler_level=True)
+        self.listener.start()
+        # The finalizer holds no reference to self, so it also flushes loggers that are collected or alive at exit.
+        self._finalizer = weakref.finalize(
+            self, _stop_async_logger, self.logger, self.queue_handler, self.listener, (self.stream_handler, self.file_handler)
+        )
+        _ASYNC_LOGGERS.add(self)
+
+    def _restart_listener_after_fork(self):
+        # The listener thread does not survive a fork, child processes (e.g. process executors) get their own queue and thread.
+        if not self.listener_running:
+            return
+        self._finalizer.detach()
+        self.log_queue = queue.Queue(maxsize=self.queue_size)
+        self.queue_handler.queue = self.log_queue
+        self.__start_listener()
+
+    @staticmethod
+    def __extra(fields: dict) -> dict:
+        # Standard logging arguments such as exc_info are passed through, the remaining keywords are structured fields
+        # that travel on the record. Only pass `extra` when there are any.
+        kwargs = {name: fields.pop(name) for name in ColorLogger.LOGGING_KWARGS if name in fields}
+        if fields:
+            kwargs["extra"] = {"fields": fields}
+        return kwargs
 
-    def debug(self, message):
-        self.logger.debug(message)
+    def debug(self, message, *args, **fields):
+        self.logger.debug(message, *args, **ColorLogger.__extra(fields))
 
-    def info(self, message):
-        self.logger.info(message)
+    def info(self, message, *args, **fields):
+        self.logger.info(message, *args, **ColorLogger.__extra(fields))
 
-    def warning(self, message):
-        self.logger.warning(message)
+    def warning(self, message, *args, **fields):
+        self.logger.warning(message, *args, **ColorLogger.__extra(fields))
 
-    def error(self, message):
-        self.logger.error(message)
+    def error(self, message, *args, **fields):
+        self.logger.error(message, *args, **ColorLogger.__extra(fields))
 
-    def critical(self, message):
-        self.logger.critical(message)
+    def critical(self, message, *args, **fields):
+        self.logger.critical(message, *args, **ColorLogger.__extra(fields))
 
-    def storage(self, message: str):
-        self.logger.log(ColorLogger.STORAGE, message)
+    def storage(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.STORAGE, message, *args, **ColorLogger.__extra(fields))
 
-    def database(self, message: str):
-        self.logger.log(ColorLogger.DATABASE, message)
+    def database(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.DATABASE, message, *args, **ColorLogger.__extra(fields))
 
-    def database_error(self, message: str):
-        self.logger.log(ColorLogger.DATA_BASE_ERROR, message)
+    def database_error(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.DATA_BASE_ERROR, message, *args, **ColorLogger.__extra(fields))
 
-    def registry(self, message: str):
-        self.logger.log(ColorLogger.REGISTRY, message)
+    def registry(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.REGISTRY, message, *args, **ColorLogger.__extra(fields))
 
-    def registry_error(self, message: str):
-        self.logger.log(ColorLogger.REGISTRY_ERROR, message)
+    def registry_error(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.REGISTRY_ERROR, message, *args, **ColorLogger.__extra(fields))
 
-    def storage_error(self, message: str):
-        self.logger.log(ColorLogger.STORAGE_ERROR, message)
+    def storage_error(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.STORAGE_ERROR, message, *args, **ColorLogger.__extra(fields))
 
-    def endpoint(self, message: str):
-        self.logger.log(ColorLogger.ENDPOINT, message)
+    def endpoint(self, message: str, *args, **fields):
+        self.logger.log(ColorLogger.ENDPOINT, message, *args, **ColorLogger.__extra(fields))
 
 
 if __name__ == "__main__":
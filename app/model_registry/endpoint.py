@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import os
 import socket
 
 import pyfiglet
 from endpoint_routes import executor
 from endpoint_routes import model_bp
+from endpoint_routes import profiler_bp
 from endpoint_routes import registry
 from flasgger import Swagger
 from flask import Flask
+from monitoring.profiler import admin_routes_enabled
 from waitress import serve
 
 app = Flask(__name__)
@@ -18,6 +21,9 @@ registry.create_tables()
 app.config["EXECUTOR_TYPE"] = "process"
 executor.init_app(app)
 
+# Nested, so the request latency hooks of model_bp time the profiler routes too.
+if admin_routes_enabled():
+    model_bp.register_blueprint(profiler_bp)
 app.register_blueprint(model_bp)
 
 if __name__ == "__main__":
@@ -25,6 +31,6 @@ if __name__ == "__main__":
     print(FIGLET)
     print("ADO-FLOW Model Registry is ready.")
     container_ip = socket.gethostbyname(socket.gethostname())
-    port = 5000  # Replace with your desired port if different
+    port = int(os.environ.get("REGISTRY_PORT", 5000))
     print(f"Flask app is running on http://{container_ip}:{port}/")
-    serve(app, host="0.0.0.0", port=5000)
+    serve(app, host="0.0.0.0", port=port)
@@ -1,24 +1,68 @@
 from __future__ import annotations
 
 import os  # noqa
+import time
 
 import model_schema as schema
 from flask import Blueprint
+from flask import g
 from flask import jsonify
 from flask import request
+from flask import Response
+from flask import send_file
 from flask_executor import Executor
 from http_status_enums import HTTPStatus
 from marshmallow import ValidationError  # noreorder # noqa
 from registry import ModelRegistry  # noreorder # noqa
+from model_registry.storage_manager import LocalStorageManager  # noreorder # noqa
 from logger.logger import ColorLogger as Logger  # noreorder # noqa
+from monitoring.metrics import IN_FLIGHT_TASKS  # noreorder # noqa
+from monitoring.metrics import METRICS_CONTENT_TYPE  # noreorder # noqa
+from monitoring.metrics import QUEUE_DEPTH  # noreorder # noqa
+from monitoring.metrics import render_metrics  # noreorder # noqa
+from monitoring.metrics import REQUEST_LATENCY  # noreorder # noqa
+from monitoring.metrics import UNMATCHED_ROUTE  # noreorder # noqa
+from monitoring.profiler import profiler_from_env  # noreorder # noqa
 
 
 model_bp = Blueprint("model_bp", __name__)
+# Unauthenticated, nested into model_bp only with PROFILER_ADMIN_ENABLED=1, see endpoint.py.
+profiler_bp = Blueprint("profiler_bp", __name__, url_prefix="/admin/profiler")
 
 database = "database" + os.sep + "model_database_file.db"
-registry_logger = Logger(log_file="logs" + os.sep + "registry_endpoint_logger.log", debug_mode=False)
-registry = ModelRegistry(database, registry_logger)
+registry_logger = Logger(
+    log_file="logs" + os.sep + "registry_endpoint_logger.log",
+    debug_mode=False,
+    async_mode=True,
+    log_format=os.environ.get("LOG_FORMAT", "text"),
+    sampling_rates={"ENDPOINT": float(os.environ.get("ENDPOINT_LOG_SAMPLE_RATE", 1.0))},  # Failures use ENDPOINT_ERROR and are never sampled.
+)
+# STORAGE_BACKEND=local keeps model files on disk instead of google cloud, e.g. for load tests without credentials.
+storage_manager = (
+    LocalStorageManager(registry_logger, os.environ.get("LOCAL_STORAGE_DIR", LocalStorageManager.STORAGE_DIR))
+    if os.environ.get("STORAGE_BACKEND", "gcloud") == "local"
+    else None
+)
+registry = ModelRegistry(database, registry_logger, storage_manager=storage_manager)
 executor = Executor()
+profiler = profiler_from_env()  # Opt in with PROFILER_ENABLED=1, or POST /admin/profiler/start when the admin routes are mounted.
+
+SERVICE_NAME = "registry"
+EXECUTOR_NAME = "registry_executor"
+LOG_QUEUE_NAME = "registry_log"
+ENDPOINT_ERROR_CATEGORY = "ENDPOINT_ERROR"
+
+
+def run_in_executor(task, *args):
+    """
+    Submit a background task and wait for its result while tracking how many tasks are in flight.
+    """
+    in_flight_tasks = IN_FLIGHT_TASKS.labels(executor=EXECUTOR_NAME)
+    in_flight_tasks.inc()
+    try:
+        return executor.submit(task, *args).result()
+    finally:
+        in_flight_tasks.dec()
 
 
 class BackgroundTasks:
@@ -81,13 +125,144 @@ class BackgroundTasks:
             return None, message
 
 
+def endpoint_log_category(success: bool) -> dict:
+    """
+    Structured log fields putting failed requests in the unsampled error category.
+    """
+    return {} if success else {"category": ENDPOINT_ERROR_CATEGORY}
+
+
+@model_bp.before_request
+def start_request_timer():
+    g.request_start_time = time.perf_counter()
+
+
+@model_bp.after_request
+def record_request_latency(response):
+    start_time = g.pop("request_start_time", None)
+    if start_time is not None:
+        route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE  # Route template keeps label cardinality bounded.
+        REQUEST_LATENCY.labels(service=SERVICE_NAME, route=route, method=request.method, status=str(response.status_code)).observe(
+            time.perf_counter() - start_time
+        )
+    return response
+
+
 # Define routes
 
 
+@model_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus metrics for the registry.
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Metrics in Prometheus text exposition format.
+    """
+    QUEUE_DEPTH.labels(queue=LOG_QUEUE_NAME).set(registry_logger.queue_depth)
+    return Response(render_metrics(), mimetype=METRICS_CONTENT_TYPE)
+
+
+@profiler_bp.route("/start", methods=["POST"])
+def start_profiler():
+    """
+    Start the sampling profiler of the registry process.
+    ---
+    tags:
+      - Monitoring
+    parameters:
+      - in: query
+        name: frequency_hz
+        required: false
+        schema:
+          type: number
+        description: Samples per second, keeps the current frequency when omitted.
+    responses:
+      200:
+        description: Profiler status, `started` is false if it was already running.
+      400:
+        description: Invalid sampling frequency.
+    """
+    try:
+        started = profiler.start(request.args.get("frequency_hz", type=float))
+    except ValueError as e:
+        return jsonify({"message": str(e), "response:": HTTPStatus.BAD_REQUEST.value}), HTTPStatus.BAD_REQUEST.value
+    return jsonify({"started": started, **profiler.status()}), HTTPStatus.OK.value
+
+
+@profiler_bp.route("/stop", methods=["POST"])
+def stop_profiler():
+    """
+    Stop the sampling profiler, the collected stacks are kept for the next dump.
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Profiler status, `stopped` is false if it was not running.
+    """
+    return jsonify({"stopped": profiler.stop(), **profiler.status()}), HTTPStatus.OK.value
+
+
+@profiler_bp.route("/status", methods=["GET"])
+def profiler_status():
+    """
+    Sampling profiler status.
+    ---
+    tags:
+      - Monitoring
+    responses:
+      200:
+        description: Whether the profiler runs, its frequency, sample count and sampling time.
+    """
+    return jsonify(profiler.status()), HTTPStatus.OK.value
+
+
+@profiler_bp.route("/dump", methods=["POST"])
+def dump_profile():
+    """
+    Write the collected stacks to the profile directory and download them.
+
+    Model operations run in the process executor, so the profile shows the request handling threads of the server.
+    ---
+    tags:
+      - Monitoring
+    parameters:
+      - in: query
+        name: format
+        required: false
+        schema:
+          type: string
+          enum: [collapsed, speedscope]
+        description: Collapsed stacks for flamegraph.pl or a speedscope profile. Defaults to collapsed.
+      - in: query
+        name: reset
+        required: false
+        schema:
+          type: boolean
+        description: Clear the collected stacks after the dump.
+    responses:
+      200:
+        description: The profile file.
+      400:
+        description: Unknown profile format.
+    """
+    try:
+        path = profiler.dump(request.args.get("format", "collapsed"), name=SERVICE_NAME)
+    except ValueError as e:
+        return jsonify({"message": str(e), "response:": HTTPStatus.BAD_REQUEST.value}), HTTPStatus.BAD_REQUEST.value
+    if request.args.get("reset", "false").lower() == "true":
+        profiler.reset()
+    return send_file(path, as_attachment=True)
+
+
 @model_bp.route("/status", methods=["GET"])
 def status():
     response_code = HTTPStatus.OK
-    registry_logger.endpoint(f"Status request recieved. Response:{response_code}")
+    registry_logger.endpoint("Status request recieved.", route="/status", status=response_code.value, **endpoint_log_category(True))
     return jsonify({"message": "ado-flow up and running.", "Status": "OK"}), response_code.value
 
 
@@ -144,6 +319,10 @@ def upload_model():
                   type: string
                 description: A list of labels associated with the model.
                 example: ["updated_label"]
+              lineage:
+                type: string
+                description: Parent model and data watermark of the training run as a JSON string.
+                example: '{"parent": {"name": "CustomModel", "version": "0.9"}, "ancestors": [], "rows": 1200}'
     responses:
       200:
         description: Model uploaded successfully.
@@ -188,15 +367,14 @@ def upload_model():
     """
     try:
         data = schema.AddDeleteModelSchema().load(request.json)
-        future = executor.submit(BackgroundTasks.upload_model_task, data)
-        success, message = future.result()
-        response_code = HTTPStatus.OK
-        registry_logger.endpoint(f"Uploading model. {message} response:{response_code}")
-        if success:
-            return jsonify({"message": message, "response:": response_code.value}), response_code.value
-        return jsonify({"message": message, "response:": HTTPStatus.DECLINED.value}), HTTPStatus.DECLINED.value
+        success, message = run_in_executor(BackgroundTasks.upload_model_task, data)
+        response_code = HTTPStatus.OK if success else HTTPStatus.DECLINED
+        registry_logger.endpoint("Uploading model. %s", message, route="/upload_model", status=response_code.value, **endpoint_log_category(success))
+        return jsonify({"message": message, "response:": response_code.value}), response_code.value
     except ValidationError as err:
-        registry_logger.endpoint(f"Uploading model. {err.messages} response:{HTTPStatus.BAD_REQUEST}")
+        registry_logger.endpoint(
+            "Uploading model. %s", err.messages, route="/upload_model", status=HTTPStatus.BAD_REQUEST.value, **endpoint_log_category(False)
+        )
         return jsonify({"message": err.messages, "response:": str(HTTPStatus.BAD_REQUEST.value)}), HTTPStatus.BAD_REQUEST.value
 
 
@@ -286,15 +464,24 @@ def fetch_model():
     if not name or not version:
         return jsonify({"Error": "Model name and version are required", "response:": 400})
 
-    future = executor.submit(BackgroundTasks.fetch_model_task, name, version)
-    data_from_database, message = future.result()
+    data_from_database, message = run_in_executor(BackgroundTasks.fetch_model_task, name, version)
     if data_from_database is None:
         response_code = HTTPStatus.BAD_REQUEST.value
-        registry_logger.endpoint(f"Could not fetch data. {message} response:{response_code}")
+        registry_logger.endpoint(
+            "Could not fetch data. %s",
+            message,
+            route="/fetch_model",
+            model_name=name,
+            model_version=version,
+            status=response_code,
+            **endpoint_log_category(False),
+        )
         return jsonify({"data": data_from_database, "message": message, "response:": response_code})
     else:
         response_code = HTTPStatus.OK.value
-        registry_logger.endpoint(f"Fetch successful fetched data {data_from_database}. {message} response:{response_code}")
+        registry_logger.endpoint(
+            "Fetch successful.", route="/fetch_model", model_name=name, model_version=version, status=response_code, **endpoint_log_category(True)
+        )
         return jsonify({"model_metadata": data_from_database, "message": message, "response:": response_code})
 
 
@@ -368,15 +555,29 @@ def fetch_and_download_model():
     if not name or not version:
         return jsonify({"Error": "Model name and version are required", "response:": 400})
 
-    future = executor.submit(BackgroundTasks.fetch_model_task, name, version, True, download_path)
-    data_from_database, message = future.result()
+    data_from_database, message = run_in_executor(BackgroundTasks.fetch_model_task, name, version, True, download_path)
     if data_from_database is None:
         response_code = HTTPStatus.BAD_REQUEST.value
-        registry_logger.endpoint(f"Could not fetch data. {message} response:{response_code}")
+        registry_logger.endpoint(
+            "Could not fetch data. %s",
+            message,
+            route="/fetch_and_download_model",
+            model_name=name,
+            model_version=version,
+            status=response_code,
+            **endpoint_log_category(False),
+        )
         return jsonify({"data": data_from_database, "message": message, "response:": response_code})
     else:
         response_code = HTTPStatus.OK.value
-        registry_logger.endpoint(f"Fetch successful fetched data {data_from_database}. {message} response:{response_code}")
+        registry_logger.endpoint(
+            "Fetch and download successful.",
+            route="/fetch_and_download_model",
+            model_name=name,
+            model_version=version,
+            status=response_code,
+            **endpoint_log_category(True),
+        )
         return jsonify({"model_metadata": data_from_database, "message": message, "response:": response_code})
 
 
@@ -467,14 +668,16 @@ def update_model_entry():
     """
     try:
         data = schema.UpdateModelSchema().load(request.json)
-        future = executor.submit(BackgroundTasks.update_model_task, data)
-
-        success, message = future.result()
+        success, message = run_in_executor(BackgroundTasks.update_model_task, data)
         response_code = HTTPStatus.OK if success else HTTPStatus.DECLINED
-        registry_logger.endpoint(f"Updating model. {message} response:{response_code}")
+        registry_logger.endpoint(
+            "Updating model. %s", message, route="/update_model_entry", status=response_code.value, **endpoint_log_category(success)
+        )
         return jsonify({"message": message, "response:": response_code.value}), response_code.value
     except ValidationError as err:
-        registry_logger.endpoint(f"Updating model. {err.messages} response:{HTTPStatus.BAD_REQUEST.value}")
+        registry_logger.endpoint(
+            "Updating model. %s", err.messages, route="/update_model_entry", status=HTTPStatus.BAD_REQUEST.value, **endpoint_log_category(False)
+        )
         return jsonify({"message": err.messages, "response:": HTTPStatus.BAD_REQUEST.value}), HTTPStatus.BAD_REQUEST.value
 
 
@@ -545,11 +748,9 @@ def remove_model():
     if not name or not version:
         return jsonify({"error": "Model name and version are required", "response:": HTTPStatus.BAD_REQUEST.value}), HTTPStatus.BAD_REQUEST.value
 
-    future = executor.submit(BackgroundTasks.remove_model_task, data)
-
-    success, message = future.result()
+    success, message = run_in_executor(BackgroundTasks.remove_model_task, data)
     response_code = HTTPStatus.OK if success else HTTPStatus.DECLINED
-    registry_logger.endpoint(f"Updating model. {message} response:{response_code}")
+    registry_logger.endpoint("Removing model. %s", message, route="/remove_model", status=response_code.value, **endpoint_log_category(success))
     return jsonify({"message": message, "response:": response_code.value}), response_code.value
 
 
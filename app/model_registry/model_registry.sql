@@ -16,9 +16,13 @@ CREATE TABLE IF NOT EXISTS model_metadata (
     uploaded_file_name TEXT,
     features TEXT,
     status TEXT CHECK(status IN ('deployed', 'archived', 'under review')) DEFAULT 'under review',
+    lineage TEXT,
     UNIQUE(name, version)  -- Ensure unique combination of name and version
 );
 
+-- Add the lineage column
+ALTER TABLE model_metadata ADD COLUMN lineage TEXT;
+
 -- Create the labels table
 CREATE TABLE IF NOT EXISTS labels (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -35,8 +39,8 @@ CREATE TABLE IF NOT EXISTS model_labels (
 );
 
 -- Insert model metadata
-INSERT INTO model_metadata (name, version, file_path, description, created_at, framework, framework_version, training_data, hyperparameters, evaluation_metrics, model_author, last_updated, uploaded_file_name, features, status)
-VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+INSERT INTO model_metadata (name, version, file_path, description, created_at, framework, framework_version, training_data, hyperparameters, evaluation_metrics, model_author, last_updated, uploaded_file_name, features, status, lineage)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
 
 -- Insert label if it does not exist
 INSERT OR IGNORE INTO labels (label) VALUES (?);
@@ -46,6 +46,8 @@ class ModelSchema(BaseModelSchema):
         status (str, optional): The current status of the model (e.g., "deployed", "archived", "under review", "special-use").
             Defaults to "under review."
         labels (list of str, optional): Labels associated with the model for categorization. Defaults to ["No Label"].
+        lineage (str, optional): Parent model and data watermark of the training run, serialized as JSON.
+            Defaults to "No lineage specified."
 
     Args:
         BaseModelSchema (Schema): Inherits from the base schema for model metadata.
@@ -61,6 +63,7 @@ class ModelSchema(BaseModelSchema):
     model_author = fields.Str(required=False, validate=validate.Length(min=1), missing="ADO-AI")
     status = fields.Str(required=False, validate=validate.OneOf(["deployed", "archived", "under review", "special-use"]), missing="under review")
     labels = fields.List(fields.Str(), required=False, missing=["No Label"])
+    lineage = fields.Str(required=False, missing="No lineage specified.")  # Can be JSON serialized
 
 
 class AddDeleteModelSchema(ModelSchema):
@@ -18,6 +18,7 @@ from model_registry.model_schema import FetchModelSchema  # noreorder # noqa
 from model_registry.model_schema import BaseModelSchema  # noreorder # noqa
 from model_registry.sqllite_db import SQLiteDB  # noreorder # noqa
 from model_registry.storage_manager import GCloudStorageManager  # noreorder # noqa
+from model_registry.storage_manager import LocalStorageManager  # noreorder # noqa
 from logger.logger import ColorLogger  # noreorder # noqa
 
 
@@ -36,6 +37,7 @@ class ModelRegistry:
         logger: ColorLogger,
         bucket_name: str | None = None,
         query_path: str = os.path.join(current_dir, "model_registry.sql"),
+        storage_manager: GCloudStorageManager | LocalStorageManager | None = None,
     ):
         """
         Initialize the ModelRegistry with a database file and SQL query file path.
@@ -44,6 +46,8 @@ class ModelRegistry:
             db_file (str): The path to the SQLite database file where model metadata is stored.
             query_path (str, optional): The path to the SQL file containing SQL queries for managing the model registry.
                 Defaults to the 'model_registry.sql' file in the current directory.
+            storage_manager (GCloudStorageManager | LocalStorageManager, optional): Storage of the model files. Defaults to a
+                `GCloudStorageManager` of `bucket_name`.
         """
 
         os.makedirs(os.path.dirname(db_file), exist_ok=True)
@@ -53,7 +57,7 @@ class ModelRegistry:
         self.logger.info(f"Using database file {db_file}")
 
         self.sql_queries = self.__load_sql_queries(query_path)
-        self.storage_manager = GCloudStorageManager(bucket_name=bucket_name, logger=self.logger)
+        self.storage_manager = GCloudStorageManager(bucket_name=bucket_name, logger=self.logger) if storage_manager is None else storage_manager
 
     def create_tables(self):
         """
@@ -65,12 +69,15 @@ class ModelRegistry:
         - `model_labels`: A junction table that links models to their associated labels.
 
         If the tables already exist, the method does nothing. If an error occurs during table creation,
-        it prints the error message.
+        it prints the error message. A `model_metadata` table created before the `lineage` column existed gets the column added.
         """
         with SQLiteDB(self.db_file, logger=self.logger) as conn:
             try:
                 cursor = conn.cursor()
                 cursor.execute(self.sql_queries["Create the model_metadata table"])
+                cursor.execute("PRAGMA table_info(model_metadata);")
+                if "lineage" not in [info[1] for info in cursor.fetchall()]:
+                    cursor.execute(self.sql_queries["Add the lineage column"])
                 cursor.execute(self.sql_queries["Create the labels table"])
                 cursor.execute(self.sql_queries["Create the model_labels table"])
                 self.logger.database("Tables created or already exist.")
@@ -92,6 +99,7 @@ class ModelRegistry:
         status: str,
         features: str,
         labels: list,
+        lineage: str = "No lineage specified.",
     ):
         """
         Insert a new model into the model registry, including its metadata and associated labels.
@@ -113,6 +121,7 @@ class ModelRegistry:
             model_author (str): The author of the model.
             status (str): The status of the model (e.g., "deployed", "archived", "under review", "special-use").
             labels (list): A list of labels (tags) associated with the model.
+            lineage (str, optional): Parent model and data watermark of the training run, typically as a JSON string.
 
         Raises:
             FileNotFoundError: If the specified model file path does not exist.
@@ -153,6 +162,7 @@ class ModelRegistry:
                         uploaded_file_name,
                         features,
                         status,
+                        lineage,
                     ),
                 )
                 model_id = cursor.lastrowid
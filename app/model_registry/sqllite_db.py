@@ -1,9 +1,44 @@
 from __future__ import annotations
 
 import sqlite3
+import time
 from sqlite3 import Error
 
 from logger.logger import ColorLogger
+from monitoring.metrics import sql_operation
+from monitoring.metrics import SQLITE_QUERY_LATENCY
+
+
+class TimedCursor(sqlite3.Cursor):
+    """
+    Cursor that records the execution time of every statement in the `sqlite_query_duration_seconds` histogram.
+    """
+
+    def execute(self, sql, parameters=()):
+        start_time = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            SQLITE_QUERY_LATENCY.labels(operation=sql_operation(sql)).observe(time.perf_counter() - start_time)
+
+    def executemany(self, sql, seq_of_parameters):
+        start_time = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            SQLITE_QUERY_LATENCY.labels(operation=sql_operation(sql)).observe(time.perf_counter() - start_time)
+
+
+class TimedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors are `TimedCursor` instances unless another factory is requested.
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
 
 
 class SQLiteDB:
@@ -30,7 +65,7 @@ class SQLiteDB:
             sqlite3.Connection: The SQLite connection object.
         """
         try:
-            self.conn = sqlite3.connect(self.db_file)
+            self.conn = sqlite3.connect(self.db_file, factory=TimedConnection)
             self.conn.row_factory = sqlite3.Row  # Set row factory to return dict-like rows
             self.logger.database(f"Connected to SQLite database '{self.db_file}'")
             return self.conn
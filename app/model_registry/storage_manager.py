@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import os.path
+import shutil
+import time
 from pathlib import Path
 from typing import Final
 
 from gcloud import storage
 from oauth2client.service_account import ServiceAccountCredentials
 from logger.logger import ColorLogger  # noreorder # noqa
+from monitoring.metrics import STORAGE_TRANSFER_BYTES  # noreorder # noqa
+from monitoring.metrics import STORAGE_TRANSFER_LATENCY  # noreorder # noqa
 
 
 class GCloudStorageManager:
@@ -62,12 +66,16 @@ class GCloudStorageManager:
         """
         if not os.path.exists(source_filename):
             raise FileNotFoundError(f"Model file '{source_filename}' does not exist! Please check the file location.")
+        start_time = time.perf_counter()
         try:
             blob = self.bucket.blob(destination_filename)
             blob.upload_from_filename(source_filename)
+            STORAGE_TRANSFER_BYTES.labels(operation="upload").inc(os.path.getsize(source_filename))
+            STORAGE_TRANSFER_LATENCY.labels(operation="upload", outcome="success").observe(time.perf_counter() - start_time)
             self.logger.storage(f"File {source_filename} successfully uploaded.")
             return True
         except Exception as e:
+            STORAGE_TRANSFER_LATENCY.labels(operation="upload", outcome="failure").observe(time.perf_counter() - start_time)
             self.logger.storage_error(f"Exception {e}. File {source_filename} upload failed.")
             return False
 
@@ -86,6 +94,7 @@ class GCloudStorageManager:
         Returns:
             None
         """
+        start_time = time.perf_counter()
         try:
             if Path(download_path).suffix or download_path == "":
                 self.logger.warning(f"{download_path} is likely intended to be a file.")
@@ -94,10 +103,13 @@ class GCloudStorageManager:
             os.makedirs(download_path, exist_ok=True)
             blob = self.bucket.blob(filename)
             blob.download_to_filename(download_path + os.sep + filename)  # Download the file to a destination
+            STORAGE_TRANSFER_BYTES.labels(operation="download").inc(os.path.getsize(download_path + os.sep + filename))
+            STORAGE_TRANSFER_LATENCY.labels(operation="download", outcome="success").observe(time.perf_counter() - start_time)
             message = f"File {filename} downloaded to {download_path}"
             self.logger.storage(f"File {filename} downloaded to {download_path}")
             return True, message
         except Exception as e:
+            STORAGE_TRANSFER_LATENCY.labels(operation="download", outcome="failure").observe(time.perf_counter() - start_time)
             message = f"Exception {e}. File {filename} could not downloaded to {download_path}"
             self.logger.storage_error(message)
             return False, message
@@ -115,11 +127,84 @@ class GCloudStorageManager:
         Returns:
             bool: True if the file was deleted successfully, False otherwise.
         """
+        start_time = time.perf_counter()
         try:
             blob = self.bucket.blob(destination_filename)
             blob.delete()
+            STORAGE_TRANSFER_LATENCY.labels(operation="delete", outcome="success").observe(time.perf_counter() - start_time)
             self.logger.storage(f"File {destination_filename} removed successfully.")
             return True
         except Exception as e:
+            STORAGE_TRANSFER_LATENCY.labels(operation="delete", outcome="failure").observe(time.perf_counter() - start_time)
+            self.logger.storage_error(f"File {destination_filename} could not removed. Exception {e}")
+            return False
+
+
+class LocalStorageManager:
+    """
+    A stand-in for `GCloudStorageManager` that keeps model files in a local directory.
+
+    It has the same methods and return values, so a `ModelRegistry` can run without cloud credentials or network access, e.g. in
+    benchmarks, load tests and local development.
+
+    Args:
+        logger (ColorLogger): Logger of the storage operations.
+        storage_dir (str, optional): Directory standing in for the bucket. Defaults to "local_storage".
+    """
+
+    STORAGE_DIR: Final = "local_storage"
+
+    def __init__(self, logger: ColorLogger, storage_dir: str = STORAGE_DIR):
+        os.makedirs(storage_dir, exist_ok=True)
+        self.storage_dir = storage_dir
+        self.logger = logger
+
+    def upload_file(self, source_filename: str, destination_filename: str):
+        """Copy a file into the storage directory, see `GCloudStorageManager.upload_file`."""
+        if not os.path.exists(source_filename):
+            raise FileNotFoundError(f"Model file '{source_filename}' does not exist! Please check the file location.")
+        start_time = time.perf_counter()
+        try:
+            shutil.copyfile(source_filename, os.path.join(self.storage_dir, destination_filename))
+            STORAGE_TRANSFER_BYTES.labels(operation="upload").inc(os.path.getsize(source_filename))
+            STORAGE_TRANSFER_LATENCY.labels(operation="upload", outcome="success").observe(time.perf_counter() - start_time)
+            self.logger.storage(f"File {source_filename} successfully uploaded.")
+            return True
+        except Exception as e:
+            STORAGE_TRANSFER_LATENCY.labels(operation="upload", outcome="failure").observe(time.perf_counter() - start_time)
+            self.logger.storage_error(f"Exception {e}. File {source_filename} upload failed.")
+            return False
+
+    def download_file(self, filename: str, download_path: str = "Downloads"):
+        """Copy a file out of the storage directory, see `GCloudStorageManager.download_file`."""
+        start_time = time.perf_counter()
+        try:
+            if Path(download_path).suffix or download_path == "":
+                self.logger.warning(f"{download_path} is likely intended to be a file.")
+                download_path = "Downloads"
+
+            os.makedirs(download_path, exist_ok=True)
+            shutil.copyfile(os.path.join(self.storage_dir, filename), download_path + os.sep + filename)
+            STORAGE_TRANSFER_BYTES.labels(operation="download").inc(os.path.getsize(download_path + os.sep + filename))
+            STORAGE_TRANSFER_LATENCY.labels(operation="download", outcome="success").observe(time.perf_counter() - start_time)
+            message = f"File {filename} downloaded to {download_path}"
+            self.logger.storage(message)
+            return True, message
+        except Exception as e:
+            STORAGE_TRANSFER_LATENCY.labels(operation="download", outcome="failure").observe(time.perf_counter() - start_time)
+            message = f"Exception {e}. File {filename} could not downloaded to {download_path}"
+            self.logger.storage_error(message)
+            return False, message
+
+    def delete_file(self, destination_filename: str):
+        """Remove a file from the storage directory, see `GCloudStorageManager.delete_file`."""
+        start_time = time.perf_counter()
+        try:
+            os.remove(os.path.join(self.storage_dir, destination_filename))
+            STORAGE_TRANSFER_LATENCY.labels(operation="delete", outcome="success").observe(time.perf_counter() - start_time)
+            self.logger.storage(f"File {destination_filename} removed successfully.")
+            return True
+        except Exception as e:
+            STORAGE_TRANSFER_LATENCY.labels(operation="delete", outcome="failure").observe(time.perf_counter() - start_time)
             self.logger.storage_error(f"File {destination_filename} could not removed. Exception {e}")
             return False
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import itertools
+import math
+import threading
+from typing import Final
+
+SUMMARY_PERCENTILES: Final = {"p50": 50.0, "p95": 95.0, "p99": 99.0, "p999": 99.9}
+
+
+class LatencyHistogram:
+    """
+    HdrHistogram style latency histogram with a fixed relative error, safe to record into from many threads.
+
+    Values are integer microseconds. Every power of two range above the linear part is split into the same number of
+    sub buckets, so three significant digits cost a few hundred kilobytes whatever the spread of the latencies is and
+    the tail percentiles are as exact as the median.
+
+    Args:
+        significant_digits (int): Decimal digits kept for every recorded value.
+        highest_value (int): Largest trackable latency in microseconds, larger values are clamped to it.
+    """
+
+    def __init__(self, significant_digits: int = 3, highest_value: int = 60_000_000):
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5.")
+        self.significant_digits = significant_digits
+        self.highest_value = highest_value
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_digits))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.counts = [0] * (self._index(highest_value) + 1)
+        self.total_count = 0
+        self.total = 0
+        self.total_of_squares = 0
+        self.min_value = highest_value
+        self.max_value = 0
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        shift = max(value.bit_length() - self.sub_bucket_bits, 0)
+        return shift * self.sub_bucket_half_count + (value >> shift)
+
+    def _lowest_value(self, index: int) -> int:
+        shift = max(index // self.sub_bucket_half_count - 1, 0)
+        return (index - shift * self.sub_bucket_half_count) << shift
+
+    def _highest_value(self, index: int) -> int:
+        return self._lowest_value(index + 1) - 1
+
+    def record(self, value: int):
+        """
+        Record one latency.
+
+        Args:
+            value (int): Latency in microseconds.
+        """
+        value = min(max(int(value), 0), self.highest_value)
+        with self._lock:
+            self.counts[self._index(value)] += 1
+            self.total_count += 1
+            self.total += value
+            self.total_of_squares += value * value
+            self.min_value = min(self.min_value, value)
+            self.max_value = max(self.max_value, value)
+
+    def record_seconds(self, seconds: float):
+        """
+        Record one latency measured with `time.perf_counter`.
+        """
+        self.record(round(seconds * 1_000_000))
+
+    def merge(self, other: LatencyHistogram) -> LatencyHistogram:
+        """
+        Add the counts of another histogram with the same layout, e.g. one per worker.
+
+        Returns:
+            LatencyHistogram: This histogram.
+        """
+        if (other.significant_digits, other.highest_value) != (self.significant_digits, self.highest_value):
+            raise ValueError("Only histograms with the same significant digits and highest value can be merged.")
+        with self._lock:
+            self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+            self.total_count += other.total_count
+            self.total += other.total
+            self.total_of_squares += other.total_of_squares
+            self.min_value = min(self.min_value, other.min_value)
+            self.max_value = max(self.max_value, other.max_value)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.total_count if self.total_count else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(max(self.total_of_squares / self.total_count - self.mean**2, 0.0)) if self.total_count else 0.0
+
+    def _index_at_percentile(self, percentile: float) -> tuple[int, int]:
+        target = max(math.ceil(min(percentile, 100.0) / 100 * self.total_count), 1)
+        for index, cumulative_count in enumerate(itertools.accumulate(self.counts)):
+            if cumulative_count >= target:
+                return index, cumulative_count
+        return len(self.counts) - 1, self.total_count
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """
+        Smallest recorded latency, up to the histogram precision, that `percentile` percent of the values do not exceed.
+
+        Args:
+            percentile (float): Percentile between 0 and 100.
+
+        Returns:
+            int: Latency in microseconds, 0 when nothing was recorded.
+        """
+        if not self.total_count:
+            return 0
+        index, _ = self._index_at_percentile(percentile)
+        return min(self._highest_value(index), self.max_value)
+
+    def summary(self, unit_scale: float = 1000) -> dict[str, float]:
+        """
+        Summary percentiles, mean and max of the recorded latencies.
+
+        Args:
+            unit_scale (float): Divisor of the microsecond values, the default reports milliseconds.
+
+        Returns:
+            dict: Values keyed by p50, p95, p99, p999, mean and max.
+        """
+        summary = {name: self.value_at_percentile(percentile) / unit_scale for name, percentile in SUMMARY_PERCENTILES.items()}
+        summary.update(mean=self.mean / unit_scale, max=self.max_value / unit_scale)
+        return summary
+
+    def write_percentile_distribution(self, file, unit_scale: float = 1000, ticks_per_half_distance: int = 5):
+        """
+        Write the percentile distribution in the `.hgrm` text format read by the HdrHistogram plotting tools.
+
+        Args:
+            file: Text file object to write to.
+            unit_scale (float): Divisor of the microsecond values, the default writes milliseconds.
+            ticks_per_half_distance (int): Reported percentiles per halving of the distance to 100%.
+        """
+        digits = self.significant_digits
+        file.write(f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}\n\n")
+        percentile = 0.0
+        while self.total_count:
+            index, cumulative_count = self._index_at_percentile(percentile)
+            if cumulative_count >= self.total_count:
+                break
+            value = min(self._highest_value(index), self.max_value) / unit_scale
+            file.write(f"{value:12.{digits}f} {percentile / 100:2.12f} {cumulative_count:10d} {1 / (1 - percentile / 100):14.2f}\n")
+            half_distance = 2 ** (int(math.log2(100 / (100 - percentile))) + 1)
+            percentile += 100 / (ticks_per_half_distance * half_distance)
+        file.write(f"{self.max_value / unit_scale:12.{digits}f} {1:2.12f} {self.total_count:10d}\n")
+        file.write(f"#[Mean    = {self.mean / unit_scale:12.{digits}f}, StdDeviation   = {self.stddev / unit_scale:12.{digits}f}]\n")
+        file.write(f"#[Max     = {self.max_value / unit_scale:12.{digits}f}, Total count    = {self.total_count:12d}]\n")
+        file.write(f"#[Buckets = {len(self.counts) // self.sub_bucket_half_count - 1:12d}, SubBuckets     = {self.sub_bucket_count:12d}]\n")
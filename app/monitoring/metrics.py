@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+from typing import Final
+
+from prometheus_client import CollectorRegistry
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import generate_latest
+from prometheus_client import Histogram
+from prometheus_client import multiprocess
+
+PROMETHEUS_MULTIPROC_DIR_ENV: Final = "PROMETHEUS_MULTIPROC_DIR"
+
+METRICS_CONTENT_TYPE: Final = CONTENT_TYPE_LATEST
+UNMATCHED_ROUTE: Final = "unmatched"
+
+# Label values are restricted to these sets so a malformed query or route can not explode series count.
+SQL_OPERATIONS: Final = frozenset(["SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "PRAGMA"])
+SQL_OTHER_OPERATION: Final = "OTHER"
+
+LATENCY_BUCKETS: Final = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Multiprocess mode (uvicorn workers, flask process executor) writes the metric values below into this shared directory.
+if os.environ.get(PROMETHEUS_MULTIPROC_DIR_ENV):
+    os.makedirs(os.environ[PROMETHEUS_MULTIPROC_DIR_ENV], exist_ok=True)
+
+# Every module owns a private registry so importing this file through both `app.monitoring` and `monitoring` never double registers.
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency per service and route template.",
+    ["service", "route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+ENGINE_STAGE_LATENCY = Histogram(
+    "inference_engine_stage_duration_seconds",
+    "Duration of each MlInferenceEngine stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+SQLITE_QUERY_LATENCY = Histogram(
+    "sqlite_query_duration_seconds",
+    "SQLite statement execution time grouped by statement type.",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+STORAGE_TRANSFER_BYTES = Counter(
+    "storage_transfer_bytes",
+    "Bytes moved to or from model storage.",
+    ["operation"],
+    registry=REGISTRY,
+)
+
+STORAGE_TRANSFER_LATENCY = Histogram(
+    "storage_transfer_duration_seconds",
+    "Duration of model storage transfers.",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache lookups by cache name and result (hit or miss). Hit ratio is hit / (hit + miss).",
+    ["cache", "result"],
+    registry=REGISTRY,
+)
+
+QUEUE_DEPTH = Gauge(
+    "queue_depth",
+    "Number of items waiting in an internal queue.",
+    ["queue"],
+    multiprocess_mode="livesum",
+    registry=REGISTRY,
+)
+
+IN_FLIGHT_TASKS = Gauge(
+    "in_flight_tasks",
+    "Number of tasks submitted to a background executor and not finished yet, queued or running.",
+    ["executor"],
+    multiprocess_mode="livesum",
+    registry=REGISTRY,
+)
+
+
+def sql_operation(sql: str) -> str:
+    """Reduce an SQL statement to its leading keyword so it can be used as a low cardinality label.
+
+    Args:
+        sql (str): SQL statement that is about to be executed.
+
+    Returns:
+        str: Upper case statement type such as `SELECT`, or `OTHER` for anything unexpected.
+    """
+    tokens = sql.split(maxsplit=1)
+    operation = tokens[0].upper() if tokens else SQL_OTHER_OPERATION
+    return operation if operation in SQL_OPERATIONS else SQL_OTHER_OPERATION
+
+
+def record_cache_access(cache: str, hit: bool):
+    """Count a single cache lookup.
+
+    Args:
+        cache (str): Name of the cache, must come from a fixed set chosen by the caller.
+        hit (bool): Whether the lookup was served from the cache.
+    """
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics() -> bytes:
+    """Render every metric in Prometheus text exposition format.
+
+    When `PROMETHEUS_MULTIPROC_DIR` is set the values written by all worker processes are aggregated,
+    otherwise only the current process is reported.
+
+    Returns:
+        bytes: Payload for the `/metrics` endpoint.
+    """
+    if os.environ.get(PROMETHEUS_MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import collections
+import json
+import os
+import sys
+import threading
+import time
+from typing import Final
+
+PROFILER_ENABLED_ENV: Final = "PROFILER_ENABLED"
+PROFILER_ADMIN_ENABLED_ENV: Final = "PROFILER_ADMIN_ENABLED"
+PROFILER_FREQUENCY_ENV: Final = "PROFILER_FREQUENCY_HZ"
+PROFILER_DUMP_DIR_ENV: Final = "PROFILER_DUMP_DIR"
+DEFAULT_FREQUENCY_HZ: Final = 100.0
+DEFAULT_DUMP_DIR: Final = "profiles"
+PROFILE_FORMATS: Final = {"collapsed": "txt", "speedscope": "speedscope.json"}
+SPEEDSCOPE_SCHEMA: Final = "https://www.speedscope.app/file-format-schema.json"
+
+
+class SamplingProfiler:
+    """
+    In process sampling profiler for flame graphs of a running service.
+
+    A daemon thread takes the stack of every other thread with `sys._current_frames` at a fixed frequency and counts
+    identical stacks, so the cost is one stack walk per thread and sample whatever the request rate is. Stacks start with
+    the thread name, idle workers show up under their own root instead of being mixed into the busy ones. The counts can
+    be exported as collapsed stacks (flamegraph.pl, speedscope) or as a speedscope sampled profile.
+
+    Args:
+        frequency_hz (float): Samples per second.
+        max_depth (int): Innermost frames kept per stack, deeper recursion is cut at the outer end.
+        dump_directory (str): Directory `dump` writes the profile files to.
+    """
+
+    def __init__(self, frequency_hz: float = DEFAULT_FREQUENCY_HZ, max_depth: int = 128, dump_directory: str = DEFAULT_DUMP_DIR):
+        if frequency_hz <= 0:
+            raise ValueError("frequency_hz must be positive.")
+        self.frequency_hz = frequency_hz
+        self.max_depth = max_depth
+        self.dump_directory = dump_directory
+        self.stack_counts: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self.samples = 0
+        self.sampling_seconds = 0.0
+        self._frame_names: dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, frequency_hz: float | None = None) -> bool:
+        """
+        Start sampling in a background thread, samples of earlier runs are kept until `reset`.
+
+        Args:
+            frequency_hz (float, optional): New sampling frequency.
+
+        Returns:
+            bool: False if the profiler was already running.
+        """
+        if frequency_hz is not None and frequency_hz <= 0:
+            raise ValueError("frequency_hz must be positive.")
+        with self._lock:
+            if self.running:
+                return False
+            self.frequency_hz = frequency_hz or self.frequency_hz
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        """
+        Stop sampling and keep the collected stacks.
+
+        Returns:
+            bool: False if the profiler was not running.
+        """
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            return True
+
+    def reset(self):
+        with self._lock:
+            self.stack_counts.clear()
+            self.samples = 0
+            self.sampling_seconds = 0.0
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "frequency_hz": self.frequency_hz,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stack_counts),
+            "sampling_seconds": self.sampling_seconds,  # Time spent taking samples, the overhead on the service.
+        }
+
+    def _run(self):
+        interval = 1 / self.frequency_hz
+        # Sleeping until the next tick instead of a fixed interval keeps the frequency when a sample is slow.
+        next_sample = time.perf_counter() + interval
+        while not self._stop.wait(max(next_sample - time.perf_counter(), 0)):
+            start_time = time.perf_counter()
+            self.sample()
+            self.sampling_seconds += time.perf_counter() - start_time
+            next_sample = max(next_sample + interval, start_time)
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = self._frame_names[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return name
+
+    def sample(self):
+        """
+        Take one sample of every thread except the calling one.
+        """
+        own_thread = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            stacks.append(tuple(reversed(stack)))
+        self.stack_counts.update(stacks)
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Stacks in the collapsed format of flamegraph.pl, one `root;...;leaf count` line per distinct stack.
+        """
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(dict(self.stack_counts).items()))
+
+    def speedscope(self, name: str = "profile") -> dict:
+        """
+        Stacks as a speedscope sampled profile, weighted in seconds of wall clock time.
+        """
+        frame_indexes: dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in dict(self.stack_counts).items():
+            samples.append([frame_indexes.setdefault(frame, len(frame_indexes)) for frame in stack])
+            weights.append(count / self.frequency_hz)
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "ado-flow sampling profiler",
+            "shared": {"frames": [{"name": frame} for frame in frame_indexes]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+    def export(self, profile_format: str = "collapsed", name: str = "profile") -> str:
+        """
+        Render the collected stacks.
+
+        Args:
+            profile_format (str): `collapsed` or `speedscope`.
+            name (str): Profile name shown by speedscope.
+
+        Returns:
+            str: File content in the requested format.
+        """
+        if profile_format not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format {profile_format}, use one of {sorted(PROFILE_FORMATS)}.")
+        return self.collapsed() if profile_format == "collapsed" else json.dumps(self.speedscope(name))
+
+    def dump(self, profile_format: str = "collapsed", name: str = "profile") -> str:
+        """
+        Write the collected stacks to `<dump_directory>/<name>_<pid>_<timestamp>.<extension>`.
+
+        Returns:
+            str: Absolute path of the written file.
+        """
+        content = self.export(profile_format, name)
+        os.makedirs(self.dump_directory, exist_ok=True)
+        path = os.path.join(
+            os.path.abspath(self.dump_directory), f"{name}_{os.getpid()}_{time.strftime('%Y%m%d_%H%M%S')}.{PROFILE_FORMATS[profile_format]}"
+        )
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+
+def profiler_from_env() -> SamplingProfiler:
+    """
+    Profiler of a service configured by PROFILER_FREQUENCY_HZ and PROFILER_DUMP_DIR, already sampling when PROFILER_ENABLED is 1.
+    """
+    profiler = SamplingProfiler(
+        frequency_hz=float(os.environ.get(PROFILER_FREQUENCY_ENV, DEFAULT_FREQUENCY_HZ)),
+        dump_directory=os.environ.get(PROFILER_DUMP_DIR_ENV, DEFAULT_DUMP_DIR),
+    )
+    os.environ.get(PROFILER_ENABLED_ENV) == "1" and profiler.start()
+    return profiler
+
+
+def admin_routes_enabled() -> bool:
+    """
+    Whether the services mount the unauthenticated `/admin/profiler` routes, only when PROFILER_ADMIN_ENABLED is 1.
+    """
+    return os.environ.get(PROFILER_ADMIN_ENABLED_ENV) == "1"
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import random
+import time
+
+
+class Span:
+    """
+    Context manager that measures one stage of a trace and adds its duration to the owning trace.
+    """
+
+    __slots__ = ("trace", "name", "start_time")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+        self.start_time = 0.0
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.start_time
+        self.trace.durations[self.name] = self.trace.durations.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _NullSpan:
+    """
+    Shared no-op span handed out by unsampled traces so the hot path only pays for an attribute lookup.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """
+    Collection of stage durations recorded for a single request.
+
+    Args:
+        sampled (bool): Unsampled traces hand out no-op spans and record nothing.
+    """
+
+    __slots__ = ("sampled", "durations")
+
+    def __init__(self, sampled: bool):
+        self.sampled = sampled
+        self.durations: dict[str, float] = {}
+
+    def span(self, name: str):
+        """
+        Open a span for the given stage.
+
+        Args:
+            name (str): Stage name, must come from a fixed set because it is exported as a metric label.
+
+        Returns:
+            Span: Context manager timing the stage, or a no-op span if the trace is not sampled.
+        """
+        return Span(self, name) if self.sampled else NULL_SPAN
+
+    def breakdown_ms(self) -> dict[str, float]:
+        """
+        Stage durations in milliseconds in the order the stages were first entered.
+        """
+        return {name: duration * 1000 for name, duration in self.durations.items()}
+
+
+class Tracer:
+    """
+    Creates per request traces and exports finished ones to a Prometheus histogram.
+
+    Args:
+        sample_rate (float, optional): Fraction of traces that are recorded. Defaults to 1.0.
+        histogram (prometheus_client.Histogram, optional): Histogram with a `stage` label receiving span durations in seconds.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, histogram=None):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Trace sample rate must be between 0 and 1, got {sample_rate}.")
+        self.sample_rate = sample_rate
+        self.histogram = histogram
+
+    def start_trace(self, force: bool = False) -> Trace:
+        """
+        Start a new trace.
+
+        Args:
+            force (bool, optional): Record the trace regardless of the sample rate. Defaults to False.
+
+        Returns:
+            Trace: The new trace.
+        """
+        return Trace(sampled=force or random.random() < self.sample_rate)
+
+    def finish(self, trace: Trace):
+        """
+        Export the durations of a sampled trace.
+
+        Args:
+            trace (Trace): Trace returned by `start_trace`.
+        """
+        if trace.sampled and self.histogram is not None:
+            for name, duration in trace.durations.items():
+                self.histogram.labels(stage=name).observe(duration)
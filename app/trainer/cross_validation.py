@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable
+
+import numpy as np
+from sklearn.model_selection import KFold
+from threadpoolctl import threadpool_limits
+
+# Arrays and fold splitter of a worker process, attached once by the pool initializer.
+_worker_state: dict = {}
+
+
+def _to_shared_memory(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    """Copies an array into a new shared memory block. Returns the block and the descriptor workers attach with."""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach(descriptor: tuple) -> np.ndarray:
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    # The block must outlive the array, which only borrows its buffer.
+    _worker_state.setdefault("blocks", []).append(block)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def _init_worker(X_descriptor: tuple, y_descriptor: tuple, folds: int, random_state: int, threads_per_fit: int):
+    threadpool_limits(limits=threads_per_fit)
+    _worker_state.update(X=_attach(X_descriptor), y=_attach(y_descriptor))
+    _worker_state["splits"] = list(KFold(n_splits=folds, shuffle=True, random_state=random_state).split(_worker_state["X"]))
+
+
+def _run_fold(fold: int, build_model: Callable, hyperparameters: dict, score: Callable) -> dict:
+    X, y = _worker_state["X"], _worker_state["y"]
+    train_index, validation_index = _worker_state["splits"][fold]
+
+    model = build_model(hyperparameters)
+    model.fit(X[train_index], y[train_index])
+    return score(y[validation_index], model.predict(X[validation_index]))
+
+
+def run_cross_validation(
+    build_model: Callable,
+    hyperparameters: dict,
+    score: Callable,
+    X: np.ndarray,
+    y: np.ndarray,
+    folds: int = 5,
+    random_state: int = 42,
+    workers: int = None,
+    threads_per_fit: int = 1,
+) -> list[dict]:
+    """
+    Trains and scores one model per fold of a shuffled k-fold split, with the folds running in parallel worker processes.
+
+    The arrays are copied once into shared memory and every worker maps them, so neither the data nor a DataFrame is pickled
+    per worker or per fold. Each worker computes the same fold indices from `random_state`.
+
+    Args:
+        build_model (Callable): Creates an untrained model from hyperparameters, e.g. `XGBoostRegressionTrainer.build_model`.
+        hyperparameters (dict): Hyperparameters of every fold's model.
+        score (Callable): Maps `(y_true, y_pred)` of a validation fold to a dict of metrics.
+        X (np.ndarray): Features.
+        y (np.ndarray): Target.
+        folds (int, optional): Number of folds. Defaults to 5.
+        random_state (int, optional): Seed of the fold shuffle. Defaults to 42.
+        workers (int, optional): Number of worker processes. Defaults to one per fold.
+        threads_per_fit (int, optional): BLAS and OpenMP threads of every worker. Defaults to 1.
+
+    Returns:
+        list[dict]: Metrics of every fold in fold order.
+    """
+    X_block, X_descriptor = _to_shared_memory(X)
+    y_block, y_descriptor = _to_shared_memory(y)
+    try:
+        # Spawned workers do not inherit the thread pools of polars and the logger from this process.
+        with ProcessPoolExecutor(
+            max_workers=workers or folds,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(X_descriptor, y_descriptor, folds, random_state, threads_per_fit),
+        ) as executor:
+            futures = [executor.submit(_run_fold, fold, build_model, hyperparameters, score) for fold in range(folds)]
+            return [future.result() for future in futures]
+    finally:
+        for block in [X_block, y_block]:
+            block.close()
+            block.unlink()
+
+
+def summarize_folds(fold_metrics: list[dict]) -> dict:
+    """
+    Mean and standard deviation of every metric across folds.
+
+    Args:
+        fold_metrics (list[dict]): Metrics of every fold, as returned by `run_cross_validation`.
+
+    Returns:
+        dict: `<metric> mean (<k>-fold)` and `<metric> std (<k>-fold)` for every metric.
+    """
+    folds = len(fold_metrics)
+    summary = {}
+    for metric in fold_metrics[0]:
+        values = np.array([metrics[metric] for metrics in fold_metrics], dtype=np.float64)
+        summary[f"{metric} mean ({folds}-fold)"] = float(values.mean())
+        summary[f"{metric} std ({folds}-fold)"] = float(values.std())
+    return summary
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Final
+
+import polars as pl
+
+
+class ProcessedDatasetCache:
+    """
+    On disk cache of processed train and test datasets.
+
+    Entries are keyed by the content hash of the raw CSV and the processing parameters, so a changed file or config never
+    hits a stale entry. Every entry is a directory holding the datasets as Arrow IPC files, which are memory mapped on load.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+    """
+
+    TRAIN_FILE: Final = "train.arrow"
+    TEST_FILE: Final = "test.arrow"
+    METADATA_FILE: Final = "metadata.json"
+    HASH_CHUNK_BYTES: Final = 8 * 1024 * 1024
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """
+        SHA-256 of a file's content, read in chunks so large exports are never loaded at once.
+
+        Args:
+            file_path (str): File to hash.
+
+        Returns:
+            str: Hex digest.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            while chunk := file.read(ProcessedDatasetCache.HASH_CHUNK_BYTES):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key(self, csv_path: str, params: dict) -> str:
+        """
+        Cache key of a raw CSV processed with the given parameters.
+
+        Args:
+            csv_path (str): Raw dataset.
+            params (dict): JSON serializable processing parameters. Key order does not matter.
+
+        Returns:
+            str: Hex digest identifying the processed dataset.
+        """
+        digest = hashlib.sha256(ProcessedDatasetCache.file_digest(csv_path).encode())
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def train_path(self, key: str) -> str:
+        return os.path.join(self.entry_path(key), ProcessedDatasetCache.TRAIN_FILE)
+
+    def contains(self, key: str) -> bool:
+        return self.__is_complete(self.entry_path(key))
+
+    def load(self, key: str) -> tuple[pl.DataFrame, pl.DataFrame] | None:
+        """
+        Load a cached entry.
+
+        Args:
+            key (str): Key returned by `key`.
+
+        Returns:
+            tuple[pl.DataFrame, pl.DataFrame] | None: Memory mapped train and test datasets, or None on a miss.
+        """
+        entry_path = self.entry_path(key)
+        if not self.__is_complete(entry_path):
+            return None
+
+        train_dataframe = pl.read_ipc(os.path.join(entry_path, ProcessedDatasetCache.TRAIN_FILE), memory_map=True)
+        test_dataframe = pl.read_ipc(os.path.join(entry_path, ProcessedDatasetCache.TEST_FILE), memory_map=True)
+        return train_dataframe, test_dataframe
+
+    def store(self, key: str, train_dataframe: pl.DataFrame, test_dataframe: pl.DataFrame, metadata: dict | None = None) -> str:
+        """
+        Store processed datasets. The entry is written to a temporary directory first and renamed into place, so concurrent
+        trainers never read a partial entry.
+
+        Args:
+            key (str): Key returned by `key`.
+            train_dataframe (pl.DataFrame): Processed train dataset.
+            test_dataframe (pl.DataFrame): Processed test dataset.
+            metadata (dict, optional): JSON serializable description of the entry, for example the processing parameters.
+
+        Returns:
+            str: Path of the entry directory.
+        """
+        entry_path = self.entry_path(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=f".{key}.", dir=self.cache_dir)
+        try:
+            train_dataframe.write_ipc(os.path.join(tmp_path, ProcessedDatasetCache.TRAIN_FILE))
+            test_dataframe.write_ipc(os.path.join(tmp_path, ProcessedDatasetCache.TEST_FILE))
+            with open(os.path.join(tmp_path, ProcessedDatasetCache.METADATA_FILE), "w") as metadata_file:
+                json.dump({"key": key, **(metadata or {})}, metadata_file, indent=4, sort_keys=True)
+
+            # Leftovers of an interrupted store are replaced, a complete entry is never touched.
+            if os.path.isdir(entry_path) and not self.__is_complete(entry_path):
+                shutil.rmtree(entry_path)
+            os.rename(tmp_path, entry_path)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            # Another trainer stored the same entry in the meantime, its content is identical.
+            if not self.__is_complete(entry_path):
+                raise
+        return entry_path
+
+    @staticmethod
+    def __is_complete(entry_path: str) -> bool:
+        # The metadata file is written last, an entry without it was interrupted while being stored.
+        return os.path.isfile(os.path.join(entry_path, ProcessedDatasetCache.METADATA_FILE))
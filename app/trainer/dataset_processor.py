@@ -15,9 +15,19 @@ import polars as pl  # noreorder # noqa
 from datetime import timedelta  # noqa
 from typing import Final  # noqa
 
+from app.datasets.dataset_io import iter_dataset_batches  # noreorder # noqa
+from app.datasets.dataset_io import parse_datetime_columns  # noreorder # noqa
+from app.datasets.dataset_io import read_dataset  # noreorder # noqa
+from app.datasets.quantile_sketch import sketch_columns  # noreorder # noqa
+
 
 class DatasetProcessor:
     MICROSECONDS_PER_DAD: Final = 24 * 60 * 60 * 1000000  # ( 24 Hours 60 Minutes * 60 Second * 1000000 Miscrosecond )
+    PURCHASE_DATE_FORMAT: Final = "%Y-%m-%dT%H:%M:%S%z"
+    PERIOD_COLUMNS: Final = ["customer_id", "purchase_year", "purchase_month"]
+    STREAMING_BATCH_ROWS: Final = 500_000
+    # Bump whenever a change alters the output of `process_dataset`, it invalidates cached processed datasets.
+    PROCESSING_VERSION: Final = 1
 
     def __init__(
         self,
@@ -26,32 +36,82 @@ class DatasetProcessor:
         categorical_columns: list | None = None,
         features: list | None = None,
         target_column: str = "next_month_purchase_amount",
+        outlier_quantile_error: float | None = None,
     ) -> None:
-        self.dataframe = pl.read_csv(csv_path)
-        self.categorical_columns = ["gender"]
-        self.numerical_columns = ["age", "annual_income", "purchase_amount"]
+        self.csv_path = csv_path
+        self.__dataframe = None
+        self.outlier_report = None
         self.target_column = target_column
 
         self.numerical_columns = ["age", "annual_income", "purchase_amount"] if numerical_columns is None else numerical_columns.copy()
         self.categorical_columns = ["gender"] if categorical_columns is None else categorical_columns.copy()
 
         self.features = ["age", "annual_income", "purchase_amount", "Recency", "Frequency", "Monetary"] if features is None else features
+        # Rank error of the KLL sketches the IQR quartiles are estimated from, None computes them exactly. An approximation knob,
+        # the sketches read the processed frame that is in memory anyway, see `__sketched_quartiles`.
+        self.outlier_quantile_error = outlier_quantile_error
 
-    def __squash_rows_by_customer_month_year(self):
-        """_summary_
+    def processing_params(self, sequential_outliers: bool = False) -> dict:
+        """Every parameter that affects the output of `process_dataset`, used to key cached processed datasets.
+
+        Args:
+            sequential_outliers (bool, optional): Outlier mode passed to `process_dataset`. Defaults to False.
 
         Returns:
-            _type_: _description_
+            dict: JSON serializable processing parameters.
         """
-        self.dataframe = self.dataframe.with_columns(
-            pl.col("purchase_date").str.strptime(pl.Datetime, format="%Y-%m-%dT%H:%M:%S%z").alias("purchase_date")
-        )
+        params = {
+            "processing_version": DatasetProcessor.PROCESSING_VERSION,
+            "numerical_columns": self.numerical_columns,
+            "categorical_columns": self.categorical_columns,
+            "features": self.features,
+            "target_column": self.target_column,
+            "sequential_outliers": sequential_outliers,
+        }
+        # Only keyed when set, datasets processed with exact quartiles keep their cache keys.
+        if self.outlier_quantile_error is not None:
+            params["outlier_quantile_error"] = self.outlier_quantile_error
+        return params
+
+    @property
+    def dataframe(self) -> pl.DataFrame:
+        """Eagerly loaded dataset. The CSV is only read on first access so the streaming mode never materializes it."""
+        if self.__dataframe is None:
+            self.__dataframe = read_dataset(self.csv_path)
+        return self.__dataframe
+
+    @dataframe.setter
+    def dataframe(self, dataframe: pl.DataFrame):
+        self.__dataframe = dataframe
+
+    @staticmethod
+    def __squash_frame(frame: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """Aggregate purchases to one row per customer and month, works for both eager and lazy frames.
+
+        Args:
+            frame (pl.DataFrame | pl.LazyFrame): Raw purchases with `purchase_date` parsed as datetime.
 
-        self.dataframe = self.dataframe.with_columns(
+        Returns:
+            pl.DataFrame | pl.LazyFrame: Squashed frame of the same kind as the input.
+        """
+        frame = frame.with_columns(
             [pl.col("purchase_date").dt.year().alias("purchase_year"), pl.col("purchase_date").dt.month().alias("purchase_month")]
         )
 
-        self.dataframe = self.dataframe.group_by(["customer_id", "purchase_year", "purchase_month"]).agg(
+        return DatasetProcessor.__aggregate_periods(frame)
+
+    @staticmethod
+    def __aggregate_periods(frame: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """Group rows by customer and period. The aggregations are idempotent, so already squashed partial results can be merged
+        by concatenating them in input order and aggregating again.
+
+        Args:
+            frame (pl.DataFrame | pl.LazyFrame): Frame with the period columns.
+
+        Returns:
+            pl.DataFrame | pl.LazyFrame: One row per customer and period.
+        """
+        return frame.group_by(DatasetProcessor.PERIOD_COLUMNS).agg(
             [
                 pl.col("age").first().alias("age"),
                 pl.col("gender").first().alias("gender"),
@@ -62,58 +122,48 @@ class DatasetProcessor:
             ]
         )
 
-        return self.dataframe
+    @staticmethod
+    def __next_month_frame(frame: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """Fill the target of a squashed frame, works for both eager and lazy frames.
 
-    def __compute_next_month_purchase_amount(self):
-        """_summary_
+        Args:
+            frame (pl.DataFrame | pl.LazyFrame): Frame with one row per customer and period.
 
         Returns:
-            _type_: _description_
+            pl.DataFrame | pl.LazyFrame: Frame sorted by customer and period with `next_month_purchase_amount` filled.
         """
-        if self.dataframe["purchase_date"].dtype != pl.Datetime:
-            self.dataframe = self.dataframe.with_columns(
-                pl.col("purchase_date").str.strptime(pl.Datetime, "%Y-%m-%dT%H:%M:%S%.f%z", strict=False).alias("purchase_date")
-            )
-
-        self.dataframe = self.dataframe.with_columns(
-            [
-                (pl.when(pl.col("purchase_month") == 12).then(pl.col("purchase_year") + 1).otherwise(pl.col("purchase_year"))).alias("next_year"),
-                (pl.when(pl.col("purchase_month") == 12).then(1).otherwise(pl.col("purchase_month") + 1)).alias("next_month"),
-            ]
+        # After squashing a customer has at most one row per period, so the closest later period is simply the next row once
+        # the frame is sorted by customer and period. An exact next month match is the closest later period as well.
+        return frame.sort(DatasetProcessor.PERIOD_COLUMNS).with_columns(
+            pl.when(pl.col("customer_id").is_not_null())
+            .then(pl.col("purchase_amount").shift(-1).over("customer_id"))
+            .otherwise(None)
+            .alias("next_month_purchase_amount")
         )
 
-        self.dataframe = self.dataframe.with_row_count(name="index")
-
-        next_month_df = self.dataframe.join(
-            self.dataframe.select(["customer_id", "purchase_year", "purchase_month", "purchase_amount"]),
-            left_on=["customer_id", "next_year", "next_month"],
-            right_on=["customer_id", "purchase_year", "purchase_month"],
-            how="left",
-            suffix="_next",
-        )
+    def __squash_rows_by_customer_month_year(self):
+        """_summary_
 
-        self.dataframe = self.dataframe.with_columns(next_month_df["purchase_amount_next"].alias("next_month_purchase_amount"))
+        Returns:
+            _type_: _description_
+        """
+        self.dataframe = parse_datetime_columns(self.dataframe, datetime_format=DatasetProcessor.PURCHASE_DATE_FORMAT)
 
-        updated_rows = []
-        for row in self.dataframe.iter_rows(named=True):
-            if row["next_month_purchase_amount"] is None:
-                future_purchases = self.dataframe.filter(
-                    (pl.col("customer_id") == row["customer_id"])
-                    & (
-                        (pl.col("purchase_year") > row["purchase_year"])
-                        | ((pl.col("purchase_year") == row["purchase_year"]) & (pl.col("purchase_month") > row["purchase_month"]))
-                    )
-                ).sort(["purchase_year", "purchase_month"])
+        self.dataframe = DatasetProcessor.__squash_frame(self.dataframe)
+        return self.dataframe
 
-                if len(future_purchases) > 0:
-                    closest_purchase = future_purchases[0]
-                    updated_rows.append((row["index"], closest_purchase["purchase_amount"]))
+    def __compute_next_month_purchase_amount(self):
+        """Fill the target with the purchase amount of the closest later month of the same customer.
 
-        for index, value in updated_rows:
-            self.dataframe[index, "next_month_purchase_amount"] = value
+        Returns:
+            pl.DataFrame: The DataFrame sorted by customer and period with `next_month_purchase_amount` filled.
+        """
+        if self.dataframe["purchase_date"].dtype != pl.Datetime:
+            self.dataframe = self.dataframe.with_columns(
+                pl.col("purchase_date").str.strptime(pl.Datetime, "%Y-%m-%dT%H:%M:%S%.f%z", strict=False).alias("purchase_date")
+            )
 
-        self.dataframe = self.dataframe.drop(["next_year", "next_month", "index"])
-        self.dataframe = self.dataframe.sort("customer_id")
+        self.dataframe = DatasetProcessor.__next_month_frame(self.dataframe)
         return self.dataframe
 
     def __one_hot_encode_categorical_data(self):
@@ -146,31 +196,94 @@ class DatasetProcessor:
         return self.dataframe
 
     def __find_outliers_iqr(self, column, drop: bool = True):
-        """_summary_
+        """Find the IQR outliers of a single column, computed on the frame left by the previous columns.
 
         Args:
-            column (_type_): _description_
-            drop (bool, optional): _description_. Defaults to True.
+            column (str): Column to check.
+            drop (bool, optional): Drop the outlier rows from the DataFrame. Defaults to True.
 
         Returns:
-            _type_: _description_
+            pl.DataFrame: Single row outlier report of the column, see `__filter_outliers_iqr`.
         """
-        Q1 = self.dataframe.select(pl.col(column).quantile(0.25)).item()
-        Q3 = self.dataframe.select(pl.col(column).quantile(0.75)).item()
-        IQR = Q3 - Q1
+        report = self.__outlier_report(self.dataframe, [column], self.__sketched_quartiles([column]))
+        lower_bound, upper_bound = report.select(["lower_bound", "upper_bound"]).row(0)
 
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+        if drop:
+            self.dataframe = self.dataframe.filter((pl.col(column) >= lower_bound) & (pl.col(column) <= upper_bound))
+
+        return report
+
+    def __filter_outliers_iqr(self, columns: list, drop: bool = True):
+        """Find the IQR outliers of every column at once. Bounds of all columns come from the same frame and a row is dropped
+        when any of its columns is outside its bounds.
 
-        outliers = self.dataframe.filter((pl.col(column) < lower_bound) | (pl.col(column) > upper_bound))
+        Args:
+            columns (list): Columns to check.
+            drop (bool, optional): Drop the outlier rows from the DataFrame. Defaults to True.
 
-        outlier_customer_ids = outliers["customer_id"].unique().to_list()
-        outlier_row_indices = outliers["customer_id"].to_list()
+        Returns:
+            pl.DataFrame: Outlier report with one row per column holding `feature`, `q1`, `q3`, `lower_bound`, `upper_bound`,
+                the number of `outlier_rows` and the number of distinct `outlier_customers`.
+        """
+        report = self.__outlier_report(self.dataframe, columns, self.__sketched_quartiles(columns))
 
         if drop:
-            self.dataframe = self.dataframe.filter((pl.col(column) >= lower_bound) & (pl.col(column) <= upper_bound))
+            self.dataframe = self.dataframe.filter(
+                pl.all_horizontal(
+                    [
+                        pl.col(column).is_between(lower_bound, upper_bound)
+                        for column, lower_bound, upper_bound in report.select(["feature", "lower_bound", "upper_bound"]).iter_rows()
+                    ]
+                )
+            )
+
+        return report
 
-        return outlier_row_indices, outlier_customer_ids
+    def __sketched_quartiles(self, columns: list) -> dict | None:
+        """Quartiles of the columns estimated with KLL sketches fed batch by batch, None when they are computed exactly.
+
+        The batches are zero copy slices of the processed frame. It is in memory in both processing modes, the RFM windows need
+        every row of a customer and the outlier filter runs on it, so the sketches do not make processing out of core. They only
+        trade exact quartiles for a bounded rank error and skip the copy of every column the exact quantiles take.
+
+        Args:
+            columns (list): Columns to estimate the quartiles of.
+
+        Returns:
+            dict | None: Column name to its first and third quartile.
+        """
+        if self.outlier_quantile_error is None:
+            return None
+
+        sketches = sketch_columns(self.dataframe.iter_slices(DatasetProcessor.STREAMING_BATCH_ROWS), columns, error=self.outlier_quantile_error)
+        return {column: tuple(sketch.quantile([0.25, 0.75]).tolist()) for column, sketch in sketches.items()}
+
+    @staticmethod
+    def __outlier_report(dataframe: pl.DataFrame, columns: list, quartiles: dict | None = None) -> pl.DataFrame:
+        """Compute quartiles, IQR bounds and outlier counts of the columns in a single aggregate over the frame. Quartiles given
+        by `quartiles` are used instead of computing them."""
+        aggregates = []
+        for column in columns:
+            q1, q3 = (pl.col(column).quantile(0.25), pl.col(column).quantile(0.75)) if quartiles is None else map(pl.lit, quartiles[column])
+            lower_bound, upper_bound = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            is_outlier = (pl.col(column) < lower_bound) | (pl.col(column) > upper_bound)
+            aggregates.append(
+                pl.struct(
+                    [
+                        pl.lit(column).alias("feature"),
+                        q1.cast(pl.Float64).alias("q1"),
+                        q3.cast(pl.Float64).alias("q3"),
+                        lower_bound.cast(pl.Float64).alias("lower_bound"),
+                        upper_bound.cast(pl.Float64).alias("upper_bound"),
+                        is_outlier.sum().cast(pl.UInt32).alias("outlier_rows"),
+                        pl.col("customer_id").filter(is_outlier).n_unique().cast(pl.UInt32).alias("outlier_customers"),
+                    ]
+                ).alias(column)
+            )
+
+        # Lazy so the quartile expressions shared by the bounds and the outlier masks are evaluated once.
+        report = dataframe.lazy().select(aggregates).collect()
+        return pl.concat([report[column].struct.unnest() for column in columns])
 
     def __calculate_rfm(self, customer_id_col="customer_id", date_col="purchase_date", amount_col="purchase_amount"):
         """Calculate RFM (Recency, Frequency, Monetary) metrics for each customer in the DataFrame.
@@ -199,6 +312,58 @@ class DatasetProcessor:
 
         return self.dataframe
 
+    def __squash_csv_in_batches(self) -> pl.DataFrame:
+        """Squash the raw CSV batch by batch, merging every batch into the running result.
+
+        Peak memory is bounded by one batch plus the squashed result instead of the whole CSV. The streaming group by of
+        polars keeps partial tables that grow with the input when there are many customer and period groups, so this step
+        is folded by hand.
+
+        Returns:
+            pl.DataFrame: One row per customer and period.
+        """
+        squashed = None
+        for batch in iter_dataset_batches(self.csv_path, batch_rows=DatasetProcessor.STREAMING_BATCH_ROWS):
+            batch = parse_datetime_columns(batch, datetime_format=DatasetProcessor.PURCHASE_DATE_FORMAT)
+            batch = DatasetProcessor.__squash_frame(batch)
+            squashed = batch if squashed is None else DatasetProcessor.__aggregate_periods(pl.concat([squashed, batch]))
+        return squashed
+
+    def __build_lazy_plan(self, squashed: pl.DataFrame) -> pl.LazyFrame:
+        """Build every step after squashing up to the outlier filter as a single lazy plan.
+
+        The steps mirror the eager methods and are executed when the returned plan is collected.
+
+        Args:
+            squashed (pl.DataFrame): Output of `__squash_csv_in_batches`.
+
+        Returns:
+            pl.LazyFrame: Processed dataset before it is split into train and test sets.
+        """
+        categorical_columns = [col for col in self.categorical_columns if col in squashed.columns]
+        categories = {col: sorted(squashed[col].drop_nulls().unique().to_list()) for col in categorical_columns}
+
+        plan = DatasetProcessor.__next_month_frame(squashed.lazy())
+        plan = plan.with_columns(
+            [(pl.col(col) == value).cast(pl.Int8).alias(f"{col}_{value}") for col in categorical_columns for value in categories[col]]
+        )
+
+        plan = plan.filter(pl.all_horizontal([pl.col(col).is_not_null() for col in self.numerical_columns]))
+
+        # Window expressions instead of the eager group by and self join, a self join of a shared sub plan stops polars from streaming it.
+        reference_date = pl.col("purchase_date").max() + timedelta(days=1)
+        plan = plan.with_columns(
+            [
+                ((reference_date - pl.col("purchase_date").max().over("customer_id")).cast(pl.Int64) / DatasetProcessor.MICROSECONDS_PER_DAD).alias(
+                    "Recency"
+                ),
+                pl.col("purchase_date").count().over("customer_id").alias("Frequency"),
+                pl.col("purchase_amount").sum().over("customer_id").alias("Monetary"),
+            ]
+        )
+
+        return plan
+
     def __separate_and_save_datasets(self, train_filename="polar_train_dataset.csv", test_filename="polars_test_dataset.csv", save: bool = False):
         """_summary_
 
@@ -223,33 +388,67 @@ class DatasetProcessor:
 
         return train_df, test_df
 
-    def process_dataset(self, save: bool = False):
-        """_summary_
+    def process_dataset(self, save: bool = False, streaming: bool = False, sequential_outliers: bool = False, as_pandas: bool = True):
+        """Run the full processing pipeline and split the result into train and test sets.
 
         Args:
-            save (bool, optional): _description_. Defaults to False.
+            save (bool, optional): Write the train and test sets as CSV. Defaults to False.
+            streaming (bool, optional): Squash the CSV in row batches and run the remaining steps as one lazy plan on the polars
+                streaming engine instead of reading the whole CSV eagerly. Peak memory then depends on the number of customer
+                months rather than on the number of purchases. Defaults to False.
+            sequential_outliers (bool, optional): Filter IQR outliers one feature at a time, every feature's bounds computed on
+                the rows left by the previous ones. By default the bounds of all features come from the same frame and are
+                applied in a single filter. Defaults to False.
+            as_pandas (bool, optional): Return pandas DataFrames instead of polars DataFrames. Defaults to True.
 
         Returns:
-            _type_: _description_
+            tuple[pd.DataFrame, pd.DataFrame] | tuple[pl.DataFrame, pl.DataFrame]: Train and test datasets.
         """
-        self.__squash_rows_by_customer_month_year()
-        self.__compute_next_month_purchase_amount()
-        self.__one_hot_encode_categorical_data()
-        self.__drop_rows_with_nan()
-        self.__calculate_rfm()
-        [self.__find_outliers_iqr(column=column, drop=True) for column in self.features]
+        if streaming:
+            self.dataframe = self.__build_lazy_plan(self.__squash_csv_in_batches()).collect(streaming=True)
+        else:
+            self.__squash_rows_by_customer_month_year()
+            self.__compute_next_month_purchase_amount()
+            self.__one_hot_encode_categorical_data()
+            self.__drop_rows_with_nan()
+            self.__calculate_rfm()
+
+        if sequential_outliers:
+            self.outlier_report = pl.concat([self.__find_outliers_iqr(column=column, drop=True) for column in self.features])
+        else:
+            self.outlier_report = self.__filter_outliers_iqr(columns=self.features, drop=True)
+
         train_dataset, test_dataset = self.__separate_and_save_datasets(save=save)
-        return train_dataset.to_pandas(), test_dataset.to_pandas()
+        return (train_dataset.to_pandas(), test_dataset.to_pandas()) if as_pandas else (train_dataset, test_dataset)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in megabytes."""
+    import resource
+    import sys
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
 
 
 if __name__ == "__main__":
+    import argparse
     import time
 
+    parser = argparse.ArgumentParser(description="Process the raw purchases CSV into train and test datasets.")
+    parser.add_argument("--csv-path", default="data/customer_purchases.csv")
+    parser.add_argument("--streaming", action="store_true", help="Squash the CSV in batches and run the rest on the streaming engine.")
+    parser.add_argument("--no-save", action="store_true", help="Do not write the train and test CSV files.")
+    args = parser.parse_args()
+
     # Avarage 1,7 ms
     start_time = time.perf_counter()
 
-    dataset_processor = DatasetProcessor(csv_path="data/customer_purchases.csv")
-    dataset_processor.process_dataset(save=True)
+    dataset_processor = DatasetProcessor(csv_path=args.csv_path)
+    dataset_processor.process_dataset(save=not args.no_save, streaming=args.streaming)
     end_time = time.perf_counter()
     elapsed_time_ms = (end_time - start_time) * 1000
+    print(f"Mode: {'streaming' if args.streaming else 'eager'}")
     print(f"Elapsed time: {elapsed_time_ms:.3f} ms")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
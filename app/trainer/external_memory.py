@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from typing import Callable
+from typing import Final
+from typing import Iterator
+
+import numpy as np
+import polars as pl
+import xgboost as xgb
+
+from app.datasets.dataset_io import iter_dataset_batches
+
+# Constants of the SplitMix64 finalizer.
+SPLITMIX_GAMMA: Final = np.uint64(0x9E3779B97F4A7C15)
+SPLITMIX_MULTIPLIERS: Final = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))
+
+
+def validation_mask(start: int, length: int, validation_ratio: float, seed: int) -> np.ndarray:
+    """
+    Assigns rows to the validation split by a hash of their position in the dataset.
+
+    A row's split only depends on its index and the seed, never on the batch size, so every pass over the dataset and every
+    batch size puts the same rows into the same split without keeping a permutation of the whole dataset in memory.
+
+    Args:
+        start (int): Dataset index of the first row of the batch.
+        length (int): Rows in the batch.
+        validation_ratio (float): Expected fraction of validation rows.
+        seed (int): Seed of the split.
+
+    Returns:
+        np.ndarray: True for the validation rows of the batch.
+    """
+    hashed = np.arange(start, start + length, dtype=np.uint64) + np.uint64(seed * int(SPLITMIX_GAMMA) % 2**64)
+    hashed ^= hashed >> np.uint64(30)
+    hashed *= SPLITMIX_MULTIPLIERS[0]
+    hashed ^= hashed >> np.uint64(27)
+    hashed *= SPLITMIX_MULTIPLIERS[1]
+    hashed ^= hashed >> np.uint64(31)
+    return (hashed >> np.uint64(11)).astype(np.float64) * 2.0**-53 < validation_ratio
+
+
+def iter_split_batches(
+    dataset_path: str,
+    features: list,
+    target: str,
+    batch_rows: int,
+    validation_ratio: float,
+    seed: int,
+    validation: bool,
+    dtype: type = np.float32,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Reads the rows of one split of a processed dataset file in batches.
+
+    Args:
+        dataset_path (str): Processed dataset in any format of `app.datasets.dataset_io`.
+        features (list): Feature columns.
+        target (str): Target column.
+        batch_rows (int): Rows read per batch, before the split.
+        validation_ratio (float): Fraction of the rows in the validation split, see `validation_mask`.
+        seed (int): Seed of the split.
+        validation (bool): Yield the validation split instead of the training split.
+        dtype (type, optional): Precision of the yielded arrays. Defaults to np.float32.
+        start (int, optional): First dataset row to read. Defaults to 0.
+        stop (int, optional): Dataset row to stop before. Defaults to the end of the dataset.
+
+    Yields:
+        tuple[np.ndarray, np.ndarray]: C-contiguous features and the target of a batch.
+    """
+    polars_dtype = pl.Float32 if np.dtype(dtype) == np.float32 else pl.Float64
+    for batch in iter_dataset_batches(dataset_path, batch_rows=batch_rows, start=start, stop=stop):
+        mask = validation_mask(start, batch.height, validation_ratio, seed)
+        start += batch.height
+        batch = batch.filter(pl.Series(mask if validation else ~mask))
+        if batch.height == 0:
+            continue
+        X = np.ascontiguousarray(batch.select(pl.col(features).cast(polars_dtype)).to_numpy())
+        yield X, batch[target].cast(polars_dtype).to_numpy()
+
+
+class DatasetBatchIterator(xgb.DataIter):
+    """
+    XGBoost data iterator over the training split of a processed dataset file.
+
+    XGBoost pulls one batch at a time and writes its quantized pages to `cache_prefix` on disk, so the dataset is never held
+    in memory as a whole.
+
+    Args:
+        batches (Callable): Returns a new iterator of `(X, y)` batches on every call, e.g. a partial of `iter_split_batches`.
+        cache_prefix (str): Path prefix of the external memory cache files of XGBoost.
+    """
+
+    def __init__(self, batches: Callable, cache_prefix: str):
+        self.batches = batches
+        self.batch_iterator = None
+        os.makedirs(os.path.dirname(cache_prefix) or ".", exist_ok=True)
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> int:
+        self.batch_iterator = self.batches() if self.batch_iterator is None else self.batch_iterator
+        batch = next(self.batch_iterator, None)
+        if batch is None:
+            return 0
+        X, y = batch
+        input_data(data=X, label=y)
+        return 1
+
+    def reset(self):
+        self.batch_iterator = None
+
+
+def train_external_memory(hyperparameters: dict, batches: Callable, cache_prefix: str) -> xgb.XGBRegressor:
+    """
+    Trains an `XGBRegressor` on an external memory `DMatrix` fed by `DatasetBatchIterator`.
+
+    The estimator hyperparameters are translated with `XGBRegressor.get_xgb_params`, so a config trains the same model in
+    memory or out of core, and the booster is loaded back into an `XGBRegressor` for the registry and the inference engine.
+
+    Args:
+        hyperparameters (dict): `XGBRegressor` keyword arguments.
+        batches (Callable): Returns a new iterator of `(X, y)` training batches on every call.
+        cache_prefix (str): Path prefix of the external memory cache files of XGBoost.
+
+    Returns:
+        xgb.XGBRegressor: The trained model.
+    """
+    model = xgb.XGBRegressor(**hyperparameters)
+    train_matrix = xgb.DMatrix(DatasetBatchIterator(batches, cache_prefix=cache_prefix))
+    booster = xgb.train(model.get_xgb_params(), train_matrix, num_boost_round=model.get_num_boosting_rounds())
+    model.load_model(bytearray(booster.save_raw(raw_format="ubj")))
+    return model
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import Final
+
+import numpy as np
+
+# Whether a higher value is better for every metric reported by `regression_metrics`.
+HIGHER_IS_BETTER: Final = {"MSE": False, "MAE": False, "R2": True}
+
+
+def thresholded_metric_name(metric: str, deflection: float) -> str:
+    return f"Thresholded {metric} (±{deflection})"
+
+
+def metric_directions(deflection: float = 0) -> dict[str, bool]:
+    """
+    Names of the metrics reported with this deflection, mapped to whether a higher value is better.
+    """
+    directions = dict(HIGHER_IS_BETTER)
+    if deflection != 0:
+        directions.update({thresholded_metric_name(metric, deflection): higher for metric, higher in HIGHER_IS_BETTER.items()})
+    return directions
+
+
+class RegressionMetricAccumulator:
+    """
+    Single pass accumulator of MSE, MAE, R2 and their deflection capped versions over batches of predictions.
+
+    Only running sums are kept, so the memory does not grow with the number of rows and a validation set never has to be
+    predicted at once. The target variance is accumulated with the parallel algorithm of Chan et al., which keeps R2
+    accurate for large sums, and accumulators of disjoint batches can be merged.
+
+    Args:
+        deflection (float, optional): When not 0, MSE, MAE and R2 are also reported with absolute errors capped at this value. Defaults to 0.
+    """
+
+    def __init__(self, deflection: float = 0):
+        self.deflection = deflection
+        self.count = 0
+        self.target_mean = 0.0
+        self.target_m2 = 0.0
+        self.absolute_error_sum = 0.0
+        self.squared_error_sum = 0.0
+        self.capped_absolute_error_sum = 0.0
+        self.capped_squared_error_sum = 0.0
+
+    def update(self, y_true, y_pred) -> RegressionMetricAccumulator:
+        """
+        Adds a batch of targets and predictions.
+
+        Args:
+            y_true (DataFrame or array-like): Actual target values of the batch.
+            y_pred (array-like): Predicted target values of the batch.
+
+        Returns:
+            RegressionMetricAccumulator: This accumulator.
+        """
+        y_true = np.asarray(y_true, dtype=np.float64).ravel()
+        y_pred = np.asarray(y_pred, dtype=np.float64).ravel()
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"Targets and predictions differ in length: {y_true.shape[0]} != {y_pred.shape[0]}.")
+        if y_true.size == 0:
+            return self
+
+        batch = RegressionMetricAccumulator(self.deflection)
+        batch.count = y_true.size
+        batch.target_mean = float(y_true.mean())
+        # One batch sized buffer is reused for every intermediate.
+        buffer = np.subtract(y_true, batch.target_mean)
+        batch.target_m2 = float(np.dot(buffer, buffer))
+        np.subtract(y_true, y_pred, out=buffer)
+        np.abs(buffer, out=buffer)
+        batch.absolute_error_sum = float(buffer.sum())
+        batch.squared_error_sum = float(np.dot(buffer, buffer))
+        if self.deflection != 0:
+            np.minimum(buffer, self.deflection, out=buffer)
+            batch.capped_absolute_error_sum = float(buffer.sum())
+            batch.capped_squared_error_sum = float(np.dot(buffer, buffer))
+
+        return self.merge(batch)
+
+    def merge(self, other: RegressionMetricAccumulator) -> RegressionMetricAccumulator:
+        """
+        Adds the batches of another accumulator with the same deflection.
+
+        Args:
+            other (RegressionMetricAccumulator): Accumulator of other rows.
+
+        Returns:
+            RegressionMetricAccumulator: This accumulator.
+        """
+        if other.deflection != self.deflection:
+            raise ValueError(f"Can not merge accumulators with deflections {self.deflection} and {other.deflection}.")
+        if other.count == 0:
+            return self
+
+        count = self.count + other.count
+        delta = other.target_mean - self.target_mean
+        self.target_m2 += other.target_m2 + delta * delta * self.count * other.count / count
+        self.target_mean += delta * other.count / count
+        self.count = count
+        self.absolute_error_sum += other.absolute_error_sum
+        self.squared_error_sum += other.squared_error_sum
+        self.capped_absolute_error_sum += other.capped_absolute_error_sum
+        self.capped_squared_error_sum += other.capped_squared_error_sum
+        return self
+
+    def result(self) -> dict:
+        """
+        Metrics of all rows added so far.
+
+        Raises:
+            ValueError: If no rows were added.
+
+        Returns:
+            dict: MSE, MAE, R2 and, with a deflection, their thresholded versions.
+        """
+        if self.count == 0:
+            raise ValueError("No predictions were added to the accumulator.")
+
+        results = {
+            "MSE": self.squared_error_sum / self.count,
+            "MAE": self.absolute_error_sum / self.count,
+            "R2": self.__r2(self.squared_error_sum),
+        }
+        if self.deflection != 0:
+            results[thresholded_metric_name("MAE", self.deflection)] = self.capped_absolute_error_sum / self.count
+            results[thresholded_metric_name("MSE", self.deflection)] = self.capped_squared_error_sum / self.count
+            results[thresholded_metric_name("R2", self.deflection)] = self.__r2(self.capped_squared_error_sum)
+        return results
+
+    def __r2(self, residual_sum_of_squares: float) -> float:
+        # A constant target has no variance to explain, scored like sklearn's r2_score.
+        if self.target_m2 == 0:
+            return 1.0 if residual_sum_of_squares == 0 else 0.0
+        return 1 - residual_sum_of_squares / self.target_m2
+
+
+def regression_metrics(y_true, y_pred, deflection: float = 0) -> dict:
+    """
+    Calculates the regression metrics reported for every trained model.
+
+    Args:
+        y_true (DataFrame or array-like): Actual target values.
+        y_pred (array-like): Predicted target values.
+        deflection (float, optional): When not 0, MSE, MAE and R2 are also reported with absolute errors capped at this value. Defaults to 0.
+
+    Returns:
+        dict: MSE, MAE, R2 and, with a deflection, their thresholded versions.
+    """
+    return RegressionMetricAccumulator(deflection).update(y_true, y_pred).result()
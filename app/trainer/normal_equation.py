@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from typing import Callable
+from typing import Iterator
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+
+class NormalEquationStatistics:
+    """
+    Sufficient statistics of an ordinary least squares fit: row count, means and centered cross products.
+
+    Batches are folded in with the pairwise update of Chan et al., the same one `RegressionMetricAccumulator` uses, so the
+    statistics of any partition of the rows merge into the statistics of all of them and no raw sum of squares loses precision
+    to large feature offsets. Solving them gives the coefficients of `LinearRegression` fitted on every row seen.
+
+    Args:
+        n_features (int): Number of feature columns.
+    """
+
+    def __init__(self, n_features: int):
+        self.rows = 0
+        self.feature_mean = np.zeros(n_features)
+        self.target_mean = 0.0
+        self.feature_scatter = np.zeros((n_features, n_features))
+        self.cross_scatter = np.zeros(n_features)
+
+    def to_dict(self) -> dict:
+        """
+        The statistics as builtin and NumPy values. Models keep this instead of the object, so unpickling them never imports
+        the trainer package.
+        """
+        return {
+            "rows": int(self.rows),
+            "feature_mean": self.feature_mean.copy(),
+            "target_mean": float(self.target_mean),
+            "feature_scatter": self.feature_scatter.copy(),
+            "cross_scatter": self.cross_scatter.copy(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> NormalEquationStatistics:
+        """
+        Rebuilds statistics stored by `to_dict`.
+        """
+        statistics = cls(np.asarray(state["feature_mean"]).size)
+        statistics.rows = int(state["rows"])
+        statistics.feature_mean = np.array(state["feature_mean"], dtype=np.float64)
+        statistics.target_mean = float(state["target_mean"])
+        statistics.feature_scatter = np.array(state["feature_scatter"], dtype=np.float64)
+        statistics.cross_scatter = np.array(state["cross_scatter"], dtype=np.float64)
+        return statistics
+
+    def update(self, X, y) -> NormalEquationStatistics:
+        """
+        Adds a batch of rows.
+
+        Args:
+            X (array-like): Features of the batch.
+            y (array-like): Target values of the batch.
+
+        Raises:
+            ValueError: If the batch does not match the statistics.
+
+        Returns:
+            NormalEquationStatistics: self, updated.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if X.ndim != 2 or X.shape[1] != self.feature_mean.size or X.shape[0] != y.size:
+            raise ValueError(f"Expected {self.feature_mean.size} feature columns and one target per row, got {X.shape} and {y.shape}.")
+        if y.size == 0:
+            return self
+
+        batch = NormalEquationStatistics(self.feature_mean.size)
+        batch.rows = y.size
+        batch.feature_mean = X.mean(axis=0)
+        batch.target_mean = float(y.mean())
+        centered_X = X - batch.feature_mean
+        batch.feature_scatter = centered_X.T @ centered_X
+        batch.cross_scatter = centered_X.T @ (y - batch.target_mean)
+        return self.merge(batch)
+
+    def merge(self, other: NormalEquationStatistics) -> NormalEquationStatistics:
+        """
+        Folds in the statistics of a disjoint set of rows.
+
+        Args:
+            other (NormalEquationStatistics): Statistics of other rows over the same features.
+
+        Raises:
+            ValueError: If the statistics cover different features.
+
+        Returns:
+            NormalEquationStatistics: self, updated.
+        """
+        if other.feature_mean.size != self.feature_mean.size:
+            raise ValueError(f"Can not merge statistics of {other.feature_mean.size} features into {self.feature_mean.size} features.")
+        if other.rows == 0:
+            return self
+
+        rows = self.rows + other.rows
+        feature_delta = other.feature_mean - self.feature_mean
+        target_delta = other.target_mean - self.target_mean
+        weight = self.rows * other.rows / rows
+        self.feature_scatter = self.feature_scatter + other.feature_scatter + weight * np.outer(feature_delta, feature_delta)
+        self.cross_scatter = self.cross_scatter + other.cross_scatter + weight * feature_delta * target_delta
+        self.feature_mean = self.feature_mean + feature_delta * other.rows / rows
+        self.target_mean = self.target_mean + target_delta * other.rows / rows
+        self.rows = rows
+        return self
+
+    def solve(self, fit_intercept: bool = True) -> tuple[np.ndarray, float]:
+        """
+        Solves the normal equations. Rank deficient statistics give the minimum norm solution, like `LinearRegression`.
+
+        Args:
+            fit_intercept (bool, optional): Fit an intercept, otherwise the line passes through the origin. Defaults to True.
+
+        Raises:
+            ValueError: If no rows were added.
+
+        Returns:
+            tuple[np.ndarray, float]: Coefficients and intercept.
+        """
+        if self.rows == 0:
+            raise ValueError("No rows were added to the normal equation statistics.")
+
+        if fit_intercept:
+            coef = np.linalg.lstsq(self.feature_scatter, self.cross_scatter, rcond=None)[0]
+            return coef, float(self.target_mean - self.feature_mean @ coef)
+
+        # Uncentered cross products, the origin replaces the means.
+        gram = self.feature_scatter + self.rows * np.outer(self.feature_mean, self.feature_mean)
+        moment = self.cross_scatter + self.rows * self.feature_mean * self.target_mean
+        return np.linalg.lstsq(gram, moment, rcond=None)[0], 0.0
+
+    def to_linear_regression(self, hyperparameters: dict | None = None) -> LinearRegression:
+        """
+        Builds a fitted `LinearRegression` from the solved statistics, loadable and usable wherever a fitted one is. The
+        statistics are kept on it as the `to_dict` values in `sufficient_statistics_`, so it can be updated with new rows later.
+
+        Args:
+            hyperparameters (dict, optional): `LinearRegression` keyword arguments.
+
+        Raises:
+            ValueError: If the hyperparameters ask for a constrained fit.
+
+        Returns:
+            LinearRegression: The fitted model.
+        """
+        model = LinearRegression(**(hyperparameters or {}))
+        if model.positive:
+            raise ValueError("Normal equations solve the unconstrained least squares problem, positive=True is not supported.")
+
+        model.coef_, model.intercept_ = self.solve(fit_intercept=model.fit_intercept)
+        model.n_features_in_ = self.feature_mean.size
+        model.sufficient_statistics_ = self.to_dict()
+        return model
+
+
+def iter_array_batches(X: np.ndarray, y: np.ndarray, batch_rows: int, start: int = 0, stop: int | None = None) -> Iterator[tuple]:
+    """
+    Yields row batches of in memory features and targets as views.
+
+    Args:
+        X (np.ndarray): Features.
+        y (np.ndarray): Target values.
+        batch_rows (int): Rows per batch.
+        start (int, optional): First row. Defaults to 0.
+        stop (int, optional): Row to stop before. Defaults to the last row.
+
+    Yields:
+        tuple[np.ndarray, np.ndarray]: Features and target values of a batch.
+    """
+    stop = len(y) if stop is None else stop
+    for offset in range(start, stop, batch_rows):
+        batch = slice(offset, min(offset + batch_rows, stop))
+        yield X[batch], y[batch]
+
+
+def statistics_workers(n_jobs: int | None) -> int:
+    """Number of accumulation workers for an sklearn style `n_jobs`, where None is one and negative values count back from all CPUs."""
+    if n_jobs is None:
+        return 1
+    return max(1, n_jobs if n_jobs > 0 else (os.cpu_count() or 1) + 1 + n_jobs)
+
+
+def accumulate_statistics(batches: Callable, rows: int, n_features: int, workers: int = 1) -> NormalEquationStatistics:
+    """
+    Accumulates the normal equation statistics of a dataset, split into contiguous row ranges of one worker each.
+
+    Every worker folds the batches of its range into its own statistics and the partial statistics are merged once at the end,
+    so memory holds one batch per worker whatever the number of rows. The workers are threads, the batch arithmetic and the
+    polars reads of `iter_split_batches` run outside the GIL.
+
+    Args:
+        batches (Callable): Called with `start` and `stop` of a row range, returns an iterator of `(X, y)` batches of it, e.g. a
+            partial of `iter_array_batches` or `external_memory.iter_split_batches`.
+        rows (int): Rows of the dataset.
+        n_features (int): Number of feature columns.
+        workers (int, optional): Parallel workers. Defaults to 1.
+
+    Returns:
+        NormalEquationStatistics: Statistics of every row the batches yield.
+    """
+    bounds = np.linspace(0, rows, max(1, min(workers, rows)) + 1).astype(int).tolist()
+
+    def accumulate(start: int, stop: int) -> NormalEquationStatistics:
+        statistics = NormalEquationStatistics(n_features)
+        for X, y in batches(start=start, stop=stop):
+            statistics.update(X, y)
+        return statistics
+
+    if len(bounds) == 2:
+        return accumulate(*bounds)
+    with ThreadPoolExecutor(max_workers=len(bounds) - 1) as pool:
+        return reduce(NormalEquationStatistics.merge, pool.map(accumulate, bounds[:-1], bounds[1:]))
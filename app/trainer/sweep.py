@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+import traceback
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Final
+
+import joblib
+import polars as pl
+from threadpoolctl import threadpool_limits
+
+import app.trainer.trainer as trainer_module
+from app.trainer.metrics import metric_directions
+from app.trainer.metrics import regression_metrics
+from app.trainer.normal_equation import iter_array_batches
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import load_config
+from app.trainer.trainer import Trainer
+
+from app.logger.logger import ColorLogger as Logger  # noreorder # noqa
+
+GRID_STRATEGY: Final = "grid"
+RANDOM_STRATEGY: Final = "random"
+
+# Data of the trials, sent once to every worker process instead of once per trial.
+_worker_state: dict = {}
+
+
+def expand_search_space(sweep_config: dict, base_hyperparameters: dict | None = None) -> list[dict]:
+    """
+    Expands the search space of a sweep into the hyperparameters of every trial.
+
+    With the `grid` strategy every key of `search_space` lists its values and every combination becomes a trial. With the `random`
+    strategy `n_trials` trials are drawn with `seed`, a key either lists its values or gives a distribution as
+    `{distribution: uniform | loguniform | randint, low: ..., high: ...}`. `randint` includes `high`.
+
+    Args:
+        sweep_config (dict): The `sweep` section of a train config.
+        base_hyperparameters (dict, optional): Hyperparameters every trial starts from, searched keys override them. Defaults to None.
+
+    Raises:
+        ValueError: On an unknown strategy or distribution, or a distribution in a grid search.
+
+    Returns:
+        list[dict]: Hyperparameters of every trial.
+    """
+    strategy = sweep_config.get("strategy", GRID_STRATEGY)
+    search_space = sweep_config["search_space"]
+    base_hyperparameters = base_hyperparameters or {}
+
+    if strategy == GRID_STRATEGY:
+        for name, values in search_space.items():
+            if not isinstance(values, list):
+                raise ValueError(f"Grid search needs a list of values for {name}, got {values}.")
+        combinations = itertools.product(*search_space.values())
+        return [{**base_hyperparameters, **dict(zip(search_space, combination))} for combination in combinations]
+
+    if strategy == RANDOM_STRATEGY:
+        rng = random.Random(sweep_config.get("seed", 42))
+        return [
+            {**base_hyperparameters, **{name: _sample(rng, name, values) for name, values in search_space.items()}}
+            for _ in range(sweep_config.get("n_trials", 10))
+        ]
+
+    raise ValueError(f"Unknown sweep strategy {strategy}. Supported strategies: {[GRID_STRATEGY, RANDOM_STRATEGY]}.")
+
+
+def _sample(rng: random.Random, name: str, values):
+    if isinstance(values, list):
+        return rng.choice(values)
+
+    distribution, low, high = values.get("distribution"), values["low"], values["high"]
+    if distribution == "uniform":
+        return rng.uniform(low, high)
+    if distribution == "loguniform":
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if distribution == "randint":
+        return rng.randint(low, high)
+    raise ValueError(f"Unknown distribution {distribution} of {name}. Supported distributions: uniform, loguniform, randint.")
+
+
+def _init_worker(X_train, y_train, X_val, y_val, threads_per_fit: int):
+    # Caps the BLAS and OpenMP pools of the worker, so workers * threads_per_fit threads share the cores.
+    threadpool_limits(limits=threads_per_fit)
+    _worker_state.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+
+def _run_trial(trainer_class_name: str, trial: int, hyperparameters: dict, deflection: float, trial_dir: str) -> dict:
+    trainer_class = getattr(trainer_module, trainer_class_name)
+    model = trainer_class.build_model(hyperparameters)
+
+    fit_start = time.perf_counter()
+    model.fit(_worker_state["X_train"], _worker_state["y_train"])
+    fit_seconds = time.perf_counter() - fit_start
+
+    metrics = regression_metrics(_worker_state["y_val"], model.predict(_worker_state["X_val"]), deflection=deflection)
+    model_path = os.path.join(trial_dir, f"trial_{trial}.joblib")
+    joblib.dump(model, model_path)
+
+    return {"trial": trial, "hyperparameters": hyperparameters, "metrics": metrics, "fit_seconds": fit_seconds, "model_path": model_path}
+
+
+class SweepRunner:
+    """
+    Trains one model per hyperparameter combination of the `sweep` section of a train config and registers the best ones.
+
+    The raw dataset is processed and split once by the configured trainer. The fits run in a process pool, each one limited to
+    `threads_per_fit` threads, and their validation metrics are collected into a leaderboard. Only the `register_top_n` best
+    models are saved and registered, each with its own version and the lineage of the training split. Linear regression models
+    also get the normal equation statistics of the training split, so they can be warm started like the ones of `LinearRegressionTrainer`.
+
+    Args:
+        train_config (dict): Train config with a `sweep` section in `train_config`.
+        logger (ColorLogger): Logger of the sweep.
+    """
+
+    LEADERBOARD_FILE: Final = "sweep_leaderboard.csv"
+    THREAD_HYPERPARAMETER: Final = "n_jobs"
+    DEFAULT_RANK_BY: Final = "MSE"
+    # Train options the trials do not run, every trial fits the in memory training split from scratch.
+    UNSUPPORTED_TRAIN_OPTIONS: Final = ["warm_start", "cross_validation", "external_memory"]
+
+    def __init__(self, train_config: dict, logger=None):
+        self.train_config = train_config
+        self.logger = logger
+
+        sweep_config = train_config["train_config"]["sweep"]
+        train_options = train_config["train_config"]["train"]
+        unsupported_options = [option for option in SweepRunner.UNSUPPORTED_TRAIN_OPTIONS if train_options.get(option, None) is not None]
+        if unsupported_options:
+            raise ValueError(f"Sweeps can not be combined with {', '.join(unsupported_options)}, remove them from the train section.")
+        self.trainer_class_name = train_config["train_config"]["model_trainer__eval__"]
+        self.threads_per_fit = sweep_config.get("threads_per_fit", 1)
+        self.workers = sweep_config.get("workers", max(1, (os.cpu_count() or 1) // self.threads_per_fit))
+        self.rank_by = sweep_config.get("rank_by", SweepRunner.DEFAULT_RANK_BY)
+        directions = metric_directions(train_config["train_config"]["train"].get("deflection", 0))
+        if self.rank_by not in directions:
+            raise ValueError(f"Unknown rank_by metric {self.rank_by}, use one of {sorted(directions)}.")
+        self.rank_descending = directions[self.rank_by]
+        self.register_top_n = sweep_config.get("register_top_n", 1)
+
+        # Every trial gets the thread cap, a configured n_jobs would oversubscribe the cores.
+        base_hyperparameters = train_config["train_config"]["train"].get("hyperparameters", None) or {}
+        self.trial_hyperparameters = [
+            {**hyperparameters, SweepRunner.THREAD_HYPERPARAMETER: self.threads_per_fit}
+            for hyperparameters in expand_search_space(sweep_config, base_hyperparameters)
+        ]
+
+        self.trainer: Trainer = getattr(trainer_module, self.trainer_class_name)(train_config=train_config, logger=logger)
+        self.sweep_name = self.trainer.experiment_name
+        self.leaderboard = None
+        self.training_statistics = None
+
+    def run(self) -> pl.DataFrame:
+        """
+        Runs every trial, writes the leaderboard and registers the best models.
+
+        Returns:
+            pl.DataFrame: Leaderboard ordered from the best to the worst trial.
+        """
+        X_train, X_val, y_train, y_val = self.trainer.prepare_data()
+        self.logger.info(
+            "Sweep %s: %d trials of %s on %d workers with %d threads per fit.",
+            self.sweep_name,
+            len(self.trial_hyperparameters),
+            self.trainer_class_name,
+            self.workers,
+            self.threads_per_fit,
+        )
+
+        sweep_dir = os.path.join(Trainer.MODEL_SAVE_PATH, self.sweep_name)
+        os.makedirs(sweep_dir, exist_ok=True)
+        trial_dir = tempfile.mkdtemp(prefix=".trials_", dir=sweep_dir)
+        try:
+            results = self.__run_trials(X_train, y_train, X_val, y_val, trial_dir)
+            self.leaderboard = self.__build_leaderboard(results)
+            self.leaderboard.write_csv(os.path.join(sweep_dir, SweepRunner.LEADERBOARD_FILE))
+            self.logger.info("Sweep %s leaderboard:\n%s", self.sweep_name, self.leaderboard.drop("model_path"))
+
+            # Every trial is fitted on the same rows, their statistics are accumulated once for all registered models.
+            if isinstance(self.trainer, LinearRegressionTrainer) and self.trainer.model_save_path is not None:
+                batches = partial(iter_array_batches, X_train, y_train, LinearRegressionTrainer.STATISTICS_BATCH_ROWS)
+                self.training_statistics = self.trainer.training_statistics(batches, len(y_train))
+            for row in self.leaderboard.head(self.register_top_n).iter_rows(named=True):
+                self.__register(row, results[row["trial"]])
+        finally:
+            shutil.rmtree(trial_dir, ignore_errors=True)
+
+        return self.leaderboard.drop("model_path")
+
+    def __run_trials(self, X_train, y_train, X_val, y_val, trial_dir: str) -> dict:
+        results = {}
+        # Spawned workers do not inherit the thread pools of polars and the logger from this process.
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(X_train, y_train, X_val, y_val, self.threads_per_fit),
+        ) as executor:
+            futures = [
+                executor.submit(_run_trial, self.trainer_class_name, trial, hyperparameters, self.trainer.deflection, trial_dir)
+                for trial, hyperparameters in enumerate(self.trial_hyperparameters)
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result["trial"]] = result
+                self.logger.info(
+                    "Trial %d finished in %.2f s, %s: %.4f.", result["trial"], result["fit_seconds"], self.rank_by, result["metrics"][self.rank_by]
+                )
+        return results
+
+    def __build_leaderboard(self, results: dict) -> pl.DataFrame:
+        rows = [
+            {
+                "trial": result["trial"],
+                **result["metrics"],
+                "fit_seconds": result["fit_seconds"],
+                "hyperparameters": json.dumps(result["hyperparameters"], sort_keys=True),
+                "model_path": result["model_path"],
+            }
+            for result in results.values()
+        ]
+        leaderboard = pl.DataFrame(rows).sort([self.rank_by, "trial"], descending=[self.rank_descending, False])
+        return leaderboard.with_row_index(name="rank", offset=1)
+
+    def __register(self, row: dict, result: dict):
+        trainer = self.trainer
+        if trainer.model_save_path is None:
+            self.logger.warning("No saved_model_path in the train config, trial %d is not registered.", row["trial"])
+            return
+
+        # The saved train config reproduces the trial on its own.
+        trainer.train_config = copy.deepcopy(self.train_config)
+        trainer.train_config["train_config"].pop("sweep")
+        trainer.train_config["train_config"]["train"]["hyperparameters"] = result["hyperparameters"]
+        trainer.registry_meta_data = trainer.train_config["meta_data"]
+
+        trainer.model = joblib.load(result["model_path"])
+        if self.training_statistics is not None:
+            trainer.model.sufficient_statistics_ = self.training_statistics.to_dict()
+        trainer.hyperparameters = result["hyperparameters"]
+        trainer.experiment_name = f"{self.sweep_name}_trial_{row['trial']}"
+        trainer.registry_meta_data["version"] = f"{trainer.version}-trial-{row['trial']}"
+        trainer.registry_meta_data["hyperparameters"] = json.dumps(result["hyperparameters"])
+        trainer.registry_meta_data["evaluation_metrics"] = json.dumps(result["metrics"])
+        trainer.registry_meta_data["features"] = json.dumps(trainer.features)
+        trainer.record_lineage()
+
+        self.logger.info("Registering rank %d, trial %d as version %s.", row["rank"], row["trial"], trainer.registry_meta_data["version"])
+        trainer.save_model()
+
+
+# python -m app.trainer.sweep --config app/trainer/configs/xgboost_regression_sweep_config.yml
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a hyperparameter sweep using the specified configuration file.")
+
+    parser.add_argument("--config", type=str, required=True, help="Path to a training configuration YAML file with a sweep section.")
+
+    args = parser.parse_args()
+
+    sweep_logger = Logger(log_file="logs" + os.sep + "sweep_logger.log", debug_mode=False)
+
+    try:
+        SweepRunner(train_config=load_config(file_path=args.config), logger=sweep_logger).run()
+    except Exception as e:
+        print(f"Sweep app has caught an unexpected exception {e}. Traceback: {traceback.format_exc()}")
+        sweep_logger.logger.critical(f"Sweep app has caught an unexpected exception {e}. Traceback: {traceback.format_exc()}")
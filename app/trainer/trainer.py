@@ -4,24 +4,42 @@ import argparse
 import json
 import os
 import random
+import shutil
 import traceback
 from abc import abstractmethod
+from functools import partial
 from functools import wraps
 from typing import Final
+from typing import Iterable
+from typing import Iterator
 
 import joblib
 import numpy as np
 import pandas as pd
+import polars as pl
 import requests
 import yaml
 from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_absolute_error
-from sklearn.metrics import mean_squared_error
-from sklearn.metrics import r2_score
 from sklearn.model_selection import train_test_split
 from xgboost import XGBRegressor
 
+from app.datasets.dataset_io import EXTENSION_BY_FORMAT
+from app.datasets.dataset_io import iter_dataset_batches
+from app.datasets.dataset_io import scan_dataset
+from app.datasets.dataset_io import write_dataset
+from app.trainer.cross_validation import run_cross_validation
+from app.trainer.cross_validation import summarize_folds
+from app.trainer.dataset_cache import ProcessedDatasetCache
 from app.trainer.dataset_processor import DatasetProcessor
+from app.trainer.external_memory import iter_split_batches
+from app.trainer.external_memory import train_external_memory
+from app.trainer.external_memory import validation_mask
+from app.trainer.metrics import regression_metrics
+from app.trainer.metrics import RegressionMetricAccumulator
+from app.trainer.normal_equation import accumulate_statistics
+from app.trainer.normal_equation import iter_array_batches
+from app.trainer.normal_equation import NormalEquationStatistics
+from app.trainer.normal_equation import statistics_workers
 
 from app.logger.logger import ColorLogger as Logger  # noreorder # noqa
 
@@ -98,8 +116,19 @@ def generate_experiment_name():
 
 class Trainer:
     PROCESSED_DATASET_SAVE_PATH: Final = "saved_datasets"
+    PROCESSED_DATASET_CACHE_PATH: Final = "dataset_cache"
     MODEL_SAVE_PATH: Final = "saved_models"
+    # The registry writes the parent model here and the trainer reads it, the Downloads mount both containers share.
+    PARENT_MODEL_DOWNLOAD_PATH: Final = "Downloads"
+    # Column whose maximum marks the newest row a model was trained on, warm starts train on the rows after it.
+    WATERMARK_COLUMN: Final = "purchase_date"
     YAML_PRETTY_PRINT: Final = 4
+    EVALUATION_BATCH_ROWS: Final = 1_000_000
+    EXTERNAL_MEMORY_BATCH_ROWS: Final = 1_000_000
+    # Precision of the arrays handed to the estimator, see prepare_data.
+    FEATURE_DTYPE = np.float64
+    # Set by the trainers that implement `run_external_memory`.
+    SUPPORTS_EXTERNAL_MEMORY = False
     SUPPORTED_REGISTRY_LIST: Final = ["ado-flow"]
 
     def __init__(self, train_config: dict = None, logger=None):
@@ -112,15 +141,14 @@ class Trainer:
         # PARSING TRAIN CONFIGS
         dataset_params = self.trainer_config["dataset"]
         train_params = self.trainer_config["train"]
-        registry_config = trainer_config["registry"]
+        registry_config = self.trainer_config["registry"]
 
         self.version = self.registry_meta_data.get("version", None)
 
         if self.version is None:
             raise ValueError("Model version can not be NONE !")
 
-        if experiment_name is None:
-            self.experiment_name = generate_experiment_name()
+        self.experiment_name = generate_experiment_name()
 
         # PARSE REGISTRY CONFIG
         registry_name = registry_config.get("name", None)
@@ -137,6 +165,9 @@ class Trainer:
         random_state = train_params.get("random_state", 42)
         saved_model_path = train_params.get("saved_model_path", None)
         hyperparameters = train_params.get("hyperparameters", None)
+        cross_validation = train_params.get("cross_validation", None)
+        external_memory = train_params.get("external_memory", None)
+        warm_start = train_params.get("warm_start", None)
 
         # TRAINING VARIABLES
         self.hyperparameters = hyperparameters
@@ -148,12 +179,29 @@ class Trainer:
         self.train_validation_split_ratio = train_validation_split_ratio
         self.deflection = deflection
         self.target = prediction_target
+        self.cross_validation = cross_validation
+        self.external_memory = external_memory
+        self.warm_start = warm_start
+
+        if self.external_memory is not None and not self.SUPPORTS_EXTERNAL_MEMORY:
+            raise ValueError(
+                f"{type(self).__name__} does not support external memory training, use XGBoostRegressionTrainer or NormalEquationRegressionTrainer."
+            )
+        if self.cross_validation is not None and self.external_memory is not None:
+            raise ValueError("Cross validation needs the dataset in memory, it can not be combined with external memory training.")
+        if self.warm_start is not None and (self.cross_validation is not None or self.external_memory is not None):
+            raise ValueError("Warm start trains on the new rows in memory, it can not be combined with cross validation or external memory.")
 
         # PARSING DATASET CONFIG
+        # Any dataset format supported by app.datasets.dataset_io, the key keeps its historical name.
         raw_dataset_csv = dataset_params.get("raw_dataset_csv", None)
         numerical_columns = dataset_params.get("numerical_columns", None)
         categorical_columns = dataset_params.get("categorical_columns", None)
         save_datasets_as_csv = dataset_params.get("save_datasets_as_csv", None)
+        saved_datasets_format = dataset_params.get("saved_datasets_format", "csv")
+        use_dataset_cache = dataset_params.get("use_cache", True)
+        dataset_cache_dir = dataset_params.get("cache_dir", Trainer.PROCESSED_DATASET_CACHE_PATH)
+        outlier_quantile_error = dataset_params.get("outlier_quantile_error", None)
 
         # DATASET VARIABLES
         self.raw_dataset_csv = raw_dataset_csv
@@ -162,17 +210,20 @@ class Trainer:
 
         # EXPORT OPTIONS
         self.save_datasets = save_datasets_as_csv
+        self.saved_datasets_extension = EXTENSION_BY_FORMAT[saved_datasets_format]
         self.model_save_path = saved_model_path
 
         # MISC
-        self.experiment_name = experiment_name
         self.logger = logger
 
         # INNER VARIABLES
         self.model = None
+        self.parent_model = None
+        self.parent_lineage = None
         self.train_dataframe = None
-        self.validation_dataframe = None
         self.test_dataframe = None
+        # Rows of train_dataframe in the training split of prepare_data, the rest are validation rows.
+        self.train_index = None
 
         if "training_data" in self.registry_meta_data:
             self.registry_meta_data["training_data"] = self.registry_meta_data["training_data"] + f" Dataset path: {self.raw_dataset_csv}"
@@ -185,45 +236,133 @@ class Trainer:
             numerical_columns=self.numerical_columns,
             categorical_columns=self.categorical_columns,
             target_column=self.target,
+            outlier_quantile_error=outlier_quantile_error,
         )
 
-        self.train_dataframe, self.test_dataframe = self.data_processor.process_dataset(save=False)
+        self.dataset_cache = ProcessedDatasetCache(cache_dir=dataset_cache_dir) if use_dataset_cache else None
+        # Processed training dataset on disk, read in batches by external memory training.
+        self.processed_dataset_path = None if self.external_memory is None else self.external_memory.get("dataset", None)
+        if self.external_memory is None:
+            self.train_dataframe, self.test_dataframe = self.load_datasets()
+        elif self.processed_dataset_path is None:
+            self.processed_dataset_path = self.cache_processed_dataset()
+
+    def load_datasets(self):
+        """Processes the raw dataset, or loads it from the processed dataset cache when the same file was already processed
+        with the same parameters.
+
+        Returns:
+            tuple[pl.DataFrame, pl.DataFrame]: Train and test datasets.
+        """
+        if self.dataset_cache is None:
+            return self.data_processor.process_dataset(save=False, as_pandas=False)
+
+        processing_params = self.data_processor.processing_params()
+        cache_key = self.__processed_dataset_key(processing_params)
+        self.processed_dataset_path = self.dataset_cache.train_path(cache_key)
+
+        cached_datasets = self.dataset_cache.load(cache_key)
+        if cached_datasets is not None:
+            self.logger.info("Processed dataset cache hit %s, loaded from %s.", cache_key, self.dataset_cache.entry_path(cache_key))
+            train_dataframe, test_dataframe = cached_datasets
+        else:
+            self.logger.info("Processed dataset cache miss %s, processing %s.", cache_key, self.raw_dataset_csv)
+            train_dataframe, test_dataframe = self.data_processor.process_dataset(save=False, as_pandas=False)
+            self.dataset_cache.store(
+                cache_key, train_dataframe, test_dataframe, metadata={"raw_dataset_csv": self.raw_dataset_csv, **processing_params}
+            )
+
+        return train_dataframe, test_dataframe
+
+    def cache_processed_dataset(self) -> str:
+        """Processes the raw dataset on the polars streaming engine into the processed dataset cache unless it is already there.
+        External memory training reads the cached training dataset file in batches, so no dataset is kept in memory.
+
+        Raises:
+            ValueError: If the processed dataset cache is disabled.
+
+        Returns:
+            str: Path of the processed training dataset file.
+        """
+        if self.dataset_cache is None:
+            raise ValueError("External memory training reads the processed dataset from disk, enable use_cache or set external_memory.dataset.")
+
+        processing_params = self.data_processor.processing_params()
+        cache_key = self.__processed_dataset_key(processing_params)
+        if self.dataset_cache.contains(cache_key):
+            self.logger.info("Processed dataset cache hit %s, training from %s.", cache_key, self.dataset_cache.entry_path(cache_key))
+        else:
+            self.logger.info("Processed dataset cache miss %s, processing %s on the streaming engine.", cache_key, self.raw_dataset_csv)
+            self.dataset_cache.store(
+                cache_key,
+                *self.data_processor.process_dataset(save=False, streaming=True, as_pandas=False),
+                metadata={"raw_dataset_csv": self.raw_dataset_csv, **processing_params},
+            )
+            # The processor keeps the processed frame it split, drop it once the entry is on disk.
+            self.data_processor.dataframe = None
+
+        return self.dataset_cache.train_path(cache_key)
+
+    def __processed_dataset_key(self, processing_params: dict) -> str:
+        cache_key = self.dataset_cache.key(self.raw_dataset_csv, processing_params)
+        if "training_data" in self.registry_meta_data:
+            self.registry_meta_data["training_data"] = self.registry_meta_data["training_data"] + f" Processed dataset: {cache_key}"
+        return cache_key
 
     def prepare_data(self):
         """Prepares the training and validation datasets by selecting features, splitting the data,
         and optionally saving the processed datasets.
 
+        The features are copied once out of the polars dataset into a C-contiguous `FEATURE_DTYPE` array ordered by split, so
+        both splits are views of it and estimators take them without converting again.
+
         Returns:
-            tuple: The training and validation sets for both features (X) and target (y).
+            tuple: The training and validation sets for both features (X) and target (y) as NumPy arrays.
         """
         # Selecting relevant features and target
-        X = self.train_dataframe[self.features]
-        y = self.train_dataframe[self.target]
+        dataset = self.train_dataframe.select(self.features + [self.target])
 
-        # Split the data into training and validation sets (80% train, 20% validation)
-        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=self.train_validation_split_ratio, random_state=self.random_state)
+        # Split the row indices into training and validation sets (80% train, 20% validation)
+        train_index, validation_index = train_test_split(
+            np.arange(dataset.height), test_size=self.train_validation_split_ratio, random_state=self.random_state
+        )
+        self.train_index = train_index
+        split_order = np.concatenate([train_index, validation_index])
 
-        # Store the datasets
-        self.train_dataframe = pd.concat([X_train, y_train], axis=1)
-        self.validation_dataframe = pd.concat([X_val, y_val], axis=1)
+        # Filled column by column in split order, so the only temporary is a single column.
+        X = np.empty((dataset.height, len(self.features)), dtype=self.FEATURE_DTYPE)
+        for column_index, feature in enumerate(self.features):
+            X[:, column_index] = dataset[feature].to_numpy()[split_order]
+        y = dataset[self.target].to_numpy()[split_order].astype(self.FEATURE_DTYPE, copy=False)
+        X_train, X_val = np.split(X, [len(train_index)])
+        y_train, y_val = np.split(y, [len(train_index)])
 
         # Optionally save the datasets
         if self.save_datasets:
-            os.makedirs(Trainer.PROCESSED_DATASET_SAVE_PATH, exist_ok=True)
-            self.train_dataframe.to_csv(Trainer.PROCESSED_DATASET_SAVE_PATH + os.sep + f"train_dataset_version_{self.version}.csv", index=False)
-            self.validation_dataframe.to_csv(
-                Trainer.PROCESSED_DATASET_SAVE_PATH + os.sep + f"validation_dataset_version_{self.version}.csv", index=False
-            )
-            self.test_dataframe is not None and self.test_dataframe.to_csv(
-                Trainer.PROCESSED_DATASET_SAVE_PATH + os.sep + f"test_dataset_version_{self.version}.csv", index=False
-            )
+            self.save_dataset(dataset[train_index], "train")
+            self.save_dataset(dataset[validation_index], "validation")
+            if self.test_dataframe is not None:
+                self.save_dataset(self.test_dataframe, "test")
 
         return X_train, X_val, y_train, y_val
 
+    def save_dataset(self, dataframe: pl.DataFrame, split: str):
+        """Saves a dataset split in the configured `saved_datasets_format` (csv, parquet or ipc).
+
+        Args:
+            dataframe (pl.DataFrame): Dataset split.
+            split (str): Name of the split, part of the file name.
+        """
+        dataset_path = os.path.join(Trainer.PROCESSED_DATASET_SAVE_PATH, f"{split}_dataset_version_{self.version}{self.saved_datasets_extension}")
+        write_dataset(dataframe, dataset_path)
+
     def evaluate_model(self, X_val, y_val):
         """
         Evaluates the model using validation data and calculates different metrics.
 
+        The validation set is predicted in batches of `EVALUATION_BATCH_ROWS` rows whose errors are accumulated in a single pass,
+        so the full prediction vector is never held in memory.
+
         Args:
             X_val (DataFrame or array-like): Validation features.
             y_val (DataFrame or array-like): Actual target values for the validation set.
@@ -231,42 +370,171 @@ class Trainer:
         Returns:
             dict: A dictionary containing evaluation metrics such as MSE, MAE, R2, and optionally, thresholded versions of these metrics.
         """
-        y_pred = self.model.predict(X_val)
+        batch_slices = (slice(start, start + Trainer.EVALUATION_BATCH_ROWS) for start in range(0, len(X_val), Trainer.EVALUATION_BATCH_ROWS))
+        return self.evaluate_batches((Trainer.__rows(X_val, batch), Trainer.__rows(y_val, batch)) for batch in batch_slices)
 
-        mse = mean_squared_error(y_val, y_pred)
-        mae = mean_absolute_error(y_val, y_pred)
-        r2 = r2_score(y_val, y_pred)
+    @staticmethod
+    def __rows(data, batch: slice):
+        return data.iloc[batch] if isinstance(data, (pd.Series, pd.DataFrame)) else data[batch]
 
-        results = {"MSE": mse, "MAE": mae, "R2": r2}
+    def evaluate_batches(self, batches: Iterable):
+        """
+        Evaluates the model on validation batches in a single pass and reports the metrics to the registry.
 
-        if self.deflection != 0:
-            y_val_np = np.array(y_val)
-            y_pred_np = np.array(y_pred)
+        Args:
+            batches (Iterable): `(X, y)` validation batches.
 
-            absolute_errors = np.abs(y_val_np - y_pred_np)
+        Returns:
+            dict: A dictionary containing evaluation metrics such as MSE, MAE, R2, and optionally, thresholded versions of these metrics.
+        """
+        accumulator = RegressionMetricAccumulator(deflection=self.deflection)
+        for X_batch, y_batch in batches:
+            accumulator.update(y_batch, self.model.predict(X_batch))
+        results = accumulator.result()
 
-            capped_errors = np.minimum(absolute_errors, self.deflection)
+        for metric, value in results.items():
+            self.logger.info(f"{metric}: {value:.4f}")
 
-            thresholded_mae = np.mean(capped_errors)
-            thresholded_mse = np.mean(capped_errors**2)
+        self.registry_meta_data["evaluation_metrics"] = json.dumps(results)
 
-            total_variance = np.sum((y_val_np - np.mean(y_val_np)) ** 2)
+        return results
 
-            thresholded_ss_residual = np.sum((capped_errors) ** 2)
+    def cross_validate(self, X, y):
+        """
+        K-fold evaluation configured by `cross_validation: {folds, workers, threads_per_fit}` of the train config. The folds run
+        in parallel worker processes and the mean and std of every metric are added to the registry's evaluation metrics.
 
-            thresholded_r2 = 1 - (thresholded_ss_residual / total_variance)
+        Args:
+            X (DataFrame or array-like): Features of all labelled rows.
+            y (DataFrame or array-like): Target values of all labelled rows.
 
-            results[f"Thresholded MAE (±{self.deflection})"] = thresholded_mae
-            results[f"Thresholded MSE (±{self.deflection})"] = thresholded_mse
-            results[f"Thresholded R2 (±{self.deflection})"] = thresholded_r2
+        Returns:
+            dict: Mean and std of every metric across folds.
+        """
+        folds = self.cross_validation.get("folds", 5)
+        threads_per_fit = self.cross_validation.get("threads_per_fit", 1)
+        fold_metrics = run_cross_validation(
+            build_model=self.build_model,
+            hyperparameters={**self.hyperparameters, "n_jobs": threads_per_fit},
+            score=partial(regression_metrics, deflection=self.deflection),
+            X=np.asarray(X, dtype=np.float64),
+            y=np.asarray(y, dtype=np.float64),
+            folds=folds,
+            random_state=self.random_state,
+            workers=self.cross_validation.get("workers", None),
+            threads_per_fit=threads_per_fit,
+        )
+        results = summarize_folds(fold_metrics)
 
         for metric, value in results.items():
             self.logger.info(f"{metric}: {value:.4f}")
 
-        self.registry_meta_data["evaluation_metrics"] = json.dumps(results)
+        evaluation_metrics = json.loads(self.registry_meta_data.get("evaluation_metrics", "{}"))
+        self.registry_meta_data["evaluation_metrics"] = json.dumps({**evaluation_metrics, **results})
 
         return results
 
+    def start_from_parent(self):
+        """
+        Prepares a warm start configured by `warm_start: {name, version, download_path}` of the train config.
+
+        The parent model is downloaded from the registry and the training dataset is reduced to the rows after the data watermark
+        of the parent's lineage, so only the rows the parent has not seen are trained on. The registry writes the parent file to
+        `download_path` relative to its own working directory, so it must be a directory both share, `Downloads` in the compose setup.
+
+        Raises:
+            ValueError: If the parent can not be fetched or read, was trained on other features, has no data watermark or there are no new rows.
+        """
+        name, version = self.warm_start["name"], self.warm_start["version"]
+        download_path = self.warm_start.get("download_path", Trainer.PARENT_MODEL_DOWNLOAD_PATH)
+        fetch_request = {"name": name, "version": version, "download_path": download_path}
+        response = requests.get(os.path.join(self.registry_url, "fetch_and_download_model"), json=fetch_request).json()  # noqa
+
+        parent_meta_data = response.get("model_metadata", None)
+        if parent_meta_data is None:
+            raise ValueError(f"Could not fetch parent model '{name}' version '{version}'. {response.get('message')}")
+        if json.loads(parent_meta_data["features"]) != self.features:
+            raise ValueError(f"Parent model '{name}' version '{version}' was trained on features {parent_meta_data['features']}.")
+
+        parent_model_path = os.path.join(download_path, parent_meta_data["uploaded_file_name"])
+        if not os.path.isfile(parent_model_path):
+            raise ValueError(
+                f"Parent model file {parent_model_path} written by the registry is not visible, download_path must be shared with the registry."
+            )
+        self.parent_model = joblib.load(parent_model_path)
+        self.parent_lineage = Trainer.__parse_lineage(parent_meta_data.get("lineage", None))
+        watermark = None if self.parent_lineage is None else self.parent_lineage.get("watermark", None)
+        if watermark is None:
+            raise ValueError(f"Parent model '{name}' version '{version}' has no data watermark in its lineage, train it from scratch once.")
+
+        watermark_column = self.parent_lineage["watermark_column"]
+        self.train_dataframe = self.train_dataframe.filter(pl.col(watermark_column).to_physical() > watermark)
+        if self.train_dataframe.height == 0:
+            raise ValueError(f"No rows after {watermark_column} {self.parent_lineage['trained_until']} of parent model '{name}' version '{version}'.")
+
+        self.logger.registry(
+            f"Warm start from '{name}' version '{version}' on {self.train_dataframe.height} rows after {self.parent_lineage['trained_until']}."
+        )
+
+    @staticmethod
+    def __parse_lineage(lineage: str | None) -> dict | None:
+        try:
+            return json.loads(lineage)
+        except (TypeError, json.JSONDecodeError):
+            return None
+
+    def record_lineage(self):
+        """
+        Records the parent model, the chain of models it descends from and the data watermark of this run as `lineage` in the registry
+        metadata. `rows` and the watermark cover the rows the model was fitted on, validation rows are left out. The watermark is the
+        maximum of `WATERMARK_COLUMN` over them, a later warm start from this model trains on the rows after it.
+        """
+        columns = (
+            self.train_dataframe.columns if self.train_dataframe is not None else scan_dataset(self.processed_dataset_path).collect_schema().names()
+        )
+        has_watermark = Trainer.WATERMARK_COLUMN in columns
+        watermark_columns = [
+            pl.col(Trainer.WATERMARK_COLUMN).max().alias("trained_until"),
+            pl.col(Trainer.WATERMARK_COLUMN).to_physical().max().alias("watermark"),
+        ]
+        aggregations = [pl.len()] + (watermark_columns if has_watermark else [])
+        batch_summaries = pl.concat([rows.select(aggregations).collect() for rows in self.__fitted_rows()])
+        summary = batch_summaries.select(pl.col("len").sum(), pl.exclude("len").max()).row(0, named=True)
+
+        parent = None if self.warm_start is None else {"name": self.warm_start["name"], "version": self.warm_start["version"]}
+        lineage = {
+            "parent": parent,
+            # Every model this one was warm started from, oldest first.
+            "ancestors": [] if parent is None else self.parent_lineage.get("ancestors", []) + [parent],
+            "watermark_column": Trainer.WATERMARK_COLUMN if has_watermark else None,
+            "watermark": summary.get("watermark", None),
+            "trained_until": summary.get("trained_until", None),
+            "rows": summary["len"],
+            "total_rows": summary["len"] + (0 if self.parent_lineage is None else self.parent_lineage.get("total_rows", 0)),
+        }
+        self.registry_meta_data["lineage"] = json.dumps(lineage, default=str)
+
+    def __fitted_rows(self) -> Iterator[pl.LazyFrame]:
+        """
+        Rows the model was fitted on, the training split of `prepare_data` in memory or, out of core, the processed dataset file
+        read in batches without the rows `external_memory.validation_mask` puts into the validation split.
+        """
+        if self.train_dataframe is not None:
+            fitted = np.ones(self.train_dataframe.height, dtype=bool)
+            if self.train_index is not None:
+                fitted[:] = False
+                fitted[self.train_index] = True
+            yield self.train_dataframe.lazy().filter(pl.Series(fitted))
+            return
+
+        start = 0
+        for batch in iter_dataset_batches(
+            self.processed_dataset_path, batch_rows=self.external_memory.get("batch_rows", self.EXTERNAL_MEMORY_BATCH_ROWS)
+        ):
+            mask = validation_mask(start, batch.height, self.train_validation_split_ratio, self.random_state)
+            start += batch.height
+            yield batch.lazy().filter(pl.Series(~mask))
+
     def save_model(self):
         """
         Saves the trained model and its configuration to the specified path. Also, registers the model if a supported registry is configured.
@@ -357,6 +625,19 @@ class Trainer:
         """
         pass
 
+    @staticmethod
+    @abstractmethod
+    def build_model(hyperparameters: dict):
+        """
+        Abstract method to create an untrained model from hyperparameters.
+
+        Args:
+            hyperparameters (dict): Keyword arguments of the model.
+
+        Must be implemented by subclasses.
+        """
+        pass
+
     @abstractmethod
     def train(self, X_train, y_train):
         """
@@ -372,34 +653,180 @@ class Trainer:
 
 
 class LinearRegressionTrainer(Trainer):
+    STATISTICS_BATCH_ROWS: Final = 1_000_000
+
+    @staticmethod
+    def build_model(hyperparameters: dict):
+        return LinearRegression(**hyperparameters)
+
+    def training_statistics(self, batches, rows: int) -> NormalEquationStatistics:
+        """
+        Accumulates the normal equation statistics of the training rows with `n_jobs` workers. On a warm start they are merged
+        into the statistics of the parent model.
+
+        Args:
+            batches (Callable): Row range `(X, y)` batches of the training rows, see `normal_equation.accumulate_statistics`.
+            rows (int): Rows of the dataset the batches are read from.
+
+        Raises:
+            ValueError: If the parent model of a warm start has no sufficient statistics.
+
+        Returns:
+            NormalEquationStatistics: Statistics of the training rows, and of the parent's on a warm start.
+        """
+        workers = statistics_workers(self.hyperparameters.get("n_jobs", None))
+        statistics = accumulate_statistics(batches, rows, len(self.features), workers=workers)
+        if self.parent_model is None:
+            return statistics
+
+        parent_statistics = getattr(self.parent_model, "sufficient_statistics_", None)
+        if parent_statistics is None:
+            raise ValueError("The parent model has no sufficient statistics to update, train it from scratch once.")
+        return NormalEquationStatistics.from_dict(parent_statistics).merge(statistics)
+
     def train(self, X_train, y_train):
-        self.model = LinearRegression(**self.hyperparameters)
-        self.model.fit(X_train, y_train)
+        """
+        Fits the model and keeps the normal equation statistics of the training rows on it as `sufficient_statistics_`, plain
+        values of `NormalEquationStatistics.to_dict` so the inference service unpickles it without the trainer package. A warm
+        start merges the statistics of the new rows into the parent's and solves them, which gives the fit on the rows of both.
+        """
+        batches = partial(iter_array_batches, X_train, y_train, LinearRegressionTrainer.STATISTICS_BATCH_ROWS)
+        statistics = self.training_statistics(batches, len(y_train))
+
+        if self.parent_model is None:
+            self.model = self.build_model(self.hyperparameters)
+            self.model.fit(X_train, y_train)
+            self.model.sufficient_statistics_ = statistics.to_dict()
+        else:
+            self.model = statistics.to_linear_regression(self.hyperparameters)
         self.logger.info("Model training complete.")
 
     def run(self):
+        # Only NormalEquationRegressionTrainer gets here with external memory, see SUPPORTS_EXTERNAL_MEMORY.
+        if self.external_memory is not None:
+            return self.run_external_memory()
+
+        if self.warm_start is not None:
+            self.start_from_parent()
         X_train, X_val, y_train, y_val = self.prepare_data()
         self.train(X_train, y_train)
         evaluation_results = self.evaluate_model(X_val, y_val)
+        if self.cross_validation is not None:
+            evaluation_results.update(self.cross_validate(np.concatenate([X_train, X_val]), np.concatenate([y_train, y_val])))
+        self.record_lineage()
 
         return evaluation_results
 
     run = Trainer.save_callback(run)  # noqa
 
 
+class NormalEquationRegressionTrainer(LinearRegressionTrainer):
+    """
+    Linear regression solved once from normal equation statistics accumulated over row batches, instead of a least squares fit
+    on the whole training matrix. The statistics of a batch are a 7x7 matrix for our features, so only one batch per worker is
+    in memory on top of the data. With `external_memory: {batch_rows, dataset}` the batches are read from the processed dataset
+    file and training memory no longer depends on the number of rows. The workers come from the `n_jobs` hyperparameter.
+
+    The model is a fitted `LinearRegression`, saved, registered and loaded by `MlInferenceEngine` like the one of
+    `LinearRegressionTrainer`.
+    """
+
+    SUPPORTS_EXTERNAL_MEMORY = True
+
+    def train(self, X_train, y_train):
+        batches = partial(iter_array_batches, X_train, y_train, LinearRegressionTrainer.STATISTICS_BATCH_ROWS)
+        self.model = self.training_statistics(batches, len(y_train)).to_linear_regression(self.hyperparameters)
+        self.logger.info("Normal equation model training complete.")
+
+    def run_external_memory(self):
+        """
+        Trains on the processed training dataset file read in batches, validation rows are chosen like in
+        `XGBoostRegressionTrainer.run_external_memory`.
+
+        Returns:
+            dict: Evaluation metrics of the validation split.
+        """
+        batches = partial(
+            iter_split_batches,
+            self.processed_dataset_path,
+            self.features,
+            self.target,
+            self.external_memory.get("batch_rows", NormalEquationRegressionTrainer.EXTERNAL_MEMORY_BATCH_ROWS),
+            self.train_validation_split_ratio,
+            self.random_state,
+            dtype=np.float64,
+        )
+        rows = scan_dataset(self.processed_dataset_path).select(pl.len()).collect().item()
+        self.logger.info("Training out of core on %s.", self.processed_dataset_path)
+        self.model = self.training_statistics(partial(batches, validation=False), rows).to_linear_regression(self.hyperparameters)
+        self.logger.info("Normal equation model training complete.")
+        self.record_lineage()
+
+        return self.evaluate_batches(batches(validation=True))
+
+
 class XGBoostRegressionTrainer(Trainer):
+    # XGBoost bins float32 features, float32 C-contiguous arrays go into its QuantileDMatrix without another copy.
+    FEATURE_DTYPE = np.float32
+    SUPPORTS_EXTERNAL_MEMORY = True
+    EXTERNAL_MEMORY_CACHE_PATH: Final = "xgboost_cache"
+
+    @staticmethod
+    def build_model(hyperparameters: dict):
+        return XGBRegressor(**hyperparameters)
+
     def train(self, X_train, y_train):
-        self.model = XGBRegressor(**self.hyperparameters)
+        self.model = self.build_model(self.hyperparameters)
 
-        self.model.fit(X_train, y_train)
+        # A warm start adds n_estimators boosting rounds on top of the parent's trees.
+        self.model.fit(X_train, y_train, xgb_model=None if self.parent_model is None else self.parent_model.get_booster())
         self.logger.info("XGBoost model training complete.")
 
+    def run_external_memory(self):
+        """
+        Trains out of core on the processed training dataset file, configured by `external_memory: {batch_rows, cache_dir, dataset}`.
+
+        The dataset is read in batches of `batch_rows` rows and XGBoost keeps its quantized pages in `cache_dir`, so neither the
+        dataset nor a split of it is loaded into memory. `dataset` defaults to the processed dataset cache entry. Rows are
+        assigned to the validation split by a seeded hash of their index, see `external_memory.validation_mask`.
+
+        Returns:
+            dict: Evaluation metrics of the validation split.
+        """
+        batches = partial(
+            iter_split_batches,
+            self.processed_dataset_path,
+            self.features,
+            self.target,
+            self.external_memory.get("batch_rows", XGBoostRegressionTrainer.EXTERNAL_MEMORY_BATCH_ROWS),
+            self.train_validation_split_ratio,
+            self.random_state,
+        )
+        cache_dir = os.path.join(self.external_memory.get("cache_dir", XGBoostRegressionTrainer.EXTERNAL_MEMORY_CACHE_PATH), self.experiment_name)
+        self.logger.info("Training out of core on %s, external memory cache in %s.", self.processed_dataset_path, cache_dir)
+        try:
+            self.model = train_external_memory(self.hyperparameters, partial(batches, validation=False), os.path.join(cache_dir, "train"))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        self.logger.info("XGBoost model training complete.")
+        self.record_lineage()
+
+        return self.evaluate_batches(batches(validation=True))
+
     def run(self):
+        if self.external_memory is not None:
+            return self.run_external_memory()
+
+        if self.warm_start is not None:
+            self.start_from_parent()
         X_train, X_val, y_train, y_val = self.prepare_data()
 
         self.train(X_train, y_train)
 
         evaluation_results = self.evaluate_model(X_val, y_val)
+        if self.cross_validation is not None:
+            evaluation_results.update(self.cross_validate(np.concatenate([X_train, X_val]), np.concatenate([y_train, y_val])))
+        self.record_lineage()
 
         return evaluation_results
 
@@ -428,7 +855,6 @@ if __name__ == "__main__":
     model_trainer = trainer_config.get("model_trainer__eval__", None)
 
     try:
-        experiment_name = generate_experiment_name()
         trainer = eval(model_trainer)(train_config=train_config, logger=trainer_logger)
         results = trainer.run()
     except Exception as e:
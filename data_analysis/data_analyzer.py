@@ -1,11 +1,66 @@
 from __future__ import annotations
 
+from typing import Final
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from matplotlib.colors import LogNorm
 from scipy.stats import chi2_contingency
 
+from app.datasets.quantile_sketch import KLLSketch
+from data_analysis.quality_profile import QualityProfile
+
+
+def reservoir_sample(rows: int, size: int, seed: int = 0, batch_rows: int = 1_000_000) -> np.ndarray:
+    """
+    Positions of a uniform random sample of rows, drawn in one pass over batches of rows. Every row gets a random key and the
+    reservoir keeps the rows of the smallest keys seen so far, so memory holds the reservoir and one batch whatever the row count.
+
+    Args:
+        rows (int): Number of rows.
+        size (int): Sample size, all rows if there are fewer.
+        seed (int, optional): Random seed, the same seed draws the same rows. Defaults to 0.
+        batch_rows (int, optional): Rows keyed at once. Defaults to 1_000_000.
+
+    Returns:
+        np.ndarray: Sorted positions of the sampled rows.
+    """
+    rng = np.random.default_rng(seed)
+    positions, keys = np.empty(0, dtype=np.int64), np.empty(0)
+
+    for offset in range(0, rows, batch_rows):
+        positions = np.concatenate([positions, np.arange(offset, min(offset + batch_rows, rows))])
+        keys = np.concatenate([keys, rng.random(positions.size - keys.size)])
+        if keys.size > size:
+            kept = np.argpartition(keys, size)[:size]
+            positions, keys = positions[kept], keys[kept]
+
+    return np.sort(positions)
+
+
+def uniform_bins(values: np.ndarray, bins: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Bins values into equal width bins over their finite range, with the edges of `np.histogram`. Codes are computed once per
+    column, so 2D histograms of every column pair are a `np.bincount` of combined codes instead of a `np.histogram2d` search.
+
+    Args:
+        values (np.ndarray): Values to bin.
+        bins (int): Number of bins.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Bin code of every value, -1 for missing and infinite ones, and the bin edges.
+    """
+    finite = np.isfinite(values)
+    low, high = (values[finite].min(), values[finite].max()) if finite.any() else (0.0, 1.0)
+    low, high = (low - 0.5, high + 0.5) if low == high else (low, high)
+    edges = np.linspace(low, high, bins + 1)
+
+    codes = np.full(values.shape, -1, dtype=np.int64)
+    codes[finite] = np.minimum(((values[finite] - low) * (bins / (high - low))).astype(np.int64), bins - 1)
+    return codes, edges
+
 
 class DataframeAnalyzer:
     def __init__(
@@ -88,17 +143,76 @@ class DataframeAnalyzer:
             print(f"Duplicate row count: {duplicate_count}")
             return duplicate_count
 
+        def quality_profile(self, constant_columns: list | None = None, chunk_rows: int | None = None) -> QualityProfile:
+            """
+            Profiles the dataframe in one pass, chunk by chunk when `chunk_rows` is given. See `QualityProfile`.
+
+            Args:
+                constant_columns (list, optional): Columns expected to be constant for every customer. Defaults to none.
+                chunk_rows (int, optional): Rows profiled at once. Defaults to all rows.
+
+            Returns:
+                QualityProfile: Profile of the dataframe.
+            """
+            profile = QualityProfile(self.parent.numerical_columns, constant_columns=constant_columns, target_column=self.parent.target_column)
+            chunk_rows = chunk_rows or max(len(self.parent.dataframe), 1)
+            for offset in range(0, len(self.parent.dataframe), chunk_rows):
+                chunk = slice(offset, offset + chunk_rows)
+                profile.update(self.parent.dataframe.iloc[chunk])
+            return profile
+
         @property
         def get_all_statistics(self):
-            self.get_unique_customer_count
-            self.get_unvalid_data_rows
-            self.get_unvalid_data_columns
-            self.get_duplicate_row_count
+            self.quality_profile().print_statistics()
             return
 
     class Plotter:
-        def __init__(self, parent):
+        """
+        Exploratory plots of the dataset. Above `large_data_rows` rows the plots switch to a large data mode: histograms, bar
+        plots and the pairwise plots are drawn from counts binned in NumPy, the pairwise scatter as 2D histograms, and the box,
+        KDE and violin plots from a reservoir sample of `sample_rows` rows, so seaborn never gets every row.
+        """
+
+        LARGE_DATA_ROWS: Final = 200_000
+        SAMPLE_ROWS: Final = 50_000
+        BINS: Final = 30
+        PAIRWISE_BINS: Final = 60
+
+        def __init__(self, parent, large_data_rows: int = LARGE_DATA_ROWS, sample_rows: int = SAMPLE_ROWS, seed: int = 0):
             self.parent = parent
+            self.large_data_rows = large_data_rows
+            self.sample_rows = sample_rows
+            self.seed = seed
+            self.__sampled_frame = None
+            self.__sample = None
+
+        @property
+        def large_data(self) -> bool:
+            return len(self.parent.dataframe) > self.large_data_rows
+
+        @property
+        def plot_dataframe(self) -> pd.DataFrame:
+            """The dataframe in the regular mode, a reservoir sample of it in the large data mode, drawn once per dataframe."""
+            if not self.large_data:
+                return self.parent.dataframe
+            if self.__sampled_frame is not self.parent.dataframe:
+                self.__sampled_frame = self.parent.dataframe
+                self.__sample = self.parent.dataframe.iloc[reservoir_sample(len(self.parent.dataframe), self.sample_rows, seed=self.seed)]
+            return self.__sample
+
+        def __binned(self, feature, bins: int) -> tuple[np.ndarray, np.ndarray]:
+            return uniform_bins(self.parent.dataframe[feature].to_numpy(dtype=np.float64, na_value=np.nan), bins)
+
+        @staticmethod
+        def __stairs(axis, codes: np.ndarray, edges: np.ndarray):
+            axis.stairs(np.bincount(codes[codes >= 0], minlength=edges.size - 1), edges, fill=True)
+
+        def __binned_histogram(self, feature):
+            self.__stairs(plt.gca(), *self.__binned(feature, self.BINS))
+
+        def __binned_bar_plot(self, feature):
+            counts = self.parent.dataframe[feature].value_counts().sort_index()
+            plt.bar(counts.index.astype(str), counts.to_numpy())
 
         def histograms(self):
             for feature in self.parent.numerical_columns + self.parent.categorical_columns:
@@ -106,23 +220,41 @@ class DataframeAnalyzer:
 
                 if feature in self.parent.numerical_columns:
                     # Plot Histogram for Numerical Features
-                    sns.histplot(self.parent.dataframe[feature], kde=False, bins=30)
+                    self.__binned_histogram(feature) if self.large_data else sns.histplot(self.parent.dataframe[feature], kde=False, bins=self.BINS)
                     plt.title(f"Histogram of {feature}")
                     plt.xlabel(feature)
                     plt.ylabel("Frequency")
 
                 elif feature in self.parent.categorical_columns:
                     # Plot Bar Plot for Categorical Features
-                    sns.countplot(x=self.parent.dataframe[feature])
+                    self.__binned_bar_plot(feature) if self.large_data else sns.countplot(x=self.parent.dataframe[feature])
                     plt.title(f"Bar Plot of {feature}")
                     plt.xlabel(feature)
                     plt.ylabel("Count")
 
                 plt.show()
 
+        def __binned_pairwise(self):
+            columns = self.parent.numerical_columns
+            binned = [self.__binned(feature, self.PAIRWISE_BINS) for feature in columns]
+            _, axes = plt.subplots(len(columns), len(columns), figsize=(2.5 * len(columns), 2.5 * len(columns)), squeeze=False)
+
+            for row, (y_codes, y_edges) in enumerate(binned):
+                for column, (x_codes, x_edges) in enumerate(binned):
+                    axis = axes[row, column]
+                    if row == column:
+                        self.__stairs(axis, x_codes, x_edges)
+                    else:
+                        both = (x_codes >= 0) & (y_codes >= 0)
+                        counts = np.bincount(y_codes[both] * self.PAIRWISE_BINS + x_codes[both], minlength=self.PAIRWISE_BINS**2)
+                        # Empty bins are left blank by the log scale.
+                        counts.any() and axis.pcolormesh(x_edges, y_edges, counts.reshape(self.PAIRWISE_BINS, -1), norm=LogNorm(), cmap="viridis")
+                    row == len(columns) - 1 and axis.set_xlabel(columns[column])
+                    column == 0 and axis.set_ylabel(columns[row])
+
         def pairwise_scatter(self):
             if len(self.parent.numerical_columns) > 1:  # Ensure there is more than one numerical feature for pairplot
-                sns.pairplot(self.parent.dataframe[self.parent.numerical_columns])
+                self.__binned_pairwise() if self.large_data else sns.pairplot(self.parent.dataframe[self.parent.numerical_columns])
                 plt.suptitle("Pairwise Scatter Plots of Numeric Features", y=1.02)
                 plt.show()
             else:
@@ -131,7 +263,7 @@ class DataframeAnalyzer:
         def box_plots(self):
             for feature in self.parent.numerical_columns:
                 plt.figure(figsize=(10, 6))
-                sns.boxplot(x=self.parent.dataframe[feature])
+                sns.boxplot(x=self.plot_dataframe[feature])
                 plt.title(f"Box Plot of {feature}")
                 plt.xlabel(feature)
                 plt.show()
@@ -139,7 +271,7 @@ class DataframeAnalyzer:
         def kde_plots(self):
             for feature in self.parent.numerical_columns:
                 plt.figure(figsize=(10, 6))
-                sns.kdeplot(self.parent.dataframe[feature], shade=True)
+                sns.kdeplot(self.plot_dataframe[feature], shade=True)
                 plt.title(f"Density Plot (KDE) of {feature}")
                 plt.xlabel(feature)
                 plt.ylabel("Density")
@@ -151,7 +283,7 @@ class DataframeAnalyzer:
             """
             for feature in self.parent.categorical_columns:
                 plt.figure(figsize=(10, 6))
-                sns.countplot(x=self.parent.dataframe[feature])
+                self.__binned_bar_plot(feature) if self.large_data else sns.countplot(x=self.parent.dataframe[feature])
                 plt.title(f"Bar Plot of {feature}")
                 plt.xlabel(feature)
                 plt.ylabel("Count")
@@ -161,7 +293,7 @@ class DataframeAnalyzer:
             for num_feature in self.parent.numerical_columns:
                 for cat_feature in self.parent.categorical_columns:
                     plt.figure(figsize=(10, 6))
-                    sns.boxplot(x=self.parent.dataframe[cat_feature], y=self.parent.dataframe[num_feature])
+                    sns.boxplot(x=self.plot_dataframe[cat_feature], y=self.plot_dataframe[num_feature])
                     plt.title(f"Box Plot of {num_feature} by {cat_feature}")
                     plt.xlabel(cat_feature)
                     plt.ylabel(num_feature)
@@ -171,7 +303,7 @@ class DataframeAnalyzer:
             for categorical_feature in self.parent.categorical_columns:
                 for numerical_feature in self.parent.numerical_columns:
                     plt.figure(figsize=(10, 6))
-                    sns.violinplot(x=self.parent.dataframe[categorical_feature], y=self.parent.dataframe[numerical_feature])
+                    sns.violinplot(x=self.plot_dataframe[categorical_feature], y=self.plot_dataframe[numerical_feature])
                     plt.title(f"Violin Plot of {numerical_feature} by {categorical_feature}")
                     plt.xlabel(categorical_feature)
                     plt.ylabel(numerical_feature)
@@ -190,43 +322,51 @@ class DataframeAnalyzer:
         def __init__(self, parent):
             self.parent = parent
 
+        @staticmethod
         def __cramers_v(confusion_matrix):
             chi2 = chi2_contingency(confusion_matrix)[0]
             n = confusion_matrix.sum().sum()
             r, k = confusion_matrix.shape
             return np.sqrt(chi2 / (n * (min(r, k) - 1)))
 
-        def __correlation_ratio(self, categories, values):
-            categories = categories.astype("category")
-            category_means = values.groupby(categories).mean()
-            overall_mean = values.mean()
-            between_group_variance = ((category_means - overall_mean) ** 2).sum() * categories.value_counts()
-            total_variance = ((values - overall_mean) ** 2).sum()
-            return np.sqrt(between_group_variance.sum() / total_variance)
+        def __encode(self, columns: list) -> list[tuple[np.ndarray, int]]:
+            """Integer codes of every column, -1 for missing values, with the number of categories."""
+            return [(codes, len(categories)) for codes, categories in (pd.factorize(self.parent.dataframe[column], sort=True) for column in columns)]
+
+        @staticmethod
+        def __contingency_table(x_codes: np.ndarray, x_levels: int, y_codes: np.ndarray, y_levels: int) -> np.ndarray:
+            both = (x_codes >= 0) & (y_codes >= 0)
+            table = np.bincount(x_codes[both] * y_levels + y_codes[both], minlength=x_levels * y_levels).reshape(x_levels, y_levels)
+            # Like `pd.crosstab`, categories only seen next to a missing value get no row or column.
+            return table[table.any(axis=1)][:, table.any(axis=0)]
+
+        @staticmethod
+        def __matrix_frame(matrix: np.ndarray, index: list, columns: list, title: str, plot: bool) -> pd.DataFrame:
+            correlation_matrix = pd.DataFrame(matrix, index=index, columns=columns)
+
+            if plot:
+                plt.figure(figsize=(10, 8))
+                sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm")
+                plt.title(title)
+                plt.show()
+
+            return correlation_matrix
 
         def categorical_correlation_matrix(self, plot: bool = False, categorical_columns: list | None = None):
             if categorical_columns is None:
                 categorical_columns = self.parent.categorical_columns
 
             if len(categorical_columns) > 1:
-                correlation_matrix = pd.DataFrame(index=categorical_columns, columns=categorical_columns)
+                encoded = self.__encode(categorical_columns)
+                matrix = np.eye(len(categorical_columns))
 
-                for col1 in categorical_columns:
-                    for col2 in categorical_columns:
-                        if col1 == col2:
-                            correlation_matrix.loc[col1, col2] = 1.0
-                        else:
-                            confusion_matrix = pd.crosstab(self.parent.dataframe[col1], self.parent.dataframe[col2])
-                            correlation_matrix.loc[col1, col2] = self.__cramers_v(confusion_matrix)  # noqa
+                pairs = [(row, column) for row in range(len(encoded)) for column in range(row + 1, len(encoded))]
+                for row, column in pairs:
+                    matrix[row, column] = matrix[column, row] = self.__cramers_v(self.__contingency_table(*encoded[row], *encoded[column]))
 
-                if plot:
-                    correlation_matrix = correlation_matrix.astype(float)
-                    plt.figure(figsize=(10, 8))
-                    sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm")
-                    plt.title("Categorical-Categorical Correlation Matrix (Cramér's V)")
-                    plt.show()
-
-                return correlation_matrix
+                return self.__matrix_frame(
+                    matrix, categorical_columns, categorical_columns, "Categorical-Categorical Correlation Matrix (Cramér's V)", plot
+                )
             print("At least 2 features need to calculate corelation matrix.")
             return None
 
@@ -248,23 +388,28 @@ class DataframeAnalyzer:
             return None
 
         def categorical_numerical_correlation_matrix(self, plot: bool = False):
-            correlation_matrix = pd.DataFrame(index=self.parent.categorical_columns, columns=self.parent.numerical_columns)
-
-            for cat_feature in self.parent.categorical_columns:
-                for num_feature in self.parent.numerical_columns:
-                    correlation_matrix.loc[cat_feature, num_feature] = self.__correlation_ratio(
-                        self.parent.dataframe[cat_feature], self.parent.dataframe[num_feature]
-                    )
-
-            correlation_matrix = correlation_matrix.astype(float)
-
-            if plot:
-                plt.figure(figsize=(10, 8))
-                sns.heatmap(correlation_matrix, annot=True, cmap="coolwarm")
-                plt.title("Categorical-Numerical Correlation Matrix (Correlation Ratio η²)")
-                plt.show()
-
-            return correlation_matrix
+            numerical_columns = self.parent.numerical_columns
+            values = self.parent.dataframe[numerical_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            with np.errstate(invalid="ignore"):
+                deviations = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+            total_variance = (deviations**2).sum(axis=0)
+
+            matrix = np.empty((len(self.parent.categorical_columns), len(numerical_columns)))
+            for row, (codes, levels) in enumerate(self.__encode(self.parent.categorical_columns)):
+                # One grouped sum over (category, numerical feature) cells gives the category means of every feature at once.
+                categorized = codes >= 0
+                cells = (codes[categorized, None] * len(numerical_columns) + np.arange(len(numerical_columns))).ravel()
+                sums = np.bincount(cells, weights=deviations[categorized].ravel(), minlength=levels * len(numerical_columns))
+                counts = np.bincount(cells, weights=present[categorized].ravel(), minlength=levels * len(numerical_columns))
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    category_means = (sums / counts).reshape(levels, len(numerical_columns))
+                    between_group_variance = np.nansum(np.bincount(codes[categorized], minlength=levels)[:, None] * category_means**2, axis=0)
+                    matrix[row] = np.sqrt(between_group_variance / total_variance)
+
+            return self.__matrix_frame(
+                matrix, self.parent.categorical_columns, numerical_columns, "Categorical-Numerical Correlation Matrix (Correlation Ratio η²)", plot
+            )
 
     class ConsistincyChecker:
         def __init__(self, parent):
@@ -424,9 +569,17 @@ class DataframeAnalyzer:
 
             return outlier_row_indices, outlier_customer_ids
 
-        def find_outliers_iqr(self, column, drop: bool = False):
-            Q1 = self.parent.dataframe[column].quantile(0.25)
-            Q3 = self.parent.dataframe[column].quantile(0.75)
+        def find_outliers_iqr(self, column, drop: bool = False, quantile_error: float | None = None):
+            if quantile_error is None:
+                Q1 = self.parent.dataframe[column].quantile(0.25)
+                Q3 = self.parent.dataframe[column].quantile(0.75)
+            else:
+                # Quartiles of a KLL sketch within `quantile_error` of the exact ranks, without sorting the column.
+                Q1, Q3 = (
+                    KLLSketch(error=quantile_error, seed=0)
+                    .update(self.parent.dataframe[column].to_numpy(dtype=np.float64, na_value=np.nan))
+                    .quantile([0.25, 0.75])
+                )
             IQR = Q3 - Q1
 
             lower_bound = Q1 - 1.5 * IQR
@@ -0,0 +1,484 @@
+from __future__ import annotations
+
+import re
+from types import SimpleNamespace
+
+import matplotlib.pyplot as plt
+import numpy as np
+import polars as pl
+import seaborn as sns
+from scipy.stats import chi2_contingency
+from scipy.stats import kendalltau
+
+from app.datasets.quantile_sketch import sketch_columns
+from data_analysis.data_analyzer import DataframeAnalyzer
+
+
+PURCHASE_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+UTC_OFFSET_PATTERN = r"([+-])(\d{2}):?(\d{2})$"
+
+
+def parse_purchase_dates(frame: pl.DataFrame, column: str = "purchase_date") -> pl.DataFrame:
+    """
+    Parses ISO 8601 purchase dates with a UTC offset, like `pd.to_datetime`. Dates that share one whole hour offset keep their
+    wall clock time in the matching `Etc/GMT` time zone, so years and months are the ones written in the file. Columns that are
+    already temporal are left as they are.
+
+    Args:
+        frame (pl.DataFrame): Frame with a text or datetime purchase date column.
+        column (str, optional): Purchase date column. Defaults to "purchase_date".
+
+    Returns:
+        pl.DataFrame: Frame with the column parsed.
+    """
+    if frame[column].dtype != pl.String:
+        return frame
+
+    offsets = frame[column].str.extract(UTC_OFFSET_PATTERN, 0).drop_nulls().unique()
+    parsed = pl.col(column).str.to_datetime(PURCHASE_DATE_FORMAT)
+    if offsets.len() == 1 and (match := re.match(UTC_OFFSET_PATTERN, offsets[0])) and match.group(3) == "00":
+        sign, hours = match.group(1), int(match.group(2))
+        # Etc/GMT zones count the other way around, Etc/GMT-3 is UTC+03:00.
+        parsed = parsed.dt.convert_time_zone(f"Etc/GMT{'-' if sign == '+' else '+'}{hours}" if hours else "UTC")
+    return frame.with_columns(parsed)
+
+
+class PolarsDataframeAnalyzer:
+    """
+    Polars engine of `DataframeAnalyzer` with the same helpers and methods, computed with vectorized expressions instead of
+    row wise `apply` and `iterrows` loops.
+
+    Frames have no index, so methods that return pandas index labels return row positions in the current dataframe, and
+    matrices and per column counts are frames with a `feature` column in place of the index.
+
+    Args:
+        dataframe (pl.DataFrame | pd.DataFrame): Dataset, pandas frames are converted.
+        numerical_columns (list, optional): Numerical columns. Defaults to age, annual income and purchase amount.
+        categorical_columns (list, optional): Categorical columns. Defaults to gender.
+        target_column (str, optional): Target column. Defaults to "next_month_purchase_amount".
+    """
+
+    def __init__(
+        self,
+        dataframe,
+        numerical_columns: list | None = None,
+        categorical_columns: list | None = None,
+        target_column: str = "next_month_purchase_amount",
+    ):
+        self.dataframe = dataframe if isinstance(dataframe, pl.DataFrame) else pl.from_pandas(dataframe)
+        self.dataframe_target_excluded = self.dataframe.drop(target_column)
+
+        self.numerical_columns = ["age", "annual_income", "purchase_amount"] if numerical_columns is None else numerical_columns.copy()
+        self.categorical_columns = ["gender"] if categorical_columns is None else categorical_columns.copy()
+
+        self.numerical_dataframe = self.dataframe.select(self.numerical_columns)
+
+        self.target_column = target_column
+
+        self.feature_columns = self.numerical_columns + self.categorical_columns
+
+        self.Statics = self.Statics(self)
+        self.Plotter = self.Plotter(self)
+        self.Correlation = self.Correlation(self)
+        self.ConsistincyChecker = self.ConsistincyChecker(self)
+        self.FeatureEngineer = self.FeatureEngineer(self)
+
+    @property
+    def get_row_count(self):
+        row_count = self.dataframe.height
+        print(f"Total number of rows: {row_count}")
+        return row_count
+
+    @staticmethod
+    def _missing(column: str, dtype: pl.DataType) -> pl.Expr:
+        """Null, or NaN for float columns, like `pd.isnull`."""
+        return pl.col(column).is_null() | pl.col(column).is_nan() if dtype.is_float() else pl.col(column).is_null()
+
+    @staticmethod
+    def _infinite(column: str, dtype: pl.DataType) -> pl.Expr:
+        return pl.col(column).is_infinite() if dtype.is_float() else pl.lit(False)
+
+    class Statics:
+        def __init__(self, parent):
+            self.parent = parent
+
+        @property
+        def summary(self):
+            return self.parent.dataframe.describe(interpolation="linear")
+
+        @property
+        def get_unique_customer_count(self):
+            num_customers = self.parent.dataframe["customer_id"].drop_nulls().n_unique()
+            print(f"Number of unique customer: {num_customers}")
+            return num_customers
+
+        @property
+        def get_unvalid_data_rows(self):
+            target_excluded, numerical = self.parent.dataframe_target_excluded, self.parent.numerical_dataframe
+            rows_with_nan = target_excluded.select(
+                pl.any_horizontal(PolarsDataframeAnalyzer._missing(c, t) for c, t in target_excluded.schema.items()).sum()
+            ).item()
+            rows_with_inf, rows_with_invalid = numerical.select(
+                pl.any_horizontal(PolarsDataframeAnalyzer._infinite(c, t) for c, t in numerical.schema.items()).sum(),
+                pl.any_horizontal(pl.col(c) < 0 for c in numerical.columns).sum().alias("Invalid"),
+            ).row(0)
+
+            print(f"Number of rows affected by NaN values: {rows_with_nan}")
+            print(f"Number of rows affected by Inf values: {rows_with_inf}")
+            print(f"Number of rows affected by Invalid values: {rows_with_invalid}")
+
+            return {"NaN": rows_with_nan, "Inf": rows_with_inf, "Invalid": rows_with_invalid}
+
+        @property
+        def get_unvalid_data_columns(self):
+            nan_counts = self.parent.dataframe.select(PolarsDataframeAnalyzer._missing(c, t).sum() for c, t in self.parent.dataframe.schema.items())
+            numerical = self.parent.numerical_dataframe
+            inf_counts = numerical.select(PolarsDataframeAnalyzer._infinite(c, t).sum().alias(c) for c, t in numerical.schema.items())
+            negative_counts = numerical.select((pl.col(c) < 0).sum() for c in numerical.columns)
+
+            print(f"\nCount of NaN values in each column:\n{nan_counts}\n")
+            print(f"Count of Inf values in each numerical column:\n{inf_counts}\n")
+            print(f"Count of Negative values in each numerical column:\n{negative_counts}")
+
+            return {"NaN": nan_counts, "Inf": inf_counts, "Negative": negative_counts}
+
+        @property
+        def get_duplicate_row_count(self):
+            duplicate_count = self.parent.dataframe.height - self.parent.dataframe.n_unique()
+            print(f"Duplicate row count: {duplicate_count}")
+            return duplicate_count
+
+        @property
+        def get_all_statistics(self):
+            self.get_unique_customer_count
+            self.get_unvalid_data_rows
+            self.get_unvalid_data_columns
+            self.get_duplicate_row_count
+            return
+
+    class Plotter(DataframeAnalyzer.Plotter):
+        """Plots of `DataframeAnalyzer.Plotter`. Seaborn is handed a pandas copy of the plotted columns, made once per dataframe."""
+
+        def __init__(self, parent, **kwargs):
+            self.__plotted_frame = None
+            self.__pandas_parent = None
+            super().__init__(parent, **kwargs)
+
+        @property
+        def parent(self):
+            if self.__plotted_frame is not self.analyzer.dataframe:
+                columns = self.analyzer.numerical_columns + self.analyzer.categorical_columns
+                self.__plotted_frame = self.analyzer.dataframe
+                self.__pandas_parent = SimpleNamespace(
+                    dataframe=self.analyzer.dataframe.select(columns).to_pandas(),
+                    numerical_columns=self.analyzer.numerical_columns,
+                    categorical_columns=self.analyzer.categorical_columns,
+                )
+            return self.__pandas_parent
+
+        @parent.setter
+        def parent(self, parent):
+            self.analyzer = parent
+
+    class Correlation:
+        def __init__(self, parent):
+            self.parent = parent
+
+        @staticmethod
+        def __cramers_v(confusion_matrix: np.ndarray):
+            chi2 = chi2_contingency(confusion_matrix)[0]
+            n = confusion_matrix.sum()
+            r, k = confusion_matrix.shape
+            return np.sqrt(chi2 / (n * (min(r, k) - 1)))
+
+        @staticmethod
+        def __matrix_frame(matrix: np.ndarray, index: list, columns: list) -> pl.DataFrame:
+            return pl.DataFrame({"feature": index, **{column: matrix[:, position] for position, column in enumerate(columns)}})
+
+        @staticmethod
+        def __heatmap(correlation_matrix: pl.DataFrame, title: str):
+            plt.figure(figsize=(10, 8))
+            sns.heatmap(correlation_matrix.to_pandas().set_index("feature"), annot=True, cmap="coolwarm")
+            plt.title(title)
+            plt.show()
+
+        def categorical_correlation_matrix(self, plot: bool = False, categorical_columns: list | None = None):
+            if categorical_columns is None:
+                categorical_columns = self.parent.categorical_columns
+
+            if len(categorical_columns) > 1:
+                matrix = np.eye(len(categorical_columns))
+                pairs = [(row, column) for row in range(len(categorical_columns)) for column in range(row + 1, len(categorical_columns))]
+                for row, column in pairs:
+                    col1, col2 = categorical_columns[row], categorical_columns[column]
+                    pair_counts = self.parent.dataframe.select(col1, col2).drop_nulls().group_by(col1, col2).len()
+                    confusion_matrix = pair_counts.pivot(on=col2, index=col1, values="len").drop(col1).fill_null(0).to_numpy()
+                    matrix[row, column] = matrix[column, row] = self.__cramers_v(confusion_matrix)
+
+                correlation_matrix = self.__matrix_frame(matrix, categorical_columns, categorical_columns)
+                plot and self.__heatmap(correlation_matrix, "Categorical-Categorical Correlation Matrix (Cramér's V)")
+                return correlation_matrix
+            print("At least 2 features need to calculate corelation matrix.")
+            return None
+
+        def numerical_correlation_matrix(self, method="pearson", plot: bool = False, numerical_columns: list | None = None):
+            if numerical_columns is None:
+                numerical_columns = self.parent.numerical_columns
+
+            if len(numerical_columns) > 1:
+                pairs = [(row, column) for row in range(len(numerical_columns)) for column in range(row + 1, len(numerical_columns))]
+                matrix = np.eye(len(numerical_columns))
+                for row, column in pairs:
+                    # Every pair on the rows where both are present, like pandas.
+                    pair = self.parent.dataframe.select(numerical_columns[row], numerical_columns[column]).drop_nulls()
+                    if method == "kendall":
+                        value = kendalltau(pair[:, 0].to_numpy(), pair[:, 1].to_numpy())[0]
+                    else:
+                        value = pair.select(pl.corr(pair.columns[0], pair.columns[1], method=method)).item()
+                    matrix[row, column] = matrix[column, row] = value
+
+                correlation_matrix = self.__matrix_frame(matrix, numerical_columns, numerical_columns)
+                plot and self.__heatmap(correlation_matrix, f"Numerical-Numerical Correlation Matrix ({method.capitalize()})")
+                return correlation_matrix
+            print("At least 2 features need to calculate corelation matrix.")
+            return None
+
+        def categorical_numerical_correlation_matrix(self, plot: bool = False):
+            numerical_columns = self.parent.numerical_columns
+            overall = self.parent.dataframe.select(
+                [pl.col(c).mean().alias(f"{c}_mean") for c in numerical_columns]
+                + [((pl.col(c) - pl.col(c).mean()) ** 2).sum().alias(f"{c}_total") for c in numerical_columns]
+            ).row(0, named=True)
+
+            matrix = np.empty((len(self.parent.categorical_columns), len(numerical_columns)))
+            for row, cat_feature in enumerate(self.parent.categorical_columns):
+                # Sum over categories of count * (category mean - overall mean)^2, one aggregation for every numerical feature.
+                between_group = (
+                    self.parent.dataframe.filter(pl.col(cat_feature).is_not_null())
+                    .group_by(cat_feature)
+                    .agg([pl.len()] + [pl.col(c).mean() for c in numerical_columns])
+                    .select(((pl.col(c) - overall[f"{c}_mean"]) ** 2 * pl.col("len")).sum() for c in numerical_columns)
+                    .row(0)
+                )
+                matrix[row] = np.sqrt(np.array(between_group) / np.array([overall[f"{c}_total"] for c in numerical_columns]))
+
+            correlation_matrix = self.__matrix_frame(matrix, self.parent.categorical_columns, numerical_columns)
+            plot and self.__heatmap(correlation_matrix, "Categorical-Numerical Correlation Matrix (Correlation Ratio η²)")
+            return correlation_matrix
+
+    class ConsistincyChecker:
+        def __init__(self, parent):
+            self.parent = parent
+
+        def check_constant_column_consistency(self, constant_columns):
+            inconsistent_details = {}
+
+            for column in constant_columns:
+                inconsistent_data = (
+                    self.parent.dataframe.group_by("customer_id")
+                    .agg(pl.col(column).unique(maintain_order=True))
+                    .filter(pl.col(column).list.len() > 1)
+                    .sort("customer_id")
+                )
+
+                if inconsistent_data.height > 0:
+                    inconsistent_details[column] = dict(zip(inconsistent_data["customer_id"].to_list(), inconsistent_data[column].to_list()))
+
+            # Print the inconsistencies
+            if inconsistent_details:
+                print("Inconsistencies found in the following columns for these customer_ids:")
+                for column, details in inconsistent_details.items():
+                    print(f"\n- {column}:")
+                    for customer_id, values in details.items():
+                        print(f"  Customer ID {customer_id}: {list(values)}")
+            else:
+                print("No inconsistencies found in the dataset for the specified columns.")
+
+            return inconsistent_details
+
+        def check_age_consistency(self):
+            sorted_frame = self.parent.dataframe.select("customer_id", "purchase_date", "age").sort(
+                "customer_id", "purchase_date", maintain_order=True
+            )
+            inconsistent_frame = sorted_frame.filter((pl.col("age").diff() < 0).any().over("customer_id"))
+            inconsistent_ages = {
+                customer_id: group.select("purchase_date", "age").rows()
+                for (customer_id,), group in inconsistent_frame.group_by("customer_id", maintain_order=True)
+            }
+
+            if inconsistent_ages:
+                print("Inconsistencies found in the 'age' column for the following customer_ids:")
+                for customer_id, values in inconsistent_ages.items():
+                    print(f"\n- Customer ID {customer_id}:")
+                    for date, age in values:
+                        print(f"  Purchase Date: {date}, Age: {age}")
+            else:
+                print("No inconsistencies found in the 'age' column.")
+
+            return inconsistent_ages
+
+    class FeatureEngineer:
+        def __init__(self, parent):
+            self.parent = parent
+
+        def squash_rows_by_customer_month_year(self):
+            self.parent.dataframe = parse_purchase_dates(self.parent.dataframe).with_columns(
+                pl.col("purchase_date").dt.year().alias("purchase_year"), pl.col("purchase_date").dt.month().alias("purchase_month")
+            )
+
+            # Like pandas, rows without a group key are dropped and `first` is the first value that is not missing.
+            keys = ["customer_id", "purchase_year", "purchase_month"]
+            first = ["age", "gender", "annual_income", "purchase_date"]
+            self.parent.dataframe = (
+                self.parent.dataframe.drop_nulls(keys)
+                .group_by(keys)
+                .agg(
+                    [pl.col(column).drop_nulls().first() for column in first]
+                    + [pl.col("purchase_amount").sum(), pl.col("next_month_purchase_amount").drop_nulls().first()]
+                )
+                .sort(keys)
+            )
+
+            return self.parent.dataframe
+
+        def compute_next_month_purchase_amount(self):
+            # After sorting by customer and period the next row of a customer is the closest later period, an exact next month
+            # match included, so one shift replaces the merge on the next month and the loop over the rows without a match.
+            self.parent.dataframe = (
+                self.parent.dataframe.with_row_index("row_position")
+                .sort(["customer_id", "purchase_year", "purchase_month"], maintain_order=True)
+                .with_columns(pl.col("purchase_amount").shift(-1).over("customer_id").alias("next_month_purchase_amount"))
+                .sort("row_position")
+                .drop("row_position")
+            )
+            return self.parent.dataframe
+
+        def drop_invalid_rows(self):
+            columns_to_check = [col for col in self.parent.numerical_columns if col in self.parent.dataframe.columns]
+
+            print(f"Initial row count: {self.parent.dataframe.height}")
+
+            schema = self.parent.dataframe.schema
+            self.parent.dataframe = self.parent.dataframe.filter(
+                ~pl.any_horizontal(PolarsDataframeAnalyzer._missing(c, schema[c]) for c in self.parent.feature_columns)
+            )
+            print(f"Row count after dropping NaNs: {self.parent.dataframe.height}")  # Debug
+
+            numerical_columns_to_check = [col for col in columns_to_check if schema[col].is_numeric()]
+
+            if numerical_columns_to_check:
+                self.parent.dataframe = self.parent.dataframe.filter(
+                    ~pl.any_horizontal(PolarsDataframeAnalyzer._infinite(c, schema[c]) for c in numerical_columns_to_check)
+                )
+            print(f"Row count after dropping Infs: {self.parent.dataframe.height}")  # Debug
+
+            if numerical_columns_to_check:
+                self.parent.dataframe = self.parent.dataframe.filter(~pl.any_horizontal(pl.col(c) < 0 for c in numerical_columns_to_check))
+            print(f"Row count after dropping negative values: {self.parent.dataframe.height}")  # Debug
+
+            return self.parent.dataframe
+
+        def one_hot_encode_categorical_data(self):
+            categorical_columns = [col for col in self.parent.categorical_columns if col in self.parent.dataframe.columns]
+            dummies = [
+                (pl.col(col) == value).fill_null(False).alias(f"{col}_{value}")
+                for col in categorical_columns
+                for value in self.parent.dataframe[col].drop_nulls().unique().sort().to_list()
+            ]
+            self.parent.dataframe = self.parent.dataframe.with_columns(
+                dummy for dummy in dummies if dummy.meta.output_name() not in self.parent.dataframe.columns
+            )
+            return self.parent.dataframe
+
+        def __report_outliers(self, outliers: pl.Expr, column: str, method: str, drop: bool):
+            positions = self.parent.dataframe.with_row_index("row_position").filter(outliers)
+            outlier_customer_ids = positions["customer_id"].unique(maintain_order=True).to_numpy()
+            outlier_row_indices = positions["row_position"].to_list()
+
+            print(outlier_customer_ids)
+            print(f"Row indices with outliers in column '{column}' based on {method} method:")
+            print(outlier_row_indices)
+
+            if drop:
+                self.parent.dataframe = self.parent.dataframe.filter(~outliers.fill_null(False))
+                print(f"Dropped {len(outlier_row_indices)} rows with outliers from the DataFrame.")
+
+            return outlier_row_indices, outlier_customer_ids
+
+        def find_outliers_z_score(self, column, threshold=3, drop: bool = True):
+            z_scores = (pl.col(column) - pl.col(column).mean()) / pl.col(column).std()
+            return self.__report_outliers(z_scores.abs() > threshold, column, "Z-Score", drop)
+
+        def find_outliers_iqr(self, column, drop: bool = False, quantile_error: float | None = None):
+            if quantile_error is None:
+                q1 = pl.col(column).quantile(0.25, interpolation="linear")
+                q3 = pl.col(column).quantile(0.75, interpolation="linear")
+            else:
+                sketches = sketch_columns(self.parent.dataframe.iter_slices(), [column], error=quantile_error)
+                q1, q3 = (pl.lit(quartile) for quartile in sketches[column].quantile([0.25, 0.75]))
+            iqr = q3 - q1
+
+            # Identify outliers
+            return self.__report_outliers((pl.col(column) < q1 - 1.5 * iqr) | (pl.col(column) > q3 + 1.5 * iqr), column, "IQR", drop)
+
+        def calculate_rfm(self, customer_id_col="customer_id", date_col="purchase_date", amount_col="purchase_amount"):
+            self.parent.dataframe = parse_purchase_dates(self.parent.dataframe, column=date_col)
+
+            # Define a reference date for recency calculation (e.g., the most recent date in the dataset + 1 day)
+            reference_date = pl.col(date_col).max() + pl.duration(days=1)
+
+            self.parent.dataframe = self.parent.dataframe.with_columns(
+                (reference_date - pl.col(date_col).max().over(customer_id_col)).dt.total_days().alias("Recency"),
+                pl.col(date_col).count().over(customer_id_col).alias("Frequency"),
+                pl.col(amount_col).sum().over(customer_id_col).alias("Monetary"),
+            )
+
+            self.parent.numerical_columns = self.parent.numerical_columns + ["Recency", "Frequency", "Monetary"]
+
+            return self.parent.dataframe
+
+    def print_customers_with_nan_in_column(self, column):
+        if column not in self.dataframe.columns:
+            print(f"Column '{column}' does not exist in the DataFrame.")
+            return
+
+        nan_customer_ids = self.dataframe.filter(PolarsDataframeAnalyzer._missing(column, self.dataframe.schema[column]))["customer_id"]
+
+        if nan_customer_ids.len() > 0:
+            print(f"Customer IDs with NaN in column '{column}':")
+            print(nan_customer_ids.unique(maintain_order=True).to_numpy())
+        else:
+            print(f"No NaN values found in column '{column}'.")
+
+    def separate_and_save_datasets(self, train_filename="train_dataset.csv", test_filename="test_dataset.csv"):
+        if self.target_column not in self.dataframe.columns:
+            print(f"Column '{self.target_column}' does not exist in the DataFrame.")
+            return
+
+        is_test = PolarsDataframeAnalyzer._missing(self.target_column, self.dataframe.schema[self.target_column])
+        self.dataframe.filter(is_test).write_csv(test_filename)
+        self.dataframe.filter(~is_test).write_csv(train_filename)
+
+        print(f"DataFrames have been separated and saved to {train_filename} and {test_filename}.")
+
+
+if __name__ == "__main__":
+    import time
+
+    start_time = time.perf_counter()
+
+    dataframe = pl.read_csv("data/customer_purchases.csv")
+    dataset_processor = PolarsDataframeAnalyzer(dataframe=dataframe)
+    dataset_processor.FeatureEngineer.squash_rows_by_customer_month_year()  # noqa
+    dataset_processor.FeatureEngineer.compute_next_month_purchase_amount()  # noqa
+    dataset_processor.FeatureEngineer.one_hot_encode_categorical_data()  # noqa
+    dataset_processor.FeatureEngineer.drop_invalid_rows()  # noqa
+    dataset_processor.FeatureEngineer.calculate_rfm()  # noqa
+    [
+        dataset_processor.FeatureEngineer.find_outliers_iqr(column=column, drop=True)  # noqa
+        for column in ["age", "annual_income", "purchase_amount", "Recency", "Frequency", "Monetary"]
+    ]
+
+    end_time = time.perf_counter()
+    elapsed_time_ms = (end_time - start_time) * 1000
+    print(f"Elapsed time: {elapsed_time_ms:.3f} ms")
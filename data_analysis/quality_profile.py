@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import warnings
+from typing import Final
+
+import numpy as np
+import pandas as pd
+
+from app.datasets.quantile_sketch import KLLSketch
+
+
+class QualityProfile:
+    """
+    Data quality profile of a dataset built in one pass over its rows: missing, infinite and negative value counts, duplicate
+    rows, customers whose constant columns change, customers whose age goes down over time, and minimum, maximum and
+    approximate quantiles of the numerical columns.
+
+    Chunks are folded in with `update` and profiles of disjoint chunks combine with `merge`, so files too large to load at once
+    are profiled chunk by chunk or partition by partition. Duplicates are counted from 64 bit row hashes, the constant columns
+    from the distinct customer and value pairs, the ages from the first and last purchase date of every customer and age, and
+    the quantiles from a mergeable `KLLSketch` per column.
+
+    Args:
+        numerical_columns (list): Columns checked for infinite and negative values and sketched.
+        constant_columns (list, optional): Columns expected to be constant for every customer. Defaults to none.
+        target_column (str, optional): Column left out of the rows with missing values. Defaults to "next_month_purchase_amount".
+        customer_column (str, optional): Customer column. Defaults to "customer_id".
+        date_column (str, optional): Purchase date column of the age check. Defaults to "purchase_date".
+        age_column (str, optional): Age column, None skips the age check. Defaults to "age".
+        quantile_error (float, optional): Rank error of the quantile sketches. Defaults to 0.01.
+        seed (int, optional): Seed of the sketches. Defaults to 0.
+    """
+
+    FIRST_PURCHASE: Final = "first_purchase"
+    LAST_PURCHASE: Final = "last_purchase"
+
+    def __init__(
+        self,
+        numerical_columns: list,
+        constant_columns: list | None = None,
+        target_column: str = "next_month_purchase_amount",
+        customer_column: str = "customer_id",
+        date_column: str = "purchase_date",
+        age_column: str | None = "age",
+        quantile_error: float = KLLSketch.DEFAULT_ERROR,
+        seed: int = 0,
+    ):
+        self.numerical_columns = list(numerical_columns)
+        self.constant_columns = [] if constant_columns is None else list(constant_columns)
+        self.target_column = target_column
+        self.customer_column = customer_column
+        self.date_column = date_column
+        self.age_column = age_column
+        self.quantile_error = quantile_error
+        self.rng = np.random.default_rng(seed)
+
+        self.rows = 0
+        self.rows_with_nan = 0
+        self.rows_with_inf = 0
+        self.rows_with_negative = 0
+        self.null_counts = pd.Series(dtype=np.int64)
+        self.inf_counts = pd.Series(0, index=self.numerical_columns, dtype=np.int64)
+        self.negative_counts = pd.Series(0, index=self.numerical_columns, dtype=np.int64)
+        self.minimum = pd.Series(np.nan, index=self.numerical_columns)
+        self.maximum = pd.Series(np.nan, index=self.numerical_columns)
+
+        self.row_hashes = np.empty(0, dtype=np.uint64)
+        self.customer_ids = pd.Index([])
+        self.constant_values = {column: pd.DataFrame(columns=[customer_column, column]) for column in self.constant_columns}
+        self.age_spans = pd.DataFrame(columns=[customer_column, age_column, QualityProfile.FIRST_PURCHASE, QualityProfile.LAST_PURCHASE])
+        self.sketches = {column: KLLSketch(error=quantile_error, seed=self.rng.integers(2**63)) for column in self.numerical_columns}
+
+    def update(self, chunk: pd.DataFrame) -> QualityProfile:
+        """
+        Folds in a chunk of rows.
+
+        Args:
+            chunk (pd.DataFrame): Rows of the dataset.
+
+        Returns:
+            QualityProfile: self, updated.
+        """
+        chunk_profile = QualityProfile(**self.__settings(), seed=self.rng.integers(2**63))
+        chunk_profile.rows = len(chunk)
+
+        missing = chunk.isnull()
+        chunk_profile.null_counts = missing.sum()
+        chunk_profile.rows_with_nan = int(missing.drop(columns=[self.target_column], errors="ignore").any(axis=1).sum())
+
+        values = chunk[self.numerical_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        infinite, negative = np.isinf(values), values < 0
+        chunk_profile.inf_counts[:] = infinite.sum(axis=0)
+        chunk_profile.negative_counts[:] = negative.sum(axis=0)
+        chunk_profile.rows_with_inf = int(infinite.any(axis=1).sum())
+        chunk_profile.rows_with_negative = int(negative.any(axis=1).sum())
+        with warnings.catch_warnings():
+            # Columns without values have NaN bounds.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            chunk_profile.minimum[:], chunk_profile.maximum[:] = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        for position, column in enumerate(self.numerical_columns):
+            chunk_profile.sketches[column].update(values[:, position])
+
+        # Numbers hash by dtype, so columns a chunk reads as integers and another as floats are hashed as floats.
+        normalized = chunk.astype({column: np.float64 for column in chunk.select_dtypes("number").columns})
+        chunk_profile.row_hashes = np.unique(pd.util.hash_pandas_object(normalized, index=False).to_numpy())
+
+        chunk_profile.customer_ids = pd.Index(chunk[self.customer_column].dropna().unique())
+        for column in self.constant_columns:
+            chunk_profile.constant_values[column] = chunk[[self.customer_column, column]].drop_duplicates()
+        if self.age_column is not None:
+            purchases = chunk[[self.customer_column, self.age_column]].assign(purchase_date=pd.to_datetime(chunk[self.date_column], utc=True))
+            chunk_profile.age_spans = self.__age_spans(purchases, "purchase_date", "purchase_date")
+
+        return self.merge(chunk_profile)
+
+    def merge(self, other: QualityProfile) -> QualityProfile:
+        """
+        Folds in the profile of a disjoint chunk of rows.
+
+        Args:
+            other (QualityProfile): Profile of other rows of the same dataset.
+
+        Raises:
+            ValueError: If the profiles check different columns.
+
+        Returns:
+            QualityProfile: self, updated.
+        """
+        if other.__settings() != self.__settings():
+            raise ValueError("Can not merge quality profiles of different columns.")
+
+        self.rows += other.rows
+        self.rows_with_nan += other.rows_with_nan
+        self.rows_with_inf += other.rows_with_inf
+        self.rows_with_negative += other.rows_with_negative
+        self.null_counts = (
+            other.null_counts.copy() if self.null_counts.empty else self.null_counts.add(other.null_counts, fill_value=0).astype(np.int64)
+        )
+        self.inf_counts += other.inf_counts
+        self.negative_counts += other.negative_counts
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+
+        self.row_hashes = np.union1d(self.row_hashes, other.row_hashes)
+        self.customer_ids = self.customer_ids.union(other.customer_ids, sort=False)
+        for column in self.constant_columns:
+            pairs = [pairs for pairs in [self.constant_values[column], other.constant_values[column]] if len(pairs)]
+            self.constant_values[column] = pd.concat(pairs, ignore_index=True).drop_duplicates() if pairs else self.constant_values[column]
+        spans = [spans for spans in [self.age_spans, other.age_spans] if len(spans)]
+        if spans:
+            self.age_spans = self.__age_spans(pd.concat(spans, ignore_index=True), QualityProfile.FIRST_PURCHASE, QualityProfile.LAST_PURCHASE)
+        for column in self.numerical_columns:
+            self.sketches[column].merge(other.sketches[column])
+
+        return self
+
+    def __settings(self) -> dict:
+        return {
+            "numerical_columns": self.numerical_columns,
+            "constant_columns": self.constant_columns,
+            "target_column": self.target_column,
+            "customer_column": self.customer_column,
+            "date_column": self.date_column,
+            "age_column": self.age_column,
+            "quantile_error": self.quantile_error,
+        }
+
+    def __age_spans(self, purchases: pd.DataFrame, first_column: str, last_column: str) -> pd.DataFrame:
+        return (
+            purchases.groupby([self.customer_column, self.age_column])
+            .agg(**{QualityProfile.FIRST_PURCHASE: (first_column, "min"), QualityProfile.LAST_PURCHASE: (last_column, "max")})
+            .reset_index()
+        )
+
+    @property
+    def duplicate_rows(self) -> int:
+        return self.rows - self.row_hashes.size
+
+    @property
+    def unique_customers(self) -> int:
+        return len(self.customer_ids)
+
+    @property
+    def constant_column_violations(self) -> dict:
+        """Distinct values of every constant column for the customers with more than one, like `check_constant_column_consistency`."""
+        violations = {}
+        for column, pairs in self.constant_values.items():
+            inconsistent = pairs[pairs.duplicated(self.customer_column, keep=False)]
+            if len(inconsistent):
+                violations[column] = {
+                    customer_id: group[column].tolist() for customer_id, group in inconsistent.groupby(self.customer_column, sort=True)
+                }
+        return violations
+
+    @property
+    def age_violations(self) -> dict:
+        """
+        Ages of the customers whose age goes down over time, as `(age, first purchase, last purchase)` spans. An age is
+        inconsistent when a lower age was seen on a later purchase. Purchases on the same date are not ordered.
+        """
+        spans = self.age_spans.sort_values([self.customer_column, self.age_column])
+        # Latest purchase at any lower age of the customer, a decrease happens when it is after the first purchase at this age.
+        latest = spans.groupby(self.customer_column)[QualityProfile.LAST_PURCHASE].cummax()
+        latest_lower = latest.groupby(spans[self.customer_column]).shift()
+        decreasing = spans[self.customer_column][latest_lower > spans[QualityProfile.FIRST_PURCHASE]].unique()
+        return {
+            customer_id: list(
+                group[[self.age_column, QualityProfile.FIRST_PURCHASE, QualityProfile.LAST_PURCHASE]].itertuples(index=False, name=None)
+            )
+            for customer_id, group in spans[spans[self.customer_column].isin(decreasing)].groupby(self.customer_column, sort=True)
+        }
+
+    def quantile(self, column: str, q):
+        """
+        Quantiles of a numerical column, see `KLLSketch.quantile`.
+
+        Args:
+            column (str): Numerical column.
+            q (float | array-like): Quantiles between 0 and 1.
+
+        Returns:
+            float | np.ndarray: The quantiles, NaN for a column without values.
+        """
+        return self.sketches[column].quantile(q)
+
+    def print_statistics(self):
+        """Prints the findings with the messages of `DataframeAnalyzer.Statics`."""
+        print(f"Number of unique customer: {self.unique_customers}")
+        print(f"Number of rows affected by NaN values: {self.rows_with_nan}")
+        print(f"Number of rows affected by Inf values: {self.rows_with_inf}")
+        print(f"Number of rows affected by Invalid values: {self.rows_with_negative}")
+        print(f"\nCount of NaN values in each column:\n{self.null_counts}\n")
+        print(f"Count of Inf values in each numerical column:\n{self.inf_counts}\n")
+        print(f"Count of Negative values in each numerical column:\n{self.negative_counts}")
+        print(f"Duplicate row count: {self.duplicate_rows}")
+
+
+def profile_csv(path: str, numerical_columns: list, chunk_rows: int = 1_000_000, **kwargs) -> QualityProfile:
+    """
+    Profiles a CSV file chunk by chunk, memory holds one chunk and the profile.
+
+    Args:
+        path (str): CSV file.
+        numerical_columns (list): Numerical columns of the profile.
+        chunk_rows (int, optional): Rows read at once. Defaults to 1_000_000.
+        **kwargs: Other `QualityProfile` arguments.
+
+    Returns:
+        QualityProfile: Profile of every row of the file.
+    """
+    profile = QualityProfile(numerical_columns, **kwargs)
+    with pd.read_csv(path, chunksize=chunk_rows) as chunks:
+        for chunk in chunks:
+            profile.update(chunk)
+    return profile
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import pytest
+
+from app.trainer.dataset_processor import DatasetProcessor
+
+ROUNDS = 3
+
+
+@pytest.mark.benchmark(group="dataset_processor")
+@pytest.mark.parametrize("streaming", [False, True], ids=["eager", "streaming"])
+def bench_process_dataset(benchmark, raw_dataset_csv, streaming):
+    train, test = benchmark.pedantic(
+        lambda: DatasetProcessor(csv_path=raw_dataset_csv).process_dataset(save=False, as_pandas=False, streaming=streaming), rounds=ROUNDS
+    )
+
+    assert train.height > test.height > 0
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import os
+from unittest import mock
+
+import joblib
+import numpy as np
+import polars as pl
+import pytest
+import yaml
+from sklearn.linear_model import LinearRegression
+
+from app.inference.engine import MlInferenceEngine
+
+FEATURES = ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"]
+
+
+@pytest.fixture(scope="session")
+def engine(raw_dataset_csv, tmp_path_factory) -> MlInferenceEngine:
+    """Engine on the synthetic dataset. The registry is unreachable, so it loads the model file and features of its config."""
+    engine_dir = tmp_path_factory.mktemp("inference")
+    model_path = os.path.join(engine_dir, "model.joblib")
+    rng = np.random.default_rng(0)
+    joblib.dump(LinearRegression().fit(rng.random((100, len(FEATURES))), rng.random(100)), model_path)
+
+    inference_config = {
+        "database": raw_dataset_csv,
+        "model": {"name": "Benchmark Model", "version": "v.0.0.1", "path": model_path, "features": FEATURES},
+        "tracing": {"sample_rate": 0.0},
+        "registry": {"name": "ado-flow", "url": "http://127.0.0.1:9"},
+    }
+    inference_config_path = os.path.join(engine_dir, "inference_config.yml")
+    with open(inference_config_path, "w") as file:
+        yaml.safe_dump(inference_config, file)
+    return MlInferenceEngine(inference_config_path=inference_config_path, logger=mock.MagicMock())
+
+
+@pytest.mark.benchmark(group="inference")
+def bench_returning_customer(benchmark, engine, raw_dataset_csv):
+    # The engine one-hot encodes the history of the customer alone, it needs a purchase with the Female category.
+    customer = pl.read_csv(raw_dataset_csv).drop("next_month_purchase_amount").drop_nulls().filter(pl.col("gender") == "Female").row(0, named=True)
+    raw_input = {key: customer[key] for key in ["customer_id", "age", "gender", "annual_income", "purchase_amount", "purchase_date"]}
+
+    _, _, _, is_valid_prediction = benchmark(engine, raw_input)
+
+    assert is_valid_prediction
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import itertools
+import os
+from unittest import mock
+
+import pytest
+
+from app.model_registry.registry import ModelRegistry
+from app.model_registry.storage_manager import LocalStorageManager
+
+MODEL = {
+    "name": "Benchmark Model",
+    "description": "Model registered by the registry benchmarks.",
+    "framework": "scikit-learn",
+    "framework_version": "1.5.1",
+    "training_data": "Synthetic customer purchase data.",
+    "hyperparameters": "{}",
+    "evaluation_metrics": '{"mse": 1.0}',
+    "model_author": "Benchmark",
+    "status": "under review",
+    "features": '["age", "annual_income", "purchase_amount"]',
+    "labels": ["benchmark", "regression"],
+}
+ROUNDS = 50
+
+
+@pytest.fixture(scope="session")
+def registry_dir(models, tmp_path_factory) -> str:
+    return str(tmp_path_factory.mktemp(f"registry_{models}"))
+
+
+@pytest.fixture(scope="session")
+def registry(models, registry_dir) -> ModelRegistry:
+    """Registry of `models` models whose files are kept in a local directory instead of the cloud bucket."""
+    logger = mock.MagicMock()
+    storage_manager = LocalStorageManager(logger, storage_dir=os.path.join(registry_dir, "storage"))
+    registry = ModelRegistry(os.path.join(registry_dir, "registry.db"), logger, storage_manager=storage_manager)
+    registry.create_tables()
+
+    model_file = os.path.join(registry_dir, "model.joblib")
+    with open(model_file, "wb") as file:
+        file.write(os.urandom(64 * 1024))
+    for version in range(models):
+        registry.insert_model(version=f"v.{version}", file_path=model_file, **MODEL)
+    registry.model_file = model_file
+    return registry
+
+
+@pytest.mark.benchmark(group="registry.insert_model")
+def bench_insert_model(benchmark, registry):
+    versions = itertools.count()
+
+    def new_version():
+        return (), {"version": f"v.benchmark.{next(versions)}", "file_path": registry.model_file, **MODEL}
+
+    inserted, _ = benchmark.pedantic(registry.insert_model, setup=new_version, rounds=ROUNDS)
+
+    assert inserted
+
+
+@pytest.mark.benchmark(group="registry.fetch_model")
+def bench_fetch_model(benchmark, registry, registry_dir):
+    model, _ = benchmark(registry.fetch_model, MODEL["name"], "v.0", download=True, download_path=os.path.join(registry_dir, "downloads"))
+
+    assert model["version"] == "v.0"
+
+
+@pytest.mark.benchmark(group="registry.export_to_csv")
+def bench_export_to_csv(benchmark, registry, registry_dir):
+    exported, _ = benchmark(registry.export_to_csv, os.path.join(registry_dir, "models_export.csv"))
+
+    assert exported
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import copy
+from unittest import mock
+
+import pytest
+
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import NormalEquationRegressionTrainer
+from app.trainer.trainer import XGBoostRegressionTrainer
+
+ROUNDS = 3
+TRAINERS = {"linear_regression": LinearRegressionTrainer, "normal_equation": NormalEquationRegressionTrainer, "xgboost": XGBoostRegressionTrainer}
+
+
+@pytest.fixture(scope="session", params=list(TRAINERS))
+def trainer(request, train_config):
+    """Trainer of every kind on the processed synthetic dataset, with a model fitted on its training split."""
+    trainer = TRAINERS[request.param](train_config=copy.deepcopy(train_config), logger=mock.MagicMock())
+    X_train, _, y_train, _ = trainer.prepare_data()
+    trainer.train(X_train, y_train)
+    return trainer
+
+
+@pytest.fixture(scope="session")
+def splits(trainer):
+    return trainer.prepare_data()
+
+
+@pytest.mark.benchmark(group="trainer.prepare_data")
+def bench_prepare_data(benchmark, trainer):
+    X_train, X_val, _, _ = benchmark(trainer.prepare_data)
+
+    assert len(X_train) > len(X_val) > 0
+
+
+@pytest.mark.benchmark(group="trainer.train")
+def bench_train(benchmark, trainer, splits):
+    X_train, _, y_train, _ = splits
+
+    benchmark.pedantic(trainer.train, args=(X_train, y_train), rounds=ROUNDS)
+
+    assert trainer.model is not None
+
+
+@pytest.mark.benchmark(group="trainer.evaluate_model")
+def bench_evaluate_model(benchmark, trainer, splits):
+    _, X_val, _, y_val = splits
+
+    metrics = benchmark(trainer.evaluate_model, X_val, y_val)
+
+    assert metrics
@@ -0,0 +1,76 @@
+"""Peak memory benchmark of the eager and streaming DatasetProcessor modes.
+
+Every mode runs in a fresh process because peak RSS is a per process high water mark. Polars memory maps the CSV and the
+mapped pages count towards RSS, so the peak of anonymous memory (Linux only) is sampled as well, it is the part that has to
+fit in memory.
+
+Usage:
+    PYTHONPATH=app python -m tests.benchmarks.benchmark_dataset_processor_memory --rows 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from app.datasets.synthetic_data import write_purchases
+from app.trainer.dataset_processor import DatasetProcessor
+from app.trainer.dataset_processor import peak_rss_mb
+
+SAMPLE_INTERVAL_SECONDS = 0.01
+
+
+def anonymous_rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_mode(csv_path: str, streaming: bool) -> tuple[float, float, float]:
+    peak_anonymous_rss = [0.0]
+    done = threading.Event()
+
+    def sample_anonymous_rss():
+        while not done.wait(SAMPLE_INTERVAL_SECONDS):
+            peak_anonymous_rss[0] = max(peak_anonymous_rss[0], anonymous_rss_mb())
+
+    os.path.exists("/proc/self/status") and threading.Thread(target=sample_anonymous_rss, daemon=True).start()
+    start_time = time.perf_counter()
+    DatasetProcessor(csv_path=csv_path).process_dataset(save=False, streaming=streaming)
+    elapsed = time.perf_counter() - start_time
+    done.set()
+    return elapsed, peak_rss_mb(), peak_anonymous_rss[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak RSS of the eager and streaming dataset processing modes.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Raw purchase rows in the synthetic CSV.")
+    parser.add_argument("--customers", type=int, default=None, help="Distinct customers. Defaults to one per 500 rows, many purchases per month.")
+    parser.add_argument("--csv-path", default=None, help="Use an existing raw purchases CSV instead of generating one.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = args.csv_path
+        if csv_path is None:
+            csv_path = os.path.join(tmp_dir, "purchases.csv")
+            customers = args.customers or max(1, args.rows // 500)
+            write_purchases(csv_path, args.rows, purchases_per_customer=args.rows / customers)
+        print(f"Input: {csv_path} ({os.path.getsize(csv_path) / 1024 / 1024:.1f} MB)")
+
+        context = multiprocessing.get_context("spawn")
+        for streaming in [False, True]:
+            with context.Pool(processes=1) as pool:
+                elapsed, peak_rss, peak_anonymous_rss = pool.apply(run_mode, (csv_path, streaming))
+            print(
+                f"{'streaming' if streaming else 'eager':>10}: {elapsed:8.2f} s, peak RSS {peak_rss:8.1f} MB, "
+                f"peak anonymous RSS {peak_anonymous_rss:8.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
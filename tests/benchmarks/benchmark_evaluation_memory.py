@@ -0,0 +1,59 @@
+"""Peak memory and time of the evaluation metrics over large validation sets.
+
+Compares the full vector metrics the trainer used before with RegressionMetricAccumulator fed in prediction batches. The targets
+and predictions themselves are excluded, only the memory the metric computation allocates on top of them is reported.
+
+Usage:
+    PYTHONPATH=app python -m tests.benchmarks.benchmark_evaluation_memory --rows 1000000 10000000 30000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.trainer.metrics import RegressionMetricAccumulator
+from tests.unittests.test_regression_metrics import reference_regression_metrics
+
+DEFLECTION = 50
+BATCH_ROWS = 1_000_000
+
+
+def measure(function, *args) -> tuple[float, float]:
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    function(*args)
+    elapsed_seconds = time.perf_counter() - start_time
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed_seconds, peak_bytes / 2**20
+
+
+def accumulate_in_batches(y_true: np.ndarray, y_pred: np.ndarray):
+    accumulator = RegressionMetricAccumulator(deflection=DEFLECTION)
+    for start in range(0, y_true.size, BATCH_ROWS):
+        batch = slice(start, start + BATCH_ROWS)
+        accumulator.update(y_true[batch], y_pred[batch])
+    return accumulator.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation metrics.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'full vector (s)':>16} {'peak (MB)':>10} {'batched (s)':>12} {'peak (MB)':>10}")
+    for rows in args.rows:
+        rng = np.random.default_rng(0)
+        y_true = rng.uniform(0, 2000, size=rows)
+        y_pred = y_true + rng.normal(scale=100, size=rows)
+
+        reference_seconds, reference_peak_mb = measure(reference_regression_metrics, y_true, y_pred, DEFLECTION)
+        batched_seconds, batched_peak_mb = measure(accumulate_in_batches, y_true, y_pred)
+        print(f"{rows:>12} {reference_seconds:>16.3f} {reference_peak_mb:>10.1f} {batched_seconds:>12.3f} {batched_peak_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Scaling benchmark for the next month target fill of DatasetProcessor.
+
+Usage:
+    PYTHONPATH=app python -m tests.benchmarks.benchmark_next_month_fill --rows 10000 100000 1000000 10000000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import polars as pl
+
+from app.trainer.dataset_processor import DatasetProcessor
+from tests.unittests.test_dataset_processor import reference_next_month_purchase_amount
+
+PERIODS_PER_CUSTOMER = 36
+START_YEAR = 2022
+
+
+def synthetic_squashed_frame(rows: int, seed: int = 0) -> pl.DataFrame:
+    """Build a frame shaped like the output of the squash step, one row per customer and period in random order."""
+    rng = np.random.default_rng(seed)
+    customer_ids = rng.integers(0, max(1, rows // 8), size=rows)
+    periods = rng.integers(0, PERIODS_PER_CUSTOMER, size=rows)
+    frame = pl.DataFrame({"customer_id": customer_ids, "period": periods}).unique(subset=["customer_id", "period"])
+    frame = frame.with_columns(
+        (pl.col("period") // 12 + START_YEAR).cast(pl.Int32).alias("purchase_year"),
+        (pl.col("period") % 12 + 1).cast(pl.Int8).alias("purchase_month"),
+        pl.Series("purchase_amount", rng.uniform(1, 2000, size=frame.height).round(2)),
+        pl.lit(None, dtype=pl.Float64).alias("next_month_purchase_amount"),
+    ).drop("period")
+    return frame.sample(fraction=1.0, shuffle=True, seed=seed)
+
+
+def time_vectorized(frame: pl.DataFrame) -> float:
+    processor = DatasetProcessor.__new__(DatasetProcessor)
+    processor.dataframe = frame.with_columns(pl.lit(None, dtype=pl.Datetime).alias("purchase_date"))
+    start_time = time.perf_counter()
+    processor._DatasetProcessor__compute_next_month_purchase_amount()
+    return time.perf_counter() - start_time
+
+
+def time_reference(frame: pl.DataFrame) -> float:
+    start_time = time.perf_counter()
+    reference_next_month_purchase_amount(frame)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the next month target fill.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--reference-max-rows", type=int, default=20_000, help="The row by row implementation is quadratic, skip it above this size.")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'vectorized (s)':>16} {'rows/s':>14} {'row by row (s)':>16}")
+    for rows in args.rows:
+        frame = synthetic_squashed_frame(rows)
+        vectorized_seconds = time_vectorized(frame)
+        reference_seconds = f"{time_reference(frame):16.3f}" if frame.height <= args.reference_max_rows else f"{'skipped':>16}"
+        print(f"{frame.height:>12} {vectorized_seconds:16.3f} {frame.height / vectorized_seconds:14.0f} {reference_seconds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Peak memory and time of linear regression training against the number of rows, sklearn fit against normal equations.
+
+The sklearn path is `LinearRegressionTrainer` on the processed dataset loaded in memory. The normal equation path is
+`NormalEquationRegressionTrainer` with `external_memory`, which reads the processed dataset file in batches. Every run happens
+in a fresh process and reports the peak of anonymous RSS (Linux only) above the RSS before training.
+
+Usage:
+    PYTHONPATH=app python -m tests.benchmarks.benchmark_normal_equation_memory --rows 1000000 4000000 --workers 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import polars as pl
+
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import NormalEquationRegressionTrainer
+from app.trainer.trainer import Trainer
+from tests.benchmarks.benchmark_dataset_processor_memory import anonymous_rss_mb
+from tests.benchmarks.benchmark_training_memory import FEATURES
+from tests.benchmarks.benchmark_training_memory import synthetic_processed_dataset
+from tests.benchmarks.benchmark_training_memory import TARGET
+
+BATCH_ROWS = 500_000
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def train_config(dataset_path: str, workers: int) -> dict:
+    return {
+        "meta_data": {"name": "Linear Regression Model", "version": "v.0.0.1"},
+        "train_config": {
+            "dataset": {"use_cache": False},
+            "train": {
+                "features": FEATURES,
+                "prediction_target": TARGET,
+                "hyperparameters": {"fit_intercept": True, "n_jobs": workers},
+                "external_memory": {"batch_rows": BATCH_ROWS, "dataset": dataset_path},
+            },
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+        },
+    }
+
+
+def sklearn_fit(dataset_path: str, workers: int):
+    config = train_config(dataset_path, workers)
+    del config["train_config"]["train"]["external_memory"]
+    with mock.patch.object(Trainer, "load_datasets", return_value=(pl.read_parquet(dataset_path), None)):
+        trainer = LinearRegressionTrainer(train_config=config, logger=mock.MagicMock())
+    trainer.run()
+
+
+def normal_equation(dataset_path: str, workers: int):
+    NormalEquationRegressionTrainer(train_config=train_config(dataset_path, workers), logger=mock.MagicMock()).run()
+
+
+def run(trainer, dataset_path: str, workers: int) -> tuple[float, float]:
+    baseline = anonymous_rss_mb()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample_anonymous_rss():
+        while not done.wait(SAMPLE_INTERVAL_SECONDS):
+            peak[0] = max(peak[0], anonymous_rss_mb())
+
+    threading.Thread(target=sample_anonymous_rss, daemon=True).start()
+    start_time = time.perf_counter()
+    trainer(dataset_path, workers)
+    elapsed = time.perf_counter() - start_time
+    done.set()
+    return elapsed, max(peak[0], anonymous_rss_mb()) - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of the sklearn and the normal equation linear regression trainers.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 4_000_000], help="Rows of the synthetic processed datasets.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="n_jobs of the trainers.")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            dataset_path = os.path.join(tmp_dir, f"processed_{rows}.parquet")
+            synthetic_processed_dataset(rows).write_parquet(dataset_path)
+            for workers in args.workers:
+                for trainer in [sklearn_fit, normal_equation]:
+                    with context.Pool(processes=1) as pool:
+                        elapsed, peak_mb = pool.apply(run, (trainer, dataset_path, workers))
+                    print(f"{rows:>10} rows {workers:>2} workers {trainer.__name__:>16}: {elapsed:8.2f} s, peak anonymous RSS {peak_mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Peak memory of preparing and training on a processed dataset, pandas hand-off against the array hand-off of prepare_data.
+
+The pandas path is the one the trainer used before: the processed polars dataset is converted to pandas, split with
+train_test_split on DataFrames, concatenated back into split frames and handed to the estimator. Every run happens in a
+fresh process and reports the peak of anonymous RSS (Linux only) above the RSS right after the processed dataset was built,
+so only the hand-off and the fit count.
+
+Usage:
+    PYTHONPATH=app python -m tests.benchmarks.benchmark_training_memory --rows 5000000
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from sklearn.model_selection import train_test_split
+
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import XGBoostRegressionTrainer
+from tests.benchmarks.benchmark_dataset_processor_memory import anonymous_rss_mb
+
+FEATURES = ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"]
+TARGET = "next_month_purchase_amount"
+TRAINERS = {"linear": (LinearRegressionTrainer, {"fit_intercept": True}), "xgboost": (XGBoostRegressionTrainer, {"n_estimators": 20, "max_depth": 6})}
+SAMPLE_INTERVAL_SECONDS = 0.005
+
+
+def synthetic_processed_dataset(rows: int, seed: int = 0) -> pl.DataFrame:
+    """Build a frame with the columns and dtypes of the processed training dataset."""
+    rng = np.random.default_rng(seed)
+    return pl.DataFrame(
+        {
+            "customer_id": rng.integers(1, rows // 10 + 2, size=rows),
+            "purchase_year": rng.integers(2021, 2024, size=rows).astype(np.int32),
+            "purchase_month": rng.integers(1, 13, size=rows).astype(np.int8),
+            "age": rng.integers(18, 80, size=rows),
+            "gender_Female": rng.integers(0, 2, size=rows).astype(np.int8),
+            "Recency": rng.integers(0, 36, size=rows).astype(np.int64),
+            "Frequency": rng.integers(1, 36, size=rows).astype(np.uint32),
+            "Monetary": rng.uniform(5, 50_000, size=rows),
+            "annual_income": rng.integers(20_000, 150_000, size=rows),
+            "purchase_amount": rng.uniform(5, 2000, size=rows),
+            TARGET: rng.uniform(5, 2000, size=rows),
+        }
+    )
+
+
+def pandas_hand_off(trainer_class, hyperparameters: dict, dataset: pl.DataFrame):
+    train_dataframe = dataset.to_pandas()
+    X_train, X_val, y_train, y_val = train_test_split(train_dataframe[FEATURES], train_dataframe[TARGET], test_size=0.2, random_state=42)
+    split_dataframes = pd.concat([X_train, y_train], axis=1), pd.concat([X_val, y_val], axis=1)  # noqa: F841
+    trainer_class.build_model(hyperparameters).fit(X_train, y_train)
+
+
+def array_hand_off(trainer_class, hyperparameters: dict, dataset: pl.DataFrame):
+    trainer = trainer_class.__new__(trainer_class)
+    trainer.train_dataframe, trainer.test_dataframe = dataset, None
+    trainer.features, trainer.target, trainer.hyperparameters = FEATURES, TARGET, hyperparameters
+    trainer.train_validation_split_ratio, trainer.random_state, trainer.save_datasets = 0.2, 42, False
+    trainer.logger = mock.MagicMock()
+    X_train, X_val, y_train, y_val = trainer.prepare_data()
+    trainer.train(X_train, y_train)
+
+
+def run(hand_off, trainer_name: str, rows: int) -> tuple[float, float]:
+    trainer_class, hyperparameters = TRAINERS[trainer_name]
+    dataset = synthetic_processed_dataset(rows)
+    baseline = anonymous_rss_mb()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample_anonymous_rss():
+        while not done.wait(SAMPLE_INTERVAL_SECONDS):
+            peak[0] = max(peak[0], anonymous_rss_mb())
+
+    threading.Thread(target=sample_anonymous_rss, daemon=True).start()
+    start_time = time.perf_counter()
+    hand_off(trainer_class, hyperparameters, dataset)
+    elapsed = time.perf_counter() - start_time
+    done.set()
+    return elapsed, max(peak[0], anonymous_rss_mb()) - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of the pandas and array hand-off to the estimators.")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Rows of the synthetic processed dataset.")
+    parser.add_argument("--trainers", nargs="+", choices=sorted(TRAINERS), default=sorted(TRAINERS))
+    args = parser.parse_args()
+
+    dataset_mb = synthetic_processed_dataset(args.rows).estimated_size("mb")
+    print(f"Processed dataset: {args.rows} rows, {dataset_mb:.1f} MB")
+    context = multiprocessing.get_context("spawn")
+    for trainer_name in args.trainers:
+        for hand_off in [pandas_hand_off, array_hand_off]:
+            with context.Pool(processes=1) as pool:
+                elapsed, peak_mb = pool.apply(run, (hand_off, trainer_name, args.rows))
+            print(f"{trainer_name:>8} {hand_off.__name__:>16}: {elapsed:8.2f} s, peak anonymous RSS above the dataset {peak_mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
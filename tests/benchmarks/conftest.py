@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import copy
+import os
+
+import pytest
+
+from app.datasets.synthetic_data import write_purchases
+
+TRAIN_CONFIG = {
+    "meta_data": {"name": "Benchmark Model", "version": "v.0.0.1", "training_data": "Synthetic customer purchase data."},
+    "train_config": {
+        "dataset": {
+            "numerical_columns": ["age", "annual_income", "purchase_amount"],
+            "categorical_columns": ["gender"],
+            "save_datasets_as_csv": False,
+            "use_cache": False,
+        },
+        "train": {
+            "features": ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"],
+            "prediction_target": "next_month_purchase_amount",
+            "hyperparameters": {},
+        },
+        "registry": {"name": "ado-flow", "url": "http://127.0.0.1:9"},
+    },
+}
+
+
+def pytest_addoption(parser):
+    parser.addini("benchmark_rows", "Comma separated raw dataset sizes of the data benchmarks.", default="10000")
+    parser.addini("benchmark_models", "Comma separated registry sizes of the registry benchmarks.", default="100")
+    parser.addini("benchmark_regression_threshold", "Default of --benchmark-compare-fail when comparing with a baseline.", default="")
+    parser.addoption("--benchmark-rows", default=None, help="Comma separated raw dataset sizes, overrides the benchmark_rows ini value.")
+    parser.addoption("--benchmark-models", default=None, help="Comma separated registry sizes, overrides the benchmark_models ini value.")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Runs before pytest-benchmark reads its options, so comparisons with a baseline fail on the configured regression.
+    threshold = config.getini("benchmark_regression_threshold")
+    if threshold and config.getoption("benchmark_compare", None) and not config.getoption("benchmark_compare_fail", None):
+        # Imported here so the unit tests do not need the plugin when they collect this directory.
+        from pytest_benchmark.utils import parse_compare_fail
+
+        config.option.benchmark_compare_fail = [parse_compare_fail(check) for check in threshold.split(",")]
+
+
+def pytest_generate_tests(metafunc):
+    for name in ["rows", "models"]:
+        if name in metafunc.fixturenames:
+            sizes = metafunc.config.getoption(f"benchmark_{name}") or metafunc.config.getini(f"benchmark_{name}")
+            metafunc.parametrize(name, [int(size) for size in sizes.split(",")], scope="session")
+
+
+@pytest.fixture(scope="session")
+def raw_dataset_csv(rows, tmp_path_factory) -> str:
+    """Synthetic raw purchase dataset of `rows` rows, generated once per size."""
+    return write_purchases(os.path.join(tmp_path_factory.mktemp(f"purchases_{rows}"), "purchases.csv"), rows, workers=1)
+
+
+@pytest.fixture(scope="session")
+def train_config(raw_dataset_csv) -> dict:
+    train_config = copy.deepcopy(TRAIN_CONFIG)
+    train_config["train_config"]["dataset"]["raw_dataset_csv"] = raw_dataset_csv
+    return train_config
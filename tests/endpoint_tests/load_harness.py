@@ -0,0 +1,392 @@
+"""Headless load test of the registry and inference services with latency SLOs.
+
+Both services are started locally in a scratch directory. The registry keeps model files on disk (STORAGE_BACKEND=local),
+so no google cloud credentials are needed, and a small linear model is registered for the inference service to fetch.
+Every scenario of the config then runs for a fixed duration after a warm up:
+
+- closed loop: `concurrency` users send back to back requests, the arrival rate follows the response times.
+- open loop: requests are sent at a constant `rate` whatever the response times are, at most `concurrency` in flight.
+  Latency is measured from the scheduled send time, so a stalled server shows up in the tail percentiles instead of
+  silently slowing the load down (coordinated omission).
+
+The p50, p95, p99 and p99.9 latency and the throughput of every scenario are checked against its SLOs and written to
+`load_test_report.json`, with one HdrHistogram `.hgrm` percentile distribution per scenario. The exit code is 1 if any
+SLO is violated.
+
+Usage:
+    python -m tests.endpoint_tests.load_harness --config tests/endpoint_tests/load_test_config.yml --output-dir load_test_results
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import Callable
+from typing import Final
+
+import joblib
+import numpy as np
+import requests
+import yaml
+from sklearn.linear_model import LinearRegression
+
+from app.monitoring.latency_histogram import LatencyHistogram
+
+REPO_ROOT: Final = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REGISTRY_SCRIPT: Final = os.path.join(REPO_ROOT, "app", "model_registry", "endpoint.py")
+HOST: Final = "127.0.0.1"
+FEATURES: Final = ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"]
+REQUEST_TIMEOUT_SECONDS: Final = 30
+SLO_LATENCY_KEYS: Final = {"p50_ms": "p50", "p95_ms": "p95", "p99_ms": "p99", "p999_ms": "p999"}
+REPORT_FILE: Final = "load_test_report.json"
+
+
+class LoadRecorder:
+    """
+    Thread safe collector of the requests that were sent inside the measurement window.
+    """
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.successes = 0
+        self.errors = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_seconds: float, success: bool):
+        # Failed requests only count towards the error rate, fast failures would otherwise flatter the percentiles.
+        success and self.histogram.record_seconds(latency_seconds)
+        with self._lock:
+            self.successes += success
+            self.errors += not success
+
+    def result(self, mode: str, duration_seconds: float, concurrency: int, rate: float | None = None) -> dict:
+        requests_sent = self.successes + self.errors + self.dropped
+        return {
+            "mode": mode,
+            "duration_seconds": duration_seconds,
+            "concurrency": concurrency,
+            "target_rate_rps": rate,
+            "requests": requests_sent,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "error_rate": (self.errors + self.dropped) / requests_sent if requests_sent else 0.0,
+            "throughput_rps": self.successes / duration_seconds,
+            "latency_ms": self.histogram.summary(),
+        }
+
+
+def _call(send: Callable[[], bool]) -> bool:
+    try:
+        return bool(send())
+    except Exception:
+        return False
+
+
+def run_closed_loop(
+    send: Callable[[], bool], concurrency: int, duration_seconds: float, warmup_seconds: float = 0.0
+) -> tuple[dict, LatencyHistogram]:
+    """
+    Run `concurrency` users that each send the next request as soon as the previous one is answered.
+
+    Args:
+        send (Callable): Sends one request and returns whether it succeeded.
+        concurrency (int): Number of concurrent users.
+        duration_seconds (float): Length of the measurement window.
+        warmup_seconds (float): Load before the measurement window that is not recorded.
+
+    Returns:
+        tuple: Result summary and the latency histogram of the measurement window.
+    """
+    recorder = LoadRecorder()
+    measure_start = time.perf_counter() + warmup_seconds
+    end = measure_start + duration_seconds
+
+    def user():
+        while (sent := time.perf_counter()) < end:
+            success = _call(send)
+            sent >= measure_start and recorder.record(time.perf_counter() - sent, success)
+
+    users = [threading.Thread(target=user, daemon=True) for _ in range(concurrency)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    return recorder.result("closed", duration_seconds, concurrency), recorder.histogram
+
+
+def run_open_loop(
+    send: Callable[[], bool],
+    rate: float,
+    concurrency: int,
+    duration_seconds: float,
+    warmup_seconds: float = 0.0,
+    drain_seconds: float = REQUEST_TIMEOUT_SECONDS,
+) -> tuple[dict, LatencyHistogram]:
+    """
+    Send requests at a constant arrival rate, independent of the response times.
+
+    Requests that arrive while `concurrency` requests are in flight wait in a queue and the wait counts into their latency.
+    Requests still queued `drain_seconds` after the last arrival are dropped and count as errors.
+
+    Args:
+        send (Callable): Sends one request and returns whether it succeeded.
+        rate (float): Arrivals per second.
+        concurrency (int): Maximum number of requests in flight.
+        duration_seconds (float): Length of the measurement window.
+        warmup_seconds (float): Load before the measurement window that is not recorded.
+        drain_seconds (float): Time the queued requests get to finish after the last arrival.
+
+    Returns:
+        tuple: Result summary and the latency histogram of the measurement window.
+    """
+    recorder = LoadRecorder()
+    start = time.perf_counter()
+    measure_start = start + warmup_seconds
+
+    def request(scheduled: float, measured: bool):
+        success = _call(send)
+        measured and recorder.record(time.perf_counter() - scheduled, success)
+
+    measured_futures = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for arrival in range(int((warmup_seconds + duration_seconds) * rate)):
+            scheduled = start + arrival / rate
+            delay = scheduled - time.perf_counter()
+            delay > 0 and time.sleep(delay)
+            future = executor.submit(request, scheduled, scheduled >= measure_start)
+            scheduled >= measure_start and measured_futures.append(future)
+        concurrent.futures.wait(measured_futures, timeout=drain_seconds)
+        executor.shutdown(wait=True, cancel_futures=True)
+    recorder.dropped = sum(future.cancelled() for future in measured_futures)
+    return recorder.result("open", duration_seconds, concurrency, rate), recorder.histogram
+
+
+def check_slo(result: dict, slo: dict) -> list[str]:
+    """
+    Compare a scenario result with its SLOs.
+
+    Args:
+        result (dict): Result of `run_closed_loop` or `run_open_loop`.
+        slo (dict): Limits keyed by p50_ms, p95_ms, p99_ms, p999_ms, max_error_rate and min_throughput_rps.
+
+    Returns:
+        list: Human readable violations, empty if every SLO is met.
+    """
+    unknown = set(slo) - set(SLO_LATENCY_KEYS) - {"max_error_rate", "min_throughput_rps"}
+    if unknown:
+        raise ValueError(f"Unknown SLO keys {sorted(unknown)}.")
+    violations = [
+        f"{key} {result['latency_ms'][percentile]:.3f} ms exceeds {limit} ms"
+        for key, percentile in SLO_LATENCY_KEYS.items()
+        if key in slo and result["latency_ms"][percentile] > (limit := slo[key])
+    ]
+    "max_error_rate" in slo and result["error_rate"] > slo["max_error_rate"] and violations.append(
+        f"error rate {result['error_rate']:.4f} exceeds {slo['max_error_rate']}"
+    )
+    "min_throughput_rps" in slo and result["throughput_rps"] < slo["min_throughput_rps"] and violations.append(
+        f"throughput {result['throughput_rps']:.2f} rps below {slo['min_throughput_rps']} rps"
+    )
+    return violations
+
+
+def load_payloads(payloads_config: dict) -> list[dict]:
+    """
+    Request bodies of a scenario, either `inline` or the `key` list of the JSON `file` the locust tests use.
+    """
+    if "inline" in payloads_config:
+        return payloads_config["inline"]
+    with open(os.path.join(REPO_ROOT, payloads_config["file"])) as file:
+        return json.load(file)[payloads_config["key"]]
+
+
+def http_sender(base_url: str, method: str, route: str, payloads: list[dict]) -> Callable[[], bool]:
+    """
+    Request function sending the payloads round robin, every thread keeps its own keep alive session.
+
+    The registry answers failures such as an unknown model with status 200 and the real code in the `response:` field,
+    so that field is checked as well.
+    """
+    url = base_url + route
+    payload_cycle = itertools.cycle(payloads)
+    local = threading.local()
+
+    def send() -> bool:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        response = local.session.request(method, url, json=next(payload_cycle), timeout=REQUEST_TIMEOUT_SECONDS)
+        if not response.ok:
+            return False
+        body = response.json()
+        return not isinstance(body, dict) or int(body.get("response:", 200)) < 400
+
+    return send
+
+
+class LocalServices:
+    """
+    Registry and inference service processes running from a scratch directory.
+
+    Args:
+        work_dir (str): Scratch directory holding the databases, model files, configs and service logs.
+        registry_port (int): Port of the registry service.
+        inference_port (int): Port of the inference service.
+        database (str): Customer purchase dataset of the inference service, relative to the repository root.
+        model (dict): Name and version the load test model is registered with.
+        startup_timeout_seconds (float): Time each service gets to answer its readiness probe.
+    """
+
+    def __init__(self, work_dir: str, registry_port: int, inference_port: int, database: str, model: dict, startup_timeout_seconds: float = 120):
+        self.work_dir = work_dir
+        self.registry_port = registry_port
+        self.inference_port = inference_port
+        self.database = os.path.join(REPO_ROOT, database)
+        self.model = model
+        self.startup_timeout_seconds = startup_timeout_seconds
+        self.urls = {"registry": f"http://{HOST}:{registry_port}", "inference": f"http://{HOST}:{inference_port}"}
+        self.processes: list[tuple[subprocess.Popen, object]] = []
+
+    def __enter__(self):
+        try:
+            os.makedirs(self.work_dir, exist_ok=True)
+            self._start(
+                "registry",
+                [sys.executable, REGISTRY_SCRIPT],
+                {"PYTHONPATH": os.path.join(REPO_ROOT, "app"), "STORAGE_BACKEND": "local", "REGISTRY_PORT": str(self.registry_port)},
+                "/status",
+            )
+            self._register_model()
+            self._start(
+                "inference",
+                [sys.executable, "-m", "uvicorn", "app.inference.endpoint:app", "--host", HOST, "--port", str(self.inference_port)],
+                {"PYTHONPATH": REPO_ROOT, "INFERENCE_CONFIG": self._write_inference_config()},
+                "/metrics",
+            )
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Signal the whole process group, the process pool workers of the registry hold its listening socket as well.
+        for process, log_file in reversed(self.processes):
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGTERM)
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    os.killpg(process.pid, signal.SIGKILL)
+                    process.wait()
+            log_file.close()
+        self.processes = []
+        return False
+
+    def _start(self, name: str, command: list[str], env: dict, readiness_route: str):
+        log_path = os.path.join(self.work_dir, f"{name}.log")
+        log_file = open(log_path, "w")
+        process = subprocess.Popen(
+            command, cwd=self.work_dir, env={**os.environ, **env}, stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True
+        )
+        self.processes.append((process, log_file))
+
+        deadline = time.monotonic() + self.startup_timeout_seconds
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"The {name} service exited with code {process.returncode}, see {log_path}.")
+            try:
+                if requests.get(self.urls[name] + readiness_route, timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise TimeoutError(f"The {name} service was not ready after {self.startup_timeout_seconds} seconds, see {log_path}.")
+
+    def _register_model(self):
+        rng = np.random.default_rng(0)
+        model_path = os.path.join(self.work_dir, "load_test_model.joblib")
+        joblib.dump(LinearRegression().fit(rng.random((100, len(FEATURES))), rng.random(100)), model_path)
+        response = requests.post(
+            self.urls["registry"] + "/upload_model",
+            json={**self.model, "features": str(FEATURES), "file_path": model_path, "framework": "scikit-learn"},
+            timeout=REQUEST_TIMEOUT_SECONDS,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Could not register the load test model: {response.text}")
+
+    def _write_inference_config(self) -> str:
+        inference_config = {
+            "database": self.database,
+            "model": {**self.model, "path": os.path.join("Downloads", "load_test_model.joblib")},
+            "tracing": {"sample_rate": 0.0},
+            "registry": {"name": "ado-flow", "url": self.urls["registry"] + "/"},
+        }
+        config_path = os.path.join(self.work_dir, "inference_config.yml")
+        with open(config_path, "w") as file:
+            yaml.safe_dump(inference_config, file)
+        return config_path
+
+
+def run_scenario(scenario: dict, urls: dict) -> tuple[dict, LatencyHistogram]:
+    send = http_sender(urls[scenario["service"]], scenario["method"], scenario["route"], load_payloads(scenario["payloads"]))
+    duration_seconds, warmup_seconds = scenario["duration_seconds"], scenario.get("warmup_seconds", 0.0)
+    if scenario["mode"] == "open":
+        return run_open_loop(send, scenario["rate"], scenario["concurrency"], duration_seconds, warmup_seconds)
+    if scenario["mode"] == "closed":
+        return run_closed_loop(send, scenario["concurrency"], duration_seconds, warmup_seconds)
+    raise ValueError(f"Unknown load mode {scenario['mode']} of scenario {scenario['name']}, use open or closed.")
+
+
+def run_harness(config: dict, output_dir: str) -> dict:
+    """
+    Boot the services, run every scenario and write the JSON report and `.hgrm` histograms to `output_dir`.
+
+    Returns:
+        dict: The report, `passed` is False if any scenario violated an SLO.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    report = {"started_at": datetime.now(timezone.utc).isoformat(), "scenarios": {}}
+    work_dir = tempfile.mkdtemp(prefix="load_test_services_")
+    try:
+        with LocalServices(work_dir, **config["services"]) as services:
+            for scenario in config["scenarios"]:
+                result, histogram = run_scenario(scenario, services.urls)
+                result["slo_violations"] = check_slo(result, scenario.get("slo", {}))
+                result["passed"] = not result["slo_violations"]
+                report["scenarios"][scenario["name"]] = result
+                with open(os.path.join(output_dir, f"{scenario['name']}.hgrm"), "w") as file:
+                    histogram.write_percentile_distribution(file)
+                print(f"{scenario['name']}: {'PASS' if result['passed'] else 'FAIL'} {result['latency_ms']} {result['throughput_rps']:.2f} rps")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    report["passed"] = all(result["passed"] for result in report["scenarios"].values())
+    with open(os.path.join(output_dir, REPORT_FILE), "w") as file:
+        json.dump(report, file, indent=4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless load test of the registry and inference services with latency SLOs.")
+    parser.add_argument("--config", default=os.path.join("tests", "endpoint_tests", "load_test_config.yml"), help="Services, scenarios and SLOs.")
+    parser.add_argument("--output-dir", default="load_test_results", help="Directory of the JSON report and the .hgrm histograms.")
+    args = parser.parse_args()
+
+    with open(args.config) as file:
+        config = yaml.safe_load(file)
+    report = run_harness(config, args.output_dir)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
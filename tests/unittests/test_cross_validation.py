@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import copy
+import json
+import shutil
+import unittest
+from functools import partial
+from typing import Final
+from unittest import mock
+
+import numpy as np
+from parameterized import parameterized
+from sklearn.model_selection import KFold
+
+from app.trainer.cross_validation import run_cross_validation
+from app.trainer.cross_validation import summarize_folds
+from app.trainer.metrics import regression_metrics
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import XGBoostRegressionTrainer
+
+
+class TestCrossValidation(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_cross_validation"
+    FOLDS: Final = 4
+    RANDOM_STATE: Final = 42
+    TRAIN_CONFIG: Final = {
+        "meta_data": {"name": "Linear Regression Model", "version": "v.0.0.1", "training_data": "Customer purchase data."},
+        "train_config": {
+            "dataset": {
+                "raw_dataset_csv": "data/customer_purchases.csv",
+                "numerical_columns": ["age", "annual_income", "purchase_amount"],
+                "categorical_columns": ["gender"],
+                "save_datasets_as_csv": False,
+                "cache_dir": TEST_TMP_ROOT,
+            },
+            "train": {
+                "features": ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"],
+                "prediction_target": "next_month_purchase_amount",
+                "deflection": 50,
+                "hyperparameters": {"fit_intercept": True},
+                "cross_validation": {"folds": FOLDS, "workers": 2},
+            },
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+            "model_trainer__eval__": "LinearRegressionTrainer",
+        },
+    }
+
+    def tearDown(self):
+        shutil.rmtree(TestCrossValidation.TEST_TMP_ROOT, ignore_errors=True)
+
+    @parameterized.expand(
+        [
+            ("linear_regression", LinearRegressionTrainer, {"fit_intercept": True}),
+            ("xgboost", XGBoostRegressionTrainer, {"n_estimators": 10, "max_depth": 3, "n_jobs": 1}),
+        ]
+    )
+    def test_parallel_folds_match_sequential_folds(self, _, trainer_class, hyperparameters):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(400, 5))
+        y = X @ np.arange(1, 6) + rng.normal(size=400)
+        score = partial(regression_metrics, deflection=1.0)
+
+        fold_metrics = run_cross_validation(
+            trainer_class.build_model,
+            hyperparameters,
+            score,
+            X,
+            y,
+            folds=TestCrossValidation.FOLDS,
+            random_state=TestCrossValidation.RANDOM_STATE,
+            workers=2,
+        )
+
+        expected = []
+        for train_index, validation_index in KFold(n_splits=TestCrossValidation.FOLDS, shuffle=True, random_state=42).split(X):
+            model = trainer_class.build_model(hyperparameters).fit(X[train_index], y[train_index])
+            expected.append(score(y[validation_index], model.predict(X[validation_index])))
+        self.assertEqual(len(fold_metrics), TestCrossValidation.FOLDS)
+        for actual_fold, expected_fold in zip(fold_metrics, expected):
+            self.assertEqual(actual_fold.keys(), expected_fold.keys())
+            for metric in expected_fold:
+                self.assertAlmostEqual(actual_fold[metric], expected_fold[metric], places=6)
+
+    def test_summarize_folds(self):
+        summary = summarize_folds([{"MSE": 1.0, "R2": 0.5}, {"MSE": 3.0, "R2": 0.7}])
+
+        self.assertEqual(summary["MSE mean (2-fold)"], 2.0)
+        self.assertEqual(summary["MSE std (2-fold)"], 1.0)
+        self.assertAlmostEqual(summary["R2 mean (2-fold)"], 0.6)
+        self.assertAlmostEqual(summary["R2 std (2-fold)"], 0.1)
+
+    def test_trainer_reports_fold_statistics_to_the_registry(self):
+        trainer = LinearRegressionTrainer(train_config=copy.deepcopy(TestCrossValidation.TRAIN_CONFIG), logger=mock.MagicMock())
+
+        with mock.patch.object(LinearRegressionTrainer, "save_model"):
+            results = trainer.run()
+
+        evaluation_metrics = json.loads(trainer.registry_meta_data["evaluation_metrics"])
+        self.assertEqual(evaluation_metrics, json.loads(json.dumps(results)))
+        for metric in ["MSE", "MAE", "R2", "Thresholded MAE (±50)", "Thresholded MSE (±50)", "Thresholded R2 (±50)"]:
+            self.assertIn(metric, evaluation_metrics)
+            self.assertIn(f"{metric} mean ({TestCrossValidation.FOLDS}-fold)", evaluation_metrics)
+            self.assertGreater(evaluation_metrics[f"{metric} std ({TestCrossValidation.FOLDS}-fold)"], 0)
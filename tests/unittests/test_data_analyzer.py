@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import unittest
+from typing import Final
+from unittest import mock
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import polars as pl
+from parameterized import parameterized
+from scipy.stats import chi2_contingency
+
+from data_analysis.data_analyzer import DataframeAnalyzer
+from data_analysis.data_analyzer import reservoir_sample
+from data_analysis.data_analyzer import uniform_bins
+from data_analysis.polars_data_analyzer import PolarsDataframeAnalyzer
+
+
+class TestPlotter(unittest.TestCase):
+    ROWS: Final = 4000
+    LARGE_DATA_ROWS: Final = 1000
+    SAMPLE_ROWS: Final = 300
+    SEABORN_PLOTS: Final = ["histplot", "countplot", "pairplot", "boxplot", "kdeplot", "violinplot"]
+
+    def setUp(self):
+        self.show = mock.patch.object(plt, "show", side_effect=lambda: plt.close("all"))
+        self.show.start()
+
+    def tearDown(self):
+        self.show.stop()
+        plt.close("all")
+
+    @staticmethod
+    def dataframe(rows: int) -> pd.DataFrame:
+        rng = np.random.default_rng(0)
+        return pd.DataFrame(
+            {
+                "customer_id": np.arange(rows),
+                "age": rng.integers(18, 80, rows).astype(float),
+                "gender": rng.choice(["Female", "Male"], rows),
+                "annual_income": rng.normal(60_000, 15_000, rows),
+                "purchase_amount": rng.exponential(300, rows),
+                "next_month_purchase_amount": np.nan,
+            }
+        )
+
+    def test_reservoir_sample(self):
+        positions = reservoir_sample(10_000, 100, seed=1, batch_rows=333)
+
+        self.assertEqual(positions.size, 100)
+        self.assertEqual(np.unique(positions).size, 100)
+        self.assertTrue((np.diff(positions) > 0).all() and positions[0] >= 0 and positions[-1] < 10_000)
+        np.testing.assert_array_equal(positions, reservoir_sample(10_000, 100, seed=1, batch_rows=333))
+        np.testing.assert_array_equal(reservoir_sample(50, 100), np.arange(50))
+
+    def test_reservoir_sample_is_uniform(self):
+        rows, size, draws = 100, 10, 2000
+        counts = np.bincount(np.concatenate([reservoir_sample(rows, size, seed=seed, batch_rows=7) for seed in range(draws)]), minlength=rows)
+
+        # Every row is drawn size / rows of the time, 200 of 2000 draws with a standard deviation of about 13.
+        self.assertTrue(((counts > 140) & (counts < 260)).all(), counts)
+
+    def test_uniform_bins_match_numpy_histogram(self):
+        values = np.random.default_rng(0).exponential(300, TestPlotter.ROWS)
+        values[[5, 9]] = [np.nan, np.inf]
+
+        codes, edges = uniform_bins(values, 40)
+        expected_counts, expected_edges = np.histogram(values[np.isfinite(values)], bins=40)
+
+        np.testing.assert_allclose(edges, expected_edges)
+        np.testing.assert_array_equal(np.bincount(codes[codes >= 0], minlength=40), expected_counts)
+        self.assertEqual(codes[[5, 9]].tolist(), [-1, -1])
+
+    @parameterized.expand([("pandas", DataframeAnalyzer, pd.DataFrame), ("polars", PolarsDataframeAnalyzer, pl.from_pandas)])
+    def test_large_data_mode_bins_and_samples(self, _, analyzer_class, frame):
+        analyzer = analyzer_class(frame(TestPlotter.dataframe(TestPlotter.ROWS)))
+        analyzer.Plotter.large_data_rows, analyzer.Plotter.sample_rows = TestPlotter.LARGE_DATA_ROWS, TestPlotter.SAMPLE_ROWS
+
+        with mock.patch.multiple("data_analysis.data_analyzer.sns", **{plot: mock.DEFAULT for plot in TestPlotter.SEABORN_PLOTS}) as plots:
+            analyzer.Plotter.plot_all()
+
+        self.assertTrue(analyzer.Plotter.large_data)
+        for plot in ["histplot", "countplot", "pairplot"]:
+            plots[plot].assert_not_called()
+        for plot in ["boxplot", "kdeplot", "violinplot"]:
+            self.assertGreater(plots[plot].call_count, 0)
+            for call in plots[plot].call_args_list:
+                data = [value for value in [*call.args, *call.kwargs.values()] if isinstance(value, pd.Series)]
+                self.assertTrue(data and all(len(values) == TestPlotter.SAMPLE_ROWS for values in data), plot)
+
+    def test_regular_mode_plots_every_row(self):
+        analyzer = DataframeAnalyzer(TestPlotter.dataframe(TestPlotter.LARGE_DATA_ROWS))
+
+        with mock.patch.multiple("data_analysis.data_analyzer.sns", **{plot: mock.DEFAULT for plot in TestPlotter.SEABORN_PLOTS}) as plots:
+            analyzer.Plotter.plot_all()
+
+        self.assertFalse(analyzer.Plotter.large_data)
+        self.assertEqual(len(plots["pairplot"].call_args.args[0]), TestPlotter.LARGE_DATA_ROWS)
+        self.assertEqual(len(plots["kdeplot"].call_args.args[0]), TestPlotter.LARGE_DATA_ROWS)
+
+    def test_binned_plots_count_every_row(self):
+        dataframe = TestPlotter.dataframe(TestPlotter.ROWS)
+        dataframe.loc[:9, "purchase_amount"] = np.nan
+        analyzer = DataframeAnalyzer(dataframe)
+        analyzer.Plotter.large_data_rows = TestPlotter.LARGE_DATA_ROWS
+
+        with mock.patch.object(plt, "show"):
+            analyzer.Plotter.pairwise_scatter()
+            axes = plt.gcf().axes
+            diagonal_counts = [axes[position * 4].patches[0].get_data().values.sum() for position in range(3)]
+            age_by_income = axes[3].collections[0].get_array().sum()
+
+        self.assertEqual(diagonal_counts, [TestPlotter.ROWS, TestPlotter.ROWS, TestPlotter.ROWS - 10])
+        self.assertEqual(age_by_income, TestPlotter.ROWS)
+
+
+class TestCorrelation(unittest.TestCase):
+    ROWS: Final = 5000
+    CATEGORICAL_COLUMNS: Final = ["gender", "region", "tier"]
+    NUMERICAL_COLUMNS: Final = ["age", "annual_income", "purchase_amount"]
+
+    @staticmethod
+    def dataframe() -> pd.DataFrame:
+        rng = np.random.default_rng(0)
+        dataframe = pd.DataFrame(
+            {
+                "customer_id": np.arange(TestCorrelation.ROWS),
+                "gender": rng.choice(np.array(["Female", "Male", None], dtype=object), TestCorrelation.ROWS),
+                "region": rng.choice(list("abcde"), TestCorrelation.ROWS),
+                "tier": rng.integers(0, 3, TestCorrelation.ROWS),
+                "age": rng.integers(18, 80, TestCorrelation.ROWS).astype(float),
+                "annual_income": rng.normal(60_000, 15_000, TestCorrelation.ROWS),
+                "purchase_amount": rng.exponential(300, TestCorrelation.ROWS),
+                "next_month_purchase_amount": np.nan,
+            }
+        )
+        # Depends on the region, and a category that only appears next to a missing gender.
+        dataframe["purchase_amount"] += dataframe["region"].map(dict(zip("abcde", [0, 50, 100, 150, 200])))
+        dataframe.loc[::9, "annual_income"] = np.nan
+        dataframe.loc[dataframe["gender"].isna() & (dataframe["tier"] == 2), "region"] = "f"
+        return dataframe
+
+    def test_categorical_correlation_matrix_matches_crosstabs(self):
+        dataframe = TestCorrelation.dataframe()
+        analyzer = DataframeAnalyzer(dataframe, categorical_columns=TestCorrelation.CATEGORICAL_COLUMNS)
+
+        result = analyzer.Correlation.categorical_correlation_matrix()
+
+        for col1 in TestCorrelation.CATEGORICAL_COLUMNS:
+            for col2 in TestCorrelation.CATEGORICAL_COLUMNS:
+                confusion_matrix = pd.crosstab(dataframe[col1], dataframe[col2])
+                chi2 = chi2_contingency(confusion_matrix)[0]
+                expected = 1.0 if col1 == col2 else np.sqrt(chi2 / (confusion_matrix.to_numpy().sum() * (min(confusion_matrix.shape) - 1)))
+                self.assertAlmostEqual(result.loc[col1, col2], expected, places=12, msg=(col1, col2))
+
+    def test_categorical_numerical_correlation_matrix_matches_group_means(self):
+        dataframe = TestCorrelation.dataframe()
+        analyzer = DataframeAnalyzer(dataframe, categorical_columns=TestCorrelation.CATEGORICAL_COLUMNS)
+
+        result = analyzer.Correlation.categorical_numerical_correlation_matrix()
+
+        self.assertEqual(list(result.columns), TestCorrelation.NUMERICAL_COLUMNS)
+        for cat_feature in TestCorrelation.CATEGORICAL_COLUMNS:
+            for num_feature in TestCorrelation.NUMERICAL_COLUMNS:
+                values = dataframe[num_feature]
+                category_means = values.groupby(dataframe[cat_feature]).mean()
+                between_group_variance = ((category_means - values.mean()) ** 2 * dataframe[cat_feature].value_counts()).sum()
+                expected = np.sqrt(between_group_variance / ((values - values.mean()) ** 2).sum())
+                self.assertAlmostEqual(result.loc[cat_feature, num_feature], expected, places=10, msg=(cat_feature, num_feature))
+        self.assertGreater(result.loc["region", "purchase_amount"], 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import copy
+import os
+import shutil
+import unittest
+from typing import Final
+from unittest import mock
+
+import polars as pl
+from parameterized import parameterized
+from polars.testing import assert_frame_equal
+
+from app.trainer.dataset_cache import ProcessedDatasetCache
+from app.trainer.dataset_processor import DatasetProcessor
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import NormalEquationRegressionTrainer
+
+
+class TestProcessedDatasetCache(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_dataset_cache"
+    CACHE_DIR: Final = os.path.join(TEST_TMP_ROOT, "cache")
+    RAW_CSV_PATH: Final = os.path.join(TEST_TMP_ROOT, "purchases.csv")
+    SOURCE_CSV_PATH: Final = os.path.join("data", "customer_purchases.csv")
+    PARAMS: Final = {"features": ["age", "Recency"], "target_column": "next_month_purchase_amount"}
+    TRAIN_CONFIG: Final = {
+        "meta_data": {"name": "Linear Regression Model", "version": "v.0.0.1", "training_data": "Customer purchase data."},
+        "train_config": {
+            "dataset": {
+                "raw_dataset_csv": RAW_CSV_PATH,
+                "numerical_columns": ["age", "annual_income", "purchase_amount"],
+                "categorical_columns": ["gender"],
+                "save_datasets_as_csv": False,
+                "cache_dir": CACHE_DIR,
+            },
+            "train": {
+                "features": ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"],
+                "prediction_target": "next_month_purchase_amount",
+                "hyperparameters": {"fit_intercept": True},
+            },
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+            "model_trainer__eval__": "LinearRegressionTrainer",
+        },
+    }
+
+    def setUp(self):
+        os.makedirs(TestProcessedDatasetCache.TEST_TMP_ROOT, exist_ok=True)
+        shutil.copyfile(TestProcessedDatasetCache.SOURCE_CSV_PATH, TestProcessedDatasetCache.RAW_CSV_PATH)
+        self.cache = ProcessedDatasetCache(cache_dir=TestProcessedDatasetCache.CACHE_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(TestProcessedDatasetCache.TEST_TMP_ROOT, ignore_errors=True)
+
+    def test_key_is_stable_and_ignores_param_order(self):
+        reordered_params = dict(reversed(list(TestProcessedDatasetCache.PARAMS.items())))
+
+        self.assertEqual(
+            self.cache.key(TestProcessedDatasetCache.RAW_CSV_PATH, TestProcessedDatasetCache.PARAMS),
+            self.cache.key(TestProcessedDatasetCache.RAW_CSV_PATH, reordered_params),
+        )
+
+    @parameterized.expand([("changed_content", True, {}), ("changed_params", False, {"features": ["age"]})])
+    def test_key_changes(self, _, change_content, param_changes):
+        key_before = self.cache.key(TestProcessedDatasetCache.RAW_CSV_PATH, TestProcessedDatasetCache.PARAMS)
+        if change_content:
+            with open(TestProcessedDatasetCache.RAW_CSV_PATH, "a") as csv_file:
+                csv_file.write("99999,30,Male,50000,10.0,2024-01-01T00:00:00+03:00,\n")
+
+        key_after = self.cache.key(TestProcessedDatasetCache.RAW_CSV_PATH, {**TestProcessedDatasetCache.PARAMS, **param_changes})
+
+        self.assertNotEqual(key_before, key_after)
+
+    def test_store_and_load_round_trip(self):
+        train_dataframe = pl.DataFrame({"age": [20, 30], "next_month_purchase_amount": [1.0, 2.0]})
+        test_dataframe = pl.DataFrame(
+            {"age": [40], "next_month_purchase_amount": [None]}, schema_overrides={"next_month_purchase_amount": pl.Float64}
+        )
+        key = self.cache.key(TestProcessedDatasetCache.RAW_CSV_PATH, TestProcessedDatasetCache.PARAMS)
+
+        self.assertIsNone(self.cache.load(key))
+        self.cache.store(key, train_dataframe, test_dataframe, metadata=TestProcessedDatasetCache.PARAMS)
+        loaded_train, loaded_test = self.cache.load(key)
+
+        assert_frame_equal(loaded_train, train_dataframe)
+        assert_frame_equal(loaded_test, test_dataframe)
+        self.assertEqual(
+            [name for name in os.listdir(TestProcessedDatasetCache.CACHE_DIR) if name.startswith(".")], [], msg="No temporary entry may be left."
+        )
+
+    def test_interrupted_entry_is_a_miss(self):
+        key = self.cache.key(TestProcessedDatasetCache.RAW_CSV_PATH, TestProcessedDatasetCache.PARAMS)
+        os.makedirs(self.cache.entry_path(key))
+        pl.DataFrame({"age": [1]}).write_ipc(os.path.join(self.cache.entry_path(key), ProcessedDatasetCache.TRAIN_FILE))
+
+        self.assertIsNone(self.cache.load(key))
+
+    def test_trainer_reuses_processed_datasets(self):
+        logger = mock.MagicMock()
+
+        first_trainer = LinearRegressionTrainer(train_config=copy.deepcopy(TestProcessedDatasetCache.TRAIN_CONFIG), logger=logger)
+        self.assertIn("cache miss", logger.info.call_args_list[-1].args[0])
+
+        with mock.patch("app.trainer.trainer.DatasetProcessor.process_dataset") as process_dataset:
+            second_trainer = LinearRegressionTrainer(train_config=copy.deepcopy(TestProcessedDatasetCache.TRAIN_CONFIG), logger=logger)
+        process_dataset.assert_not_called()
+        self.assertIn("cache hit", logger.info.call_args_list[-1].args[0])
+
+        assert_frame_equal(first_trainer.train_dataframe, second_trainer.train_dataframe)
+        self.assertIn("Processed dataset:", second_trainer.registry_meta_data["training_data"])
+
+    def test_external_memory_trainer_only_writes_the_cache_entry(self):
+        config = copy.deepcopy(TestProcessedDatasetCache.TRAIN_CONFIG)
+        config["train_config"]["train"]["external_memory"] = {"batch_rows": 1_000}
+
+        with mock.patch.object(DatasetProcessor, "process_dataset", autospec=True, side_effect=DatasetProcessor.process_dataset) as process_dataset:
+            trainer = NormalEquationRegressionTrainer(train_config=copy.deepcopy(config), logger=mock.MagicMock())
+        self.assertTrue(process_dataset.call_args.kwargs["streaming"])
+
+        self.assertIsNone(trainer.train_dataframe)
+        self.assertIsNone(trainer.test_dataframe)
+        self.assertTrue(os.path.isfile(trainer.processed_dataset_path))
+        self.assertEqual(
+            os.path.dirname(trainer.processed_dataset_path),
+            os.path.join(TestProcessedDatasetCache.CACHE_DIR, os.listdir(TestProcessedDatasetCache.CACHE_DIR)[0]),
+        )
+
+        with mock.patch("app.trainer.trainer.DatasetProcessor.process_dataset") as process_dataset:
+            cached_trainer = NormalEquationRegressionTrainer(train_config=copy.deepcopy(config), logger=mock.MagicMock())
+        process_dataset.assert_not_called()
+        self.assertEqual(cached_trainer.processed_dataset_path, trainer.processed_dataset_path)
+        self.assertGreater(cached_trainer.run()["R2"], 0)
+
+        config["train_config"]["dataset"]["use_cache"] = False
+        with self.assertRaises(ValueError):
+            NormalEquationRegressionTrainer(train_config=config, logger=mock.MagicMock())
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+import shutil
+import unittest
+from typing import Final
+
+import polars as pl
+from parameterized import parameterized
+from polars.testing import assert_frame_equal
+
+from app.datasets.dataset_io import convert_dataset
+from app.datasets.dataset_io import dataset_format
+from app.datasets.dataset_io import iter_dataset_batches
+from app.datasets.dataset_io import parse_datetime_columns
+from app.datasets.dataset_io import read_dataset
+from app.datasets.dataset_io import scan_dataset
+from app.trainer.dataset_processor import DatasetProcessor
+
+
+class TestDatasetIO(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_dataset_io"
+    SOURCE_CSV_PATH: Final = os.path.join("data", "customer_purchases.csv")
+    SORT_COLUMNS: Final = ["customer_id", "purchase_year", "purchase_month"]
+
+    @classmethod
+    def setUpClass(cls):
+        os.makedirs(cls.TEST_TMP_ROOT, exist_ok=True)
+        cls.converted_paths = {
+            target_format: convert_dataset(cls.SOURCE_CSV_PATH, target_format, output_dir=cls.TEST_TMP_ROOT) for target_format in ["parquet", "ipc"]
+        }
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.TEST_TMP_ROOT, ignore_errors=True)
+
+    @parameterized.expand(
+        [
+            ("csv", "data/customer_purchases.csv", "csv"),
+            ("parquet", "data/customer_purchases.parquet", "parquet"),
+            ("arrow", "data/customer_purchases.arrow", "ipc"),
+            ("feather_upper_case", "data/CUSTOMER_PURCHASES.FEATHER", "ipc"),
+        ]
+    )
+    def test_dataset_format(self, _, path, expected_format):
+        self.assertEqual(dataset_format(path), expected_format)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            dataset_format("data/customer_purchases.xlsx")
+
+    @parameterized.expand([("parquet",), ("ipc",)])
+    def test_converted_dataset_keeps_rows_and_parses_dates(self, target_format):
+        expected = parse_datetime_columns(pl.read_csv(TestDatasetIO.SOURCE_CSV_PATH), datetime_format=DatasetProcessor.PURCHASE_DATE_FORMAT)
+
+        converted = read_dataset(TestDatasetIO.converted_paths[target_format])
+
+        self.assertEqual(converted.schema["purchase_date"], pl.Datetime("us", "UTC"))
+        assert_frame_equal(converted, expected)
+
+    @parameterized.expand([("csv",), ("parquet",), ("ipc",)])
+    def test_column_and_predicate_pushdown(self, target_format):
+        path = TestDatasetIO.SOURCE_CSV_PATH if target_format == "csv" else TestDatasetIO.converted_paths[target_format]
+
+        customer = read_dataset(path, columns=["customer_id", "purchase_amount"], predicate=pl.col("customer_id") == 1)
+
+        self.assertEqual(customer.columns, ["customer_id", "purchase_amount"])
+        self.assertGreater(customer.height, 0)
+        self.assertTrue((customer["customer_id"] == 1).all())
+
+    def test_parquet_scan_pushes_projection_and_predicate_into_the_reader(self):
+        plan = scan_dataset(
+            TestDatasetIO.converted_paths["parquet"], columns=["customer_id", "purchase_amount"], predicate=pl.col("customer_id") == 1
+        )
+
+        # Both appear on the scan node itself, nothing is filtered after a full read.
+        self.assertIn("PROJECT 2/7 COLUMNS", plan.explain())
+        self.assertIn("SELECTION", plan.explain())
+
+    @parameterized.expand([("parquet",), ("ipc",)])
+    def test_batches_cover_the_dataset_in_order(self, target_format):
+        path = TestDatasetIO.converted_paths[target_format]
+
+        batches = list(iter_dataset_batches(path, batch_rows=1_000))
+
+        self.assertGreater(len(batches), 1)
+        assert_frame_equal(pl.concat(batches), read_dataset(path))
+
+    @parameterized.expand([("csv", None), ("parquet", "parquet"), ("ipc", "ipc")])
+    def test_batches_of_a_row_range(self, _, target_format):
+        path = TestDatasetIO.SOURCE_CSV_PATH if target_format is None else TestDatasetIO.converted_paths[target_format]
+
+        batches = list(iter_dataset_batches(path, batch_rows=700, start=1_234, stop=5_000))
+
+        self.assertGreater(len(batches), 1)
+        assert_frame_equal(pl.concat(batches), read_dataset(path).slice(1_234, 5_000 - 1_234))
+
+    @parameterized.expand([("parquet_eager", "parquet", False), ("parquet_streaming", "parquet", True), ("ipc_eager", "ipc", False)])
+    def test_dataset_processor_output_does_not_depend_on_format(self, _, target_format, streaming):
+        csv_train, csv_test = DatasetProcessor(csv_path=TestDatasetIO.SOURCE_CSV_PATH).process_dataset(as_pandas=False)
+        train, test = DatasetProcessor(csv_path=TestDatasetIO.converted_paths[target_format]).process_dataset(streaming=streaming, as_pandas=False)
+
+        for expected, actual in [(csv_train, train), (csv_test, test)]:
+            assert_frame_equal(
+                actual.select(sorted(actual.columns)).sort(TestDatasetIO.SORT_COLUMNS),
+                expected.select(sorted(expected.columns)).sort(TestDatasetIO.SORT_COLUMNS),
+            )
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import unittest
+from typing import Final
+from unittest import mock
+
+import polars as pl
+from parameterized import parameterized
+from polars.testing import assert_frame_equal
+
+from app.trainer.dataset_processor import DatasetProcessor
+
+
+def reference_next_month_purchase_amount(dataframe: pl.DataFrame) -> pl.DataFrame:
+    """Row by row implementation the vectorized target fill replaced, kept as the parity oracle."""
+    dataframe = dataframe.with_columns(
+        [
+            (pl.when(pl.col("purchase_month") == 12).then(pl.col("purchase_year") + 1).otherwise(pl.col("purchase_year"))).alias("next_year"),
+            (pl.when(pl.col("purchase_month") == 12).then(1).otherwise(pl.col("purchase_month") + 1)).alias("next_month"),
+        ]
+    )
+    dataframe = dataframe.with_row_index(name="index")
+    next_month_df = dataframe.join(
+        dataframe.select(["customer_id", "purchase_year", "purchase_month", "purchase_amount"]),
+        left_on=["customer_id", "next_year", "next_month"],
+        right_on=["customer_id", "purchase_year", "purchase_month"],
+        how="left",
+        suffix="_next",
+    )
+    dataframe = dataframe.with_columns(next_month_df["purchase_amount_next"].alias("next_month_purchase_amount"))
+
+    updated_rows = []
+    for row in dataframe.iter_rows(named=True):
+        if row["next_month_purchase_amount"] is None:
+            future_purchases = dataframe.filter(
+                (pl.col("customer_id") == row["customer_id"])
+                & (
+                    (pl.col("purchase_year") > row["purchase_year"])
+                    | ((pl.col("purchase_year") == row["purchase_year"]) & (pl.col("purchase_month") > row["purchase_month"]))
+                )
+            ).sort(["purchase_year", "purchase_month"])
+            if len(future_purchases) > 0:
+                updated_rows.append((row["index"], future_purchases[0, "purchase_amount"]))
+
+    for index, value in updated_rows:
+        dataframe[index, "next_month_purchase_amount"] = value
+
+    return dataframe.drop(["next_year", "next_month", "index"])
+
+
+def reference_sequential_outlier_filter(dataframe: pl.DataFrame, columns: list) -> pl.DataFrame:
+    """Per feature IQR filter as it was implemented before the combined outlier stage."""
+    for column in columns:
+        q1 = dataframe.select(pl.col(column).quantile(0.25)).item()
+        q3 = dataframe.select(pl.col(column).quantile(0.75)).item()
+        iqr = q3 - q1
+        dataframe = dataframe.filter((pl.col(column) >= q1 - 1.5 * iqr) & (pl.col(column) <= q3 + 1.5 * iqr))
+    return dataframe
+
+
+class TestDatasetProcessor(unittest.TestCase):
+    DATASET_PATH: Final = "data/customer_purchases.csv"
+    SORT_COLUMNS: Final = ["customer_id", "purchase_year", "purchase_month"]
+    OUTLIER_REPORT_COLUMNS: Final = ["feature", "q1", "q3", "lower_bound", "upper_bound", "outlier_rows", "outlier_customers"]
+
+    def test_next_month_fill_matches_reference_on_customer_purchases(self):
+        processor = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH)
+        squashed = processor._DatasetProcessor__squash_rows_by_customer_month_year()
+
+        expected = reference_next_month_purchase_amount(squashed).sort(TestDatasetProcessor.SORT_COLUMNS)
+        actual = processor._DatasetProcessor__compute_next_month_purchase_amount()
+
+        self.assertEqual(actual.columns, expected.columns)
+        self.assertTrue(actual.equals(expected), msg="Vectorized fill must match the row by row implementation.")
+
+    @parameterized.expand([("single_batch", 500_000), ("merged_batches", 1_000)])
+    def test_streaming_mode_matches_eager_mode(self, _, batch_rows):
+        eager_train, eager_test = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH).process_dataset()
+        with mock.patch.object(DatasetProcessor, "STREAMING_BATCH_ROWS", batch_rows):
+            streaming_train, streaming_test = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH).process_dataset(streaming=True)
+
+        for eager, streaming in [(eager_train, streaming_train), (eager_test, streaming_test)]:
+            self.assertEqual(sorted(eager.columns), sorted(streaming.columns))
+            assert_frame_equal(self.__normalize(eager), self.__normalize(streaming))
+
+    def test_sequential_outliers_match_per_feature_reference(self):
+        processor = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH)
+        before_outliers = self.__process_until_outliers(processor)
+
+        report = pl.concat([processor._DatasetProcessor__find_outliers_iqr(column=column) for column in processor.features])
+
+        assert_frame_equal(processor.dataframe, reference_sequential_outlier_filter(before_outliers, processor.features))
+        self.assertEqual(report["feature"].to_list(), processor.features)
+
+    def test_combined_outliers_use_bounds_of_the_same_frame(self):
+        processor = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH)
+        before_outliers = self.__process_until_outliers(processor)
+
+        report = processor._DatasetProcessor__filter_outliers_iqr(columns=processor.features)
+
+        self.assertEqual(report.columns, TestDatasetProcessor.OUTLIER_REPORT_COLUMNS)
+        keep = pl.lit(True)
+        for row in report.iter_rows(named=True):
+            column = pl.col(row["feature"])
+            self.assertEqual(row["q1"], before_outliers[row["feature"]].quantile(0.25))
+            self.assertEqual(row["q3"], before_outliers[row["feature"]].quantile(0.75))
+            is_outlier = (column < row["lower_bound"]) | (column > row["upper_bound"])
+            self.assertEqual(row["outlier_rows"], before_outliers.filter(is_outlier).height)
+            self.assertEqual(row["outlier_customers"], before_outliers.filter(is_outlier)["customer_id"].n_unique())
+            keep = keep & ~is_outlier
+        assert_frame_equal(processor.dataframe, before_outliers.filter(keep))
+
+    def test_sketched_quartiles_are_within_the_rank_error(self):
+        processor = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH, outlier_quantile_error=0.01)
+        before_outliers = self.__process_until_outliers(processor)
+
+        with mock.patch.object(DatasetProcessor, "STREAMING_BATCH_ROWS", 500):
+            report = processor._DatasetProcessor__filter_outliers_iqr(columns=processor.features)
+
+        for row in report.iter_rows(named=True):
+            values = before_outliers[row["feature"]]
+            # Tied values share a range of ranks, one of them must be within the error of the quartile.
+            for quartile, quantile in [(row["q1"], 0.25), (row["q3"], 0.75)]:
+                self.assertLessEqual((values < quartile).mean() - 0.01, quantile, row["feature"])
+                self.assertGreaterEqual((values <= quartile).mean() + 0.01, quantile, row["feature"])
+            is_outlier = (pl.col(row["feature"]) < row["lower_bound"]) | (pl.col(row["feature"]) > row["upper_bound"])
+            self.assertEqual(row["outlier_rows"], before_outliers.filter(is_outlier).height)
+        self.assertEqual(processor.processing_params()["outlier_quantile_error"], 0.01)
+        self.assertNotIn("outlier_quantile_error", DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH).processing_params())
+
+    @parameterized.expand([("combined", False), ("sequential", True)])
+    def test_process_dataset_exposes_outlier_report(self, _, sequential_outliers):
+        processor = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH)
+        processor.process_dataset(sequential_outliers=sequential_outliers)
+
+        self.assertEqual(processor.outlier_report.columns, TestDatasetProcessor.OUTLIER_REPORT_COLUMNS)
+        self.assertEqual(processor.outlier_report["feature"].to_list(), processor.features)
+
+    def test_csv_is_read_lazily(self):
+        processor = DatasetProcessor(csv_path="missing_dataset.csv")
+        with self.assertRaises(FileNotFoundError):
+            processor.dataframe
+
+    @parameterized.expand(
+        [
+            # (customer_id, year, month, amount) rows and the expected target per row in period order.
+            ("consecutive_months", [(1, 2024, 1, 10.0), (1, 2024, 2, 20.0)], [20.0, None]),
+            ("gap_uses_closest_later_month", [(1, 2024, 1, 10.0), (1, 2024, 5, 50.0), (1, 2024, 9, 90.0)], [50.0, 90.0, None]),
+            ("year_boundary", [(1, 2023, 12, 10.0), (1, 2024, 1, 20.0)], [20.0, None]),
+            ("customers_do_not_leak", [(1, 2024, 1, 10.0), (2, 2024, 2, 20.0)], [None, None]),
+            ("unsorted_input", [(1, 2024, 3, 30.0), (1, 2024, 1, 10.0), (1, 2023, 6, 5.0)], [10.0, 30.0, None]),
+        ]
+    )
+    def test_next_month_fill(self, _, rows, expected_target):
+        processor = DatasetProcessor(csv_path=TestDatasetProcessor.DATASET_PATH)
+        customer_ids, years, months, amounts = zip(*rows)
+        processor.dataframe = pl.DataFrame(
+            {
+                "customer_id": customer_ids,
+                "purchase_year": years,
+                "purchase_month": months,
+                "purchase_amount": amounts,
+                "purchase_date": ["2024-01-01T00:00:00+03:00"] * len(rows),
+                "next_month_purchase_amount": [None] * len(rows),
+            },
+            schema_overrides={"purchase_year": pl.Int32, "purchase_month": pl.Int8, "next_month_purchase_amount": pl.Float64},
+        )
+
+        result = processor._DatasetProcessor__compute_next_month_purchase_amount()
+
+        self.assertEqual(result["next_month_purchase_amount"].to_list(), expected_target)
+
+    @staticmethod
+    def __normalize(dataframe) -> pl.DataFrame:
+        # Row order and one hot column order are not part of the contract.
+        dataframe = pl.from_pandas(dataframe)
+        return dataframe.select(sorted(dataframe.columns)).sort(TestDatasetProcessor.SORT_COLUMNS)
+
+    @staticmethod
+    def __process_until_outliers(processor: DatasetProcessor) -> pl.DataFrame:
+        processor._DatasetProcessor__squash_rows_by_customer_month_year()
+        processor._DatasetProcessor__compute_next_month_purchase_amount()
+        processor._DatasetProcessor__one_hot_encode_categorical_data()
+        processor._DatasetProcessor__drop_rows_with_nan()
+        return processor._DatasetProcessor__calculate_rfm()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import unittest
+from typing import Final
+from unittest import mock
+
+import numpy as np
+import polars as pl
+from parameterized import parameterized
+
+from app.trainer.external_memory import iter_split_batches
+from app.trainer.external_memory import validation_mask
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import XGBoostRegressionTrainer
+
+TEST_TMP_ROOT: Final = "tmp_external_memory"
+FEATURES: Final = ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"]
+TARGET: Final = "next_month_purchase_amount"
+
+
+def write_processed_dataset(path: str, rows: int, seed: int = 0):
+    """Write a parquet file with the columns and dtypes of the processed training dataset and a learnable target."""
+    rng = np.random.default_rng(seed)
+    purchase_amount = rng.uniform(5, 2000, size=rows)
+    monetary = rng.uniform(5, 50_000, size=rows)
+    pl.DataFrame(
+        {
+            "customer_id": rng.integers(1, rows // 10 + 2, size=rows),
+            "purchase_year": rng.integers(2021, 2024, size=rows).astype(np.int32),
+            "purchase_month": rng.integers(1, 13, size=rows).astype(np.int8),
+            "age": rng.integers(18, 80, size=rows),
+            "gender_Female": rng.integers(0, 2, size=rows).astype(np.int8),
+            "Recency": rng.integers(0, 36, size=rows),
+            "Frequency": rng.integers(1, 36, size=rows),
+            "Monetary": monetary,
+            "annual_income": rng.integers(20_000, 150_000, size=rows),
+            "purchase_amount": purchase_amount,
+            TARGET: 0.5 * purchase_amount + monetary / 100 + rng.normal(scale=10, size=rows),
+        }
+    ).write_parquet(path, row_group_size=100_000)
+
+
+def train_config(dataset_path: str, batch_rows: int) -> dict:
+    return {
+        "meta_data": {"name": "XGBOOST Regression Model", "version": "v.0.0.1"},
+        "train_config": {
+            "dataset": {"use_cache": False},
+            "train": {
+                "features": FEATURES,
+                "prediction_target": TARGET,
+                "hyperparameters": {"n_estimators": 20, "max_depth": 4, "n_jobs": 1},
+                "external_memory": {"batch_rows": batch_rows, "cache_dir": os.path.join(TEST_TMP_ROOT, "xgboost_cache"), "dataset": dataset_path},
+            },
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+        },
+    }
+
+
+def anonymous_memory_limited_run(config: dict, memory_cap_mb: int, in_memory: bool):
+    """Runs in a spawned process: caps the private memory this process may add and trains, or loads the dataset at once."""
+    # Pools of OpenMP and polars are started before the cap, so only the training itself counts.
+    XGBoostRegressionTrainer.build_model({"n_estimators": 1}).fit(np.ones((10, 2), dtype=np.float32), np.ones(10))
+    pl.DataFrame({"a": [1]}).lazy().collect()
+    with open("/proc/self/status") as status:
+        data_bytes = next(int(line.split()[1]) * 1024 for line in status if line.startswith("VmData:"))
+    resource.setrlimit(resource.RLIMIT_DATA, (data_bytes + memory_cap_mb * 2**20, resource.RLIM_INFINITY))
+
+    if in_memory:
+        pl.read_parquet(config["train_config"]["train"]["external_memory"]["dataset"]).to_numpy()
+    else:
+        XGBoostRegressionTrainer(train_config=config, logger=mock.MagicMock()).run()
+
+
+class TestExternalMemory(unittest.TestCase):
+    DATASET_PATH: Final = os.path.join(TEST_TMP_ROOT, "processed_train.parquet")
+    LARGE_DATASET_PATH: Final = os.path.join(TEST_TMP_ROOT, "large_processed_train.parquet")
+    ROWS: Final = 20_000
+    LARGE_ROWS: Final = 4_000_000
+    MEMORY_CAP_MB: Final = 224
+
+    @classmethod
+    def setUpClass(cls):
+        os.makedirs(TEST_TMP_ROOT, exist_ok=True)
+        write_processed_dataset(cls.DATASET_PATH, cls.ROWS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEST_TMP_ROOT, ignore_errors=True)
+
+    @parameterized.expand([("small_batches", 7), ("large_batches", 1_000)])
+    def test_validation_mask_does_not_depend_on_batch_size(self, _, batch_rows):
+        expected = validation_mask(0, 10_000, 0.2, seed=42)
+
+        batched = np.concatenate([validation_mask(start, min(batch_rows, 10_000 - start), 0.2, seed=42) for start in range(0, 10_000, batch_rows)])
+
+        np.testing.assert_array_equal(batched, expected)
+        self.assertAlmostEqual(expected.mean(), 0.2, delta=0.02)
+        self.assertFalse(np.array_equal(expected, validation_mask(0, 10_000, 0.2, seed=7)))
+
+    def test_splits_partition_the_dataset(self):
+        dataset = pl.read_parquet(TestExternalMemory.DATASET_PATH)
+
+        splits = [
+            list(iter_split_batches(TestExternalMemory.DATASET_PATH, FEATURES, TARGET, 3_000, 0.2, 42, validation)) for validation in [False, True]
+        ]
+
+        train_rows, validation_rows = (sum(len(y) for _, y in split) for split in splits)
+        self.assertEqual(train_rows + validation_rows, dataset.height)
+        self.assertTrue(all(X.dtype == np.float32 and X.flags["C_CONTIGUOUS"] for split in splits for X, _ in split))
+        mask = validation_mask(0, dataset.height, 0.2, 42)
+        np.testing.assert_array_equal(np.concatenate([y for _, y in splits[1]]), dataset[TARGET].cast(pl.Float32).to_numpy()[mask])
+
+    def test_trainer_trains_out_of_core_and_reports_validation_metrics(self):
+        trainer = XGBoostRegressionTrainer(train_config=train_config(TestExternalMemory.DATASET_PATH, batch_rows=3_000), logger=mock.MagicMock())
+
+        results = trainer.run()
+
+        self.assertIsNone(trainer.train_dataframe, msg="The dataset must not be loaded in memory.")
+        self.assertGreater(results["R2"], 0.9)
+        self.assertIn("evaluation_metrics", trainer.registry_meta_data)
+        features = pl.read_parquet(TestExternalMemory.DATASET_PATH, n_rows=5).select(FEATURES).to_numpy()
+        self.assertEqual(trainer.model.predict(features).shape, (5,))
+        self.assertFalse(os.path.exists(os.path.join(TEST_TMP_ROOT, "xgboost_cache", trainer.experiment_name)))
+
+    @parameterized.expand(
+        [
+            ("linear_regression", LinearRegressionTrainer, {}),
+            ("with_cross_validation", XGBoostRegressionTrainer, {"cross_validation": {"folds": 2}}),
+        ]
+    )
+    def test_unsupported_combinations_are_rejected_on_construction(self, _, trainer_class, train_changes):
+        config = copy.deepcopy(train_config(TestExternalMemory.DATASET_PATH, batch_rows=3_000))
+        config["train_config"]["train"].update(train_changes)
+
+        with self.assertRaises(ValueError):
+            trainer_class(train_config=config, logger=mock.MagicMock())
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "RLIMIT_DATA caps anonymous memory on Linux only.")
+    def test_dataset_larger_than_the_memory_cap_trains_out_of_core(self):
+        write_processed_dataset(TestExternalMemory.LARGE_DATASET_PATH, TestExternalMemory.LARGE_ROWS)
+        config = train_config(TestExternalMemory.LARGE_DATASET_PATH, batch_rows=100_000)
+        context = multiprocessing.get_context("spawn")
+
+        exit_codes = {}
+        for in_memory in [True, False]:
+            process = context.Process(target=anonymous_memory_limited_run, args=(config, TestExternalMemory.MEMORY_CAP_MB, in_memory))
+            process.start()
+            process.join()
+            exit_codes[in_memory] = process.exitcode
+
+        self.assertNotEqual(exit_codes[True], 0, msg="Loading the dataset at once must exceed the memory cap.")
+        self.assertEqual(exit_codes[False], 0, msg="External memory training must stay within the memory cap.")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import io
+import threading
+import unittest
+from typing import Final
+
+import numpy as np
+from parameterized import parameterized
+
+from app.monitoring.latency_histogram import LatencyHistogram
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    VALUES: Final = np.random.default_rng(0).lognormal(mean=8, sigma=1.5, size=50_000).astype(int)
+
+    def record_all(self, histogram: LatencyHistogram, values) -> LatencyHistogram:
+        for value in values:
+            histogram.record(int(value))
+        return histogram
+
+    @parameterized.expand([(50.0,), (95.0,), (99.0,), (99.9,), (100.0,)])
+    def test_percentiles_keep_three_significant_digits(self, percentile):
+        histogram = self.record_all(LatencyHistogram(), TestLatencyHistogram.VALUES)
+
+        expected = np.percentile(TestLatencyHistogram.VALUES, percentile, method="inverted_cdf")
+        self.assertLessEqual(abs(histogram.value_at_percentile(percentile) - expected), expected * 1e-3)
+
+    def test_merge_matches_recording_everything_in_one_histogram(self):
+        half = len(TestLatencyHistogram.VALUES) // 2
+        merged = self.record_all(LatencyHistogram(), TestLatencyHistogram.VALUES[:half])
+        merged.merge(self.record_all(LatencyHistogram(), TestLatencyHistogram.VALUES[half:]))
+
+        expected = self.record_all(LatencyHistogram(), TestLatencyHistogram.VALUES)
+        self.assertEqual(merged.counts, expected.counts)
+        self.assertEqual(merged.summary(), expected.summary())
+        with self.assertRaises(ValueError):
+            merged.merge(LatencyHistogram(significant_digits=2))
+
+    def test_concurrent_records_are_not_lost(self):
+        histogram = LatencyHistogram()
+        threads = [threading.Thread(target=self.record_all, args=(histogram, range(5_000))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(histogram.total_count, 20_000)
+        self.assertEqual(sum(histogram.counts), 20_000)
+
+    def test_summary_is_in_milliseconds_and_clamps_to_the_highest_value(self):
+        histogram = LatencyHistogram(highest_value=1_000_000)
+        self.assertEqual(histogram.summary(), {"p50": 0.0, "p95": 0.0, "p99": 0.0, "p999": 0.0, "mean": 0.0, "max": 0.0})
+
+        histogram.record_seconds(0.002)
+        histogram.record(5_000_000)
+
+        self.assertEqual(histogram.summary()["p50"], 2.0)
+        self.assertEqual(histogram.summary()["max"], 1000.0)
+
+    def test_percentile_distribution_is_written_in_hgrm_format(self):
+        histogram = self.record_all(LatencyHistogram(), TestLatencyHistogram.VALUES)
+        file = io.StringIO()
+        histogram.write_percentile_distribution(file)
+        lines = file.getvalue().splitlines()
+
+        self.assertEqual(lines[0].split(), ["Value", "Percentile", "TotalCount", "1/(1-Percentile)"])
+        rows = [line.split() for line in lines[2:-3]]
+        self.assertEqual([float(row[1]) for row in rows], sorted(float(row[1]) for row in rows))
+        self.assertEqual(rows[-1][1:3], ["1.000000000000", str(len(TestLatencyHistogram.VALUES))])
+        self.assertAlmostEqual(float(rows[-1][0]), TestLatencyHistogram.VALUES.max() / 1000)
+        self.assertRegex(lines[-3], r"^#\[Mean    = +[\d.]+, StdDeviation   = +[\d.]+\]$")
+        self.assertRegex(lines[-2], rf"^#\[Max     = +[\d.]+, Total count    = +{len(TestLatencyHistogram.VALUES)}\]$")
+        self.assertRegex(lines[-1], r"^#\[Buckets = +\d+, SubBuckets     = +2048\]$")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import itertools
+import time
+import unittest
+from typing import Final
+
+from parameterized import parameterized
+
+from tests.endpoint_tests.load_harness import check_slo
+from tests.endpoint_tests.load_harness import run_closed_loop
+from tests.endpoint_tests.load_harness import run_open_loop
+
+
+def sleeping_sender(seconds: float):
+    def send() -> bool:
+        time.sleep(seconds)
+        return True
+
+    return send
+
+
+class TestLoadHarness(unittest.TestCase):
+    SERVICE_TIME_SECONDS: Final = 0.01
+    DURATION_SECONDS: Final = 0.5
+
+    def test_closed_loop_throughput_follows_the_service_time(self):
+        result, histogram = run_closed_loop(
+            sleeping_sender(TestLoadHarness.SERVICE_TIME_SECONDS),
+            concurrency=2,
+            duration_seconds=TestLoadHarness.DURATION_SECONDS,
+            warmup_seconds=0.1,
+        )
+
+        self.assertEqual(result["mode"], "closed")
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(histogram.total_count, result["requests"])
+        self.assertLessEqual(result["throughput_rps"], 2 / TestLoadHarness.SERVICE_TIME_SECONDS)
+        self.assertGreater(result["throughput_rps"], 0.25 * 2 / TestLoadHarness.SERVICE_TIME_SECONDS)
+        self.assertGreaterEqual(result["latency_ms"]["p50"], TestLoadHarness.SERVICE_TIME_SECONDS * 1000)
+
+    def test_open_loop_keeps_the_arrival_rate(self):
+        result, _ = run_open_loop(
+            sleeping_sender(TestLoadHarness.SERVICE_TIME_SECONDS),
+            rate=40,
+            concurrency=4,
+            duration_seconds=TestLoadHarness.DURATION_SECONDS,
+            warmup_seconds=0.1,
+        )
+
+        self.assertEqual(result["mode"], "open")
+        self.assertEqual(result["requests"], 20)
+        self.assertEqual(result["error_rate"], 0.0)
+        self.assertEqual(result["target_rate_rps"], 40)
+
+    def test_open_loop_counts_queueing_into_the_latency(self):
+        # Arrivals come twice as fast as one worker serves them, so the queue and the latency grow over the run.
+        result, _ = run_open_loop(sleeping_sender(0.02), rate=100, concurrency=1, duration_seconds=0.3)
+
+        self.assertEqual(result["requests"], 30)
+        self.assertGreater(result["latency_ms"]["p50"], 5 * 20)
+        self.assertGreater(result["latency_ms"]["max"], 10 * 20)
+
+    def test_open_loop_drops_requests_that_are_still_queued_after_the_drain(self):
+        result, histogram = run_open_loop(sleeping_sender(0.05), rate=100, concurrency=1, duration_seconds=0.2, drain_seconds=0)
+
+        self.assertGreater(result["dropped"], 0)
+        self.assertEqual(result["requests"], 20)
+        self.assertEqual(histogram.total_count + result["dropped"], 20)
+        self.assertAlmostEqual(result["error_rate"], result["dropped"] / 20)
+
+    def test_failed_and_raising_requests_are_errors(self):
+        outcomes = itertools.cycle([True, False, "raise"])
+
+        def send() -> bool:
+            outcome = next(outcomes)
+            if outcome == "raise":
+                raise ConnectionError("Connection refused.")
+            return outcome
+
+        result, histogram = run_open_loop(send, rate=60, concurrency=1, duration_seconds=0.5)
+
+        self.assertEqual(result["requests"], 30)
+        self.assertEqual(result["errors"], 20)
+        self.assertEqual(histogram.total_count, 10)
+
+    @parameterized.expand(
+        [
+            ({"p50_ms": 20, "p99_ms": 100, "max_error_rate": 0.01, "min_throughput_rps": 50}, 0),
+            ({"p50_ms": 5, "p999_ms": 100}, 1),
+            ({"p99_ms": 50, "max_error_rate": 0.0, "min_throughput_rps": 200}, 3),
+        ]
+    )
+    def test_check_slo(self, slo, violations):
+        result = {"latency_ms": {"p50": 10.0, "p95": 40.0, "p99": 80.0, "p999": 90.0}, "error_rate": 0.005, "throughput_rps": 100.0}
+
+        self.assertEqual(len(check_slo(result, slo)), violations)
+
+    def test_unknown_slo_is_rejected(self):
+        with self.assertRaises(ValueError):
+            check_slo({"latency_ms": {}, "error_rate": 0.0, "throughput_rps": 0.0}, {"p90_ms": 10})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import gc
+import json
 import logging
 import os
 import shutil
@@ -8,15 +10,19 @@ from typing import Final
 from unittest.mock import MagicMock
 from unittest.mock import patch
 
+import logger.logger as logger_module
 from logger.logger import ColorLogger
+from logger.logger import SamplingFilter
 
 
 class TestColorLogger(unittest.TestCase):
     TEST_TMP_ROOT: Final = "tmp"
     TEST_LOGGER_PATH: Final = os.path.join(TEST_TMP_ROOT, "test_logs", "test.log")
+    TEST_ASYNC_LOGGER_PATH: Final = os.path.join(TEST_TMP_ROOT, "test_logs", "test_async.log")
+    TEST_JSON_LOGGER_PATH: Final = os.path.join(TEST_TMP_ROOT, "test_logs", "test_json.log")
 
     @patch("os.makedirs")
-    @patch("logging.FileHandler")
+    @patch("logging.handlers.RotatingFileHandler")
     @patch("logging.StreamHandler")
     def setUp(self, mock_stream_handler, mock_file_handler, mock_makedirs):
         self.mock_stream_handler = MagicMock()
@@ -101,6 +107,176 @@ class TestColorLogger(unittest.TestCase):
             self.logger.endpoint("Endpoint message")
             mock_log.assert_called_once_with(ColorLogger.ENDPOINT, "Endpoint message")
 
+    def test_log_lazy_formatting_args(self):
+        with patch.object(self.logger.logger, "log") as mock_log:
+            self.logger.endpoint("Elapsed time: %.3f ms", 1.5)
+            mock_log.assert_called_once_with(ColorLogger.ENDPOINT, "Elapsed time: %.3f ms", 1.5)
+
+    def test_log_structured_fields(self):
+        with patch.object(self.logger.logger, "log") as mock_log:
+            self.logger.endpoint("Fetch successful.", model_name="MyModel", status=200)
+            mock_log.assert_called_once_with(ColorLogger.ENDPOINT, "Fetch successful.", extra={"fields": {"model_name": "MyModel", "status": 200}})
+
+    def test_standard_logging_arguments_are_not_fields(self):
+        with patch.object(self.logger.logger, "error") as mock_error:
+            self.logger.error("Upload failed.", exc_info=True, stack_info=True, stacklevel=2, route="/upload_model")
+            mock_error.assert_called_once_with(
+                "Upload failed.", exc_info=True, stack_info=True, stacklevel=2, extra={"fields": {"route": "/upload_model"}}
+            )
+
+    def test_json_format_keeps_the_traceback(self):
+        json_logger = ColorLogger(log_file=TestColorLogger.TEST_JSON_LOGGER_PATH, log_format="json")
+        self.addCleanup(self.__remove_handlers, json_logger)
+
+        try:
+            raise ValueError("Broken model file.")
+        except ValueError:
+            json_logger.error("Upload failed.", exc_info=True, route="/upload_model")
+        json_logger.file_handler.flush()
+
+        with open(json_logger.logger_name) as log_file:
+            document = json.loads(log_file.readlines()[-1])
+        self.assertIn("ValueError: Broken model file.", document["exception"])
+        self.assertEqual(document["route"], "/upload_model")
+        self.assertNotIn("exc_info", document)
+
+    def test_json_format_keeps_field_types(self):
+        json_logger = ColorLogger(log_file=TestColorLogger.TEST_JSON_LOGGER_PATH, log_format="json")
+        self.addCleanup(self.__remove_handlers, json_logger)
+
+        json_logger.endpoint("Fetch %s.", "successful", route="/fetch_model", status=200, valid=True)
+        json_logger.file_handler.flush()
+
+        with open(json_logger.logger_name) as log_file:
+            document = json.loads(log_file.readlines()[-1])
+        self.assertEqual(document["level"], "ENDPOINT")
+        self.assertEqual(document["message"], "Fetch successful.")
+        self.assertEqual(document["route"], "/fetch_model")
+        self.assertEqual(document["status"], 200)
+        self.assertIs(document["valid"], True)
+
+    def test_sampling_filter(self):
+        sampling_filter = SamplingFilter({"ENDPOINT": 0.0, "ENDPOINT_ERROR": 1.0})
+        success_record = logging.LogRecord("test", ColorLogger.ENDPOINT, __file__, 0, "ok", None, None)
+        error_record = logging.LogRecord("test", ColorLogger.ENDPOINT, __file__, 0, "failed", None, None)
+        error_record.fields = {"category": "ENDPOINT_ERROR"}
+        unconfigured_record = logging.LogRecord("test", logging.ERROR, __file__, 0, "error", None, None)
+
+        self.assertFalse(sampling_filter.filter(success_record), msg="ENDPOINT records are sampled at 0%.")
+        self.assertTrue(sampling_filter.filter(error_record), msg="Category field must override the level name.")
+        self.assertTrue(sampling_filter.filter(unconfigured_record), msg="Categories without a rate are never sampled.")
+
+    @patch("os.makedirs")
+    @patch("logging.handlers.RotatingFileHandler")
+    @patch("logging.StreamHandler")
+    def test_sampling_filter_is_replaced_not_stacked(self, *_):
+        # Both instances share the cached logging.Logger of the file name.
+        ColorLogger(log_file=TestColorLogger.TEST_LOGGER_PATH, sampling_rates={"ENDPOINT": 0.5})
+        color_logger = ColorLogger(log_file=TestColorLogger.TEST_LOGGER_PATH, sampling_rates={"ENDPOINT": 0.1})
+
+        sampling_filters = [log_filter for log_filter in color_logger.logger.filters if isinstance(log_filter, SamplingFilter)]
+        self.assertEqual(len(sampling_filters), 1)
+        self.assertEqual(sampling_filters[0].sampling_rates, {"ENDPOINT": 0.1})
+
+        ColorLogger(log_file=TestColorLogger.TEST_LOGGER_PATH)
+        self.assertEqual(color_logger.logger.filters, [], msg="A logger without sampling rates keeps every record.")
+
+    def test_invalid_sampling_rate(self):
+        with self.assertRaises(ValueError):
+            SamplingFilter({"ENDPOINT": 1.5})
+
+    def test_invalid_log_format(self):
+        with self.assertRaises(ValueError):
+            ColorLogger(log_file=TestColorLogger.TEST_JSON_LOGGER_PATH, log_format="xml")
+
+    @patch("os.path.isdir", return_value=True)
+    @patch("os.makedirs")
+    @patch("logging.handlers.RotatingFileHandler")
+    def test_file_is_rotated_by_size(self, mock_rotating_file_handler, *_):
+        ColorLogger(log_file=TestColorLogger.TEST_LOGGER_PATH, max_bytes=1024, backup_count=3)
+        mock_rotating_file_handler.assert_called_once_with(TestColorLogger.TEST_LOGGER_PATH, maxBytes=1024, backupCount=3)
+
+    def test_invalid_queue_full_policy(self):
+        with self.assertRaises(ValueError):
+            ColorLogger(log_file=TestColorLogger.TEST_ASYNC_LOGGER_PATH, queue_full_policy="retry")
+
+    def test_async_logger_writes_through_listener(self):
+        async_logger = ColorLogger(log_file=TestColorLogger.TEST_ASYNC_LOGGER_PATH, debug_mode=True, async_mode=True)
+        self.addCleanup(self.__remove_handlers, async_logger)
+
+        self.assertEqual(async_logger.logger.handlers, [async_logger.queue_handler], msg="Only the queue handler may run on the caller thread.")
+        async_logger.info("Async message %d", 42)
+        async_logger.stop()
+
+        with open(async_logger.logger_name) as log_file:
+            self.assertIn("Async message 42", log_file.read())
+        self.assertEqual(async_logger.queue_depth, 0)
+
+    def test_async_logger_drops_when_queue_is_full(self):
+        async_logger = ColorLogger(log_file=TestColorLogger.TEST_ASYNC_LOGGER_PATH, async_mode=True, queue_size=1, queue_full_policy="drop")
+        self.addCleanup(self.__remove_handlers, async_logger)
+        async_logger.listener.stop()  # Nothing drains the queue anymore.
+
+        for index in range(3):
+            async_logger.info("Message %d", index)
+
+        self.assertEqual(async_logger.queue_depth, 1)
+        self.assertEqual(async_logger.dropped_records, 2)
+        async_logger.log_queue.get_nowait()
+        async_logger.listener.start()  # The cleanup stops the logger again.
+
+    def test_stopped_async_logger_writes_synchronously(self):
+        async_logger = ColorLogger(log_file=TestColorLogger.TEST_ASYNC_LOGGER_PATH, async_mode=True)
+        self.addCleanup(self.__remove_handlers, async_logger)
+
+        self.assertTrue(async_logger.listener_running)
+        async_logger.stop()
+        async_logger.stop()
+        async_logger.info("Message after stop")
+
+        self.assertFalse(async_logger.listener_running)
+        self.assertEqual(async_logger.logger.handlers, [async_logger.stream_handler, async_logger.file_handler])
+        with open(async_logger.logger_name) as log_file:
+            self.assertIn("Message after stop", log_file.read())
+
+    def test_only_running_async_loggers_restart_after_fork(self):
+        running_logger = ColorLogger(log_file=TestColorLogger.TEST_ASYNC_LOGGER_PATH, async_mode=True)
+        stopped_logger = ColorLogger(log_file=TestColorLogger.TEST_JSON_LOGGER_PATH, async_mode=True)
+        self.addCleanup(self.__remove_handlers, running_logger)
+        self.addCleanup(self.__remove_handlers, stopped_logger)
+        stopped_logger.stop()
+        running_queue, stopped_queue = running_logger.log_queue, stopped_logger.log_queue
+
+        logger_module._restart_async_loggers_after_fork()
+
+        self.assertIsNot(running_logger.log_queue, running_queue)
+        self.assertIs(running_logger.queue_handler.queue, running_logger.log_queue)
+        self.assertTrue(running_logger.listener_running)
+        self.assertIs(stopped_logger.log_queue, stopped_queue)
+        self.assertFalse(stopped_logger.listener_running)
+
+    def test_collected_async_logger_is_flushed_and_forgotten(self):
+        async_logger = ColorLogger(log_file=TestColorLogger.TEST_ASYNC_LOGGER_PATH, async_mode=True)
+        logger, listener, file_handler = async_logger.logger, async_logger.listener, async_logger.file_handler
+        self.addCleanup(file_handler.close)
+        self.addCleanup(lambda: [logger.removeHandler(handler) for handler in list(logger.handlers)])
+        async_logger.info("Message before collection")
+
+        del async_logger
+        gc.collect()
+
+        self.assertIsNone(listener._thread, msg="The listener must be stopped when its logger is collected.")
+        self.assertNotIn(logger, [color_logger.logger for color_logger in logger_module._ASYNC_LOGGERS])
+        with open(file_handler.baseFilename) as log_file:
+            self.assertIn("Message before collection", log_file.read())
+
+    @staticmethod
+    def __remove_handlers(color_logger):
+        color_logger.stop()
+        for handler in list(color_logger.logger.handlers):
+            color_logger.logger.removeHandler(handler)
+        color_logger.file_handler.close()
+
     @patch("os.path.isdir", return_value=True)
     def test_logger_creates_directory(self, mock_isdir):
         mock_isdir.return_value = False
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+import shutil
+import unittest
+from typing import Final
+
+from monitoring.metrics import render_metrics
+from monitoring.metrics import SQLITE_QUERY_LATENCY
+from monitoring.metrics import sql_operation
+from parameterized import parameterized
+
+from app.logger.logger import ColorLogger as Logger
+from app.model_registry.sqllite_db import SQLiteDB
+
+
+class TestMetrics(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_metrics"
+    TEST_LOGGER_PATH: Final = os.path.join(TEST_TMP_ROOT, "test_logs", "test_metrics.log")
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.exists(cls.TEST_TMP_ROOT):
+            shutil.rmtree(cls.TEST_TMP_ROOT)
+
+    @parameterized.expand(
+        [
+            ("select", "SELECT * FROM model_metadata WHERE name = ?;", "SELECT"),
+            ("lower_case_insert", "insert into labels (label) values (?);", "INSERT"),
+            ("leading_whitespace", "\n    UPDATE model_metadata SET status = ?", "UPDATE"),
+            ("pragma", "PRAGMA table_info(model_metadata);", "PRAGMA"),
+            ("unknown_statement", "VACUUM;", "OTHER"),
+            ("empty_statement", "", "OTHER"),
+        ]
+    )
+    def test_sql_operation(self, _, sql, expected_operation):
+        self.assertEqual(sql_operation(sql), expected_operation)
+
+    def test_sqlite_queries_are_timed(self):
+        logger = Logger(log_file=TestMetrics.TEST_LOGGER_PATH, debug_mode=True)
+        sample_count_before = self.__sample_count(operation="SELECT")
+
+        with SQLiteDB(":memory:", logger=logger) as conn:
+            conn.cursor().execute("SELECT 1")
+            conn.execute("SELECT 2")
+
+        self.assertEqual(self.__sample_count(operation="SELECT"), sample_count_before + 2)
+
+    def test_render_metrics_exposes_all_metric_families(self):
+        payload = render_metrics().decode()
+        for metric_name in [
+            "http_request_duration_seconds",
+            "inference_engine_stage_duration_seconds",
+            "sqlite_query_duration_seconds",
+            "storage_transfer_bytes",
+            "storage_transfer_duration_seconds",
+            "cache_requests",
+            "queue_depth",
+            "in_flight_tasks",
+        ]:
+            self.assertIn(f"# TYPE {metric_name}", payload, msg=f"{metric_name} must be exposed.")
+
+    @staticmethod
+    def __sample_count(operation: str) -> float:
+        for metric in SQLITE_QUERY_LATENCY.collect():
+            for sample in metric.samples:
+                if sample.name.endswith("_count") and sample.labels.get("operation") == operation:
+                    return sample.value
+        return 0.0
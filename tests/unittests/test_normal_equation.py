@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+from functools import partial
+from typing import Final
+from unittest import mock
+
+import joblib
+import numpy as np
+import polars as pl
+from parameterized import parameterized
+from sklearn.linear_model import LinearRegression
+
+from app.trainer.external_memory import validation_mask
+from app.trainer.normal_equation import accumulate_statistics
+from app.trainer.normal_equation import iter_array_batches
+from app.trainer.normal_equation import NormalEquationStatistics
+from app.trainer.normal_equation import statistics_workers
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import NormalEquationRegressionTrainer
+from app.trainer.trainer import Trainer
+from tests.unittests.test_external_memory import FEATURES
+from tests.unittests.test_external_memory import TARGET
+from tests.unittests.test_external_memory import train_config
+from tests.unittests.test_external_memory import write_processed_dataset
+
+# Loads a model like the inference service, whose container has no app.trainer package.
+UNPICKLE_WITHOUT_TRAINER: Final = (
+    "import sys; sys.modules['app.trainer'] = None; import joblib; print(joblib.load(sys.argv[1]).predict([[0.0] * 7])[0])"
+)
+
+
+def unpickle_without_trainer(model_path: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", UNPICKLE_WITHOUT_TRAINER, model_path], capture_output=True, text=True)
+
+
+class TestNormalEquationStatistics(unittest.TestCase):
+    ROWS: Final = 5_000
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Large offsets make raw cross products lose the variance.
+        self.X = rng.normal(size=(TestNormalEquationStatistics.ROWS, 4)) * [1, 10, 1e3, 1e4] + [0, 5, 1e5, 1e6]
+        self.y = self.X @ [2.0, -1.0, 0.01, 0.001] + 7 + rng.normal(size=TestNormalEquationStatistics.ROWS)
+
+    @parameterized.expand([("intercept", True), ("origin", False)])
+    def test_matches_linear_regression(self, _, fit_intercept):
+        expected = LinearRegression(fit_intercept=fit_intercept).fit(self.X, self.y)
+
+        model = NormalEquationStatistics(4).update(self.X, self.y).to_linear_regression({"fit_intercept": fit_intercept})
+
+        np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-7)
+        self.assertAlmostEqual(model.intercept_, expected.intercept_, delta=1e-6 * max(1.0, abs(expected.intercept_)))
+        np.testing.assert_allclose(model.predict(self.X[:10]), expected.predict(self.X[:10]), rtol=1e-9)
+
+    def test_dict_round_trip(self):
+        statistics = NormalEquationStatistics(4).update(self.X, self.y)
+
+        state = statistics.to_dict()
+        restored = NormalEquationStatistics.from_dict(state)
+
+        self.assertTrue(all(isinstance(value, (int, float, np.ndarray)) for value in state.values()))
+        self.assertEqual(restored.rows, statistics.rows)
+        np.testing.assert_array_equal(restored.feature_scatter, statistics.feature_scatter)
+        np.testing.assert_array_equal(restored.solve()[0], statistics.solve()[0])
+        restored.merge(statistics)
+        self.assertEqual(state["rows"], statistics.rows, msg="Merging into restored statistics must not touch the stored ones.")
+
+    def test_merged_batches_match_one_pass(self):
+        one_pass = NormalEquationStatistics(4).update(self.X, self.y)
+        batches = [NormalEquationStatistics(4).update(self.X[rows], self.y[rows]) for rows in np.array_split(np.arange(len(self.y)), 7)]
+
+        merged = batches[0]
+        for batch in batches[1:] + [NormalEquationStatistics(4)]:
+            merged.merge(batch)
+
+        self.assertEqual(merged.rows, one_pass.rows)
+        np.testing.assert_allclose(merged.feature_scatter, one_pass.feature_scatter, rtol=1e-9)
+        np.testing.assert_allclose(merged.solve()[0], one_pass.solve()[0], rtol=1e-9)
+
+    @parameterized.expand(
+        [
+            ("empty", lambda: NormalEquationStatistics(2).solve()),
+            ("feature_mismatch", lambda: NormalEquationStatistics(2).update(np.ones((3, 3)), np.ones(3))),
+            ("merge_mismatch", lambda: NormalEquationStatistics(2).merge(NormalEquationStatistics(3))),
+            ("positive", lambda: NormalEquationStatistics(1).update([[1.0], [2.0]], [1.0, 2.0]).to_linear_regression({"positive": True})),
+        ]
+    )
+    def test_invalid_use(self, _, call):
+        with self.assertRaises(ValueError):
+            call()
+
+    @parameterized.expand([("one_worker", 1), ("three_workers", 3), ("more_workers_than_rows", 10)])
+    def test_accumulation_over_workers_matches_one_pass(self, _, workers):
+        rows = 7 if workers == 10 else TestNormalEquationStatistics.ROWS
+        X, y = self.X[:rows], self.y[:rows]
+
+        statistics = accumulate_statistics(partial(iter_array_batches, X, y, 333), rows, n_features=4, workers=workers)
+
+        expected = NormalEquationStatistics(4).update(X, y)
+        self.assertEqual(statistics.rows, rows)
+        np.testing.assert_allclose(statistics.feature_scatter, expected.feature_scatter, rtol=1e-9)
+        np.testing.assert_allclose(statistics.solve()[0], expected.solve()[0], rtol=1e-8)
+
+    @parameterized.expand([("default", None, 1), ("explicit", 3, 3), ("all_cpus", -1, os.cpu_count())])
+    def test_statistics_workers(self, _, n_jobs, expected):
+        self.assertEqual(statistics_workers(n_jobs), expected)
+
+
+class TestNormalEquationRegressionTrainer(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_normal_equation"
+    DATASET_PATH: Final = os.path.join(TEST_TMP_ROOT, "processed_train.parquet")
+    ROWS: Final = 20_000
+
+    @classmethod
+    def setUpClass(cls):
+        os.makedirs(cls.TEST_TMP_ROOT, exist_ok=True)
+        write_processed_dataset(cls.DATASET_PATH, cls.ROWS)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.TEST_TMP_ROOT, ignore_errors=True)
+
+    def test_in_memory_model_matches_linear_regression_trainer(self):
+        config = copy.deepcopy(train_config(TestNormalEquationRegressionTrainer.DATASET_PATH, batch_rows=1_500))
+        config["train_config"]["train"]["hyperparameters"] = {"fit_intercept": True, "n_jobs": 2}
+        del config["train_config"]["train"]["external_memory"]
+        with mock.patch.object(Trainer, "load_datasets", return_value=(pl.read_parquet(TestNormalEquationRegressionTrainer.DATASET_PATH), None)):
+            trainers = [
+                trainer_class(train_config=copy.deepcopy(config), logger=mock.MagicMock())
+                for trainer_class in [LinearRegressionTrainer, NormalEquationRegressionTrainer]
+            ]
+
+        results = [trainer.run() for trainer in trainers]
+
+        self.assertIs(type(trainers[1].model), LinearRegression)
+        np.testing.assert_allclose(trainers[1].model.coef_, trainers[0].model.coef_, rtol=1e-6)
+        for metric, value in results[0].items():
+            self.assertAlmostEqual(results[1][metric], value, places=6)
+
+    @parameterized.expand([("one_worker", 1), ("parallel_workers", 3)])
+    def test_out_of_core_model_matches_a_fit_on_the_training_split(self, _, n_jobs):
+        config = copy.deepcopy(train_config(TestNormalEquationRegressionTrainer.DATASET_PATH, batch_rows=1_500))
+        config["train_config"]["train"]["hyperparameters"] = {"n_jobs": n_jobs}
+        trainer = NormalEquationRegressionTrainer(train_config=config, logger=mock.MagicMock())
+
+        results = trainer.run()
+
+        self.assertIsNone(trainer.train_dataframe, msg="The dataset must not be loaded in memory.")
+        dataset = pl.read_parquet(TestNormalEquationRegressionTrainer.DATASET_PATH)
+        train_rows = ~validation_mask(0, dataset.height, trainer.train_validation_split_ratio, trainer.random_state)
+        expected = LinearRegression().fit(dataset.select(FEATURES).to_numpy()[train_rows], dataset[TARGET].to_numpy()[train_rows])
+        np.testing.assert_allclose(trainer.model.coef_, expected.coef_, rtol=1e-6)
+        self.assertAlmostEqual(trainer.model.intercept_, expected.intercept_, places=4)
+        self.assertEqual(trainer.model.sufficient_statistics_["rows"], train_rows.sum())
+        self.assertEqual(json.loads(trainer.registry_meta_data["lineage"])["rows"], train_rows.sum())
+        self.assertGreater(results["R2"], 0.9)
+
+    def test_model_unpickles_without_the_trainer_package(self):
+        config = copy.deepcopy(train_config(TestNormalEquationRegressionTrainer.DATASET_PATH, batch_rows=5_000))
+        config["train_config"]["train"]["hyperparameters"] = {}
+        trainer = NormalEquationRegressionTrainer(train_config=config, logger=mock.MagicMock())
+        trainer.run()
+        model_path = os.path.join(TestNormalEquationRegressionTrainer.TEST_TMP_ROOT, "model.joblib")
+        joblib.dump(trainer.model, model_path)
+
+        loaded = unpickle_without_trainer(model_path)
+
+        self.assertEqual(loaded.returncode, 0, msg=loaded.stderr)
+        self.assertAlmostEqual(float(loaded.stdout), trainer.model.predict(np.zeros((1, 7)))[0])
+        # The check itself: an object of the trainer package can not be loaded there.
+        joblib.dump(NormalEquationStatistics(7), model_path)
+        self.assertIn("ModuleNotFoundError", unpickle_without_trainer(model_path).stderr)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import unittest
+from typing import Final
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from parameterized import parameterized
+
+from data_analysis.data_analyzer import DataframeAnalyzer
+from data_analysis.polars_data_analyzer import PolarsDataframeAnalyzer
+
+
+class TestPolarsDataframeAnalyzer(unittest.TestCase):
+    RAW_DATASET_CSV: Final = "data/customer_purchases.csv"
+    ROWS: Final = 2000
+    CONSTANT_COLUMNS: Final = ["gender", "annual_income"]
+    OUTLIER_COLUMNS: Final = ["annual_income", "purchase_amount", "Recency", "Frequency", "Monetary"]
+
+    def analyzers(self):
+        """Both engines on the first rows of the raw dataset with some missing, negative and inconsistent values added."""
+        dataframe = pd.read_csv(TestPolarsDataframeAnalyzer.RAW_DATASET_CSV, nrows=TestPolarsDataframeAnalyzer.ROWS)
+        dataframe.loc[[3, 50], "age"] = np.nan
+        dataframe.loc[7, "purchase_amount"] = -10.0
+        dataframe.loc[20, "annual_income"] = 1.0
+        dataframe.loc[40, "gender"] = "Male" if dataframe.loc[40, "gender"] == "Female" else "Female"
+        dataframe.loc[62, "age"] = 1.0
+        dataframe = pd.concat([dataframe, dataframe.iloc[[100, 200]]], ignore_index=True)
+
+        return DataframeAnalyzer(dataframe.copy()), PolarsDataframeAnalyzer(pl.from_pandas(dataframe))
+
+    @staticmethod
+    def quietly(function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+    def assertFramesEqual(self, pandas_frame: pd.DataFrame, polars_frame: pl.DataFrame):
+        pandas_frame, polars_frame = pandas_frame.reset_index(drop=True), polars_frame.to_pandas()
+        self.assertEqual(list(pandas_frame.columns), list(polars_frame.columns))
+        for column in pandas_frame.columns:
+            if pd.api.types.is_numeric_dtype(pandas_frame[column]) and pd.api.types.is_numeric_dtype(polars_frame[column]):
+                np.testing.assert_allclose(pandas_frame[column].astype(float), polars_frame[column].astype(float), err_msg=column)
+            else:
+                self.assertEqual(pandas_frame[column].astype(str).tolist(), polars_frame[column].astype(str).tolist(), column)
+
+    def test_statistics_match(self):
+        pandas_analyzer, polars_analyzer = self.analyzers()
+
+        for statistic in ["get_unique_customer_count", "get_unvalid_data_rows", "get_duplicate_row_count"]:
+            expected = self.quietly(getattr, pandas_analyzer.Statics, statistic)
+            self.assertEqual(self.quietly(getattr, polars_analyzer.Statics, statistic), expected, statistic)
+
+        expected = self.quietly(getattr, pandas_analyzer.Statics, "get_unvalid_data_columns")
+        result = self.quietly(getattr, polars_analyzer.Statics, "get_unvalid_data_columns")
+        for kind in ["NaN", "Inf", "Negative"]:
+            self.assertEqual(expected[kind].to_dict(), result[kind].row(0, named=True), kind)
+
+    @parameterized.expand([("pearson",), ("spearman",), ("kendall",)])
+    def test_numerical_correlation_matches(self, method):
+        pandas_analyzer, polars_analyzer = self.analyzers()
+
+        expected = pandas_analyzer.Correlation.numerical_correlation_matrix(method=method)
+        result = polars_analyzer.Correlation.numerical_correlation_matrix(method=method)
+
+        self.assertEqual(result["feature"].to_list(), list(expected.index))
+        np.testing.assert_allclose(result.drop("feature").to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+    def test_categorical_correlations_match(self):
+        pandas_analyzer, polars_analyzer = self.analyzers()
+        categorical_columns = ["gender", "age"]
+
+        expected = pandas_analyzer.Correlation.categorical_correlation_matrix(categorical_columns=categorical_columns).astype(float)
+        result = polars_analyzer.Correlation.categorical_correlation_matrix(categorical_columns=categorical_columns)
+        np.testing.assert_allclose(result.drop("feature").to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+        expected = pandas_analyzer.Correlation.categorical_numerical_correlation_matrix()
+        result = polars_analyzer.Correlation.categorical_numerical_correlation_matrix()
+        np.testing.assert_allclose(result.drop("feature").to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+    def test_consistency_checks_match(self):
+        pandas_analyzer, polars_analyzer = self.analyzers()
+
+        expected = self.quietly(pandas_analyzer.ConsistincyChecker.check_constant_column_consistency, TestPolarsDataframeAnalyzer.CONSTANT_COLUMNS)
+        result = self.quietly(polars_analyzer.ConsistincyChecker.check_constant_column_consistency, TestPolarsDataframeAnalyzer.CONSTANT_COLUMNS)
+        self.assertEqual(set(result), set(TestPolarsDataframeAnalyzer.CONSTANT_COLUMNS))
+        self.assertEqual({column: {key: list(values) for key, values in details.items()} for column, details in expected.items()}, result)
+
+        expected = self.quietly(pandas_analyzer.ConsistincyChecker.check_age_consistency)
+        result = self.quietly(polars_analyzer.ConsistincyChecker.check_age_consistency)
+        self.assertGreater(len(result), 0)
+        self.assertEqual(expected.keys(), result.keys())
+        for customer_id, values in expected.items():
+            self.assertEqual([age for _, age in values], [age for _, age in result[customer_id]], customer_id)
+
+    def test_feature_engineering_matches(self):
+        pandas_analyzer, polars_analyzer = self.analyzers()
+
+        for analyzer in [pandas_analyzer, polars_analyzer]:
+            self.quietly(analyzer.FeatureEngineer.squash_rows_by_customer_month_year)
+            self.quietly(analyzer.FeatureEngineer.compute_next_month_purchase_amount)
+            self.quietly(analyzer.FeatureEngineer.one_hot_encode_categorical_data)
+            self.quietly(analyzer.FeatureEngineer.drop_invalid_rows)
+            self.quietly(analyzer.FeatureEngineer.calculate_rfm)
+        self.assertFramesEqual(pandas_analyzer.dataframe, polars_analyzer.dataframe)
+
+        for column in TestPolarsDataframeAnalyzer.OUTLIER_COLUMNS:
+            index = pandas_analyzer.dataframe.index
+            expected_rows, expected_customer_ids = self.quietly(pandas_analyzer.FeatureEngineer.find_outliers_iqr, column=column, drop=True)
+            rows, customer_ids = self.quietly(polars_analyzer.FeatureEngineer.find_outliers_iqr, column=column, drop=True)
+            # Pandas reports index labels, polars row positions.
+            self.assertEqual(rows, index.get_indexer(expected_rows).tolist(), column)
+            np.testing.assert_array_equal(customer_ids, expected_customer_ids)
+        self.assertFramesEqual(pandas_analyzer.dataframe, polars_analyzer.dataframe)
+
+        index = pandas_analyzer.dataframe.index
+        expected_rows, _ = self.quietly(pandas_analyzer.FeatureEngineer.find_outliers_z_score, column="purchase_amount", threshold=2)
+        rows, _ = self.quietly(polars_analyzer.FeatureEngineer.find_outliers_z_score, column="purchase_amount", threshold=2)
+        self.assertGreater(len(rows), 0)
+        self.assertEqual(rows, index.get_indexer(expected_rows).tolist())
+        self.assertFramesEqual(pandas_analyzer.dataframe, polars_analyzer.dataframe)
+
+    def test_sketched_iqr_outliers_match(self):
+        pandas_analyzer, polars_analyzer = self.analyzers()
+
+        index = pandas_analyzer.dataframe.index
+        expected_rows, _ = self.quietly(pandas_analyzer.FeatureEngineer.find_outliers_iqr, column="annual_income", quantile_error=0.05)
+        rows, _ = self.quietly(polars_analyzer.FeatureEngineer.find_outliers_iqr, column="annual_income", quantile_error=0.05)
+        self.assertGreater(len(rows), 0)
+        self.assertEqual(rows, index.get_indexer(expected_rows).tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
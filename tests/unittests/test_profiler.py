@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+import unittest
+from typing import Final
+from unittest import mock
+
+from parameterized import parameterized
+
+from app.monitoring.profiler import admin_routes_enabled
+from app.monitoring.profiler import profiler_from_env
+from app.monitoring.profiler import SamplingProfiler
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_profiler"
+    BUSY_THREAD_NAME: Final = "busy-worker"
+
+    def setUp(self):
+        self.stop = threading.Event()
+        self.busy_thread = threading.Thread(target=busy_loop, args=(self.stop,), name=TestProfiler.BUSY_THREAD_NAME, daemon=True)
+        self.busy_thread.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.busy_thread.join()
+        shutil.rmtree(TestProfiler.TEST_TMP_ROOT, ignore_errors=True)
+
+    def sampled_profiler(self, samples: int = 20) -> SamplingProfiler:
+        profiler = SamplingProfiler(dump_directory=TestProfiler.TEST_TMP_ROOT)
+        for _ in range(samples):
+            profiler.sample()
+        return profiler
+
+    def test_collapsed_stacks_start_with_the_thread_name(self):
+        profiler = self.sampled_profiler()
+
+        busy_stacks = {}
+        for line in profiler.collapsed().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            stack.startswith(TestProfiler.BUSY_THREAD_NAME + ";") and busy_stacks.update({stack: int(count)})
+        self.assertEqual(sum(busy_stacks.values()), 20)
+        self.assertTrue(all("busy_loop (test_profiler.py:" in stack for stack in busy_stacks))
+        self.assertFalse(any(line.startswith("MainThread;") for line in profiler.collapsed().splitlines()), msg="The sampling thread is skipped.")
+
+    def test_speedscope_profile_references_its_frames(self):
+        profiler = self.sampled_profiler()
+
+        speedscope = profiler.speedscope(name="test")
+        profile = speedscope["profiles"][0]
+        frame_count = len(speedscope["shared"]["frames"])
+        self.assertEqual(profile["type"], "sampled")
+        self.assertEqual(len(profile["samples"]), len(profile["weights"]))
+        self.assertTrue(all(0 <= frame < frame_count for sample in profile["samples"] for frame in sample))
+        self.assertAlmostEqual(profile["endValue"], sum(profiler.stack_counts.values()) / profiler.frequency_hz)
+
+    def test_background_sampling_can_be_started_and_stopped(self):
+        profiler = SamplingProfiler(frequency_hz=200)
+
+        self.assertTrue(profiler.start())
+        self.assertFalse(profiler.start())
+        time.sleep(0.2)
+        self.assertTrue(profiler.stop())
+        self.assertFalse(profiler.stop())
+
+        samples = profiler.samples
+        self.assertGreater(samples, 10)
+        self.assertFalse(profiler.status()["running"])
+        time.sleep(0.05)
+        self.assertEqual(profiler.samples, samples)
+        profiler.reset()
+        self.assertEqual(profiler.status()["samples"], 0)
+        self.assertEqual(profiler.collapsed(), "")
+
+    @parameterized.expand([("collapsed", ".txt"), ("speedscope", ".speedscope.json")])
+    def test_dump_writes_the_profile_file(self, profile_format, extension):
+        profiler = self.sampled_profiler()
+
+        path = profiler.dump(profile_format, name="inference")
+
+        self.assertEqual(os.path.dirname(path), os.path.abspath(TestProfiler.TEST_TMP_ROOT))
+        self.assertTrue(os.path.basename(path).startswith(f"inference_{os.getpid()}_"))
+        self.assertTrue(path.endswith(extension))
+        with open(path) as file:
+            content = file.read()
+        self.assertEqual(content, profiler.collapsed() if profile_format == "collapsed" else json.dumps(profiler.speedscope("inference")))
+
+    def test_invalid_format_and_frequency_are_rejected(self):
+        profiler = SamplingProfiler()
+
+        with self.assertRaises(ValueError):
+            profiler.export("pprof")
+        with self.assertRaises(ValueError):
+            profiler.start(frequency_hz=0)
+        with self.assertRaises(ValueError):
+            SamplingProfiler(frequency_hz=-1)
+
+    def test_profiler_from_env(self):
+        with mock.patch.dict(os.environ, {"PROFILER_ENABLED": "1", "PROFILER_FREQUENCY_HZ": "250", "PROFILER_DUMP_DIR": TestProfiler.TEST_TMP_ROOT}):
+            profiler = profiler_from_env()
+        self.addCleanup(profiler.stop)
+
+        self.assertTrue(profiler.running)
+        self.assertEqual(profiler.frequency_hz, 250)
+        self.assertEqual(profiler.dump_directory, TestProfiler.TEST_TMP_ROOT)
+        with mock.patch.dict(os.environ, {"PROFILER_ENABLED": "0"}):
+            self.assertFalse(profiler_from_env().running)
+
+    @parameterized.expand(
+        [("enabled", {"PROFILER_ADMIN_ENABLED": "1"}, True), ("other_value", {"PROFILER_ADMIN_ENABLED": "true"}, False), ("unset", {}, False)]
+    )
+    def test_admin_routes_are_opt_in(self, _, environ, enabled):
+        with mock.patch.dict(os.environ, environ, clear=True):
+            self.assertIs(admin_routes_enabled(), enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
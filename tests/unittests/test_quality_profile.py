@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import shutil
+import unittest
+from typing import Final
+
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+
+from data_analysis.data_analyzer import DataframeAnalyzer
+from data_analysis.quality_profile import profile_csv
+from data_analysis.quality_profile import QualityProfile
+
+
+class TestQualityProfile(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_quality_profile"
+    RAW_DATASET_CSV: Final = "data/customer_purchases.csv"
+    NUMERICAL_COLUMNS: Final = ["age", "annual_income", "purchase_amount"]
+    CONSTANT_COLUMNS: Final = ["gender", "annual_income"]
+
+    def tearDown(self):
+        shutil.rmtree(TestQualityProfile.TEST_TMP_ROOT, ignore_errors=True)
+
+    @staticmethod
+    def dataframe() -> pd.DataFrame:
+        dataframe = pd.read_csv(TestQualityProfile.RAW_DATASET_CSV)
+        dataframe.loc[[3, 50], "age"] = np.nan
+        dataframe.loc[7, "purchase_amount"] = -10.0
+        dataframe.loc[40, "gender"] = "Male" if dataframe.loc[40, "gender"] == "Female" else "Female"
+        dataframe.loc[62, "age"] = 1.0
+        dataframe.loc[99, "annual_income"] = np.inf
+        return pd.concat([dataframe, dataframe.iloc[[100, 200, 300]]], ignore_index=True)
+
+    @staticmethod
+    def profile(dataframe: pd.DataFrame, chunks: int = 1, **kwargs) -> QualityProfile:
+        profile = QualityProfile(TestQualityProfile.NUMERICAL_COLUMNS, constant_columns=TestQualityProfile.CONSTANT_COLUMNS, **kwargs)
+        for rows in np.array_split(np.arange(len(dataframe)), chunks):
+            profile.update(dataframe.iloc[rows])
+        return profile
+
+    @parameterized.expand([("one_chunk", 1), ("chunks", 7)])
+    def test_profile_matches_statics_and_consistency_checks(self, _, chunks):
+        dataframe = TestQualityProfile.dataframe()
+        analyzer = DataframeAnalyzer(dataframe.copy())
+
+        profile = TestQualityProfile.profile(dataframe, chunks)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            invalid_rows, invalid_columns = analyzer.Statics.get_unvalid_data_rows, analyzer.Statics.get_unvalid_data_columns
+            self.assertEqual(profile.unique_customers, analyzer.Statics.get_unique_customer_count)
+            self.assertEqual(profile.duplicate_rows, analyzer.Statics.get_duplicate_row_count)
+            constant_violations = analyzer.ConsistincyChecker.check_constant_column_consistency(TestQualityProfile.CONSTANT_COLUMNS)
+            age_violations = analyzer.ConsistincyChecker.check_age_consistency()
+        self.assertEqual(profile.rows, len(dataframe))
+        self.assertEqual([profile.rows_with_nan, profile.rows_with_inf, profile.rows_with_negative], list(invalid_rows.values()))
+        pd.testing.assert_series_equal(profile.null_counts, invalid_columns["NaN"])
+        pd.testing.assert_series_equal(profile.inf_counts, invalid_columns["Inf"])
+        pd.testing.assert_series_equal(profile.negative_counts, invalid_columns["Negative"])
+        self.assertEqual(
+            profile.constant_column_violations,
+            {column: {customer_id: list(values) for customer_id, values in details.items()} for column, details in constant_violations.items()},
+        )
+        self.assertEqual(profile.age_violations.keys(), age_violations.keys())
+        self.assertEqual([age for age, _, _ in profile.age_violations[14]], [1.0, 53.0])
+
+        numerical = dataframe[TestQualityProfile.NUMERICAL_COLUMNS]
+        pd.testing.assert_series_equal(profile.minimum, numerical.min(), check_names=False)
+        pd.testing.assert_series_equal(profile.maximum, numerical.max(), check_names=False)
+        rank = (numerical["purchase_amount"] <= profile.quantile("purchase_amount", 0.75)).mean()
+        self.assertAlmostEqual(rank, 0.75, delta=profile.sketches["purchase_amount"].error_bound)
+
+    def test_merged_partitions_equal_one_profile(self):
+        dataframe = TestQualityProfile.dataframe()
+        half = len(dataframe) // 2
+
+        merged = TestQualityProfile.profile(dataframe.iloc[:half], 3).merge(TestQualityProfile.profile(dataframe.iloc[half:], 2))
+        whole = TestQualityProfile.profile(dataframe)
+
+        for statistic in ["rows", "rows_with_nan", "rows_with_inf", "rows_with_negative", "duplicate_rows", "unique_customers"]:
+            self.assertEqual(getattr(merged, statistic), getattr(whole, statistic), statistic)
+        pd.testing.assert_series_equal(merged.null_counts, whole.null_counts)
+        self.assertEqual(merged.constant_column_violations, whole.constant_column_violations)
+        self.assertEqual(merged.age_violations, whole.age_violations)
+
+    def test_duplicates_across_chunks_read_with_other_dtypes(self):
+        dataframe = pd.DataFrame({"customer_id": [1, 2, 1], "age": [30, 40, 30], "purchase_date": ["2024-01-01T00:00:00+03:00"] * 3})
+        profile = QualityProfile(["age"], target_column=None)
+
+        profile.update(dataframe.iloc[:2])
+        profile.update(dataframe.iloc[2:].astype({"age": np.float64}))
+
+        self.assertEqual(profile.duplicate_rows, 1)
+
+    def test_quantiles_of_a_large_column_are_sketched(self):
+        values = np.random.default_rng(0).normal(size=200_000)
+        dataframe = pd.DataFrame({"customer_id": np.arange(values.size), "value": values})
+        profile = QualityProfile(["value"], age_column=None, quantile_error=0.01)
+
+        for rows in np.array_split(np.arange(values.size), 10):
+            profile.update(dataframe.iloc[rows])
+
+        ranks = np.searchsorted(np.sort(values), profile.quantile("value", [0.25, 0.5, 0.75]), side="right") / values.size
+        np.testing.assert_allclose(ranks, [0.25, 0.5, 0.75], atol=0.01)
+        self.assertEqual(profile.sketches["value"].count, values.size)
+
+    def test_profile_csv(self):
+        os.makedirs(TestQualityProfile.TEST_TMP_ROOT, exist_ok=True)
+        path = os.path.join(TestQualityProfile.TEST_TMP_ROOT, "purchases.csv")
+        dataframe = TestQualityProfile.dataframe()
+        dataframe.to_csv(path, index=False)
+
+        profile = profile_csv(path, TestQualityProfile.NUMERICAL_COLUMNS, chunk_rows=1000, constant_columns=TestQualityProfile.CONSTANT_COLUMNS)
+
+        expected = TestQualityProfile.profile(dataframe)
+        self.assertEqual(profile.duplicate_rows, expected.duplicate_rows)
+        self.assertEqual(profile.constant_column_violations, expected.constant_column_violations)
+        self.assertEqual(profile.age_violations, expected.age_violations)
+
+    def test_profiles_of_other_columns_do_not_merge(self):
+        with self.assertRaises(ValueError):
+            QualityProfile(["age"]).merge(QualityProfile(["purchase_amount"]))
+
+    def test_all_statistics_are_printed(self):
+        analyzer = DataframeAnalyzer(TestQualityProfile.dataframe())
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            analyzer.Statics.get_all_statistics
+
+        self.assertIn("Duplicate row count: 3", output.getvalue())
+        self.assertIn("Number of rows affected by Inf values: 1", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
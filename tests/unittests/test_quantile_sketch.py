@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import unittest
+from typing import Final
+
+import numpy as np
+import polars as pl
+from parameterized import parameterized
+
+from app.datasets.quantile_sketch import KLLSketch
+from app.datasets.quantile_sketch import sketch_columns
+
+
+class TestKLLSketch(unittest.TestCase):
+    ROWS: Final = 300_000
+    QUANTILES: Final = np.linspace(0.01, 0.99, 99)
+
+    @staticmethod
+    def rank_errors(values: np.ndarray, estimates: np.ndarray, quantiles: np.ndarray) -> np.ndarray:
+        return np.abs(np.searchsorted(np.sort(values), estimates, side="right") / values.size - quantiles)
+
+    def test_small_inputs_are_exact(self):
+        values = np.random.default_rng(0).normal(size=100)
+        sketch = KLLSketch(error=0.01, seed=0).update(values)
+
+        sorted_values = np.sort(values)
+        np.testing.assert_array_equal(sketch.quantile([0.0, 0.25, 0.5, 1.0]), sorted_values[[0, 24, 49, 99]])
+        self.assertEqual(sketch.rank(sorted_values[9]), 0.1)
+
+    @parameterized.expand(
+        [
+            ("normal_one_update", "normal", 1),
+            ("normal_chunks", "normal", 300),
+            ("exponential_chunks", "exponential", 300),
+            ("sorted_chunks", "sorted", 300),
+        ]
+    )
+    def test_rank_error_is_within_the_bound(self, _, distribution, chunks):
+        rng = np.random.default_rng(1)
+        values = {
+            "normal": rng.normal(size=TestKLLSketch.ROWS),
+            "exponential": rng.exponential(size=TestKLLSketch.ROWS),
+            "sorted": np.arange(TestKLLSketch.ROWS, dtype=np.float64),
+        }[distribution]
+
+        sketch = KLLSketch(error=0.01, seed=2)
+        for chunk in np.array_split(values, chunks):
+            sketch.update(chunk)
+
+        errors = TestKLLSketch.rank_errors(values, sketch.quantile(TestKLLSketch.QUANTILES), TestKLLSketch.QUANTILES)
+        self.assertLessEqual(errors.max(), sketch.error_bound)
+        self.assertLess(sum(level.size for level in sketch.levels), 3 * sketch.k + len(sketch.levels))
+        self.assertEqual([sketch.quantile(0.0), sketch.quantile(1.0)], [values.min(), values.max()])
+
+    def test_merged_partitions_are_within_the_bound(self):
+        values = np.random.default_rng(3).lognormal(size=TestKLLSketch.ROWS)
+        partitions = [KLLSketch(error=0.01, seed=seed).update(part) for seed, part in enumerate(np.array_split(values, 16))]
+
+        merged = partitions[0]
+        for partition in partitions[1:]:
+            merged.merge(partition)
+
+        self.assertEqual(merged.count, TestKLLSketch.ROWS)
+        errors = TestKLLSketch.rank_errors(values, merged.quantile(TestKLLSketch.QUANTILES), TestKLLSketch.QUANTILES)
+        self.assertLessEqual(errors.max(), merged.error_bound)
+
+    def test_smaller_errors_make_larger_sketches(self):
+        self.assertLess(KLLSketch(error=0.05).k, KLLSketch(error=0.01).k)
+        self.assertLessEqual(KLLSketch(error=0.001).error_bound, 0.001)
+
+    def test_missing_values_are_skipped(self):
+        sketch = KLLSketch(seed=0).update([np.nan, 1.0, 2.0, np.nan, 3.0])
+
+        self.assertEqual(sketch.count, 3)
+        self.assertEqual(sketch.quantile(0.5), 2.0)
+        self.assertTrue(np.isnan(KLLSketch().quantile(0.5)))
+
+    @parameterized.expand([("zero", 0.0), ("one", 1.0)])
+    def test_invalid_error(self, _, error):
+        with self.assertRaises(ValueError):
+            KLLSketch(error=error)
+
+    def test_sketches_of_other_sizes_do_not_merge(self):
+        with self.assertRaises(ValueError):
+            KLLSketch(error=0.01).merge(KLLSketch(error=0.05))
+
+    def test_sketch_columns(self):
+        frame = pl.DataFrame({"a": np.arange(1000, dtype=np.int64), "b": [None, *np.arange(999.0)]})
+
+        sketches = sketch_columns(frame.iter_slices(100), ["a", "b"], error=0.05)
+
+        self.assertEqual([sketches["a"].count, sketches["b"].count], [1000, 999])
+        self.assertAlmostEqual(sketches["a"].quantile(0.5), 500, delta=0.05 * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
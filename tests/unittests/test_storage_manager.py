@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import os
+import shutil
+import unittest
+from typing import Final
+from unittest import mock
+
+from app.model_registry.registry import ModelRegistry
+from app.model_registry.storage_manager import LocalStorageManager
+
+
+class TestLocalStorageManager(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_storage_manager"
+    STORAGE_DIR: Final = os.path.join(TEST_TMP_ROOT, "storage")
+    DOWNLOAD_DIR: Final = os.path.join(TEST_TMP_ROOT, "downloads")
+    MODEL_FILE: Final = os.path.join(TEST_TMP_ROOT, "model.joblib")
+
+    def setUp(self):
+        os.makedirs(TestLocalStorageManager.TEST_TMP_ROOT, exist_ok=True)
+        with open(TestLocalStorageManager.MODEL_FILE, "w") as file:
+            file.write("TESTING FILE")
+
+    def tearDown(self):
+        shutil.rmtree(TestLocalStorageManager.TEST_TMP_ROOT, ignore_errors=True)
+
+    def test_upload_download_delete(self):
+        storage_manager = LocalStorageManager(mock.MagicMock(), storage_dir=TestLocalStorageManager.STORAGE_DIR)
+
+        self.assertTrue(storage_manager.upload_file(TestLocalStorageManager.MODEL_FILE, "model__a__v1.joblib"))
+        success, _ = storage_manager.download_file("model__a__v1.joblib", download_path=TestLocalStorageManager.DOWNLOAD_DIR)
+        self.assertTrue(success)
+        with open(os.path.join(TestLocalStorageManager.DOWNLOAD_DIR, "model__a__v1.joblib")) as file:
+            self.assertEqual(file.read(), "TESTING FILE")
+
+        self.assertTrue(storage_manager.delete_file("model__a__v1.joblib"))
+        self.assertFalse(storage_manager.delete_file("model__a__v1.joblib"))
+        success, _ = storage_manager.download_file("model__a__v1.joblib", download_path=TestLocalStorageManager.DOWNLOAD_DIR)
+        self.assertFalse(success)
+        with self.assertRaises(FileNotFoundError):
+            storage_manager.upload_file(os.path.join(TestLocalStorageManager.TEST_TMP_ROOT, "missing.joblib"), "missing.joblib")
+
+    def test_registry_with_local_storage(self):
+        logger = mock.MagicMock()
+        storage_manager = LocalStorageManager(logger, storage_dir=TestLocalStorageManager.STORAGE_DIR)
+        registry = ModelRegistry(os.path.join(TestLocalStorageManager.TEST_TMP_ROOT, "registry.db"), logger, storage_manager=storage_manager)
+        registry.create_tables()
+
+        inserted, _ = registry.insert_model(
+            name="model",
+            version="v1",
+            file_path=TestLocalStorageManager.MODEL_FILE,
+            description="Test model.",
+            framework="scikit-learn",
+            framework_version="1.5.1",
+            training_data="Test data.",
+            hyperparameters="{}",
+            evaluation_metrics="{}",
+            model_author="Tester",
+            status="under review",
+            features="[]",
+            labels=["test"],
+        )
+        model, _ = registry.fetch_model("model", "v1", download=True, download_path=TestLocalStorageManager.DOWNLOAD_DIR)
+
+        self.assertTrue(inserted)
+        self.assertEqual(model["labels"], ["test"])
+        self.assertTrue(os.path.exists(os.path.join(TestLocalStorageManager.DOWNLOAD_DIR, "model__model__v1.joblib")))
+
+
+if __name__ == "__main__":
+    unittest.main()
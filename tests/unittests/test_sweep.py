@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import shutil
+import unittest
+from typing import Final
+from unittest import mock
+
+import joblib
+import numpy as np
+import yaml
+from parameterized import parameterized
+
+from app.trainer.normal_equation import NormalEquationStatistics
+from app.trainer.sweep import expand_search_space
+from app.trainer.sweep import SweepRunner
+from app.trainer.trainer import Trainer
+from tests.unittests.test_normal_equation import unpickle_without_trainer
+
+
+class TestSweep(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_sweep"
+    MODEL_SAVE_PATH: Final = os.path.join(TEST_TMP_ROOT, "saved_models")
+    TRAIN_CONFIG: Final = {
+        "meta_data": {"name": "XGBOOST Regression Model", "version": "v.0.0.1", "training_data": "Customer purchase data."},
+        "train_config": {
+            "dataset": {
+                "raw_dataset_csv": "data/customer_purchases.csv",
+                "numerical_columns": ["age", "annual_income", "purchase_amount"],
+                "categorical_columns": ["gender"],
+                "save_datasets_as_csv": False,
+                "cache_dir": os.path.join(TEST_TMP_ROOT, "cache"),
+            },
+            "train": {
+                "features": ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"],
+                "prediction_target": "next_month_purchase_amount",
+                "saved_model_path": "sweep_model.joblib",
+                "hyperparameters": {"objective": "reg:squarederror", "n_estimators": 10},
+            },
+            "sweep": {"strategy": "grid", "workers": 2, "threads_per_fit": 1, "register_top_n": 2, "search_space": {"max_depth": [2, 3, 4]}},
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+            "model_trainer__eval__": "XGBoostRegressionTrainer",
+        },
+    }
+
+    def tearDown(self):
+        shutil.rmtree(TestSweep.TEST_TMP_ROOT, ignore_errors=True)
+
+    def test_grid_expands_every_combination_over_base_hyperparameters(self):
+        sweep_config = {"strategy": "grid", "search_space": {"max_depth": [3, 6], "learning_rate": [0.1, 0.2, 0.3]}}
+
+        trials = expand_search_space(sweep_config, base_hyperparameters={"max_depth": 1, "n_estimators": 100})
+
+        self.assertEqual(len(trials), 6)
+        self.assertEqual(
+            {(trial["max_depth"], trial["learning_rate"]) for trial in trials}, {(3, 0.1), (3, 0.2), (3, 0.3), (6, 0.1), (6, 0.2), (6, 0.3)}
+        )
+        self.assertTrue(all(trial["n_estimators"] == 100 for trial in trials))
+
+    def test_random_search_is_seeded_and_within_bounds(self):
+        sweep_config = {
+            "strategy": "random",
+            "n_trials": 50,
+            "seed": 7,
+            "search_space": {
+                "max_depth": [3, 6],
+                "learning_rate": {"distribution": "loguniform", "low": 0.01, "high": 0.3},
+                "n_estimators": {"distribution": "randint", "low": 50, "high": 60},
+                "subsample": {"distribution": "uniform", "low": 0.5, "high": 1.0},
+            },
+        }
+
+        trials = expand_search_space(sweep_config)
+
+        self.assertEqual(trials, expand_search_space(sweep_config))
+        self.assertEqual(len(trials), 50)
+        for trial in trials:
+            self.assertIn(trial["max_depth"], [3, 6])
+            self.assertTrue(0.01 <= trial["learning_rate"] <= 0.3)
+            self.assertTrue(50 <= trial["n_estimators"] <= 60)
+            self.assertTrue(0.5 <= trial["subsample"] <= 1.0)
+
+    @parameterized.expand(
+        [
+            ("distribution_in_grid", {"strategy": "grid", "search_space": {"learning_rate": {"distribution": "uniform", "low": 0, "high": 1}}}),
+            ("unknown_distribution", {"strategy": "random", "search_space": {"learning_rate": {"distribution": "normal", "low": 0, "high": 1}}}),
+            ("unknown_strategy", {"strategy": "bayes", "search_space": {"max_depth": [3]}}),
+        ]
+    )
+    def test_invalid_search_space(self, _, sweep_config):
+        with self.assertRaises(ValueError):
+            expand_search_space(sweep_config)
+
+    @parameterized.expand([("R2", 0, True), ("MAE", 0, False), ("Thresholded R2 (±100)", 100, True), ("Thresholded MSE (±100)", 100, False)])
+    def test_rank_order_follows_the_metric(self, rank_by, deflection, descending):
+        train_config = copy.deepcopy(TestSweep.TRAIN_CONFIG)
+        train_config["train_config"]["sweep"]["rank_by"] = rank_by
+        train_config["train_config"]["train"]["deflection"] = deflection
+
+        with mock.patch.object(Trainer, "__init__", return_value=None), mock.patch.object(Trainer, "experiment_name", "sweep", create=True):
+            runner = SweepRunner(train_config=train_config, logger=mock.MagicMock())
+
+        self.assertIs(runner.rank_descending, descending)
+
+    @parameterized.expand(
+        [("unknown_metric", "RMSE", 0), ("thresholded_without_deflection", "Thresholded R2 (±100)", 0), ("substring", "R2 score", 0)]
+    )
+    def test_unknown_rank_by_is_rejected(self, _, rank_by, deflection):
+        train_config = copy.deepcopy(TestSweep.TRAIN_CONFIG)
+        train_config["train_config"]["sweep"]["rank_by"] = rank_by
+        train_config["train_config"]["train"]["deflection"] = deflection
+
+        with self.assertRaises(ValueError):
+            SweepRunner(train_config=train_config, logger=mock.MagicMock())
+
+    @parameterized.expand(
+        [
+            ("warm_start", {"name": "XGBOOST Regression Model", "version": "v.0.0.0"}),
+            ("cross_validation", {"folds": 2}),
+            ("external_memory", {"batch_rows": 1_000}),
+        ]
+    )
+    def test_unsupported_train_options_are_rejected_before_any_work(self, option, value):
+        train_config = copy.deepcopy(TestSweep.TRAIN_CONFIG)
+        train_config["train_config"]["train"][option] = value
+
+        with mock.patch.object(Trainer, "__init__", return_value=None) as trainer_init, self.assertRaisesRegex(ValueError, option):
+            SweepRunner(train_config=train_config, logger=mock.MagicMock())
+        trainer_init.assert_not_called()
+
+    def test_sweep_ranks_trials_and_registers_the_best(self):
+        logger = mock.MagicMock()
+        with mock.patch.object(Trainer, "MODEL_SAVE_PATH", TestSweep.MODEL_SAVE_PATH), mock.patch.object(
+            Trainer, "check_registry_status", return_value=-1
+        ):
+            runner = SweepRunner(train_config=copy.deepcopy(TestSweep.TRAIN_CONFIG), logger=logger)
+            leaderboard = runner.run()
+
+        self.assertEqual(leaderboard["rank"].to_list(), [1, 2, 3])
+        self.assertEqual(sorted(leaderboard["trial"].to_list()), [0, 1, 2])
+        self.assertEqual(leaderboard["MSE"].to_list(), sorted(leaderboard["MSE"].to_list()))
+        self.assertTrue(all(json.loads(hyperparameters)["n_jobs"] == 1 for hyperparameters in leaderboard["hyperparameters"]))
+
+        sweep_dir = os.path.join(TestSweep.MODEL_SAVE_PATH, runner.sweep_name)
+        self.assertEqual(os.listdir(sweep_dir), [SweepRunner.LEADERBOARD_FILE], msg="Only the leaderboard may be left in the sweep directory.")
+        for row in leaderboard.head(2).iter_rows(named=True):
+            experiment_name = f"{runner.sweep_name}_trial_{row['trial']}"
+            experiment_dir = os.path.join(TestSweep.MODEL_SAVE_PATH, experiment_name)
+            self.assertTrue(os.path.isfile(os.path.join(experiment_dir, "sweep_model.joblib")))
+            with open(os.path.join(experiment_dir, f"{experiment_name}_train_config.yml")) as config_file:
+                saved_config = yaml.safe_load(config_file)
+            self.assertEqual(saved_config["meta_data"]["version"], f"v.0.0.1-trial-{row['trial']}")
+            self.assertEqual(saved_config["train_config"]["train"]["hyperparameters"], json.loads(row["hyperparameters"]))
+            self.assertNotIn("sweep", saved_config["train_config"])
+            self.assertEqual(json.loads(saved_config["meta_data"]["lineage"])["rows"], len(runner.trainer.train_index))
+        self.assertFalse(os.path.exists(os.path.join(TestSweep.MODEL_SAVE_PATH, f"{runner.sweep_name}_trial_{leaderboard['trial'][2]}")))
+
+    def test_linear_regression_winners_keep_the_statistics_of_the_training_split(self):
+        train_config = copy.deepcopy(TestSweep.TRAIN_CONFIG)
+        train_config["train_config"]["model_trainer__eval__"] = "LinearRegressionTrainer"
+        train_config["train_config"]["train"]["hyperparameters"] = {}
+        train_config["train_config"]["sweep"].update(register_top_n=1, search_space={"fit_intercept": [True, False]})
+        with mock.patch.object(Trainer, "MODEL_SAVE_PATH", TestSweep.MODEL_SAVE_PATH), mock.patch.object(
+            Trainer, "check_registry_status", return_value=-1
+        ):
+            runner = SweepRunner(train_config=train_config, logger=mock.MagicMock())
+            leaderboard = runner.run()
+
+        experiment_dir = os.path.join(TestSweep.MODEL_SAVE_PATH, f"{runner.sweep_name}_trial_{leaderboard['trial'][0]}")
+        model = joblib.load(os.path.join(experiment_dir, "sweep_model.joblib"))
+        lineage = json.loads(runner.trainer.registry_meta_data["lineage"])
+        self.assertEqual(model.sufficient_statistics_["rows"], len(runner.trainer.train_index))
+        self.assertEqual(lineage["rows"], model.sufficient_statistics_["rows"])
+        expected = NormalEquationStatistics.from_dict(model.sufficient_statistics_).to_linear_regression(
+            json.loads(leaderboard["hyperparameters"][0])
+        )
+        np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-6)
+        loaded = unpickle_without_trainer(os.path.join(experiment_dir, "sweep_model.joblib"))
+        self.assertEqual(loaded.returncode, 0, msg=loaded.stderr)
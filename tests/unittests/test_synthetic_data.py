@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from datetime import timezone
+from typing import Final
+
+import polars as pl
+from parameterized import parameterized
+from polars.testing import assert_frame_equal
+
+from app.datasets.dataset_io import parse_datetime_columns
+from app.datasets.dataset_io import read_dataset
+from app.datasets.synthetic_data import generate_chunk
+from app.datasets.synthetic_data import generate_purchases
+from app.datasets.synthetic_data import write_purchases
+from app.trainer.dataset_processor import DatasetProcessor
+
+
+class TestSyntheticData(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_synthetic_data"
+    RAW_DATASET_CSV: Final = "data/customer_purchases.csv"
+    ROWS: Final = 25_000
+    CHUNK_ROWS: Final = 10_000
+
+    def tearDown(self):
+        shutil.rmtree(TestSyntheticData.TEST_TMP_ROOT, ignore_errors=True)
+
+    def test_chunks_are_deterministic_and_independent(self):
+        purchases = generate_purchases(TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, seed=1)
+
+        assert_frame_equal(purchases, generate_purchases(TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, seed=1))
+        assert_frame_equal(
+            purchases.slice(2 * TestSyntheticData.CHUNK_ROWS),
+            generate_chunk(2, TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, seed=1),
+        )
+        self.assertFalse(purchases.equals(generate_purchases(TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, seed=2)))
+        with self.assertRaises(ValueError):
+            generate_chunk(3, TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS)
+
+    def test_purchases_look_like_the_raw_dataset(self):
+        purchases = generate_purchases(TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, null_fraction=0.01, outlier_fraction=0.01)
+        raw_columns = pl.read_csv(TestSyntheticData.RAW_DATASET_CSV, n_rows=1).columns
+
+        self.assertEqual(purchases.columns, raw_columns)
+        self.assertEqual(purchases.height, TestSyntheticData.ROWS)
+        self.assertAlmostEqual(purchases.height / purchases["customer_id"].n_unique(), 5, delta=0.2)
+        self.assertEqual(purchases["next_month_purchase_amount"].null_count(), TestSyntheticData.ROWS)
+        for column in ["age", "gender", "annual_income"]:
+            self.assertGreater(purchases[column].null_count(), 0, column)
+
+        # Customers keep their gender and income, and their age apart from the outliers.
+        attributes = purchases.filter(pl.col("age") > 0).group_by("customer_id").agg(pl.col("age", "gender", "annual_income").drop_nulls().n_unique())
+        self.assertEqual(attributes.select(pl.max_horizontal(pl.exclude("customer_id")).max()).item(), 1)
+        self.assertGreater(purchases.filter(pl.col("age") == 0).height, 0)
+        self.assertGreater(purchases["annual_income"].max(), 500_000)
+
+        dates = purchases["purchase_date"]
+        self.assertGreaterEqual(dates.min(), datetime(2023, 5, 24, tzinfo=timezone.utc))
+        self.assertLess(dates.max(), datetime(2024, 5, 23, tzinfo=timezone.utc))
+        self.assertGreater(dates.dt.month().n_unique(), 11)
+
+    @parameterized.expand([("csv",), ("parquet",), ("arrow",)])
+    def test_written_file_matches_the_generated_purchases(self, extension):
+        path = os.path.join(TestSyntheticData.TEST_TMP_ROOT, f"purchases.{extension}")
+
+        write_purchases(path, TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, workers=2, seed=3)
+
+        written = parse_datetime_columns(read_dataset(path)).with_columns(pl.col("next_month_purchase_amount").cast(pl.Float64))
+        assert_frame_equal(written, generate_purchases(TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, seed=3))
+        self.assertEqual(os.listdir(TestSyntheticData.TEST_TMP_ROOT), [f"purchases.{extension}"])
+
+    def test_synthetic_csv_is_processed(self):
+        path = os.path.join(TestSyntheticData.TEST_TMP_ROOT, "purchases.csv")
+        write_purchases(path, TestSyntheticData.ROWS, chunk_rows=TestSyntheticData.CHUNK_ROWS, workers=1)
+        with open(path) as csv_file, open(TestSyntheticData.RAW_DATASET_CSV) as raw_file:
+            self.assertEqual(csv_file.readline(), raw_file.readline())
+            self.assertRegex(csv_file.readline(), r",\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\+03:00,$")
+
+        train, test = DatasetProcessor(csv_path=path).process_dataset(save=False)
+
+        self.assertGreater(len(train), len(test))
+        self.assertGreater(len(test), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import unittest
+
+from monitoring.metrics import ENGINE_STAGE_LATENCY
+from parameterized import parameterized
+
+from app.monitoring.tracing import NULL_SPAN
+from app.monitoring.tracing import Tracer
+
+
+class TestTracing(unittest.TestCase):
+    STAGES = ["validation", "history_lookup", "predict"]
+
+    def test_sampled_trace_records_every_stage(self):
+        trace = Tracer(sample_rate=1.0).start_trace()
+        for stage in TestTracing.STAGES:
+            with trace.span(stage):
+                pass
+
+        breakdown = trace.breakdown_ms()
+        self.assertEqual(list(breakdown.keys()), TestTracing.STAGES, msg="Breakdown must keep the order stages were entered.")
+        self.assertTrue(all(duration >= 0 for duration in breakdown.values()))
+
+    def test_repeated_stage_is_accumulated(self):
+        trace = Tracer(sample_rate=1.0).start_trace()
+        with trace.span("predict"):
+            pass
+        first_duration = trace.durations["predict"]
+        with trace.span("predict"):
+            pass
+
+        self.assertEqual(len(trace.durations), 1)
+        self.assertGreaterEqual(trace.durations["predict"], first_duration)
+
+    def test_unsampled_trace_records_nothing(self):
+        trace = Tracer(sample_rate=0.0).start_trace()
+        span = trace.span("validation")
+        with span:
+            pass
+
+        self.assertIs(span, NULL_SPAN)
+        self.assertEqual(trace.breakdown_ms(), {})
+
+    def test_forced_trace_ignores_sample_rate(self):
+        trace = Tracer(sample_rate=0.0).start_trace(force=True)
+        with trace.span("validation"):
+            pass
+
+        self.assertIn("validation", trace.breakdown_ms())
+
+    def test_finish_exports_to_histogram(self):
+        tracer = Tracer(sample_rate=1.0, histogram=ENGINE_STAGE_LATENCY)
+        count_before = self.__sample_count("rfm")
+        trace = tracer.start_trace()
+        with trace.span("rfm"):
+            pass
+        tracer.finish(trace)
+
+        self.assertEqual(self.__sample_count("rfm"), count_before + 1)
+
+    @parameterized.expand([("negative", -0.1), ("above_one", 1.5)])
+    def test_invalid_sample_rate(self, _, sample_rate):
+        with self.assertRaises(ValueError):
+            Tracer(sample_rate=sample_rate)
+
+    @staticmethod
+    def __sample_count(stage: str) -> float:
+        for metric in ENGINE_STAGE_LATENCY.collect():
+            for sample in metric.samples:
+                if sample.name.endswith("_count") and sample.labels.get("stage") == stage:
+                    return sample.value
+        return 0.0
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import copy
+import shutil
+import unittest
+from typing import Final
+from unittest import mock
+
+import numpy as np
+from parameterized import parameterized
+from sklearn.model_selection import train_test_split
+
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import XGBoostRegressionTrainer
+
+
+class TestTrainer(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_trainer"
+    TRAIN_CONFIG: Final = {
+        "meta_data": {"name": "Regression Model", "version": "v.0.0.1", "training_data": "Customer purchase data."},
+        "train_config": {
+            "dataset": {
+                "raw_dataset_csv": "data/customer_purchases.csv",
+                "numerical_columns": ["age", "annual_income", "purchase_amount"],
+                "categorical_columns": ["gender"],
+                "save_datasets_as_csv": False,
+                "cache_dir": TEST_TMP_ROOT,
+            },
+            "train": {
+                "features": ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"],
+                "prediction_target": "next_month_purchase_amount",
+                "hyperparameters": {},
+            },
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+        },
+    }
+
+    def tearDown(self):
+        shutil.rmtree(TestTrainer.TEST_TMP_ROOT, ignore_errors=True)
+
+    @parameterized.expand([("linear_regression", LinearRegressionTrainer, np.float64), ("xgboost", XGBoostRegressionTrainer, np.float32)])
+    def test_prepare_data_hands_contiguous_arrays_of_the_same_split(self, _, trainer_class, expected_dtype):
+        trainer = trainer_class(train_config=copy.deepcopy(TestTrainer.TRAIN_CONFIG), logger=mock.MagicMock())
+        pandas_dataframe = trainer.train_dataframe.to_pandas()
+
+        X_train, X_val, y_train, y_val = trainer.prepare_data()
+
+        expected = train_test_split(pandas_dataframe[trainer.features], pandas_dataframe[trainer.target], test_size=0.2, random_state=42)
+        for actual, expected_split in zip([X_train, X_val, y_train, y_val], expected):
+            self.assertEqual(actual.dtype, expected_dtype)
+            self.assertTrue(actual.flags["C_CONTIGUOUS"])
+            np.testing.assert_array_equal(actual, expected_split.to_numpy().astype(expected_dtype))
+        self.assertIs(X_train.base, X_val.base, msg="Both splits must be views of one array.")
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import shutil
+import unittest
+from datetime import datetime
+from datetime import timezone
+from typing import Final
+from unittest import mock
+
+import joblib
+import numpy as np
+import polars as pl
+from parameterized import parameterized
+from sklearn.linear_model import LinearRegression
+
+from app.trainer.trainer import LinearRegressionTrainer
+from app.trainer.trainer import XGBoostRegressionTrainer
+from tests.unittests.test_normal_equation import unpickle_without_trainer
+
+
+class TestWarmStart(unittest.TestCase):
+    TEST_TMP_ROOT: Final = "tmp_warm_start"
+    DOWNLOAD_PATH: Final = os.path.join(TEST_TMP_ROOT, "parent_models")
+    PARENT: Final = {"name": "Regression Model", "version": "v.0.0.1"}
+    # The parent is trained on the purchases up to the cutoff, the child on the ones after it.
+    CUTOFF: Final = datetime(2024, 1, 31, tzinfo=timezone.utc)
+    TRAIN_CONFIG: Final = {
+        "meta_data": {"name": "Regression Model", "version": "v.0.0.2", "training_data": "Customer purchase data."},
+        "train_config": {
+            "dataset": {
+                "raw_dataset_csv": "data/customer_purchases.csv",
+                "numerical_columns": ["age", "annual_income", "purchase_amount"],
+                "categorical_columns": ["gender"],
+                "save_datasets_as_csv": False,
+                "cache_dir": os.path.join(TEST_TMP_ROOT, "cache"),
+            },
+            "train": {
+                "features": ["age", "gender_Female", "Recency", "Frequency", "Monetary", "annual_income", "purchase_amount"],
+                "prediction_target": "next_month_purchase_amount",
+                "hyperparameters": {},
+            },
+            "registry": {"name": "ado-flow", "url": "http://127.0.0.1:5000"},
+        },
+    }
+
+    def tearDown(self):
+        shutil.rmtree(TestWarmStart.TEST_TMP_ROOT, ignore_errors=True)
+
+    def train_parent(self, trainer_class, hyperparameters: dict):
+        """Trains the parent on the rows up to the cutoff and puts it where a download from the registry would."""
+        config = copy.deepcopy(TestWarmStart.TRAIN_CONFIG)
+        config["meta_data"]["version"] = TestWarmStart.PARENT["version"]
+        config["train_config"]["train"]["hyperparameters"] = hyperparameters
+        parent = trainer_class(train_config=config, logger=mock.MagicMock())
+        parent.train_dataframe = parent.train_dataframe.filter(pl.col("purchase_date") <= TestWarmStart.CUTOFF)
+        parent.run()
+
+        uploaded_file_name = f"model__{TestWarmStart.PARENT['name']}__{TestWarmStart.PARENT['version']}.joblib"
+        os.makedirs(TestWarmStart.DOWNLOAD_PATH, exist_ok=True)
+        joblib.dump(parent.model, os.path.join(TestWarmStart.DOWNLOAD_PATH, uploaded_file_name))
+        return parent, {**parent.registry_meta_data, "uploaded_file_name": uploaded_file_name}
+
+    def warm_started_child(self, trainer_class, hyperparameters: dict, parent_meta_data: dict):
+        config = copy.deepcopy(TestWarmStart.TRAIN_CONFIG)
+        config["train_config"]["train"]["hyperparameters"] = hyperparameters
+        config["train_config"]["train"]["warm_start"] = {**TestWarmStart.PARENT, "download_path": TestWarmStart.DOWNLOAD_PATH}
+        child = trainer_class(train_config=config, logger=mock.MagicMock())
+        response = mock.MagicMock()
+        response.json.return_value = {"model_metadata": parent_meta_data, "message": "found"}
+        return child, mock.patch("app.trainer.trainer.requests.get", return_value=response)
+
+    def test_linear_regression_update_equals_a_fit_on_all_training_rows(self):
+        parent, parent_meta_data = self.train_parent(LinearRegressionTrainer, {})
+        parent_X_train, _, parent_y_train, _ = parent.prepare_data()
+        child, fetch = self.warm_started_child(LinearRegressionTrainer, {}, parent_meta_data)
+
+        with fetch as get:
+            child.run()
+        X_train, _, y_train, _ = child.prepare_data()
+
+        self.assertEqual(get.call_args.kwargs["json"], {**TestWarmStart.PARENT, "download_path": TestWarmStart.DOWNLOAD_PATH})
+        self.assertTrue((child.train_dataframe["purchase_date"] > TestWarmStart.CUTOFF).all())
+        expected = LinearRegression().fit(np.concatenate([parent_X_train, X_train]), np.concatenate([parent_y_train, y_train]))
+        np.testing.assert_allclose(child.model.coef_, expected.coef_, rtol=1e-6)
+        self.assertAlmostEqual(child.model.intercept_, expected.intercept_, places=4)
+        self.assertEqual(child.model.sufficient_statistics_["rows"], len(parent_y_train) + len(y_train))
+        loaded = unpickle_without_trainer(os.path.join(TestWarmStart.DOWNLOAD_PATH, parent_meta_data["uploaded_file_name"]))
+        self.assertEqual(loaded.returncode, 0, msg=loaded.stderr)
+
+    def test_xgboost_continues_boosting_the_parent(self):
+        _, parent_meta_data = self.train_parent(XGBoostRegressionTrainer, {"n_estimators": 8, "max_depth": 3})
+        child, fetch = self.warm_started_child(XGBoostRegressionTrainer, {"n_estimators": 5, "max_depth": 3}, parent_meta_data)
+
+        with fetch:
+            child.run()
+
+        self.assertEqual(child.model.get_booster().num_boosted_rounds(), 13)
+
+    def test_lineage_chains_parent_and_watermark(self):
+        parent, parent_meta_data = self.train_parent(LinearRegressionTrainer, {})
+        child, fetch = self.warm_started_child(LinearRegressionTrainer, {}, parent_meta_data)
+
+        with fetch:
+            child.run()
+
+        parent_lineage, lineage = json.loads(parent_meta_data["lineage"]), json.loads(child.registry_meta_data["lineage"])
+        fitted_rows = child.train_dataframe[child.train_index]
+        self.assertIsNone(parent_lineage["parent"])
+        self.assertEqual(parent_lineage["rows"], len(parent.train_index))
+        self.assertLess(parent_lineage["rows"], parent.train_dataframe.height, msg="Validation rows are not fitted rows.")
+        self.assertEqual(lineage["parent"], TestWarmStart.PARENT)
+        self.assertEqual(lineage["ancestors"], [TestWarmStart.PARENT])
+        self.assertEqual(lineage["rows"], fitted_rows.height)
+        self.assertEqual(lineage["total_rows"], child.model.sufficient_statistics_["rows"])
+        self.assertGreater(lineage["watermark"], parent_lineage["watermark"])
+        self.assertEqual(lineage["trained_until"], str(fitted_rows["purchase_date"].max()))
+
+    @parameterized.expand(
+        [
+            ("no_watermark", {"lineage": "No lineage specified."}),
+            ("other_features", {"features": json.dumps(["age"])}),
+            ("file_not_shared_with_the_registry", {"uploaded_file_name": "missing.joblib"}),
+            ("no_new_rows", {"lineage": json.dumps({"watermark_column": "purchase_date", "watermark": 2**62, "trained_until": "the future"})}),
+        ]
+    )
+    def test_invalid_parent(self, _, meta_data_changes):
+        _, parent_meta_data = self.train_parent(LinearRegressionTrainer, {})
+        child, fetch = self.warm_started_child(LinearRegressionTrainer, {}, {**parent_meta_data, **meta_data_changes})
+
+        with fetch, self.assertRaises(ValueError):
+            child.run()
+
+    def test_warm_start_can_not_be_combined_with_cross_validation(self):
+        config = copy.deepcopy(TestWarmStart.TRAIN_CONFIG)
+        config["train_config"]["train"].update({"warm_start": TestWarmStart.PARENT, "cross_validation": {"folds": 2}})
+
+        with self.assertRaises(ValueError):
+            LinearRegressionTrainer(train_config=config, logger=mock.MagicMock())